@@ -4,7 +4,7 @@ from config.config import Config
 app = Flask(__name__)
 
 # Import routes
-from routes.chatbot_routes import chatbot_bp
+from routes.chatbot_routes import chatbot_bp, http_client
 
 # Register blueprints
 app.register_blueprint(chatbot_bp, url_prefix="/api/chatbot")
@@ -15,6 +15,12 @@ def health_check():
     return jsonify({"status": "healthy", "service": "api-gateway"})
 
 
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Get latency and error metrics of the calls to each service"""
+    return jsonify({"upstreams": http_client.metrics()})
+
+
 if __name__ == "__main__":
     app.run(host=Config.HOST, port=Config.PORT, debug=Config.DEBUG)
 
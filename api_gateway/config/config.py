@@ -18,6 +18,14 @@ class Config:
     )
     # PDF_SERVICE_URL = os.getenv("PDF_SERVICE_URL", "http://pdf-service:5005")
 
+    # Appels HTTP vers les services (utils/http_client.py) : échéance d'un appel et de
+    # la connexion (secondes), nouvelles tentatives des appels idempotents, connexions
+    # gardées ouvertes par service
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 60))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 2))
+    HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", 2))
+    HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 20))
+
     # Security
     SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "your-jwt-secret-key-here")
@@ -1,35 +1,106 @@
-﻿from flask import Blueprint, request, jsonify
-import requests
+﻿import os
+from urllib.parse import quote
+
+from flask import Blueprint, request, jsonify
 from config.config import Config
+from utils.http_client import HTTPClient, StreamBody
 
 chatbot_bp = Blueprint("chatbot", __name__)
 
+# Connexions gardées ouvertes vers les services, avec échéance sur chaque appel
+http_client = HTTPClient(
+    timeout=Config.HTTP_TIMEOUT,
+    connect_timeout=Config.HTTP_CONNECT_TIMEOUT,
+    retries=Config.HTTP_RETRIES,
+    pool_size=Config.HTTP_POOL_SIZE,
+)
+
 
 @chatbot_bp.route("/start", methods=["POST"])
 def start_conversation():
     """Start a new chatbot conversation"""
     try:
         # Forward request to chatbot service
-        response = requests.post(
-            f"{Config.CHATBOT_SERVICE_URL}/conversation", json=request.json
+        response = http_client.post(
+            f"{Config.CHATBOT_SERVICE_URL}/conversation",
+            json=request.json,
+            upstream="chatbot",
         )
         return jsonify(response.json()), response.status_code
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+def _audio_upload():
+    """Conversation ID and STT request arguments of a raw or multipart audio body.
+
+    Raw audio (audio/*, application/octet-stream, ?conversation_id=) and multipart
+    audio (file field "audio") are streamed to the STT service chunk by chunk.
+
+    Returns (conversation_id, keyword arguments of http_client.post, or None if no audio).
+    """
+    if request.mimetype == "multipart/form-data":
+        conversation_id = request.form.get("conversation_id") or request.args.get(
+            "conversation_id"
+        )
+        upload = request.files.get("audio")
+        if upload is None:
+            return conversation_id, None
+        stream = upload.stream
+        stream.seek(0, os.SEEK_END)
+        length = stream.tell()
+        stream.seek(0)
+        content_type = upload.mimetype
+    else:
+        conversation_id = request.args.get("conversation_id")
+        stream = request.stream
+        length = request.content_length
+        content_type = request.mimetype
+
+    if not length:
+        return conversation_id, None
+    return conversation_id, {
+        "data": StreamBody((stream, length)),
+        "headers": {"Content-Type": content_type or "application/octet-stream"},
+        "params": {"language": "fr"},
+    }
+
+
 @chatbot_bp.route("/process", methods=["POST"])
 def process_input():
-    """Process user input (text or audio)"""
+    """Process user input (text, base64 JSON audio, raw or multipart audio)"""
     try:
-        data = request.json
-        conversation_id = data.get("conversation_id")
+        if request.is_json:
+            data = request.json
+            conversation_id = data.get("conversation_id")
+            stt_request = {"json": {"audio": data["audio"]}} if "audio" in data else None
+        else:
+            conversation_id, stt_request = _audio_upload()
+            if stt_request is None:
+                return jsonify({"error": "No audio data provided"}), 400
+
+        idempotency_key = request.headers.get("Idempotency-Key")
+        if stt_request is not None and idempotency_key:
+            # Retry of an audio turn already processed: replayed without a new transcription
+            replayed = http_client.get(
+                f"{Config.CHATBOT_SERVICE_URL}/conversation/{conversation_id}"
+                f"/replies/{quote(idempotency_key, safe='')}",
+                upstream="chatbot",
+            )
+            if replayed.status_code != 404:
+                headers = {}
+                if "Idempotent-Replayed" in replayed.headers:
+                    headers["Idempotent-Replayed"] = replayed.headers["Idempotent-Replayed"]
+                return jsonify(replayed.json()), replayed.status_code, headers
 
         # Handle audio input
-        if "audio" in data:
+        if stt_request is not None:
             # Forward to STT service
-            stt_response = requests.post(
-                f"{Config.STT_SERVICE_URL}/transcribe", json={"audio": data["audio"]}
+            stt_response = http_client.post(
+                f"{Config.STT_SERVICE_URL}/transcribe",
+                idempotent=True,
+                upstream="stt",
+                **stt_request,
             )
 
             if stt_response.status_code != 200:
@@ -39,13 +110,20 @@ def process_input():
         else:
             text_input = data.get("text", "")
 
-        # Forward to chatbot service for processing
-        response = requests.post(
+        # Forward to chatbot service for processing. With the client's Idempotency-Key
+        # the chatbot replays the stored response of a retried turn.
+        response = http_client.post(
             f"{Config.CHATBOT_SERVICE_URL}/process",
             json={"conversation_id": conversation_id, "text": text_input},
+            headers={"Idempotency-Key": idempotency_key} if idempotency_key else None,
+            idempotent=bool(idempotency_key),
+            upstream="chatbot",
         )
 
-        return jsonify(response.json()), response.status_code
+        headers = {}
+        if "Idempotent-Replayed" in response.headers:
+            headers["Idempotent-Replayed"] = response.headers["Idempotent-Replayed"]
+        return jsonify(response.json()), response.status_code, headers
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -58,16 +136,20 @@ def generate_pdf():
         conversation_id = data.get("conversation_id")
 
         # Get conversation data and eligibility result
-        conversation_response = requests.get(
-            f"{Config.CHATBOT_SERVICE_URL}/conversation/{conversation_id}"
+        conversation_response = http_client.get(
+            f"{Config.CHATBOT_SERVICE_URL}/conversation/{conversation_id}",
+            upstream="chatbot",
         )
 
         if conversation_response.status_code != 200:
             return jsonify({"error": "Failed to retrieve conversation data"}), 400
 
-        # Forward to PDF service
-        pdf_response = requests.post(
-            f"{Config.PDF_SERVICE_URL}/generate", json=conversation_response.json()
+        # Forward to PDF service (body passed through as received)
+        pdf_response = http_client.post(
+            f"{Config.PDF_SERVICE_URL}/generate",
+            data=conversation_response.content,
+            headers={"Content-Type": "application/json"},
+            upstream="pdf",
         )
 
         return jsonify(pdf_response.json()), pdf_response.status_code
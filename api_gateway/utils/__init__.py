@@ -0,0 +1 @@
+# Utilitaires du service api_gateway
@@ -0,0 +1,338 @@
+"""
+Client HTTP partagé pour les appels entre services (et vers les API externes).
+
+- Une session requests par client : connexions gardées ouvertes (keep-alive) et
+  réutilisées, pool de pool_size connexions par hôte.
+- Chaque appel a une échéance (timeout, en secondes) qui couvre la connexion, la
+  réponse et les nouvelles tentatives : un service bloqué n'immobilise plus un worker.
+  Le corps de la réponse est lu par blocs de BODY_CHUNK_SIZE octets ; l'échéance est
+  vérifiée entre deux blocs et borne l'attente du bloc suivant, si bien qu'un service
+  qui envoie sa réponse au compte-gouttes est abandonné à l'échéance.
+- Les appels idempotents (GET, ou idempotent=True) sont retentés au plus retries fois
+  après une erreur de connexion, un dépassement de délai ou une réponse 502/503/504,
+  avec une attente aléatoire croissante (backoff exponentiel avec jitter).
+- Latences et erreurs sont comptées par service appelé (voir metrics()).
+- Un corps StreamBody (upload reçu, fichier sur disque, formulaire multipart) est
+  envoyé par blocs avec son Content-Length, sans être chargé en mémoire ; il est
+  rembobiné avant une nouvelle tentative, ou l'appel n'est pas retenté si le flux ne
+  peut pas être relu.
+
+Ce fichier est la version de référence, copiée dans les autres services par
+update_http_client.sh : le modifier ici puis relancer le script.
+
+Exemple:
+    client = HTTPClient(timeout=10, retries=2)
+    response = client.post(f"{url}/evaluate", json=payload, timeout=5, idempotent=True)
+"""
+
+import io
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS", "PUT", "DELETE"))
+RETRY_STATUSES = frozenset((502, 503, 504))
+BODY_CHUNK_SIZE = 16 * 1024
+
+
+class DeadlineExceeded(requests.Timeout):
+    """L'échéance de l'appel est dépassée (nouvelles tentatives comprises)."""
+
+
+def _seekable(fileobj):
+    try:
+        return fileobj.seekable()
+    except AttributeError:
+        return hasattr(fileobj, "seek") and hasattr(fileobj, "tell")
+    except (OSError, ValueError):
+        return False
+
+
+class StreamBody:
+    """
+    Corps de requête lu par blocs : suite de morceaux, bytes ou (objet fichier, longueur).
+
+    requests l'envoie avec un Content-Length, bloc par bloc : ni le corps entier ni
+    une copie en base64 ne sont gardés en mémoire.
+
+    Exemple:
+        body = StreamBody((request.stream, request.content_length))
+        client.post(url, data=body, headers={"Content-Type": "audio/wav"})
+    """
+
+    def __init__(self, *parts):
+        self._parts = []
+        for part in parts:
+            if isinstance(part, bytes):
+                part = (io.BytesIO(part), len(part))
+            fileobj, length = part
+            start = fileobj.tell() if _seekable(fileobj) else None
+            self._parts.append((fileobj, length, start))
+        self._length = sum(length for _, length, _ in self._parts)
+        self._rewind()
+
+    @classmethod
+    def multipart(cls, fields, name, filename, fileobj, length, content_type="application/octet-stream"):
+        """
+        Formulaire multipart/form-data : champs texte puis un fichier lu par blocs.
+
+        Returns:
+            tuple: (StreamBody, valeur de l'en-tête Content-Type)
+        """
+        boundary = uuid.uuid4().hex
+        head = "".join(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{key}"\r\n\r\n{value}\r\n'
+            for key, value in fields.items()
+        )
+        head += (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; '
+            f'filename="{filename}"\r\nContent-Type: {content_type}\r\n\r\n'
+        )
+        tail = f"\r\n--{boundary}--\r\n"
+        body = cls(head.encode("utf-8"), (fileobj, length), tail.encode("utf-8"))
+        return body, f"multipart/form-data; boundary={boundary}"
+
+    def __len__(self):
+        return self._length
+
+    def seekable(self):
+        """Le corps peut être renvoyé : tous ses morceaux peuvent être relus"""
+        return all(start is not None for _, _, start in self._parts)
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        """Seul le retour au début est possible (nouvelle tentative)"""
+        if offset != 0 or whence != io.SEEK_SET or not self.seekable():
+            raise io.UnsupportedOperation("StreamBody ne peut être que rembobiné")
+        for fileobj, _, start in self._parts:
+            fileobj.seek(start)
+        self._rewind()
+        return 0
+
+    def _rewind(self):
+        self._index = 0
+        self._left = self._parts[0][1] if self._parts else 0
+        self._position = 0
+
+    def read(self, size=-1):
+        chunks = []
+        while self._index < len(self._parts) and size != 0:
+            wanted = self._left if size < 0 else min(size, self._left)
+            chunk = self._parts[self._index][0].read(wanted) if wanted else b""
+            if not chunk:
+                # Morceau terminé : passer au suivant
+                self._index += 1
+                if self._index < len(self._parts):
+                    self._left = self._parts[self._index][1]
+                continue
+            chunks.append(chunk)
+            self._left -= len(chunk)
+            self._position += len(chunk)
+            if size > 0:
+                size -= len(chunk)
+        return b"".join(chunks)
+
+
+class _UpstreamStats:
+    __slots__ = ("calls", "errors", "retries", "latencies")
+
+    def __init__(self, window):
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.latencies = deque(maxlen=window)
+
+    def to_dict(self):
+        latencies = sorted(self.latencies)
+        data = {"calls": self.calls, "errors": self.errors, "retries": self.retries}
+        if latencies:
+            data["latency_ms"] = {
+                "mean": round(sum(latencies) / len(latencies) * 1000, 2),
+                "p50": round(latencies[len(latencies) // 2] * 1000, 2),
+                "p95": round(latencies[int(len(latencies) * 0.95)] * 1000, 2),
+                "max": round(latencies[-1] * 1000, 2),
+            }
+        return data
+
+
+class HTTPClient:
+    """Session HTTP avec pool de connexions, échéances, nouvelles tentatives et métriques."""
+
+    def __init__(
+        self,
+        timeout=10.0,
+        connect_timeout=2.0,
+        retries=2,
+        backoff=0.1,
+        max_backoff=2.0,
+        pool_size=20,
+        window=1000,
+    ):
+        """
+        Args:
+            timeout (float, optional): Échéance par défaut d'un appel, en secondes.
+            connect_timeout (float, optional): Délai maximum d'établissement d'une connexion.
+            retries (int, optional): Nouvelles tentatives au plus pour un appel idempotent.
+            backoff (float, optional): Attente de base avant la première nouvelle tentative.
+            max_backoff (float, optional): Attente maximum entre deux tentatives.
+            pool_size (int, optional): Connexions gardées ouvertes par hôte.
+            window (int, optional): Nombre de latences gardées par service pour les centiles.
+        """
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.window = window
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def request(
+        self, method, url, timeout=None, idempotent=None, retries=None, upstream=None, **kwargs
+    ):
+        """
+        Envoie une requête et renvoie la réponse (quel que soit son code HTTP).
+
+        Args:
+            method (str): Méthode HTTP.
+            url (str): URL complète.
+            timeout (float, optional): Échéance de l'appel, en secondes (défaut: self.timeout).
+            idempotent (bool, optional): Autoriser les nouvelles tentatives.
+                Par défaut: vrai pour GET, HEAD, OPTIONS, PUT et DELETE.
+            retries (int, optional): Nombre maximum de nouvelles tentatives.
+            upstream (str, optional): Nom du service dans les métriques (défaut: hôte:port).
+            **kwargs: Arguments de requests (json, data, files, headers...).
+                Les fichiers doivent être en mémoire (bytes) pour pouvoir être renvoyés ;
+                un data=StreamBody est rembobiné, ou n'est pas renvoyé s'il ne peut
+                pas être relu.
+
+        Raises:
+            DeadlineExceeded: Si l'échéance est dépassée.
+            requests.RequestException: Si la dernière tentative échoue.
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        if retries is None:
+            retries = self.retries if idempotent else 0
+        upstream = upstream or urlsplit(url).netloc
+        body = kwargs.get("data")
+        if isinstance(body, StreamBody) and not body.seekable():
+            # Flux déjà consommé par le premier envoi
+            retries = 0
+        budget = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + budget
+        expired = f"{method} {url}: échéance de {budget}s dépassée"
+
+        attempt = 0
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise DeadlineExceeded(expired)
+                if attempt and isinstance(body, StreamBody):
+                    body.seek(0)
+                try:
+                    response = self.session.request(
+                        method,
+                        url,
+                        timeout=(min(self.connect_timeout, remaining), remaining),
+                        stream=True,
+                        **kwargs,
+                    )
+                    self._read_body(response, deadline, expired)
+                except DeadlineExceeded:
+                    raise
+                except (requests.ConnectionError, requests.Timeout) as error:
+                    if attempt >= retries:
+                        if isinstance(error, requests.Timeout):
+                            raise DeadlineExceeded(f"{method} {url}: {error}") from error
+                        raise
+                else:
+                    if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                        self._record(upstream, start, attempt, response.status_code >= 500)
+                        return response
+                    response.close()
+
+                # Attente aléatoire (full jitter) sans dépasser l'échéance
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+                if time.monotonic() + delay >= deadline:
+                    raise DeadlineExceeded(expired)
+                time.sleep(delay)
+                attempt += 1
+        except requests.RequestException:
+            self._record(upstream, start, attempt, True)
+            raise
+
+    @staticmethod
+    def _read_body(response, deadline, message):
+        """
+        Lit le corps de la réponse par blocs : avant chaque bloc, l'échéance est vérifiée
+        et le délai de lecture de la socket ramené au temps restant.
+
+        Raises:
+            DeadlineExceeded: Si l'échéance est atteinte avant la fin du corps.
+        """
+        connection = getattr(response.raw, "connection", None)
+        sock = getattr(connection, "sock", None)
+        chunks = []
+        try:
+            for chunk in response.iter_content(BODY_CHUNK_SIZE):
+                chunks.append(chunk)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise DeadlineExceeded(message)
+                if sock is not None:
+                    sock.settimeout(remaining)
+        except requests.RequestException as error:
+            # Corps incomplet : la connexion n'est pas rendue au pool
+            response.close()
+            if time.monotonic() >= deadline and not isinstance(error, DeadlineExceeded):
+                raise DeadlineExceeded(message) from error
+            raise
+        # Comme requests pour un appel sans stream : le corps est gardé dans la réponse
+        response._content = b"".join(chunks)
+
+    def _record(self, upstream, start, retries, error):
+        latency = time.monotonic() - start
+        with self._lock:
+            stats = self._stats.get(upstream)
+            if stats is None:
+                stats = self._stats[upstream] = _UpstreamStats(self.window)
+            stats.calls += 1
+            stats.retries += retries
+            stats.errors += error
+            stats.latencies.append(latency)
+
+    def metrics(self):
+        """
+        Returns:
+            dict: Par service appelé : appels, erreurs (exceptions et réponses 5xx),
+            nouvelles tentatives et latences (moyenne, p50, p95, max en ms).
+        """
+        with self._lock:
+            return {upstream: stats.to_dict() for upstream, stats in self._stats.items()}
+
+    def close(self):
+        self.session.close()
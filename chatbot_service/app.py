@@ -1,13 +1,15 @@
-﻿from flask import Flask, request, jsonify
+﻿from flask import Flask, request, jsonify, Response, redirect
 from flask_cors import CORS
 import os
-from datetime import datetime  # Ajoutez cette ligne
+import json
 from core.conversation_manager import ConversationManager
+from core.idempotency import MAX_KEY_LENGTH
+from core.pdf_jobs import PDFQueueFullError
 from config.config import Config
+from utils.http_client import StreamBody
 
 print(f"Config has STT_SERVICE_URL: {'STT_SERVICE_URL' in dir(Config)}")
 print(f"Available Config attributes: {dir(Config)}")
-import requests
 
 app = Flask(__name__)
 CORS(
@@ -22,6 +24,71 @@ CORS(
 )  # Activer CORS pour toutes les routes
 
 conversation_manager = ConversationManager()
+http_client = conversation_manager.http_client
+
+
+def _idempotency_check(conversation_id):
+    """Optional Idempotency-Key header sent by clients that retry a turn.
+
+    Returns (key, response): response is the stored reply of a retried turn, or a 400
+    for an invalid key, and is None when the turn must be processed.
+    """
+    key = request.headers.get("Idempotency-Key")
+    if key is None:
+        return None, None
+    if not 0 < len(key) <= MAX_KEY_LENGTH:
+        error = f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"
+        return key, (jsonify({"error": error}), 400)
+    replayed = conversation_manager.get_idempotent_response(conversation_id, key)
+    if replayed is not None:
+        return key, (jsonify(replayed), 200, {"Idempotent-Replayed": "true"})
+    return key, None
+
+
+def _audio_upload():
+    """Conversation ID and STT request arguments for the audio of /process-audio.
+
+    The audio comes as the historic JSON {"conversation_id", "audio": base64}, as a raw
+    body (audio/*, application/octet-stream, ?conversation_id=) or as multipart/form-data
+    (file field "audio", conversation_id field or query parameter). Raw and multipart
+    audio is forwarded to the STT service chunk by chunk, never decoded or held whole.
+
+    Returns (conversation_id, keyword arguments of http_client.post, or None if no audio).
+    """
+    if request.is_json:
+        data = request.get_json(silent=True) or {}
+        audio_data = data.get("audio")
+        print(f"Audio data length: {len(audio_data) if audio_data else 'None'}")
+        stt_request = {"json": {"audio": audio_data, "language": "fr"}}
+        return data.get("conversation_id"), stt_request if audio_data else None
+
+    if request.mimetype == "multipart/form-data":
+        conversation_id = request.form.get("conversation_id") or request.args.get(
+            "conversation_id"
+        )
+        upload = request.files.get("audio")
+        if upload is None:
+            return conversation_id, None
+        # Fichier reçu gardé par Werkzeug (sur disque au-delà de 500 Ko) : il peut être relu
+        stream = upload.stream
+        stream.seek(0, os.SEEK_END)
+        length = stream.tell()
+        stream.seek(0)
+        content_type = upload.mimetype
+    else:
+        conversation_id = request.args.get("conversation_id")
+        stream = request.stream
+        length = request.content_length
+        content_type = request.mimetype
+
+    print(f"Audio bytes length: {length}")
+    if not length:
+        return conversation_id, None
+    return conversation_id, {
+        "data": StreamBody((stream, length)),
+        "headers": {"Content-Type": content_type or "application/octet-stream"},
+        "params": {"language": "fr"},
+    }
 
 
 @app.route("/conversation", methods=["POST"])
@@ -38,7 +105,10 @@ def start_conversation():
         initial_message = conversation_manager.get_welcome_message()
 
         # Assurez-vous que l'état est bien "initial" et non déjà en transition
-        conversation_manager.conversations[conversation_id]["current_state"] = "initial"
+        with conversation_manager.conversation_lock(conversation_id):
+            conversation = conversation_manager.get_conversation(conversation_id)
+            conversation["current_state"] = "initial"
+            conversation_manager.save_conversation(conversation_id, conversation)
 
         return (
             jsonify({"conversation_id": conversation_id, "message": initial_message}),
@@ -59,8 +129,13 @@ def process_message():
         if not conversation_id or not text:
             return jsonify({"error": "Missing conversation_id or text"}), 400
 
+        # Retry of a turn already processed: same response, nothing is run again
+        idempotency_key, early_response = _idempotency_check(conversation_id)
+        if early_response is not None:
+            return early_response
+
         # Process the message through conversation manager
-        response = conversation_manager.process_message(conversation_id, text)
+        response = conversation_manager.process_message(conversation_id, text, idempotency_key)
 
         return jsonify(response), 200
     except Exception as e:
@@ -69,33 +144,68 @@ def process_message():
 
 @app.route("/conversation/<conversation_id>", methods=["GET"])
 def get_conversation(conversation_id):
-    """Get conversation data"""
+    """Get conversation data (or only the messages from ?since=<message index>)
+
+    The body is encoded once per conversation state; a client sending back its ETag
+    in If-None-Match gets 304 while nothing has changed.
+    """
     try:
+        since = request.args.get("since")
+        if since is not None:
+            if not since.isdigit():
+                return jsonify({"error": "since must be a message index"}), 400
+            since = int(since)
+
         conversation = conversation_manager.get_conversation(conversation_id)
 
         if not conversation:
             return jsonify({"error": "Conversation not found"}), 404
 
-        return jsonify(conversation), 200
+        etag, body = conversation_manager.serializer.render(conversation, since)
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype="application/json")
+        response.set_etag(etag)
+        # Toujours revalider : la conversation change à chaque tour
+        response.headers["Cache-Control"] = "no-cache"
+        return response
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/conversation/<conversation_id>/replies/<path:key>", methods=["GET"])
+def get_reply(conversation_id, key):
+    """Stored response of the turn sent with this Idempotency-Key (404 if none)
+
+    Lets the API gateway replay a retried audio turn without transcribing it again.
+    """
+    if not 0 < len(key) <= MAX_KEY_LENGTH:
+        error = f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"
+        return jsonify({"error": error}), 400
+    replayed = conversation_manager.get_idempotent_response(conversation_id, key)
+    if replayed is None:
+        return jsonify({"error": "No reply for this key"}), 404
+    return jsonify(replayed), 200, {"Idempotent-Replayed": "true"}
+
+
 @app.route("/process-audio", methods=["POST"])
 def process_audio():
     """Process audio input"""
     try:
-        print("Received audio processing request")
-        data = request.json
-        conversation_id = data.get("conversation_id")
-        audio_data = data.get("audio")
+        print(f"Received audio processing request ({request.mimetype})")
+        conversation_id, stt_request = _audio_upload()
 
         print(f"Conversation ID: {conversation_id}")
-        print(f"Audio data length: {len(audio_data) if audio_data else 'None'}")
 
-        if not conversation_id or not audio_data:
+        if not conversation_id or not stt_request:
             return jsonify({"error": "Missing conversation_id or audio data"}), 400
 
+        # Retry of a message already transcribed and processed: no new transcription
+        idempotency_key, early_response = _idempotency_check(conversation_id)
+        if early_response is not None:
+            return early_response
+
         # Vérifier d'abord l'état de la conversation
         conversation = conversation_manager.get_conversation(conversation_id)
         if not conversation:
@@ -107,9 +217,12 @@ def process_audio():
 
         try:
             # Transcribe audio using STT service
-            stt_response = requests.post(
+            stt_response = http_client.post(
                 f"{stt_service_url}/transcribe",
-                json={"audio": audio_data, "language": "fr"},
+                timeout=Config.STT_TIMEOUT,
+                idempotent=True,
+                upstream="stt",
+                **stt_request,
             )
 
             if stt_response.status_code != 200:
@@ -124,79 +237,11 @@ def process_audio():
             # Utiliser un texte par défaut en cas d'erreur
             text = "Message vocal reçu mais erreur lors de la transcription."
 
-        # Si l'état est "consent" et la réponse est "non", traiter comme un refus de consentement
-        if conversation["current_state"] == "consent":
-            text_lower = text.lower()
-            if (
-                "non" in text_lower
-                or "pas" in text_lower
-                or "refuse" in text_lower
-                or "n'accepte" in text_lower
-            ):
-                # Forcer le traitement du refus de consentement
-                response = {
-                    "message": "Je comprends. Sans ces informations, je ne peux pas déterminer votre éligibilité. N'hésitez pas à revenir si vous changez d'avis.",
-                    "conversation_id": conversation_id,
-                    "is_final": False,
-                    "transcription": text,
-                }
-
-                # Mettre à jour l'état de la conversation
-                conversation["current_state"] = "end"
-                conversation["messages"].append(
-                    {
-                        "role": "user",
-                        "content": text,
-                        "timestamp": datetime.now().isoformat(),
-                    }
-                )
-                conversation["messages"].append(
-                    {
-                        "role": "bot",
-                        "content": response["message"],
-                        "timestamp": datetime.now().isoformat(),
-                    }
-                )
-
-                return jsonify(response), 200
-
-        # Si nous sommes dans l'état "end" (refus précédent) et l'utilisateur change d'avis
-        elif conversation["current_state"] == "end":
-            text_lower = text.lower()
-            positive_words = ["oui", "d'accord", "accepte", "ok", "je veux bien", "yes"]
-            if any(word in text_lower for word in positive_words):
-                # Forcer le passage à l'étape de l'âge
-                age_message = "Parfait ! Pour mieux t'orienter, peux tu me communiquer ton âge ? Cela m'aidera à te fournir des informations adaptées à ton profil. 😊"
-                response = {
-                    "message": age_message,
-                    "conversation_id": conversation_id,
-                    "is_final": False,
-                    "transcription": text,
-                }
-
-                # Mettre à jour l'état de la conversation
-                conversation["current_state"] = "age_verification"
-                conversation["messages"].append(
-                    {
-                        "role": "user",
-                        "content": text,
-                        "timestamp": datetime.now().isoformat(),
-                    }
-                )
-                conversation["messages"].append(
-                    {
-                        "role": "bot",
-                        "content": age_message,
-                        "timestamp": datetime.now().isoformat(),
-                    }
-                )
-
-                return jsonify(response), 200
-
-        # Traitement normal pour les autres cas
-        # Nous n'ajoutons pas le message utilisateur ici car process_message va le faire
-        response = conversation_manager.process_message(conversation_id, text)
-        response["transcription"] = text
+        # La transcription est faite hors verrou ; l'état de la conversation est relu
+        # sous son verrou
+        response = conversation_manager.process_audio_message(
+            conversation_id, text, idempotency_key
+        )
 
         return jsonify(response), 200
     except Exception as e:
@@ -209,12 +254,68 @@ def process_audio():
 
 @app.route("/health", methods=["GET"])
 def health_check():
-    return jsonify({"service": "chatbot-service", "status": "healthy"})
+    breaker = conversation_manager.decision_tree_breaker.status()
+    return jsonify(
+        {
+            "service": "chatbot-service",
+            # Dégradé : l'arbre décisionnel est remplacé par la logique de secours
+            "status": "healthy" if breaker["state"] == "closed" else "degraded",
+            "decision_tree": dict(breaker, mode=conversation_manager.decision_tree.mode),
+        }
+    )
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Get conversation store and outbound HTTP metrics"""
+    return jsonify(
+        {
+            "conversations": conversation_manager.get_metrics(),
+            "idempotency": conversation_manager.idempotency.metrics(),
+            "rendering": conversation_manager.serializer.metrics(),
+            "pdf_jobs": conversation_manager.pdf_jobs.metrics(),
+            "upstreams": http_client.metrics(),
+        }
+    )
+
+
+@app.route("/admin/banned-words", methods=["GET"])
+def banned_words_status():
+    """Get the banned words lexicon currently in service"""
+    word_filter = conversation_manager.word_filter
+    return jsonify(
+        {
+            "version": word_filter.version,
+            "word_count": len(word_filter.banned_words),
+            "file": word_filter.banned_words_file,
+        }
+    )
+
+
+@app.route("/admin/banned-words/reload", methods=["POST"])
+def reload_banned_words():
+    """Rebuild the banned words lexicon in the background and swap it in"""
+    try:
+        data = request.get_json(silent=True) or {}
+        word_filter = conversation_manager.word_filter
+        current_version = word_filter.version
+
+        # Only the configured list, or a list of BANNED_WORDS_DIR named by the client
+        word_filter.reload(conversation_manager.banned_words_file(data.get("file")))
+
+        return (
+            jsonify({"status": "reloading", "current_version": current_version}),
+            202,
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
 
 @app.route("/generate-pdf", methods=["POST"])
 def generate_pdf():
-    """Generate PDF report for conversation"""
+    """Generate PDF report for conversation (waits for its job, see /pdf-jobs)"""
     try:
         data = request.json
         conversation_id = data.get("conversation_id")
@@ -222,45 +323,26 @@ def generate_pdf():
         if not conversation_id:
             return jsonify({"error": "Missing conversation_id"}), 400
 
-        # Get conversation data
-        conversation = conversation_manager.get_conversation(conversation_id)
+        submitted = conversation_manager.submit_pdf(conversation_id)
 
-        if not conversation:
+        if submitted is None:
             return jsonify({"error": "Conversation not found"}), 404
 
-        # Ajouter un log pour déboguer
-        print(f"Envoi de la requête au service PDF: {Config.PDF_SERVICE_URL}/generate")
-
-        # Forward to PDF service
-        pdf_response = requests.post(
-            f"{Config.PDF_SERVICE_URL}/generate", json=conversation
-        )
-
-        if pdf_response.status_code != 200:
-            print(
-                f"Erreur du service PDF: {pdf_response.status_code} - {pdf_response.text}"
-            )
-            return (
-                jsonify(
-                    {
-                        "error": f"Failed to generate PDF: {pdf_response.status_code} - {pdf_response.text}"
-                    }
-                ),
-                500,
-            )
-
-        pdf_data = pdf_response.json()
+        job, _ = submitted
+        result = job.future.result(timeout=Config.PDF_TIMEOUT)
 
         return (
             jsonify(
                 {
                     "status": "success",
-                    "file_url": pdf_data.get("file_url"),
-                    "filename": pdf_data.get("filename"),
+                    "file_url": result["file_url"],
+                    "filename": result["filename"],
                 }
             ),
             200,
         )
+    except PDFQueueFullError as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": "5"}
     except Exception as e:
         import traceback
 
@@ -269,5 +351,111 @@ def generate_pdf():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/pdf-jobs", methods=["POST"])
+def submit_pdf_job():
+    """Queue the PDF report of a conversation and return the job to poll.
+
+    Repeated requests for an unchanged conversation join the job already submitted.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        conversation_id = data.get("conversation_id")
+
+        if not conversation_id:
+            return jsonify({"error": "Missing conversation_id"}), 400
+
+        submitted = conversation_manager.submit_pdf(conversation_id)
+
+        if submitted is None:
+            return jsonify({"error": "Conversation not found"}), 404
+
+        job, joined = submitted
+        return jsonify(dict(job.to_dict(), joined=joined)), 202
+    except PDFQueueFullError as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": "5"}
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/pdf-jobs/<job_id>", methods=["GET"])
+def get_pdf_job(job_id):
+    """Get a PDF job: queued, running, done (file_url, filename) or failed (error)"""
+    job = conversation_manager.pdf_jobs.get(job_id)
+
+    if job is None:
+        return jsonify({"error": "PDF job not found"}), 404
+
+    return jsonify(job.to_dict())
+
+
+@app.route("/pdf-jobs/<job_id>/download", methods=["GET"])
+def download_pdf_job(job_id):
+    """Redirect to the report of a finished PDF job"""
+    job = conversation_manager.pdf_jobs.get(job_id)
+
+    if job is None:
+        return jsonify({"error": "PDF job not found"}), 404
+
+    if job.status != "done":
+        return jsonify(job.to_dict()), 409
+
+    return redirect(job.result["file_url"])
+
+
+def _scan_workers(data):
+    """Worker processes requested for a moderation scan, at most MODERATION_SCAN_WORKERS.
+
+    Returns (workers, error): error is set when "workers" is not an integer.
+    """
+    workers = data.get("workers", Config.MODERATION_SCAN_WORKERS)
+    if not isinstance(workers, int) or isinstance(workers, bool):
+        return None, "workers must be an integer"
+    return max(1, min(workers, Config.MODERATION_SCAN_WORKERS)), None
+
+
+@app.route("/admin/moderation/scan", methods=["POST"])
+def scan_moderation():
+    """Re-scan stored conversations (or given messages) with the current lexicon.
+
+    Read-only: violation counters and conversation states are never modified.
+    Hits are streamed as newline-delimited JSON, one line per offending message.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        word_filter = conversation_manager.word_filter
+        workers, error = _scan_workers(data)
+        if error:
+            return jsonify({"error": error}), 400
+
+        if "messages" in data:
+            messages = data["messages"]
+            hits = (
+                {
+                    "message_index": position,
+                    "content": messages[position],
+                    "banned_words_found": found,
+                }
+                for position, found in word_filter.scan_messages(
+                    messages, workers=workers
+                )
+            )
+        else:
+            conversations = conversation_manager.list_conversations(
+                data.get("conversation_ids")
+            )
+            hits = word_filter.scan_conversations(conversations, workers=workers)
+
+        lexicon_version = word_filter.version
+
+        def generate():
+            for hit in hits:
+                hit["lexicon_version"] = lexicon_version
+                yield json.dumps(hit, ensure_ascii=False) + "\n"
+
+        return Response(generate(), mimetype="application/x-ndjson")
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 if __name__ == "__main__":
     app.run(host=Config.HOST, port=Config.PORT, debug=Config.DEBUG)
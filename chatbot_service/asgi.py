@@ -0,0 +1,667 @@
+"""
+Variante asynchrone (ASGI) du service chatbot : mêmes routes et mêmes réponses JSON
+que app.py.
+
+Les appels aux autres services (STT, arbre décisionnel distant, PDF) sont attendus
+sans bloquer de worker : pendant qu'une transcription Whisper prend plusieurs
+secondes, le même processus continue de répondre aux messages texte.
+
+Un canal WebSocket (/ws) garde la connexion ouverte pour toute la conversation : le
+client y envoie ses tours (texte, audio, demande de PDF) et reçoit les étapes au fil
+de l'eau (transcription prête, réponse prête, PDF prêt), sans attendre la fin du tour
+pour afficher la transcription. Son URL (CONVERSATION_CHANNEL_URL) est annoncée dans
+la réponse de /conversation ; app.py n'en annonce pas, les clients restent sur HTTP.
+
+Lancement:
+    uvicorn asgi:app --host 0.0.0.0 --port 5001
+"""
+
+import asyncio
+import contextlib
+import json
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, RedirectResponse, Response, StreamingResponse
+from starlette.routing import Route, WebSocketRoute
+from starlette.websockets import WebSocketDisconnect
+
+from config.config import Config
+from core.async_conversation_manager import AsyncConversationManager
+from core.idempotency import MAX_KEY_LENGTH
+from core.pdf_jobs import PDFQueueFullError
+
+conversation_manager = AsyncConversationManager()
+http_client = conversation_manager.async_http_client
+
+# Blocs lus dans un fichier reçu en multipart pour l'envoyer au service STT
+AUDIO_CHUNK_SIZE = 64 * 1024
+
+# Canaux WebSocket ouverts et messages reçus, pour /metrics
+channel_metrics = {"open": 0, "opened": 0, "messages": 0}
+
+
+async def _json(request):
+    """Corps JSON de la requête ({} s'il est vide ou invalide, comme get_json(silent=True))"""
+    try:
+        return await request.json() or {}
+    except ValueError:
+        return {}
+
+
+async def _idempotency_check(request, conversation_id):
+    """(Idempotency-Key, stored reply or 400 to send now, or None), like app.py"""
+    key = request.headers.get("Idempotency-Key")
+    if key is None:
+        return None, None
+    if not 0 < len(key) <= MAX_KEY_LENGTH:
+        error = f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"
+        return key, JSONResponse({"error": error}, 400)
+    replayed = await conversation_manager.get_idempotent_response_async(conversation_id, key)
+    if replayed is not None:
+        return key, JSONResponse(replayed, headers={"Idempotent-Replayed": "true"})
+    return key, None
+
+
+class _UploadChunks:
+    """Fichier reçu en multipart, relu depuis le début à chaque envoi (nouvelle tentative comprise)"""
+
+    def __init__(self, upload):
+        self.upload = upload
+
+    async def __aiter__(self):
+        await self.upload.seek(0)
+        while True:
+            chunk = await self.upload.read(AUDIO_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+async def _audio_upload(request):
+    """(conversation_id, STT request arguments or None if no audio), like app.py
+
+    A raw body is streamed to the STT service as it arrives (it cannot be sent twice);
+    a multipart file is spooled by Starlette and can be sent again.
+    """
+    mimetype = request.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    if mimetype == "application/json":
+        data = await _json(request)
+        audio_data = data.get("audio")
+        stt_request = {"json": {"audio": audio_data, "language": "fr"}, "idempotent": True}
+        return data.get("conversation_id"), stt_request if audio_data else None
+
+    if mimetype == "multipart/form-data":
+        form = await request.form()
+        conversation_id = form.get("conversation_id") or request.query_params.get(
+            "conversation_id"
+        )
+        upload = form.get("audio")
+        if upload is None or isinstance(upload, str) or not upload.size:
+            return conversation_id, None
+        content, content_type, length = _UploadChunks(upload), upload.content_type, upload.size
+        idempotent = True
+    else:
+        conversation_id = request.query_params.get("conversation_id")
+        length = int(request.headers.get("Content-Length") or 0)
+        if not length:
+            return conversation_id, None
+        content, content_type = request.stream(), mimetype
+        idempotent = False
+
+    return conversation_id, {
+        "content": content,
+        "headers": {
+            "Content-Type": content_type or "application/octet-stream",
+            "Content-Length": str(length),
+        },
+        "params": {"language": "fr"},
+        "idempotent": idempotent,
+    }
+
+
+async def _transcribe(stt_request):
+    """Texte transcrit par le service STT (message de remplacement en cas d'échec)"""
+    try:
+        stt_response = await http_client.post(
+            f"{Config.STT_SERVICE_URL}/transcribe",
+            timeout=Config.STT_TIMEOUT,
+            upstream="stt",
+            **stt_request,
+        )
+
+        if stt_response.status_code != 200:
+            print(f"STT service error: {stt_response.text}")
+            return "Message vocal reçu mais non transcrit."
+
+        text = stt_response.json().get("text", "")
+        print(f"Transcribed text: {text}")
+        return text
+    except Exception as stt_err:
+        print(f"Error during STT request: {str(stt_err)}")
+        return "Message vocal reçu mais erreur lors de la transcription."
+
+
+async def _generate_pdf(conversation_id):
+    """(JSON payload, status code) of a PDF generation, like the /generate-pdf route
+
+    The report is rendered by the job queue shared with /pdf-jobs; only its result is
+    awaited here.
+    """
+    try:
+        submitted = await conversation_manager.submit_pdf_async(conversation_id)
+    except PDFQueueFullError as e:
+        return {"error": str(e)}, 503
+
+    if submitted is None:
+        return {"error": "Conversation not found"}, 404
+
+    job, _ = submitted
+    # shield : un délai dépassé ici n'annule pas la tâche, que d'autres attendent peut-être
+    result = await asyncio.wait_for(
+        asyncio.shield(asyncio.wrap_future(job.future)), Config.PDF_TIMEOUT
+    )
+
+    return {
+        "status": "success",
+        "file_url": result["file_url"],
+        "filename": result["filename"],
+    }, 200
+
+
+async def start_conversation(request):
+    """Start a new conversation session"""
+    try:
+        data = await request.json()
+        user_id = data.get("user_id", "anonymous")
+
+        # Create new conversation
+        conversation_id = await conversation_manager.create_conversation_async(user_id)
+
+        # Get initial message
+        initial_message = conversation_manager.get_welcome_message()
+
+        # Assurez-vous que l'état est bien "initial" et non déjà en transition
+        async with conversation_manager.conversation_lock(conversation_id):
+            conversation = await conversation_manager.get_conversation_async(conversation_id)
+            conversation["current_state"] = "initial"
+            await conversation_manager.save_conversation_async(conversation_id, conversation)
+
+        return JSONResponse(
+            {
+                "conversation_id": conversation_id,
+                "message": initial_message,
+                "channel": Config.CONVERSATION_CHANNEL_URL,
+            }
+        )
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, 500)
+
+
+async def process_message(request):
+    """Process a message in an existing conversation"""
+    try:
+        data = await request.json()
+        conversation_id = data.get("conversation_id")
+        text = data.get("text")
+
+        if not conversation_id or not text:
+            return JSONResponse({"error": "Missing conversation_id or text"}, 400)
+
+        idempotency_key, early_response = await _idempotency_check(request, conversation_id)
+        if early_response is not None:
+            return early_response
+
+        response = await conversation_manager.process_message(
+            conversation_id, text, idempotency_key
+        )
+
+        return JSONResponse(response)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, 500)
+
+
+def _etag_matches(request, etag):
+    """If-None-Match contient l'ETag (ou *)"""
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or f'"{etag}"' in tags
+
+
+async def get_conversation(request):
+    """Get conversation data (or only the messages from ?since=<message index>), with ETag"""
+    try:
+        since = request.query_params.get("since")
+        if since is not None:
+            if not since.isdigit():
+                return JSONResponse({"error": "since must be a message index"}, 400)
+            since = int(since)
+
+        conversation = await conversation_manager.get_conversation_async(
+            request.path_params["conversation_id"]
+        )
+
+        if not conversation:
+            return JSONResponse({"error": "Conversation not found"}, 404)
+
+        etag, body = conversation_manager.serializer.render(conversation, since)
+        headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, 500)
+
+
+async def get_reply(request):
+    """Stored response of the turn sent with this Idempotency-Key (404 if none), like app.py"""
+    conversation_id = request.path_params["conversation_id"]
+    key = request.path_params["key"]
+    if not 0 < len(key) <= MAX_KEY_LENGTH:
+        error = f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"
+        return JSONResponse({"error": error}, status_code=400)
+    replayed = await conversation_manager.get_idempotent_response_async(conversation_id, key)
+    if replayed is None:
+        return JSONResponse({"error": "No reply for this key"}, status_code=404)
+    return JSONResponse(replayed, headers={"Idempotent-Replayed": "true"})
+
+
+async def process_audio(request):
+    """Process audio input (base64 JSON, raw or multipart body)"""
+    try:
+        conversation_id, stt_request = await _audio_upload(request)
+
+        if not conversation_id or not stt_request:
+            return JSONResponse({"error": "Missing conversation_id or audio data"}, 400)
+
+        idempotency_key, early_response = await _idempotency_check(request, conversation_id)
+        if early_response is not None:
+            return early_response
+
+        if not await conversation_manager.get_conversation_async(conversation_id):
+            return JSONResponse({"error": "Conversation not found"}, 404)
+
+        # La transcription est attendue sans verrou : les autres tours continuent
+        text = await _transcribe(stt_request)
+
+        response = await conversation_manager.process_audio_message(
+            conversation_id, text, idempotency_key
+        )
+
+        return JSONResponse(response)
+    except Exception as e:
+        print(f"Error in process_audio: {str(e)}")
+        return JSONResponse({"error": str(e)}, 500)
+    finally:
+        # Fichiers multipart gardés par Starlette
+        await request.close()
+
+
+async def health_check(request):
+    breaker = conversation_manager.decision_tree_breaker.status()
+    return JSONResponse(
+        {
+            "service": "chatbot-service",
+            "status": "healthy" if breaker["state"] == "closed" else "degraded",
+            "decision_tree": dict(breaker, mode=conversation_manager.decision_tree.mode),
+        }
+    )
+
+
+async def metrics(request):
+    """Get conversation store and outbound HTTP metrics"""
+    return JSONResponse(
+        {
+            "conversations": await conversation_manager.get_metrics_async(),
+            "idempotency": conversation_manager.idempotency.metrics(),
+            "rendering": conversation_manager.serializer.metrics(),
+            "pdf_jobs": conversation_manager.pdf_jobs.metrics(),
+            "channels": dict(channel_metrics),
+            "upstreams": http_client.metrics(),
+        }
+    )
+
+
+async def banned_words_status(request):
+    """Get the banned words lexicon currently in service"""
+    word_filter = conversation_manager.word_filter
+    return JSONResponse(
+        {
+            "version": word_filter.version,
+            "word_count": len(word_filter.banned_words),
+            "file": word_filter.banned_words_file,
+        }
+    )
+
+
+async def reload_banned_words(request):
+    """Rebuild the banned words lexicon in the background and swap it in"""
+    try:
+        data = await _json(request)
+        word_filter = conversation_manager.word_filter
+        current_version = word_filter.version
+
+        # Only the configured list, or a list of BANNED_WORDS_DIR named by the client
+        word_filter.reload(conversation_manager.banned_words_file(data.get("file")))
+
+        return JSONResponse({"status": "reloading", "current_version": current_version}, 202)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, 400)
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, 500)
+
+
+async def generate_pdf(request):
+    """Generate PDF report for conversation"""
+    try:
+        data = await request.json()
+        conversation_id = data.get("conversation_id")
+
+        if not conversation_id:
+            return JSONResponse({"error": "Missing conversation_id"}, 400)
+
+        payload, status = await _generate_pdf(conversation_id)
+        headers = {"Retry-After": "5"} if status == 503 else None
+        return JSONResponse(payload, status, headers=headers)
+    except Exception as e:
+        print(f"Exception dans generate_pdf: {str(e)}")
+        return JSONResponse({"error": str(e)}, 500)
+
+
+async def submit_pdf_job(request):
+    """Queue the PDF report of a conversation and return the job to poll.
+
+    Repeated requests for an unchanged conversation join the job already submitted.
+    """
+    try:
+        data = await _json(request)
+        conversation_id = data.get("conversation_id")
+
+        if not conversation_id:
+            return JSONResponse({"error": "Missing conversation_id"}, 400)
+
+        submitted = await conversation_manager.submit_pdf_async(conversation_id)
+
+        if submitted is None:
+            return JSONResponse({"error": "Conversation not found"}, 404)
+
+        job, joined = submitted
+        return JSONResponse(dict(job.to_dict(), joined=joined), 202)
+    except PDFQueueFullError as e:
+        return JSONResponse({"error": str(e)}, 503, headers={"Retry-After": "5"})
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, 500)
+
+
+async def get_pdf_job(request):
+    """Get a PDF job: queued, running, done (file_url, filename) or failed (error)"""
+    job = conversation_manager.pdf_jobs.get(request.path_params["job_id"])
+
+    if job is None:
+        return JSONResponse({"error": "PDF job not found"}, 404)
+
+    return JSONResponse(job.to_dict())
+
+
+async def download_pdf_job(request):
+    """Redirect to the report of a finished PDF job"""
+    job = conversation_manager.pdf_jobs.get(request.path_params["job_id"])
+
+    if job is None:
+        return JSONResponse({"error": "PDF job not found"}, 404)
+
+    if job.status != "done":
+        return JSONResponse(job.to_dict(), 409)
+
+    return RedirectResponse(job.result["file_url"], 302)
+
+
+def _scan_workers(data):
+    """(worker processes of a moderation scan, error), like app.py"""
+    workers = data.get("workers", Config.MODERATION_SCAN_WORKERS)
+    if not isinstance(workers, int) or isinstance(workers, bool):
+        return None, "workers must be an integer"
+    return max(1, min(workers, Config.MODERATION_SCAN_WORKERS)), None
+
+
+async def scan_moderation(request):
+    """Re-scan stored conversations (or given messages) with the current lexicon.
+
+    Read-only, streamed as newline-delimited JSON like app.py. The scan is CPU-bound and
+    reads the store: Starlette iterates the generator in its thread pool.
+    """
+    try:
+        data = await _json(request)
+        word_filter = conversation_manager.word_filter
+        workers, error = _scan_workers(data)
+        if error:
+            return JSONResponse({"error": error}, 400)
+
+        if "messages" in data:
+            messages = data["messages"]
+            hits = (
+                {
+                    "message_index": position,
+                    "content": messages[position],
+                    "banned_words_found": found,
+                }
+                for position, found in word_filter.scan_messages(messages, workers=workers)
+            )
+        else:
+            conversations = conversation_manager.list_conversations(
+                data.get("conversation_ids")
+            )
+            hits = word_filter.scan_conversations(conversations, workers=workers)
+
+        lexicon_version = word_filter.version
+
+        def generate():
+            for hit in hits:
+                hit["lexicon_version"] = lexicon_version
+                yield json.dumps(hit, ensure_ascii=False) + "\n"
+
+        return StreamingResponse(generate(), media_type="application/x-ndjson")
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, 500)
+
+
+class _Channel:
+    """Persistent conversation channel: one WebSocket for every turn of a conversation.
+
+    Client frames:
+        {"type": "text", "text": "...", "id": "..."}   a text turn
+        {"type": "audio", "id": "..."}                  optional, names the next binary frame
+        <binary frame>                                  a voice turn (raw audio)
+        {"type": "pdf", "id": "..."}                    generate the PDF report
+
+    Server events, in order, each echoing the "id" of the frame it answers:
+        {"event": "conversation", "conversation_id": ..., "message": ...}  once, on connect
+        {"event": "transcription", "text": ...}   as soon as the STT service answers
+        {"event": "reply", ...}                   the /process or /process-audio response
+        {"event": "pdf", "file_url": ..., "filename": ...}
+        {"event": "error", "error": ...}
+
+    "id" doubles as the Idempotency-Key of the turn: a client that resends a turn after
+    a reconnection gets the stored reply. Frames are handled one at a time, in order.
+    """
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.conversation_id = None
+        self.audio_id = None
+
+    async def open(self):
+        """Accept the socket and bind it to ?conversation_id= (or a new conversation)"""
+        await self.websocket.accept()
+        conversation_id = self.websocket.query_params.get("conversation_id")
+        if conversation_id:
+            if not await conversation_manager.get_conversation_async(conversation_id):
+                await self.send("error", None, error="Conversation not found")
+                await self.websocket.close(code=4404)
+                return False
+            await self.send("conversation", None, conversation_id=conversation_id)
+        else:
+            conversation_id = await conversation_manager.create_conversation_async(
+                self.websocket.query_params.get("user_id", "anonymous")
+            )
+            await self.send(
+                "conversation",
+                None,
+                conversation_id=conversation_id,
+                message=conversation_manager.get_welcome_message(),
+            )
+        self.conversation_id = conversation_id
+        return True
+
+    async def send(self, event, message_id, **payload):
+        await self.websocket.send_json(dict(payload, event=event, id=message_id))
+
+    async def serve(self):
+        while True:
+            message = await self.websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            channel_metrics["messages"] += 1
+
+            if message.get("bytes") is not None:
+                message_id, self.audio_id = self.audio_id, None
+                await self.audio_turn(message_id, message["bytes"])
+                continue
+
+            try:
+                data = json.loads(message.get("text") or "")
+            except ValueError:
+                data = None
+            if not isinstance(data, dict):
+                await self.send("error", None, error="Frames must be JSON objects or audio")
+                continue
+
+            message_id = data.get("id")
+            if message_id is not None and not 0 < len(str(message_id)) <= MAX_KEY_LENGTH:
+                error = f"id must be 1 to {MAX_KEY_LENGTH} characters"
+                await self.send("error", message_id, error=error)
+                continue
+
+            message_type = data.get("type")
+            if message_type == "text":
+                await self.text_turn(message_id, data.get("text"))
+            elif message_type == "audio":
+                self.audio_id = message_id
+            elif message_type == "pdf":
+                await self.pdf(message_id)
+            else:
+                await self.send("error", message_id, error=f"Unknown type: {message_type}")
+
+    async def text_turn(self, message_id, text):
+        if not text:
+            await self.send("error", message_id, error="Missing text")
+            return
+        try:
+            response = await conversation_manager.process_message(
+                self.conversation_id, text, _key(message_id)
+            )
+        except Exception as e:
+            await self.send("error", message_id, error=str(e))
+            return
+        await self.send("reply", message_id, **response)
+
+    async def audio_turn(self, message_id, audio):
+        if not audio:
+            await self.send("error", message_id, error="Missing audio data")
+            return
+        try:
+            key = _key(message_id)
+            replayed = await conversation_manager.get_idempotent_response_async(
+                self.conversation_id, key
+            )
+            if replayed is None:
+                text = await _transcribe(
+                    {
+                        "content": audio,
+                        "headers": {"Content-Type": "application/octet-stream"},
+                        "params": {"language": "fr"},
+                        "idempotent": True,
+                    }
+                )
+                # Affichable avant la fin du tour (modération, arbre décisionnel)
+                await self.send("transcription", message_id, text=text)
+                replayed = await conversation_manager.process_audio_message(
+                    self.conversation_id, text, key
+                )
+        except WebSocketDisconnect:
+            raise
+        except Exception as e:
+            await self.send("error", message_id, error=str(e))
+            return
+        await self.send("reply", message_id, **replayed)
+
+    async def pdf(self, message_id):
+        try:
+            payload, status = await _generate_pdf(self.conversation_id)
+        except Exception as e:
+            print(f"Exception dans generate_pdf: {str(e)}")
+            payload, status = {"error": str(e)}, 500
+        if status != 200:
+            await self.send("error", message_id, **payload)
+        else:
+            await self.send("pdf", message_id, **payload)
+
+
+def _key(message_id):
+    return None if message_id is None else str(message_id)
+
+
+async def conversation_channel(websocket):
+    """Persistent channel for the turns of one conversation (see _Channel)"""
+    channel = _Channel(websocket)
+    channel_metrics["open"] += 1
+    channel_metrics["opened"] += 1
+    try:
+        if await channel.open():
+            await channel.serve()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        channel_metrics["open"] -= 1
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    yield
+    await conversation_manager.close()
+
+
+app = Starlette(
+    routes=[
+        Route("/conversation", start_conversation, methods=["POST"]),
+        Route("/process", process_message, methods=["POST"]),
+        Route("/conversation/{conversation_id}", get_conversation, methods=["GET"]),
+        Route(
+            "/conversation/{conversation_id}/replies/{key:path}", get_reply, methods=["GET"]
+        ),
+        Route("/process-audio", process_audio, methods=["POST"]),
+        Route("/health", health_check, methods=["GET"]),
+        Route("/metrics", metrics, methods=["GET"]),
+        Route("/admin/banned-words", banned_words_status, methods=["GET"]),
+        Route("/admin/banned-words/reload", reload_banned_words, methods=["POST"]),
+        Route("/generate-pdf", generate_pdf, methods=["POST"]),
+        Route("/pdf-jobs", submit_pdf_job, methods=["POST"]),
+        Route("/pdf-jobs/{job_id}", get_pdf_job, methods=["GET"]),
+        Route("/pdf-jobs/{job_id}/download", download_pdf_job, methods=["GET"]),
+        Route("/admin/moderation/scan", scan_moderation, methods=["POST"]),
+        WebSocketRoute("/ws", conversation_channel),
+    ],
+    middleware=[
+        # Activer CORS pour toutes les routes
+        Middleware(
+            CORSMiddleware,
+            allow_origins=["*"],
+            allow_headers=["*"],
+            allow_methods=["GET", "POST", "OPTIONS"],
+        )
+    ],
+    lifespan=lifespan,
+)
@@ -15,5 +15,104 @@ class Config:
     PDF_SERVICE_URL = os.getenv("PDF_SERVICE_URL", "http://pdf-service:5005")
     STT_SERVICE_URL = os.getenv("STT_SERVICE_URL", "http://stt-service:5002")
 
-    # Database configuration (for future use)
+    # Appels HTTP sortants (utils/http_client.py) : échéance par défaut d'un appel et de
+    # la connexion (secondes), nouvelles tentatives des appels idempotents, connexions
+    # gardées ouvertes par service, puis échéances propres à chaque service appelé
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 10))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 2))
+    HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", 2))
+    HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 20))
+    # Variante ASGI (asgi.py) : connexions ouvertes au plus vers les autres services
+    ASYNC_HTTP_POOL_SIZE = int(os.getenv("ASYNC_HTTP_POOL_SIZE", 100))
+    # Canal WebSocket de la variante ASGI, annoncé aux clients par /conversation :
+    # chemin ajouté à l'URL de l'API vue par le navigateur, ou URL complète (wss://...)
+    # si le canal est exposé ailleurs
+    CONVERSATION_CHANNEL_URL = os.getenv("CONVERSATION_CHANNEL_URL", "/ws")
+    DECISION_TREE_TIMEOUT = float(os.getenv("DECISION_TREE_TIMEOUT", 5))
+    STT_TIMEOUT = float(os.getenv("STT_TIMEOUT", 30))
+    PDF_TIMEOUT = float(os.getenv("PDF_TIMEOUT", 30))
+
+    # Arbre décisionnel : "remote" (appel HTTP à DECISION_TREE_SERVICE_URL) ou "local"
+    # (EligibilityEvaluator importé depuis DECISION_TREE_SERVICE_PATH et exécuté dans le
+    # processus, sans aller-retour réseau). DECISION_TREE_RULES_FILE remplace les règles du service
+    DECISION_TREE_MODE = os.getenv("DECISION_TREE_MODE", "remote")
+    DECISION_TREE_SERVICE_PATH = os.getenv(
+        "DECISION_TREE_SERVICE_PATH",
+        os.path.join(
+            os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+            "decision_tree_service",
+        ),
+    )
+    DECISION_TREE_RULES_FILE = os.getenv("DECISION_TREE_RULES_FILE")
+    # Règles compilées pour la logique de secours (par défaut: celles de l'arbre décisionnel)
+    FALLBACK_RULES_FILE = os.getenv(
+        "FALLBACK_RULES_FILE",
+        DECISION_TREE_RULES_FILE
+        or os.path.join(DECISION_TREE_SERVICE_PATH, "rules", "eligibility_rules.json"),
+    )
+    # Disjoncteur : ouverture après N échecs consécutifs (ou réponses plus lentes que
+    # DECISION_TREE_BREAKER_LATENCY secondes, 0 = ignoré), logique de secours immédiate
+    # tant qu'il est ouvert, vérification du service toutes les DECISION_TREE_BREAKER_RESET s
+    DECISION_TREE_BREAKER_FAILURES = int(os.getenv("DECISION_TREE_BREAKER_FAILURES", 3))
+    DECISION_TREE_BREAKER_LATENCY = float(os.getenv("DECISION_TREE_BREAKER_LATENCY", 2))
+    DECISION_TREE_BREAKER_RESET = float(os.getenv("DECISION_TREE_BREAKER_RESET", 10))
+    # Questions déjà répondues dans un message précédent ("j'ai 23 ans, pas au RSA,
+    # j'habite Stains") passées en un seul appel à l'arbre décisionnel. Désactivé par
+    # défaut tant que l'extraction des entités n'est pas validée sur de vrais messages
+    SLOT_PREFILL = os.getenv("SLOT_PREFILL", "False") == "True"
+
+    # Mots interdits : fichier optionnel (.txt ou .json) remplaçant la liste intégrée,
+    # et intervalle de surveillance en secondes pour le rechargement à chaud (0 = désactivé)
+    BANNED_WORDS_FILE = os.getenv("BANNED_WORDS_FILE")
+    BANNED_WORDS_RELOAD_INTERVAL = float(os.getenv("BANNED_WORDS_RELOAD_INTERVAL", 0))
+    # Dossier optionnel des autres listes que POST /admin/banned-words/reload peut charger,
+    # désignées par leur seul nom de fichier (aucun autre chemin n'est accepté)
+    BANNED_WORDS_DIR = os.getenv("BANNED_WORDS_DIR")
+    # Recherche approximative des fautes de frappe (distance d'édition, 0 = désactivée)
+    # et longueur minimale des mots concernés ; voir tests/bench_fuzzy_matching.py
+    BANNED_WORDS_FUZZY_DISTANCE = int(os.getenv("BANNED_WORDS_FUZZY_DISTANCE", 0))
+    BANNED_WORDS_FUZZY_MIN_LENGTH = int(os.getenv("BANNED_WORDS_FUZZY_MIN_LENGTH", 5))
+    # Nombre de processus pour la vérification en masse de l'historique
+    MODERATION_SCAN_WORKERS = int(os.getenv("MODERATION_SCAN_WORKERS", 2))
+
+    # Conversations en mémoire : expiration après inactivité (secondes, 0 = jamais),
+    # nombre maximum (0 = illimité, éviction LRU au-delà) et intervalle du nettoyage
+    CONVERSATION_TTL = float(os.getenv("CONVERSATION_TTL", 3600))
+    CONVERSATION_MAX_ENTRIES = int(os.getenv("CONVERSATION_MAX_ENTRIES", 10000))
+    CONVERSATION_SWEEP_INTERVAL = float(os.getenv("CONVERSATION_SWEEP_INTERVAL", 60))
+
+    # Stockage des conversations : "memory" (perdu au redémarrage), "sqlite" (DATABASE_URI)
+    # ou "redis" (REDIS_URL, partagé entre workers et nœuds).
+    # En SQLite, les tours sont écrits par lots toutes les CONVERSATION_FLUSH_INTERVAL secondes
+    # ou dès que CONVERSATION_FLUSH_BATCH_SIZE messages sont en attente
+    CONVERSATION_BACKEND = os.getenv("CONVERSATION_BACKEND", "memory")
+    CONVERSATION_FLUSH_INTERVAL = float(os.getenv("CONVERSATION_FLUSH_INTERVAL", 1.0))
+    CONVERSATION_FLUSH_BATCH_SIZE = int(os.getenv("CONVERSATION_FLUSH_BATCH_SIZE", 200))
+    REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    # Verrous des conversations : les tours d'une même conversation sont traités l'un
+    # après l'autre, ceux de conversations différentes en parallèle
+    CONVERSATION_LOCK_STRIPES = int(os.getenv("CONVERSATION_LOCK_STRIPES", 256))
+    # Nombre de fois où un tour est rejoué si un autre worker a modifié la conversation
+    CONVERSATION_CONFLICT_RETRIES = int(os.getenv("CONVERSATION_CONFLICT_RETRIES", 3))
+    # En-tête Idempotency-Key de /process et /process-audio : durée (secondes) pendant
+    # laquelle la réponse d'un tour est rejouée, et nombre de réponses gardées en mémoire
+    IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", 300))
+    IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", 10000))
+    # En Redis, durée (secondes) pendant laquelle un worker attend la réponse d'un tour
+    # de même clé exécuté par un autre worker avant de répondre 409
+    IDEMPOTENCY_PENDING_TTL = float(os.getenv("IDEMPOTENCY_PENDING_TTL", 30))
+    # GET /conversation/<id> : nombre de conversations dont le JSON encodé est gardé
+    CONVERSATION_RENDER_CACHE_SIZE = int(os.getenv("CONVERSATION_RENDER_CACHE_SIZE", 1000))
+    # Rapports PDF (POST /pdf-jobs, /generate-pdf) : rendus simultanés, tâches en
+    # attente au-delà desquelles la demande est refusée (503), et durée (secondes)
+    # pendant laquelle une tâche terminée reste consultable
+    PDF_JOB_WORKERS = int(os.getenv("PDF_JOB_WORKERS", 2))
+    PDF_JOB_QUEUE_SIZE = int(os.getenv("PDF_JOB_QUEUE_SIZE", 50))
+    PDF_JOB_TTL = float(os.getenv("PDF_JOB_TTL", 900))
+    # Rapport rendu par avance quand une conversation se termine avec un résultat
+    # d'éligibilité, sauf si PDF_PRERENDER_MAX_QUEUED tâches attendent déjà
+    PDF_PRERENDER = os.getenv("PDF_PRERENDER", "True") == "True"
+    PDF_PRERENDER_MAX_QUEUED = int(os.getenv("PDF_PRERENDER_MAX_QUEUED", 5))
+
+    # Database configuration
     DATABASE_URI = os.getenv("DATABASE_URI", "sqlite:///chatbot.db")
@@ -0,0 +1,191 @@
+"""
+Gestionnaire de conversations de la variante ASGI du service (asgi.py).
+
+Les tours sont ceux de ConversationManager (modération, NLP, arbre décisionnel, plan
+de secours) ; l'appel à l'arbre décisionnel distant est attendu (await) au lieu de
+bloquer un worker. La modération et l'extraction des entités sont exécutées dans le
+processus en quelques µs : elles restent dans la boucle d'événements.
+
+Tout ce qui attend le réseau ou le disque sans client asyncio passe par un thread
+(asyncio.to_thread) : lectures et écritures des conversations et des réponses
+rejouées en Redis ou SQLite, métriques Redis (SCAN), arbre décisionnel "local" (sous
+son verrou de thread). Un aller-retour Redis lent ne bloque ainsi que son tour. Avec
+le stockage "memory", ces appels restent dans la boucle : ils ne durent que quelques µs.
+
+Les tours d'une même conversation sont sérialisés par des verrous asyncio : un verrou
+de thread ne sépare pas deux coroutines exécutées par le même thread.
+"""
+
+import asyncio
+import json
+import time
+
+from config.config import Config
+from core.conversation_manager import IDEMPOTENCY_POLL_INTERVAL, ConversationManager
+from core.conversation_store import ConversationConflictError
+from utils.async_http_client import AsyncHTTPClient
+from utils.striped_lock import StripedLock
+
+
+class AsyncConversationManager(ConversationManager):
+    def __init__(self, http_client=None, async_http_client=None):
+        super().__init__(http_client)
+
+        # Non-blocking client for every outbound call of the ASGI service
+        self.async_http_client = async_http_client or AsyncHTTPClient(
+            timeout=Config.HTTP_TIMEOUT,
+            connect_timeout=Config.HTTP_CONNECT_TIMEOUT,
+            retries=Config.HTTP_RETRIES,
+            pool_size=Config.ASYNC_HTTP_POOL_SIZE,
+        )
+        if self.decision_tree.mode == "remote":
+            self.decision_tree.async_http_client = self.async_http_client
+
+        # asyncio locks are created in the server's event loop, on the first turn
+        self._turn_locks = None
+        # Redis and SQLite calls block on I/O: they are run in a thread
+        self.blocking_store = self.conversations.backend != "memory"
+
+    async def run_store(self, function, *args):
+        """Call a conversation store or idempotency cache function without blocking the loop"""
+        if self.blocking_store:
+            return await asyncio.to_thread(function, *args)
+        return function(*args)
+
+    async def create_conversation_async(self, user_id):
+        return await self.run_store(self.create_conversation, user_id)
+
+    async def get_conversation_async(self, conversation_id):
+        return await self.run_store(self.get_conversation, conversation_id)
+
+    async def save_conversation_async(self, conversation_id, conversation=None):
+        await self.run_store(self.save_conversation, conversation_id, conversation)
+
+    async def get_idempotent_response_async(self, conversation_id, idempotency_key):
+        return await self.run_store(
+            self.get_idempotent_response, conversation_id, idempotency_key
+        )
+
+    async def submit_pdf_async(self, conversation_id):
+        return await self.run_store(self.submit_pdf, conversation_id)
+
+    async def get_metrics_async(self):
+        return await self.run_store(self.get_metrics)
+
+    def conversation_lock(self, conversation_id):
+        """asyncio lock of the conversation, to use with `async with` (not reentrant)"""
+        if self._turn_locks is None:
+            self._turn_locks = StripedLock(Config.CONVERSATION_LOCK_STRIPES, asyncio.Lock)
+        return self._turn_locks.locked(conversation_id)
+
+    async def process_message(self, conversation_id, text, idempotency_key=None):
+        """Process user message and advance the conversation"""
+        async with self.conversation_lock(conversation_id):
+            response = await self._begin_turn_async(conversation_id, idempotency_key)
+            if response is not None:
+                return response
+
+            try:
+                response = await self._run_turn(conversation_id, text)
+            except Exception:
+                await self.run_store(self._release_turn, conversation_id, idempotency_key)
+                raise
+            return await self.run_store(
+                self._remember_response, conversation_id, idempotency_key, response
+            )
+
+    async def process_audio_message(self, conversation_id, text, idempotency_key=None):
+        """Process a transcribed voice message (consent shortcuts, then a normal turn)"""
+        async with self.conversation_lock(conversation_id):
+            response = await self._begin_turn_async(conversation_id, idempotency_key)
+            if response is not None:
+                return response
+
+            try:
+                conversation = await self.get_conversation_async(conversation_id)
+                if conversation is None:
+                    raise Exception("Conversation not found")
+
+                response = self._voice_shortcut(conversation_id, conversation, text)
+                if response is not None:
+                    await self.save_conversation_async(conversation_id, conversation)
+                else:
+                    response = await self._run_turn(conversation_id, text)
+                    response["transcription"] = text
+            except Exception:
+                await self.run_store(self._release_turn, conversation_id, idempotency_key)
+                raise
+            return await self.run_store(
+                self._remember_response, conversation_id, idempotency_key, response
+            )
+
+    async def _begin_turn_async(self, conversation_id, idempotency_key):
+        """Stored response of a retried turn, or None once the turn may be run here"""
+        deadline = time.monotonic() + Config.IDEMPOTENCY_PENDING_TTL
+        while True:
+            response, claimed = await self.run_store(
+                self._claim_turn, conversation_id, idempotency_key
+            )
+            if response is not None or claimed:
+                return response
+            if time.monotonic() >= deadline:
+                raise ConversationConflictError(
+                    f"Turn {idempotency_key} is still running in another worker"
+                )
+            await asyncio.sleep(IDEMPOTENCY_POLL_INTERVAL)
+
+    async def _run_turn(self, conversation_id, text):
+        attempts = Config.CONVERSATION_CONFLICT_RETRIES + 1
+        for attempt in range(attempts):
+            conversation = await self.get_conversation_async(conversation_id)
+            if conversation is None:
+                raise Exception("Conversation not found")
+
+            response, nlp_response = self._start_turn(conversation_id, conversation, text)
+            if response is None:
+                decision_response = await self._process_with_decision_tree_async(
+                    conversation_id,
+                    conversation["current_state"],
+                    nlp_response,
+                    conversation.get("user_data", {}),
+                )
+                response = self._finish_turn(conversation_id, conversation, decision_response)
+
+            try:
+                await self.save_conversation_async(conversation_id, conversation)
+            except ConversationConflictError as e:
+                if attempt == attempts - 1:
+                    raise
+                print(f"Conflit d'écriture, nouvel essai du tour: {str(e)}")
+                continue
+
+            self._prerender_pdf(conversation_id, conversation, response)
+            return response
+
+    async def _process_with_decision_tree_async(
+        self, conversation_id, current_state, nlp_data, user_data=None
+    ):
+        """Get next step from decision tree service without blocking the event loop"""
+        print(
+            f"Calling decision tree service with: state={current_state}, nlp_data={json.dumps(nlp_data)}"
+        )
+
+        try:
+            result = await self.decision_tree_breaker.call_async(
+                self.decision_tree.evaluate_async,
+                conversation_id,
+                current_state,
+                nlp_data,
+                user_data,
+                prefill=Config.SLOT_PREFILL,
+            )
+            print(f"Decision tree result: {json.dumps(result)}")
+            return result
+        except Exception as api_error:
+            print(f"Failed to call decision tree service: {str(api_error)}")
+
+        return self._fallback_decision(current_state, nlp_data, user_data)
+
+    async def close(self):
+        self.decision_tree_breaker.close()
+        await self.async_http_client.close()
@@ -0,0 +1,165 @@
+"""
+Disjoncteur (circuit breaker) pour un service appelé à chaque tour.
+
+- fermé : les appels passent ; chaque échec ou réponse plus lente que
+  latency_threshold compte comme un échec, un appel normal remet le compteur à zéro.
+- ouvert : après failure_threshold échecs consécutifs, les appels sont refusés
+  immédiatement (CircuitOpenError) et l'appelant passe directement à son plan de secours.
+- semi-ouvert : reset_timeout secondes après l'ouverture, un thread vérifie le service
+  avec probe() ; s'il répond, le circuit se referme, sinon il reste ouvert et une
+  nouvelle vérification est programmée. Aucun tour d'utilisateur ne sert de test.
+
+Exemple:
+    breaker = CircuitBreaker("decision-tree", probe=decision_tree.probe)
+    result = breaker.call(decision_tree.evaluate, conversation_id, state, nlp_data)
+"""
+
+import threading
+import time
+
+
+class CircuitOpenError(Exception):
+    """Le circuit est ouvert : l'appel n'a pas été tenté."""
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name,
+        failure_threshold=3,
+        latency_threshold=0,
+        reset_timeout=10.0,
+        probe=None,
+    ):
+        """
+        Args:
+            name (str): Nom du service protégé (messages et état).
+            failure_threshold (int, optional): Échecs consécutifs avant ouverture.
+            latency_threshold (float, optional): Durée (secondes) au-delà de laquelle un
+                appel réussi compte comme un échec (0 = désactivé).
+            reset_timeout (float, optional): Délai avant chaque vérification du service.
+            probe (callable, optional): Vérification du service, lève une exception en cas
+                d'échec. Sans probe, le circuit se referme après reset_timeout.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.latency_threshold = latency_threshold
+        self.reset_timeout = reset_timeout
+        self.probe = probe
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.last_error = None
+        self.opened = 0
+        self.rejected = 0
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def call(self, func, *args, **kwargs):
+        """
+        Appelle func si le circuit est fermé.
+
+        Raises:
+            CircuitOpenError: Si le circuit est ouvert ou en cours de vérification.
+            Exception: Toute exception levée par func.
+        """
+        self._check_closed()
+        start = time.monotonic()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self._record_failure(str(e))
+            raise
+        self._record_latency(start)
+        return result
+
+    async def call_async(self, func, *args, **kwargs):
+        """Comme call, pour une coroutine (variante ASGI du service)."""
+        self._check_closed()
+        start = time.monotonic()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as e:
+            self._record_failure(str(e))
+            raise
+        self._record_latency(start)
+        return result
+
+    def _check_closed(self):
+        if self.state != self.CLOSED:
+            with self._lock:
+                self.rejected += 1
+            raise CircuitOpenError(f"Circuit {self.name} ouvert")
+
+    def _record_latency(self, start):
+        elapsed = time.monotonic() - start
+        if self.latency_threshold and elapsed > self.latency_threshold:
+            self._record_failure(f"réponse en {elapsed:.2f}s")
+        else:
+            self._record_success()
+
+    def _record_success(self):
+        if self.failures:
+            with self._lock:
+                self.failures = 0
+
+    def _record_failure(self, error):
+        with self._lock:
+            self.failures += 1
+            self.last_error = error
+            if self.state == self.CLOSED and self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.time()
+                self.opened += 1
+                print(f"Circuit {self.name} ouvert après {self.failures} échecs: {error}")
+                self._schedule_probe()
+
+    def _schedule_probe(self):
+        self._timer = threading.Timer(self.reset_timeout, self._run_probe)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _run_probe(self):
+        with self._lock:
+            self.state = self.HALF_OPEN
+        try:
+            if self.probe:
+                self.probe()
+        except Exception as e:
+            with self._lock:
+                self.state = self.OPEN
+                self.last_error = str(e)
+                self._schedule_probe()
+            print(f"Circuit {self.name} toujours ouvert: {str(e)}")
+            return
+
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.opened_at = None
+        print(f"Circuit {self.name} refermé")
+
+    def status(self):
+        """
+        Returns:
+            dict: État du circuit (pour /health).
+        """
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "opened_at": self.opened_at,
+                "last_error": self.last_error,
+                "times_opened": self.opened,
+                "rejected_calls": self.rejected,
+            }
+
+    def close(self):
+        """Arrête la vérification programmée."""
+        if self._timer is not None:
+            self._timer.cancel()
@@ -1,31 +1,112 @@
+import os
 import uuid
-import requests
 import json
-from datetime import datetime
+import time
 from config.config import Config
 from utils.banned_words_filter import BannedWordsFilter
+from utils.entity_extractor import extract as extract_entities
+from utils.http_client import HTTPClient
+from utils.striped_lock import StripedLock
+from core.records import Conversation, Role
+from core.conversation_store import (
+    ConversationConflictError,
+    create_conversation_store,
+)
+from core.circuit_breaker import CircuitBreaker
+from core.conversation_serializer import ConversationSerializer
+from core.idempotency import create_idempotency_cache
+from core.pdf_jobs import PDFJobQueue
+from core.decision_tree import create_decision_tree
+from core.dialogue_engine import DialogueEngine
+
+# Seconds between two checks of a turn running in another worker with the same key
+IDEMPOTENCY_POLL_INTERVAL = 0.05
 
 
 class ConversationManager:
-    def __init__(self):
-        self.conversations = {}  # In-memory storage for development
+    def __init__(self, http_client=None):
+        # Hot conversations in memory (idle TTL + LRU), optionally persisted to SQLite,
+        # or shared between workers in Redis
+        self.conversations = create_conversation_store(
+            backend=Config.CONVERSATION_BACKEND,
+            database_uri=Config.DATABASE_URI,
+            redis_url=Config.REDIS_URL,
+            ttl=Config.CONVERSATION_TTL,
+            max_entries=Config.CONVERSATION_MAX_ENTRIES,
+            flush_interval=Config.CONVERSATION_FLUSH_INTERVAL,
+            batch_size=Config.CONVERSATION_FLUSH_BATCH_SIZE,
+        )
+        if Config.CONVERSATION_SWEEP_INTERVAL > 0:
+            self.conversations.start_sweeper(Config.CONVERSATION_SWEEP_INTERVAL)
+        # Turns of one conversation are serialised, different conversations run in parallel
+        self.conversation_locks = StripedLock(Config.CONVERSATION_LOCK_STRIPES)
+        # Responses replayed for client retries carrying the same Idempotency-Key
+        self.idempotency = create_idempotency_cache(
+            backend=Config.CONVERSATION_BACKEND,
+            redis_url=Config.REDIS_URL,
+            ttl=Config.IDEMPOTENCY_TTL,
+            max_entries=Config.IDEMPOTENCY_MAX_ENTRIES,
+            pending_ttl=Config.IDEMPOTENCY_PENDING_TTL,
+        )
+        # JSON bodies of GET /conversation/<id>, re-encoded only when the conversation changes
+        self.serializer = ConversationSerializer(Config.CONVERSATION_RENDER_CACHE_SIZE)
+
+        # Lexique et automate partagés par toutes les conversations
+        self.word_filter = BannedWordsFilter(
+            banned_words_file=Config.BANNED_WORDS_FILE,
+            max_violations=2,
+            fuzzy_distance=Config.BANNED_WORDS_FUZZY_DISTANCE,
+            fuzzy_min_length=Config.BANNED_WORDS_FUZZY_MIN_LENGTH,
+        )
+        if Config.BANNED_WORDS_FILE and Config.BANNED_WORDS_RELOAD_INTERVAL > 0:
+            self.word_filter.start_watching(Config.BANNED_WORDS_RELOAD_INTERVAL)
+
+        # Pooled HTTP client shared by every outbound call of the service
+        self.http_client = http_client or HTTPClient(
+            timeout=Config.HTTP_TIMEOUT,
+            connect_timeout=Config.HTTP_CONNECT_TIMEOUT,
+            retries=Config.HTTP_RETRIES,
+            pool_size=Config.HTTP_POOL_SIZE,
+        )
+
+        # Arbre décisionnel appelé par HTTP ou exécuté dans le processus
+        self.decision_tree = create_decision_tree(
+            mode=Config.DECISION_TREE_MODE,
+            service_url=Config.DECISION_TREE_SERVICE_URL,
+            service_path=Config.DECISION_TREE_SERVICE_PATH,
+            rules_file=Config.DECISION_TREE_RULES_FILE,
+            http_client=self.http_client,
+            timeout=Config.DECISION_TREE_TIMEOUT,
+        )
+        # PDF reports rendered by a bounded pool of threads, one job per conversation version
+        self.pdf_jobs = PDFJobQueue(
+            self.render_pdf,
+            workers=Config.PDF_JOB_WORKERS,
+            max_pending=Config.PDF_JOB_QUEUE_SIZE,
+            ttl=Config.PDF_JOB_TTL,
+            max_speculative=Config.PDF_PRERENDER_MAX_QUEUED,
+        )
+
+        # Fallback logic is served immediately while the decision tree is failing
+        self.decision_tree_breaker = CircuitBreaker(
+            "decision-tree",
+            failure_threshold=Config.DECISION_TREE_BREAKER_FAILURES,
+            latency_threshold=Config.DECISION_TREE_BREAKER_LATENCY,
+            reset_timeout=Config.DECISION_TREE_BREAKER_RESET,
+            probe=self.decision_tree.probe,
+        )
+        # Fallback dialogue compiled once from the decision tree rules file
+        try:
+            self.fallback_engine = DialogueEngine.from_file(Config.FALLBACK_RULES_FILE)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Règles de secours indisponibles ({Config.FALLBACK_RULES_FILE}): {str(e)}")
+            self.fallback_engine = DialogueEngine({})
 
     def create_conversation(self, user_id):
         """Create a new conversation and return its ID"""
         conversation_id = str(uuid.uuid4())
 
-        self.conversations[conversation_id] = {
-            "id": conversation_id,
-            "user_id": user_id,
-            "created_at": datetime.now().isoformat(),
-            "messages": [],
-            "current_state": "initial",
-            "eligibility_result": None,
-            "user_data": {},  # Storage for user data across the conversation
-            "word_filter": BannedWordsFilter(
-                max_violations=2
-            ),  # Instance unique par conversation
-        }
+        self.conversations[conversation_id] = Conversation(conversation_id, user_id)
 
         return conversation_id
 
@@ -33,37 +114,215 @@ class ConversationManager:
         """Return the welcome message to start the conversation"""
         return "Bonjour et ravi de te voir ici ! Je suis CODEE, ton assistant intelligent prêt à t'aider. 🚀 Je suis là pour toi !"
 
-    def process_message(self, conversation_id, text):
-        """Process user message and advance the conversation"""
-        if conversation_id not in self.conversations:
-            raise Exception("Conversation not found")
+    def banned_words_file(self, name=None):
+        """Path of a banned words list a reload may load (None: the filter's own file)
+
+        Only BANNED_WORDS_FILE, or the bare name of a file in BANNED_WORDS_DIR, is
+        accepted: the path never comes from the client.
+
+        Raises ValueError for any other name.
+        """
+        if name is None or name == Config.BANNED_WORDS_FILE:
+            return None
+        directory = Config.BANNED_WORDS_DIR
+        if directory and isinstance(name, str) and name == os.path.basename(name):
+            path = os.path.join(directory, name)
+            if not name.startswith(".") and os.path.isfile(path):
+                return path
+        raise ValueError(f"Unknown banned words file: {name}")
+
+    def conversation_lock(self, conversation_id):
+        """Lock held while a conversation is read, modified and saved (reentrant)"""
+        return self.conversation_locks.locked(conversation_id)
+
+    def get_idempotent_response(self, conversation_id, idempotency_key):
+        """Response already sent for this Idempotency-Key, or None"""
+        if not idempotency_key:
+            return None
+        return self.idempotency.get(conversation_id, idempotency_key)
+
+    def _claim_turn(self, conversation_id, idempotency_key):
+        """(stored response, True if this worker may run the turn)
+
+        The key is reserved atomically: with the Redis backend, a worker receiving the
+        same key while another one runs the turn gets (None, False) and must wait.
+        """
+        response = self.get_idempotent_response(conversation_id, idempotency_key)
+        if response is not None or not idempotency_key:
+            return response, response is None
+        return None, self.idempotency.reserve(conversation_id, idempotency_key)
+
+    def _begin_turn(self, conversation_id, idempotency_key):
+        """Stored response of a retried turn, or None once the turn may be run here"""
+        deadline = time.monotonic() + Config.IDEMPOTENCY_PENDING_TTL
+        while True:
+            response, claimed = self._claim_turn(conversation_id, idempotency_key)
+            if response is not None or claimed:
+                return response
+            if time.monotonic() >= deadline:
+                raise ConversationConflictError(
+                    f"Turn {idempotency_key} is still running in another worker"
+                )
+            time.sleep(IDEMPOTENCY_POLL_INTERVAL)
+
+    def _remember_response(self, conversation_id, idempotency_key, response):
+        if idempotency_key:
+            self.idempotency.put(conversation_id, idempotency_key, response)
+        return response
+
+    def _release_turn(self, conversation_id, idempotency_key):
+        """Turn failed: a retry with the same key runs it again"""
+        if idempotency_key:
+            self.idempotency.release(conversation_id, idempotency_key)
+
+    def process_message(self, conversation_id, text, idempotency_key=None):
+        """Process user message and advance the conversation
+
+        A retry with the same idempotency_key gets the stored response back; the turn
+        is not run again.
+        """
+        with self.conversation_lock(conversation_id):
+            # Checked under the lock (and reserved across workers): a retry sent while
+            # the first try is still running waits for it, then gets its response
+            response = self._begin_turn(conversation_id, idempotency_key)
+            if response is not None:
+                return response
+
+            try:
+                response = self._run_turn(conversation_id, text)
+            except Exception:
+                self._release_turn(conversation_id, idempotency_key)
+                raise
+            return self._remember_response(conversation_id, idempotency_key, response)
+
+    def _run_turn(self, conversation_id, text):
+        attempts = Config.CONVERSATION_CONFLICT_RETRIES + 1
+        for attempt in range(attempts):
+            conversation = self.conversations.get(conversation_id)
+            if conversation is None:
+                raise Exception("Conversation not found")
+
+            response = self._process_message(conversation_id, conversation, text)
 
-        conversation = self.conversations[conversation_id]
+            try:
+                # Persist the turn (queued by SQLite, checked against concurrent writes by Redis)
+                self.save_conversation(conversation_id, conversation)
+            except ConversationConflictError as e:
+                if attempt == attempts - 1:
+                    raise
+                print(f"Conflit d'écriture, nouvel essai du tour: {str(e)}")
+                continue
+
+            self._prerender_pdf(conversation_id, conversation, response)
+            return response
+
+    def save_conversation(self, conversation_id, conversation=None):
+        """Save a conversation modified outside process_message"""
+        self.conversations.save(conversation_id, conversation)
+
+    def process_audio_message(self, conversation_id, text, idempotency_key=None):
+        """Process a transcribed voice message (consent shortcuts, then a normal turn)"""
+        with self.conversation_lock(conversation_id):
+            response = self._begin_turn(conversation_id, idempotency_key)
+            if response is not None:
+                return response
+
+            try:
+                conversation = self.conversations.get(conversation_id)
+                if conversation is None:
+                    raise Exception("Conversation not found")
+
+                response = self._voice_shortcut(conversation_id, conversation, text)
+                if response is not None:
+                    self.save_conversation(conversation_id, conversation)
+                else:
+                    # Nous n'ajoutons pas le message utilisateur ici car process_message va le faire
+                    response = self._run_turn(conversation_id, text)
+                    response["transcription"] = text
+            except Exception:
+                self._release_turn(conversation_id, idempotency_key)
+                raise
+            return self._remember_response(conversation_id, idempotency_key, response)
+
+    def _voice_shortcut(self, conversation_id, conversation, text):
+        """Consent refusal / change of mind spoken aloud; None for a normal turn"""
+        # Si l'état est "consent" et la réponse est "non", traiter comme un refus de consentement
+        if conversation["current_state"] == "consent":
+            text_lower = text.lower()
+            if (
+                "non" in text_lower
+                or "pas" in text_lower
+                or "refuse" in text_lower
+                or "n'accepte" in text_lower
+            ):
+                # Forcer le traitement du refus de consentement
+                response = {
+                    "message": "Je comprends. Sans ces informations, je ne peux pas déterminer votre éligibilité. N'hésitez pas à revenir si vous changez d'avis.",
+                    "conversation_id": conversation_id,
+                    "is_final": False,
+                    "transcription": text,
+                }
+
+                # Mettre à jour l'état de la conversation
+                conversation["current_state"] = "end"
+                conversation.add_message(Role.USER, text)
+                conversation.add_message(Role.BOT, response["message"])
+                return response
+
+        # Si nous sommes dans l'état "end" (refus précédent) et l'utilisateur change d'avis
+        elif conversation["current_state"] == "end":
+            text_lower = text.lower()
+            positive_words = ["oui", "d'accord", "accepte", "ok", "je veux bien", "yes"]
+            if any(word in text_lower for word in positive_words):
+                # Forcer le passage à l'étape de l'âge
+                age_message = "Parfait ! Pour mieux t'orienter, peux tu me communiquer ton âge ? Cela m'aidera à te fournir des informations adaptées à ton profil. 😊"
+                response = {
+                    "message": age_message,
+                    "conversation_id": conversation_id,
+                    "is_final": False,
+                    "transcription": text,
+                }
+
+                # Mettre à jour l'état de la conversation
+                conversation["current_state"] = "age_verification"
+                conversation.add_message(Role.USER, text)
+                conversation.add_message(Role.BOT, age_message)
+                return response
+
+        return None
+
+    def _process_message(self, conversation_id, conversation, text):
+        response, nlp_response = self._start_turn(conversation_id, conversation, text)
+        if response is not None:
+            return response
+
+        # Get next step from decision tree
+        decision_response = self._process_with_decision_tree(
+            conversation_id,
+            conversation["current_state"],
+            nlp_response,
+            conversation.get("user_data", {}),
+        )
+        return self._finish_turn(conversation_id, conversation, decision_response)
+
+    def _start_turn(self, conversation_id, conversation, text):
+        """Moderation and NLP; returns (response, None) if the turn ends here, else (None, nlp_response)"""
 
         # Vérifier les mots interdits AVANT d'ajouter le message à l'historique
-        word_filter = conversation["word_filter"]
-        filter_result = word_filter.check_message(conversation_id, text)
+        word_filter = self.word_filter
+        filter_result = word_filter.check_message(
+            text, conversation.get("violation_count", 0)
+        )
+        conversation["violation_count"] = filter_result["violation_count"]
 
         # Si la conversation doit être terminée en raison de violations répétées
         if filter_result["should_terminate"]:
             termination_message = word_filter.get_termination_message()
 
             # Ajouter le message utilisateur et la réponse du bot à l'historique
-            conversation["messages"].append(
-                {
-                    "role": "user",
-                    "content": text,
-                    "timestamp": datetime.now().isoformat(),
-                }
-            )
+            conversation.add_message(Role.USER, text)
 
-            conversation["messages"].append(
-                {
-                    "role": "bot",
-                    "content": termination_message,
-                    "timestamp": datetime.now().isoformat(),
-                }
-            )
+            conversation.add_message(Role.BOT, termination_message)
 
             conversation["current_state"] = "terminated"
 
@@ -73,29 +332,17 @@ class ConversationManager:
                 "is_final": True,
                 "contains_banned_words": True,
                 "banned_words_found": filter_result["banned_words_found"],
-            }
+            }, None
 
         # Si c'est une première violation (avertissement)
         if filter_result["should_warn"]:
             warning_message = word_filter.get_warning_message()
 
             # Ajouter le message utilisateur avec l'avertissement
-            conversation["messages"].append(
-                {
-                    "role": "user",
-                    "content": text,
-                    "timestamp": datetime.now().isoformat(),
-                }
-            )
+            conversation.add_message(Role.USER, text)
 
             # IMPORTANT: Ne pas continuer le traitement normal, juste retourner l'avertissement
-            conversation["messages"].append(
-                {
-                    "role": "bot",
-                    "content": warning_message,
-                    "timestamp": datetime.now().isoformat(),
-                }
-            )
+            conversation.add_message(Role.BOT, warning_message)
 
             # Garder le même état pour redemander la ville
             return {
@@ -104,13 +351,11 @@ class ConversationManager:
                 "is_final": False,
                 "contains_banned_words": True,
                 "banned_words_found": filter_result["banned_words_found"],
-            }
+            }, None
 
         # Traitement normal si aucun mot interdit n'est trouvé
         # Add user message to history
-        conversation["messages"].append(
-            {"role": "user", "content": text, "timestamp": datetime.now().isoformat()}
-        )
+        conversation.add_message(Role.USER, text)
 
         # NOUVELLE LOGIQUE: Détecter si l'utilisateur change d'avis après un refus
         if conversation["current_state"] == "end":
@@ -129,19 +374,13 @@ class ConversationManager:
                 conversation["current_state"] = "age_verification"
 
                 response_message = "Parfait ! Pour mieux t'orienter, peux-tu me communiquer ton âge ? Cela m'aidera à te fournir des informations adaptées à ton profil. 😊"
-                conversation["messages"].append(
-                    {
-                        "role": "bot",
-                        "content": response_message,
-                        "timestamp": datetime.now().isoformat(),
-                    }
-                )
+                conversation.add_message(Role.BOT, response_message)
 
                 return {
                     "message": response_message,
                     "conversation_id": conversation_id,
                     "is_final": False,
-                }
+                }, None
 
         # Process with NLP service
         nlp_response = self._process_with_nlp(text)
@@ -155,14 +394,11 @@ class ConversationManager:
                 conversation["user_data"][key] = value
             print(f"User data updated: {json.dumps(conversation['user_data'])}")
 
-        # Get next step from decision tree
         print(f"État avant décision : {conversation['current_state']}")
-        decision_response = self._process_with_decision_tree(
-            conversation_id,
-            conversation["current_state"],
-            nlp_response,
-            conversation.get("user_data", {}),
-        )
+        return None, nlp_response
+
+    def _finish_turn(self, conversation_id, conversation, decision_response):
+        """Apply the decision tree response to the conversation"""
         print(f"Réponse de l'arbre de décision : {json.dumps(decision_response)}")
         print(f"Nouvel état : {decision_response.get('next_state')}")
 
@@ -175,14 +411,11 @@ class ConversationManager:
             conversation["eligibility_result"] = decision_response["eligibility_result"]
 
         # Add bot response to history
-        conversation["messages"].append(
-            {
-                "role": "bot",
-                "content": decision_response.get(
-                    "message", "Je n'ai pas compris. Pouvez-vous répéter ?"
-                ),
-                "timestamp": datetime.now().isoformat(),
-            }
+        conversation.add_message(
+            Role.BOT,
+            decision_response.get(
+                "message", "Je n'ai pas compris. Pouvez-vous répéter ?"
+            ),
         )
 
         return {
@@ -191,79 +424,78 @@ class ConversationManager:
             "is_final": decision_response.get("is_final", False),
         }
 
+    def submit_pdf(self, conversation_id):
+        """Queue the PDF report of a conversation: (job, joined), or None if not found
+
+        Raises PDFQueueFullError when too many reports are waiting.
+        """
+        conversation = self.get_conversation(conversation_id)
+        if not conversation:
+            return None
+        # JSON already encoded for GET /conversation/<id>; its ETag identifies the version
+        etag, body = self.serializer.render(conversation)
+        return self.pdf_jobs.submit(conversation_id, etag, body)
+
+    def _prerender_pdf(self, conversation_id, conversation, response):
+        """Queue a low-priority render of the report a finished conversation will ask for"""
+        if not Config.PDF_PRERENDER:
+            return
+        if not response.get("is_final") or not conversation.get("eligibility_result"):
+            return
+        etag, body = self.serializer.render(conversation)
+        if self.pdf_jobs.submit(conversation_id, etag, body, speculative=True) is None:
+            print(f"Rapport de {conversation_id} non anticipé : file des PDF chargée")
+
+    def render_pdf(self, body):
+        """Render a conversation (encoded JSON) with the PDF service: {"file_url", "filename"}"""
+        print(f"Envoi de la requête au service PDF: {Config.PDF_SERVICE_URL}/generate")
+        pdf_response = self.http_client.post(
+            f"{Config.PDF_SERVICE_URL}/generate",
+            data=body,
+            headers={"Content-Type": "application/json"},
+            timeout=Config.PDF_TIMEOUT,
+            upstream="pdf",
+        )
+
+        if pdf_response.status_code != 200:
+            print(f"Erreur du service PDF: {pdf_response.status_code} - {pdf_response.text}")
+            raise Exception(
+                f"Failed to generate PDF: {pdf_response.status_code} - {pdf_response.text}"
+            )
+
+        pdf_data = pdf_response.json()
+        return {"file_url": pdf_data.get("file_url"), "filename": pdf_data.get("filename")}
+
     def get_conversation(self, conversation_id):
         """Get the full conversation data"""
         return self.conversations.get(conversation_id)
 
+    def list_conversations(self, conversation_ids=None):
+        """Return a snapshot of stored conversations (all, or only the given IDs) as dicts"""
+        if conversation_ids is None:
+            conversations = self.conversations.values()
+        else:
+            # Lazy: read while the scan is iterated (in a thread by the ASGI variant)
+            conversations = (
+                self.conversations.get(conversation_id)
+                for conversation_id in conversation_ids
+            )
+        return (
+            conversation.to_dict()
+            for conversation in conversations
+            if conversation is not None
+        )
+
+    def get_metrics(self):
+        """Return live session and eviction counters of the conversation store"""
+        return self.conversations.metrics()
+
     def _process_with_nlp(self, text):
         """Send text to NLP service for intent and entity extraction"""
         try:
-            # Pour l'instant, nous simulons la réponse NLP
-            # Extraction basique des entités
-            entities = {}
-
-            # Tenter d'extraire l'âge
-            import re
-
-            age_match = re.search(r"\d+", text)
-            if age_match:
-                entities["age"] = int(age_match.group())
-
-            # Vérifier pour le RSA
-            rsa_keywords = ["rsa", "revenu de solidarité active"]
-            if any(keyword in text.lower() for keyword in rsa_keywords):
-                if "non" in text.lower() or "pas" in text.lower():
-                    entities["rsa"] = False
-                else:
-                    entities["rsa"] = True
-
-            # Vérifier pour la scolarisation
-            schooling_keywords = ["scolarisé", "école", "étudiant", "études"]
-            if any(keyword in text.lower() for keyword in schooling_keywords):
-                if "non" in text.lower() or "pas" in text.lower():
-                    entities["schooling"] = False
-                else:
-                    entities["schooling"] = True
-
-            # Vérifier pour les villes
-            cities = [
-                "saint-denis",
-                "stains",
-                "pierrefitte",
-                "saint-ouen",
-                "épinay",
-                "villetaneuse",
-                "île-saint-denis",
-                "aubervilliers",
-                "épinay-sur-seine",
-                "la courneuve",
-                "montfermeil",
-            ]
-            for city in cities:
-                if city in text.lower() or city.replace("-", " ") in text.lower():
-                    entities["city"] = city
-                    break
-
-            # Déterminer l'intention
-            intent = "provide_info"
-            if "?" in text:
-                intent = "ask_question"
-            elif (
-                "oui" in text.lower()
-                or "yes" in text.lower()
-                or "accepte" in text.lower()
-            ):
-                intent = "yes"
-            elif "non" in text.lower() or "no" in text.lower():
-                intent = "no"
-
-            return {
-                "intent": intent,
-                "entities": entities,
-                "text": text,
-                "sentiment": "neutral",
-                "confidence": 0.8,
-            }
+            # Pour l'instant, nous simulons la réponse NLP :
+            # extraction locale des entités et de l'intention, en une passe
+            return extract_entities(text)
         except Exception as e:
             print(f"Error processing with NLP: {str(e)}")
             return {"intent": "unknown", "entities": {}}
@@ -272,415 +504,39 @@ class ConversationManager:
         self, conversation_id, current_state, nlp_data, user_data=None
     ):
         """Get next step from decision tree service"""
+        print(
+            f"Calling decision tree service with: state={current_state}, nlp_data={json.dumps(nlp_data)}"
+        )
+        if user_data:
+            print(f"User data: {json.dumps(user_data)}")
+
+        # Tenter d'appeler l'arbre décisionnel réel (service ou bibliothèque),
+        # sauf si le disjoncteur est ouvert
         try:
-            print(
-                f"Calling decision tree service with: state={current_state}, nlp_data={json.dumps(nlp_data)}"
+            result = self.decision_tree_breaker.call(
+                self.decision_tree.evaluate,
+                conversation_id,
+                current_state,
+                nlp_data,
+                user_data,
+                prefill=Config.SLOT_PREFILL,
             )
-            if user_data:
-                print(f"User data: {json.dumps(user_data)}")
+            print(f"Decision tree result: {json.dumps(result)}")
+            return result
+        except Exception as api_error:
+            print(f"Failed to call decision tree service: {str(api_error)}")
+            # Continue with fallback
 
-            # Tenter d'appeler le service d'arbre décisionnel réel
-            try:
-                decision_tree_url = f"{Config.DECISION_TREE_SERVICE_URL}/evaluate"
-                print(f"Sending request to: {decision_tree_url}")
-
-                payload = {
-                    "conversation_id": conversation_id,
-                    "current_state": current_state,
-                    "nlp_data": nlp_data,
-                    "user_data": user_data or {},
-                }
-                print(f"Payload: {json.dumps(payload)}")
+        return self._fallback_decision(current_state, nlp_data, user_data)
 
-                response = requests.post(decision_tree_url, json=payload)
-
-                print(f"Decision tree response status: {response.status_code}")
-                if response.status_code == 200:
-                    result = response.json()
-                    print(f"Decision tree result: {json.dumps(result)}")
-                    return result
-                else:
-                    print(
-                        f"Decision tree service returned an error: {response.status_code} - {response.text}"
-                    )
-                    # Continue with fallback
-            except Exception as api_error:
-                print(f"Failed to call decision tree service: {str(api_error)}")
-                # Continue with fallback
-
-            # Simulation comme plan de secours
+    def _fallback_decision(self, current_state, nlp_data, user_data):
+        """Fallback used when the decision tree cannot be reached"""
+        try:
+            # Plan de secours : règles de l'arbre décisionnel compilées localement
             print("Using fallback decision tree logic")
-
-            # Consentement
-            # Flux de conversation
-            if current_state == "initial":
-                return {
-                    "next_state": "pre_consent",
-                    "message": "Merci pour ton message, je suis là pour t'aider ! 😊\nDonne moi plus de détails sur ton besoin?",
-                    "is_final": False,
-                }
-            elif current_state == "pre_consent":
-                # Passer toujours au consentement quelle que soit la réponse
-                return {
-                    "next_state": "consent",
-                    "message": "Avant de commencer, je dois recueillir quelques informations personnelles pour déterminer votre éligibilité. Acceptez-vous que vos données soient traitées dans le cadre de cette évaluation ?",
-                    "is_final": False,
-                }
-            elif current_state == "consent":
-                intent = nlp_data.get("intent", "").lower() if nlp_data else ""
-                text = nlp_data.get("text", "").lower() if nlp_data else ""
-
-                # Vérification plus simple pour oui/non
-                if "oui" in text or "yes" in text or intent == "yes":
-                    return {
-                        "next_state": "age_verification",
-                        "message": "Pour mieux t'orienter, peux tu me communiquer ton âge ? Cela m'aidera à te fournir des informations adaptées à ton profil. 😊",
-                        "is_final": False,
-                    }
-                elif "non" in text or "no" in text or intent == "no":
-                    return {
-                        "next_state": "end",
-                        "message": "Je comprends. Sans ces informations, je ne peux pas déterminer votre éligibilité. N'hésitez pas à revenir si vous changez d'avis.",
-                        "is_final": True,
-                    }
-                else:
-                    # Redemander en cas de réponse ambiguë
-                    return {
-                        "next_state": "consent",
-                        "message": "Je n'ai pas compris votre réponse. Pourriez-vous répondre simplement par oui ou par non ?",
-                        "is_final": False,
-                    }
-
-            # Vérification de l'âge
-            elif current_state == "age_verification":
-                # Vérifier si l'âge est dans les données utilisateur
-                age = None
-                if user_data and "age" in user_data:
-                    age = user_data["age"]
-                elif (
-                    nlp_data
-                    and "entities" in nlp_data
-                    and "age" in nlp_data["entities"]
-                ):
-                    age = nlp_data["entities"]["age"]
-
-                if age is not None:
-                    if age < 16:
-                        return {
-                            "next_state": "not_eligible_age",
-                            "message": "Je suis désolé, mais vous devez avoir au moins 16 ans pour être éligible aux programmes.",
-                            "is_final": True,
-                            "eligibility_result": "Non éligible (âge)",
-                        }
-                    elif age >= 16 and age <= 25.5:
-                        return {
-                            "next_state": "rsa_verification_young",
-                            "message": "Êtes-vous bénéficiaire du <b>RSA</b> (Revenu de Solidarité Active) ? C'est une aide sociale qui garantit un revenu minimum aux personnes sans ressources ou à faibles revenus, versée par la CAF ou la MSA.",
-                            "is_final": False,
-                        }
-                    elif age > 25.5 and age <= 64:
-                        return {
-                            "next_state": "rsa_verification_adult",
-                            "message": "Êtes-vous bénéficiaire du <b>RSA</b> (Revenu de Solidarité Active) ? C'est une aide sociale qui garantit un revenu minimum aux personnes sans ressources ou à faibles revenus, versée par la CAF ou la MSA.",
-                            "is_final": False,
-                        }
-                    else:  # age > 64
-                        return {
-                            "next_state": "not_eligible_age",
-                            "message": "Je suis désolé, mais vous devez avoir moins de 64 ans pour être éligible aux programmes.",
-                            "is_final": True,
-                            "eligibility_result": "Non éligible (âge)",
-                        }
-                else:
-                    return {
-                        "next_state": "age_verification",
-                        "message": "Quel âge avez-vous ?",
-                        "is_final": False,
-                    }
-
-            # RSA verification - Young (16-25.5)
-            elif current_state == "rsa_verification_young":
-                intent = nlp_data.get("intent", "").lower() if nlp_data else ""
-                rsa = None
-
-                if "entities" in nlp_data and "rsa" in nlp_data["entities"]:
-                    rsa = nlp_data["entities"]["rsa"]
-                elif user_data and "rsa" in user_data:
-                    rsa = user_data["rsa"]
-                elif "oui" in nlp_data.get("text", "").lower() or intent == "yes":
-                    rsa = True
-                elif "non" in nlp_data.get("text", "").lower() or intent == "no":
-                    rsa = False
-
-                if rsa is True:
-                    return {
-                        "next_state": "schooling_verification_young_rsa",
-                        "message": "D'accord, tu es scolarisé?",
-                        "is_final": False,
-                    }
-                elif rsa is False:
-                    return {
-                        "next_state": "schooling_verification_young_no_rsa",
-                        "message": "D'accord, tu es scolarisé?",
-                        "is_final": False,
-                    }
-                else:
-                    return {
-                        "next_state": "rsa_verification_young",
-                        "message": "Êtes-vous bénéficiaire du RSA ? Veuillez répondre par oui ou non.",
-                        "is_final": False,
-                    }
-
-            # RSA verification - Adult (>25.5)
-            elif current_state == "rsa_verification_adult":
-                intent = nlp_data.get("intent", "").lower() if nlp_data else ""
-                rsa = None
-
-                if "entities" in nlp_data and "rsa" in nlp_data["entities"]:
-                    rsa = nlp_data["entities"]["rsa"]
-                elif user_data and "rsa" in user_data:
-                    rsa = user_data["rsa"]
-                elif "oui" in nlp_data.get("text", "").lower() or intent == "yes":
-                    rsa = True
-                elif "non" in nlp_data.get("text", "").lower() or intent == "no":
-                    rsa = False
-
-                if rsa is True:
-                    return {
-                        "next_state": "schooling_verification_adult_rsa",
-                        "message": "D'accord, tu es scolarisé?",
-                        "is_final": False,
-                    }
-                elif rsa is False:
-                    return {
-                        "next_state": "schooling_verification_adult_no_rsa",
-                        "message": "D'accord, tu es scolarisé?",
-                        "is_final": False,
-                    }
-                else:
-                    return {
-                        "next_state": "rsa_verification_adult",
-                        "message": "Êtes-vous bénéficiaire du RSA ? Veuillez répondre par oui ou non.",
-                        "is_final": False,
-                    }
-
-            # Schooling verification - Young with RSA
-            elif current_state == "schooling_verification_young_rsa":
-                return {
-                    "next_state": "city_verification_young_rsa",
-                    "message": "Pour mieux t'aider, peux tu me préciser ton code postal ou le nom de ta ville?",
-                    "is_final": False,
-                }
-
-            # Schooling verification - Young without RSA
-            elif current_state == "schooling_verification_young_no_rsa":
-                intent = nlp_data.get("intent", "").lower() if nlp_data else ""
-                schooling = None
-
-                if "entities" in nlp_data and "schooling" in nlp_data["entities"]:
-                    schooling = nlp_data["entities"]["schooling"]
-                elif user_data and "schooling" in user_data:
-                    schooling = user_data["schooling"]
-                elif "oui" in nlp_data.get("text", "").lower() or intent == "yes":
-                    schooling = True
-                elif "non" in nlp_data.get("text", "").lower() or intent == "no":
-                    schooling = False
-
-                if schooling is True:
-                    return {
-                        "next_state": "not_eligible_schooling",
-                        "message": "Malheureusement, tu n’es pas éligible à un accompagnement pour le moment, tant que tu es encore scolarisé. 🎓 Cependant, dès que tu auras terminé tes études, tu pourras bénéficier de nos services d’accompagnement pour t'aider dans ta recherche d’emploi et ton insertion professionnelle. En attendant, si tu as des questions ou besoin de conseils, tu peux appeler CODE au  0148131320. A bientôt",
-                        "is_final": True,
-                        "eligibility_result": "Non éligible (scolarisation)",
-                    }
-                elif schooling is False:
-                    return {
-                        "next_state": "city_verification_young_no_rsa",
-                        "message": "Pour mieux t'aider, peux tu me préciser ton code postal ou le nom de ta ville?",
-                        "is_final": False,
-                    }
-                else:
-                    return {
-                        "next_state": "schooling_verification_young_no_rsa",
-                        "message": "D'accord, tu es scolarisé? Veuillez répondre par oui ou non.",
-                        "is_final": False,
-                    }
-
-            # Schooling verification - Adult with RSA
-            elif current_state == "schooling_verification_adult_rsa":
-                return {
-                    "next_state": "city_verification_adult_rsa",
-                    "message": "Pour mieux t'aider, peux tu me préciser ton code postal ou le nom de ta ville?",
-                    "is_final": False,
-                }
-
-            # Schooling verification - Adult without RSA
-            elif current_state == "schooling_verification_adult_no_rsa":
-                return {
-                    "next_state": "city_verification_adult_no_rsa",
-                    "message": "Pour mieux t'aider, peux tu me préciser ton code postal ou le nom de ta ville?",
-                    "is_final": False,
-                }
-
-            # City verification - Young with RSA
-            elif current_state == "city_verification_young_rsa":
-                city = None
-
-                if "entities" in nlp_data and "city" in nlp_data["entities"]:
-                    city = nlp_data["entities"]["city"].lower()
-                elif user_data and "city" in user_data:
-                    city = user_data["city"].lower()
-
-                if city:
-                    if city in ["saint-denis", "stains", "pierrefitte"]:
-                        return {
-                            "next_state": "eligible_ali",
-                            "message": "🎉 Bonne nouvelle ! 🎉 Tu es éligible à un accompagnement personnalisé par l'agence locale d'insertion de ta ville ! 🙌 Cela peut t'aider à trouver des opportunités professionnelles, recevoir des conseils et bien plus. <a href='https://code93.fr/rendezvous/formulaire_ali.php' target='_blank'>Cliquez ici </a> pour prendre un rendez-vous avec un conseiller",
-                            "is_final": True,
-                            "eligibility_result": "ALI",
-                        }
-                    else:
-                        return {
-                            "next_state": "not_eligible_city",
-                            "message": "Pour ton cas, je te recommande de contacter les services sociaux de ta ville ou de ton département pour explorer les dispositifs d'accompagnement disponibles localement.",
-                            "is_final": True,
-                            "eligibility_result": "Non éligible (ville)",
-                        }
-                else:
-                    return {
-                        "next_state": "city_verification_young_rsa",
-                        "message": "Pourriez-vous me préciser dans quelle ville vous habitez ?",
-                        "is_final": False,
-                    }
-
-            # City verification - Young without RSA
-            elif current_state == "city_verification_young_no_rsa":
-                city = None
-
-                if "entities" in nlp_data and "city" in nlp_data["entities"]:
-                    city = nlp_data["entities"]["city"].lower()
-                elif user_data and "city" in user_data:
-                    city = user_data["city"].lower()
-
-                if city:
-                    ml_cities = [
-                        "saint-denis",
-                        "pierrefitte",
-                        "saint-ouen",
-                        "épinay",
-                        "villetaneuse",
-                        "île-saint-denis",
-                    ]
-                    normalized_city = city.replace(" ", "-").lower()
-
-                    if normalized_city in ml_cities or any(
-                        city in c for c in ml_cities
-                    ):
-                        return {
-                            "next_state": "eligible_ml",
-                            "message": "🎉 Bonne nouvelle ! 🎉 Tu es éligible à un accompagnement personnalisé par la mission locale de ta ville ! 🙌 Cela peut t'aider à trouver des opportunités professionnelles, recevoir des conseils et bien plus. <a href='https://code93.fr/rendezvous/formulaire_ml.php' target='_blank'>Cliquez ici </a> pour prendre un rendez-vous avec un conseiller",
-                            "is_final": True,
-                            "eligibility_result": "ML",
-                        }
-                    else:
-                        return {
-                            "next_state": "not_eligible_city",
-                            "message": "Pour ton cas, je te recommande de contacter les services sociaux de ta ville ou de ton département pour explorer les dispositifs d'accompagnement disponibles localement.",
-                            "is_final": True,
-                            "eligibility_result": "Non éligible (ville)",
-                        }
-                else:
-                    return {
-                        "next_state": "city_verification_young_no_rsa",
-                        "message": "Pourriez-vous me préciser dans quelle ville vous habitez ?",
-                        "is_final": False,
-                    }
-
-            # City verification - Adult with RSA
-            elif current_state == "city_verification_adult_rsa":
-                city = None
-
-                if "entities" in nlp_data and "city" in nlp_data["entities"]:
-                    city = nlp_data["entities"]["city"].lower()
-                elif user_data and "city" in user_data:
-                    city = user_data["city"].lower()
-
-                if city:
-                    if city in ["saint-denis", "stains", "pierrefitte"]:
-                        return {
-                            "next_state": "eligible_ali",
-                            "message": "🎉 Bonne nouvelle ! 🎉 Tu es éligible à un accompagnement personnalisé par l'agence locale d'insertion de ta ville ! 🙌 Cela peut t'aider à trouver des opportunités professionnelles, recevoir des conseils et bien plus. <a href='https://code93.fr/rendezvous/formulaire_ali.php' target='_blank'>Cliquez ici </a> pour prendre un rendez-vous avec un conseiller",
-                            "is_final": True,
-                            "eligibility_result": "ALI",
-                        }
-                    else:
-                        return {
-                            "next_state": "not_eligible_city",
-                            "message": "Pour ton cas, je te recommande de contacter les services sociaux de ta ville ou de ton département pour explorer les dispositifs d'accompagnement disponibles localement.",
-                            "is_final": True,
-                            "eligibility_result": "Non éligible (ville)",
-                        }
-                else:
-                    return {
-                        "next_state": "city_verification_adult_rsa",
-                        "message": "Pourriez-vous me préciser dans quelle ville vous habitez ?",
-                        "is_final": False,
-                    }
-
-            # City verification - Adult without RSA
-            elif current_state == "city_verification_adult_no_rsa":
-                city = None
-
-                if "entities" in nlp_data and "city" in nlp_data["entities"]:
-                    city = nlp_data["entities"]["city"].lower()
-                elif user_data and "city" in user_data:
-                    city = user_data["city"].lower()
-
-                if city:
-                    plie_cities = [
-                        "aubervilliers",
-                        "épinay-sur-seine",
-                        "île-saint-denis",
-                        "la-courneuve",
-                        "pierrefitte",
-                        "saint-denis",
-                        "saint-ouen",
-                        "stains",
-                        "villetaneuse",
-                    ]
-
-                    normalized_city = city.replace(" ", "-").lower()
-
-                    if normalized_city in plie_cities or any(
-                        city in c for c in plie_cities
-                    ):
-                        return {
-                            "next_state": "eligible_plie",
-                            "message": "🎉 Bonne nouvelle ! 🎉 Tu es éligible à un accompagnement personnalisé par le PLIE de ta ville ! 🙌 Cela peut t'aider à trouver des opportunités professionnelles, recevoir des conseils et bien plus. <a href='https://code93.fr/rendezvous/formulaire_plie.php' target='_blank'>Cliquez ici</a> pour prendre un rendez-vous avec un conseiller",
-                            "is_final": True,
-                            "eligibility_result": "PLIE",
-                        }
-                    else:
-                        return {
-                            "next_state": "not_eligible_city",
-                            "message": "Pour ton cas, je te recommande de contacter les services sociaux de ta ville ou de ton département pour explorer les dispositifs d'accompagnement disponibles localement.",
-                            "is_final": True,
-                            "eligibility_result": "Non éligible (ville)",
-                        }
-                else:
-                    return {
-                        "next_state": "city_verification_adult_no_rsa",
-                        "message": "Pourriez-vous me préciser dans quelle ville vous habitez ?",
-                        "is_final": False,
-                    }
-
-            # Fallback for any other state
-            else:
-                return {
-                    "next_state": "error",
-                    "message": "État non reconnu dans l'arbre de décision.",
-                    "is_final": False,
-                }
+            return self.fallback_engine.evaluate(
+                current_state, nlp_data, user_data, prefill=Config.SLOT_PREFILL
+            )
         except Exception as e:
             print(f"Error processing with decision tree: {str(e)}")
             return {
@@ -0,0 +1,119 @@
+"""
+Corps JSON de GET /conversation/<id>, encodés une fois par état de la conversation.
+
+Le corps est le format historique de Conversation.to_dict() (messages en dernier),
+encodé en UTF-8 compact. Par conversation sont gardés :
+
+- chaque message déjà encodé : l'historique ne fait que s'allonger, un nouveau tour
+  n'encode que ses deux nouveaux messages ;
+- le corps complet et son ETag fort, réutilisés tant que la conversation ne change
+  pas (un client qui interroge sans nouveauté reçoit 304 sans rien encoder).
+
+Avec ``since=<index>``, seuls les messages à partir de cet index sont renvoyés
+(avec les autres champs, ``since`` et ``message_count``), pour les clients qui
+interrogent régulièrement la conversation.
+
+Exemple:
+    serializer = ConversationSerializer()
+    etag, body = serializer.render(conversation, since=4)
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+
+def _encode(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class _Rendered:
+    __slots__ = ("head", "messages", "last_timestamp", "body", "etag")
+
+    def __init__(self):
+        self.head = None
+        self.messages = []
+        self.last_timestamp = None
+        self.body = None
+        self.etag = None
+
+
+class ConversationSerializer:
+    def __init__(self, max_entries=1000):
+        """
+        Args:
+            max_entries (int, optional): Nombre de conversations dont l'encodage est
+                gardé (les moins récemment demandées sont oubliées).
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._encoded = 0
+        self._reused = 0
+
+    def _rendered(self, conversation, head):
+        """Encodage à jour de la conversation (réutilisé, complété ou refait), sous self._lock."""
+        messages = conversation.messages
+        count = len(messages)
+        rendered = self._entries.get(conversation.id)
+        if rendered is None:
+            rendered = self._entries[conversation.id] = _Rendered()
+            if self.max_entries > 0 and len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(conversation.id)
+
+        encoded = len(rendered.messages)
+        # Historique modifié autrement que par ajout : tout réencoder
+        if encoded > count or (
+            encoded and messages[encoded - 1].timestamp != rendered.last_timestamp
+        ):
+            rendered.messages = []
+            encoded = 0
+
+        if rendered.body is not None and encoded == count and rendered.head == head:
+            self._reused += 1
+            return rendered
+
+        # Bornés à count : un tour peut ajouter des messages pendant l'encodage
+        for message in messages[encoded:count]:
+            rendered.messages.append(_encode(message.to_dict()))
+        rendered.last_timestamp = messages[count - 1].timestamp if count else None
+        rendered.head = head
+        rendered.body = b"".join(
+            (head, b',"messages":[', b",".join(rendered.messages), b"]}")
+        )
+        rendered.etag = hashlib.blake2b(rendered.body, digest_size=16).hexdigest()
+        self._encoded += 1
+        return rendered
+
+    def render(self, conversation, since=None):
+        """
+        Returns:
+            tuple: (ETag fort sans guillemets, JSON en bytes de la conversation ou des
+            messages à partir de l'index since).
+        """
+        head = _encode(conversation.to_dict(include_messages=False))[:-1]
+        with self._lock:
+            rendered = self._rendered(conversation, head)
+            if since is None:
+                return rendered.etag, rendered.body
+
+            since = max(0, min(since, len(rendered.messages)))
+            body = b"".join(
+                (
+                    rendered.head,
+                    b',"since":%d,"message_count":%d,"messages":[' % (since, len(rendered.messages)),
+                    b",".join(rendered.messages[since:]),
+                    b"]}",
+                )
+            )
+            return f"{rendered.etag}-{since}", body
+
+    def metrics(self):
+        return {
+            "cached": len(self._entries),
+            "encoded": self._encoded,
+            "reused": self._reused,
+        }
@@ -0,0 +1,260 @@
+"""
+Stockage en mémoire des conversations, borné en durée et en nombre.
+
+Les conversations inactives depuis plus de ``ttl`` secondes expirent, et au-delà de
+``max_entries`` conversations la moins récemment utilisée est supprimée (LRU).
+Un thread de nettoyage optionnel supprime les conversations expirées même sans trafic.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class ConversationConflictError(Exception):
+    """La conversation a été modifiée par un autre worker depuis sa lecture."""
+
+
+class ConversationStore:
+    """
+    Dictionnaire de conversations avec expiration (TTL) et éviction LRU.
+
+    S'utilise comme un dict (``store[id]``, ``id in store``, ``store.get(id)``) ;
+    chaque accès à une conversation repousse son expiration.
+
+    Les conversations sont modifiées sur place : save() ne fait rien ici, mais les
+    autres stockages (voir sqlite_conversation_store) s'en servent pour persister un tour.
+    """
+
+    backend = "memory"
+
+    def __init__(self, ttl=3600, max_entries=10000, on_evict=None):
+        """
+        Args:
+            ttl (float, optional): Durée d'inactivité en secondes avant expiration (0 = jamais).
+            max_entries (int, optional): Nombre maximum de conversations (0 = illimité).
+            on_evict (callable, optional): Appelé avec l'identifiant de chaque conversation
+                                         expirée ou évincée, hors du verrou du stockage.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.on_evict = on_evict
+
+        # Identifiant -> (conversation, date du dernier accès), du plus ancien au plus récent
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop_sweeping = None
+
+        self._created = 0
+        self._expired = 0
+        self._evicted = 0
+
+    def _is_expired(self, last_access, now):
+        return self.ttl > 0 and now - last_access > self.ttl
+
+    def _notify_evicted(self, conversation_ids):
+        if self.on_evict is not None:
+            for conversation_id in conversation_ids:
+                self.on_evict(conversation_id)
+
+    def get(self, conversation_id, default=None):
+        """Retourne la conversation et repousse son expiration, ou default si absente ou expirée."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(conversation_id)
+            if entry is None:
+                return default
+            conversation, last_access = entry
+            expired = self._is_expired(last_access, now)
+            if expired:
+                del self._entries[conversation_id]
+                self._expired += 1
+            else:
+                self._entries[conversation_id] = (conversation, now)
+                self._entries.move_to_end(conversation_id)
+
+        if expired:
+            self._notify_evicted((conversation_id,))
+            return default
+        return conversation
+
+    def peek(self, conversation_id, default=None):
+        """Retourne la conversation sans repousser son expiration ni changer l'ordre LRU."""
+        with self._lock:
+            entry = self._entries.get(conversation_id)
+        if entry is None or self._is_expired(entry[1], time.monotonic()):
+            return default
+        return entry[0]
+
+    def __getitem__(self, conversation_id):
+        conversation = self.get(conversation_id)
+        if conversation is None:
+            raise KeyError(conversation_id)
+        return conversation
+
+    def __setitem__(self, conversation_id, conversation):
+        now = time.monotonic()
+        evicted = []
+        with self._lock:
+            if conversation_id not in self._entries:
+                self._created += 1
+            self._entries[conversation_id] = (conversation, now)
+            self._entries.move_to_end(conversation_id)
+
+            # Supprimer les conversations les moins récemment utilisées
+            if self.max_entries > 0:
+                while len(self._entries) > self.max_entries:
+                    evicted.append(self._entries.popitem(last=False)[0])
+                    self._evicted += 1
+
+        self._notify_evicted(evicted)
+
+    def __contains__(self, conversation_id):
+        return self.get(conversation_id) is not None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def pop(self, conversation_id, *default):
+        with self._lock:
+            entry = self._entries.pop(conversation_id, None)
+        if entry is None:
+            if default:
+                return default[0]
+            raise KeyError(conversation_id)
+        return entry[0]
+
+    def save(self, conversation_id, conversation=None):
+        """Rien à faire : la conversation en mémoire est déjà à jour."""
+
+    def flush(self):
+        """Rien à faire : aucune écriture en attente."""
+
+    def close(self):
+        """Arrête le thread de nettoyage."""
+        self.stop_sweeper()
+
+    def values(self):
+        """Copie des conversations non expirées, sans repousser leur expiration."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                conversation
+                for conversation, last_access in self._entries.values()
+                if not self._is_expired(last_access, now)
+            ]
+
+    def sweep(self):
+        """
+        Supprime les conversations expirées.
+
+        Returns:
+            int: Nombre de conversations supprimées.
+        """
+        if self.ttl <= 0:
+            return 0
+
+        now = time.monotonic()
+        removed = []
+        with self._lock:
+            # Les entrées sont triées par dernier accès : on s'arrête à la première non expirée
+            while self._entries:
+                conversation_id, (_, last_access) = next(iter(self._entries.items()))
+                if not self._is_expired(last_access, now):
+                    break
+                del self._entries[conversation_id]
+                removed.append(conversation_id)
+            self._expired += len(removed)
+
+        self._notify_evicted(removed)
+        return len(removed)
+
+    def start_sweeper(self, interval=60):
+        """
+        Lance un thread qui supprime régulièrement les conversations expirées.
+
+        Args:
+            interval (float, optional): Délai en secondes entre deux nettoyages.
+        """
+        if self._stop_sweeping is not None:
+            return
+
+        self._stop_sweeping = threading.Event()
+        thread = threading.Thread(
+            target=self._sweep_loop,
+            args=(interval, self._stop_sweeping),
+            name="conversation-sweeper",
+            daemon=True,
+        )
+        thread.start()
+
+    def stop_sweeper(self):
+        """Arrête le thread de nettoyage."""
+        if self._stop_sweeping is not None:
+            self._stop_sweeping.set()
+            self._stop_sweeping = None
+
+    def _sweep_loop(self, interval, stop_event):
+        while not stop_event.wait(interval):
+            removed = self.sweep()
+            if removed:
+                print(f"{removed} conversation(s) expirée(s) supprimée(s)")
+
+    def metrics(self):
+        """
+        Returns:
+            dict: Conversations en mémoire, créées, expirées (TTL) et évincées (LRU).
+        """
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "live_sessions": len(self._entries),
+                "created": self._created,
+                "expired": self._expired,
+                "evicted": self._evicted,
+                "ttl": self.ttl,
+                "max_entries": self.max_entries,
+            }
+
+
+def create_conversation_store(
+    backend="memory",
+    database_uri=None,
+    redis_url=None,
+    ttl=3600,
+    max_entries=10000,
+    flush_interval=1.0,
+    batch_size=200,
+):
+    """
+    Crée le stockage des conversations choisi par la configuration.
+
+    Args:
+        backend (str, optional): "memory", "sqlite" ou "redis".
+        database_uri (str, optional): URI de la base pour le stockage "sqlite".
+        redis_url (str, optional): URL du serveur pour le stockage "redis".
+        ttl (float, optional): Durée d'inactivité avant qu'une conversation quitte la mémoire.
+        max_entries (int, optional): Nombre maximum de conversations gardées en mémoire.
+        flush_interval (float, optional): Délai maximum avant l'écriture d'un tour ("sqlite").
+        batch_size (int, optional): Nombre de messages en attente déclenchant une écriture ("sqlite").
+
+    Raises:
+        ValueError: Si le stockage demandé n'existe pas.
+    """
+    if backend == "memory":
+        return ConversationStore(ttl=ttl, max_entries=max_entries)
+    if backend == "sqlite":
+        from core.sqlite_conversation_store import SQLiteConversationStore
+
+        return SQLiteConversationStore(
+            database_uri,
+            ttl=ttl,
+            max_entries=max_entries,
+            flush_interval=flush_interval,
+            batch_size=batch_size,
+        )
+    if backend == "redis":
+        from core.redis_conversation_store import RedisConversationStore
+
+        return RedisConversationStore(redis_url, ttl=ttl)
+    raise ValueError(f"Stockage de conversations inconnu: {backend}")
@@ -0,0 +1,191 @@
+"""
+Accès à l'arbre décisionnel d'éligibilité, via le service HTTP ou dans le processus.
+
+- "remote" : POST {DECISION_TREE_SERVICE_URL}/evaluate (service déployé séparément)
+- "local" : EligibilityEvaluator de decision_tree_service est importé et exécuté dans
+  le processus du chatbot, avec le même fichier de règles. Les données échangées
+  passent par JSON comme avec le service, pour obtenir exactement les mêmes résultats.
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+from utils.http_client import HTTPClient
+from utils.striped_lock import StripedLock
+
+
+class DecisionTreeError(Exception):
+    """L'arbre décisionnel n'a pas pu évaluer le tour."""
+
+
+class RemoteDecisionTree:
+    """Appelle le service decision_tree_service par HTTP."""
+
+    mode = "remote"
+
+    def __init__(self, service_url, http_client=None, timeout=None, async_http_client=None):
+        """
+        Args:
+            service_url (str): URL de base du service (ex: http://decision-tree-service:5004).
+            http_client (HTTPClient, optional): Client partagé (pool de connexions, métriques).
+            timeout (float, optional): Échéance d'un appel, en secondes.
+            async_http_client (AsyncHTTPClient, optional): Client de la variante ASGI,
+                utilisé par evaluate_async.
+        """
+        self.service_url = service_url
+        self.http_client = http_client or HTTPClient()
+        self.timeout = timeout
+        self.async_http_client = async_http_client
+
+    def evaluate(self, conversation_id, current_state, nlp_data, user_data=None, prefill=False):
+        """
+        Args:
+            prefill (bool, optional): Le service passe les questions dont la réponse est
+                déjà dans user_data.
+
+        Returns:
+            dict: Réponse de /evaluate (next_state, message, is_final...).
+
+        Raises:
+            DecisionTreeError: Si le service répond avec une erreur.
+            requests.RequestException: Si le service est injoignable ou ne répond pas à temps.
+        """
+        # L'évaluation d'un tour peut être rejouée sans effet de bord
+        response = self.http_client.post(
+            **self._request(conversation_id, current_state, nlp_data, user_data, prefill)
+        )
+        return self._result(response)
+
+    async def evaluate_async(
+        self, conversation_id, current_state, nlp_data, user_data=None, prefill=False
+    ):
+        """Comme evaluate, avec le client asynchrone (httpx.HTTPError si injoignable)."""
+        response = await self.async_http_client.post(
+            **self._request(conversation_id, current_state, nlp_data, user_data, prefill)
+        )
+        return self._result(response)
+
+    def _request(self, conversation_id, current_state, nlp_data, user_data, prefill):
+        decision_tree_url = f"{self.service_url}/evaluate"
+        print(f"Sending request to: {decision_tree_url}")
+
+        payload = {
+            "conversation_id": conversation_id,
+            "current_state": current_state,
+            "nlp_data": nlp_data,
+            "user_data": user_data or {},
+            "prefill": prefill,
+        }
+        print(f"Payload: {json.dumps(payload)}")
+        return {
+            "url": decision_tree_url,
+            "json": payload,
+            "timeout": self.timeout,
+            "idempotent": True,
+            "upstream": "decision-tree",
+        }
+
+    def _result(self, response):
+        print(f"Decision tree response status: {response.status_code}")
+        if response.status_code != 200:
+            raise DecisionTreeError(
+                f"Decision tree service returned an error: {response.status_code} - {response.text}"
+            )
+        return response.json()
+
+    def probe(self):
+        """
+        Vérifie que le service répond (GET /health).
+
+        Raises:
+            DecisionTreeError: Si le service répond avec une erreur.
+            requests.RequestException: Si le service est injoignable.
+        """
+        response = self.http_client.get(
+            f"{self.service_url}/health", timeout=self.timeout, upstream="decision-tree"
+        )
+        if response.status_code != 200:
+            raise DecisionTreeError(f"Decision tree health check: {response.status_code}")
+
+
+class LocalDecisionTree:
+    """Exécute EligibilityEvaluator dans le processus (mode bibliothèque)."""
+
+    mode = "local"
+
+    def __init__(self, service_path, rules_file=None):
+        """
+        Args:
+            service_path (str): Dossier de decision_tree_service (contient evaluators/ et rules/).
+            rules_file (str, optional): Fichier de règles. Par défaut: celui du service.
+        """
+        if service_path not in sys.path:
+            sys.path.append(service_path)
+        from evaluators.eligibility_evaluator import EligibilityEvaluator
+
+        self.evaluator = EligibilityEvaluator(rules_file)
+        # L'évaluateur garde des données par conversation : un tour à la fois par
+        # conversation, les conversations différentes en parallèle
+        self._locks = StripedLock()
+
+    def evaluate(self, conversation_id, current_state, nlp_data, user_data=None, prefill=False):
+        """
+        Returns:
+            dict: Même réponse que /evaluate pour les mêmes entrées.
+        """
+        # Copies JSON : l'évaluateur ne partage aucun objet avec la conversation
+        nlp_data = json.loads(json.dumps(nlp_data))
+        user_data = json.loads(json.dumps(user_data or {}))
+
+        with self._locks.locked(conversation_id):
+            result = self.evaluator.evaluate(
+                conversation_id=conversation_id,
+                current_state=current_state,
+                nlp_data=nlp_data,
+                user_data=user_data,
+                prefill=prefill,
+            )
+        return json.loads(json.dumps(result))
+
+    async def evaluate_async(
+        self, conversation_id, current_state, nlp_data, user_data=None, prefill=False
+    ):
+        """Comme evaluate, dans un thread : le verrou de la conversation et l'évaluation
+        ne bloquent pas la boucle d'événements."""
+        return await asyncio.to_thread(
+            self.evaluate, conversation_id, current_state, nlp_data, user_data, prefill
+        )
+
+    def probe(self):
+        """Toujours disponible dans le processus."""
+
+
+def create_decision_tree(
+    mode="remote",
+    service_url=None,
+    service_path=None,
+    rules_file=None,
+    http_client=None,
+    timeout=None,
+):
+    """
+    Crée l'accès à l'arbre décisionnel choisi par la configuration.
+
+    Args:
+        mode (str, optional): "remote" ou "local".
+        service_url (str, optional): URL du service pour le mode "remote".
+        http_client (HTTPClient, optional): Client HTTP pour le mode "remote".
+        timeout (float, optional): Échéance d'un appel en mode "remote", en secondes.
+        service_path (str, optional): Dossier de decision_tree_service pour le mode "local".
+        rules_file (str, optional): Fichier de règles pour le mode "local".
+
+    Raises:
+        ValueError: Si le mode n'existe pas.
+    """
+    if mode == "remote":
+        return RemoteDecisionTree(service_url, http_client, timeout)
+    if mode == "local":
+        return LocalDecisionTree(os.path.abspath(service_path), rules_file)
+    raise ValueError(f"Mode d'arbre décisionnel inconnu: {mode}")
@@ -0,0 +1,208 @@
+"""
+Moteur de dialogue de secours, compilé depuis le fichier de règles de l'arbre décisionnel.
+
+Utilisé quand decision_tree_service ne répond pas (ou que le disjoncteur est ouvert).
+Les états, messages et transitions viennent de eligibility_rules.json : la logique
+de secours ne peut plus diverger des règles du service.
+
+Au chargement, chaque état est compilé en un CompiledState :
+- "responses" (oui / non) : table réponse -> résultat ; la réponse vient de l'entité
+  de l'état (rsa, scolarisation) si elle est connue, sinon de l'intention ou du texte ;
+- "process" + "transitions" : l'information attendue (âge, ville) et la liste des
+  conditions, compilées une fois en prédicats Python (voir compile_condition) ;
+- sinon : passage direct à "next" (ou état final).
+
+Un tour est une recherche dans un dict puis quelques appels de prédicats. Avec
+prefill, les états dont la réponse est déjà dans les données utilisateur sont passés
+dans le même appel.
+
+Exemple:
+    engine = DialogueEngine.from_file("decision_tree_service/rules/eligibility_rules.json")
+    engine.evaluate("age_verification", {"entities": {"age": 19}}, {})
+"""
+
+import json
+import re
+import unicodedata
+
+from utils.conditions import compile_condition
+
+# Information attendue par les états "process"
+_PROCESS_SLOTS = {"extract_age": "age", "extract_city": "city"}
+
+# Réponse à la question de l'âge sans entité ("19") : premier nombre du texte, comme
+# l'extraction d'âge de decision_tree_service. La réponse du tour passe avant un âge
+# déjà connu ("ma mère a 70 ans" dit plus tôt)
+_AGE_ANSWER = re.compile(r"\d+")
+
+# Entité répondant à la question oui / non d'un état, d'après son nom
+_RESPONSE_SLOTS = (("rsa_verification", "rsa"), ("schooling_verification", "schooling"))
+
+# Mots entiers : "normal", "nom" ou "bonjour" ne sont pas des "non"
+YES_WORDS = re.compile(r"\b(?:oui|yes)\b")
+NO_WORDS = re.compile(r"\b(?:non|no)\b")
+
+UNKNOWN_STATE = {
+    "next_state": "error",
+    "message": "État non reconnu dans l'arbre de décision.",
+    "is_final": False,
+}
+YES_NO_REPROMPT = "Je n'ai pas compris votre réponse. Pourriez-vous répondre simplement par oui ou par non ?"
+
+
+def normalize_city(value):
+    """Minuscules, sans accents, espaces remplacés par des tirets ("Île Saint Denis" -> "ile-saint-denis")."""
+    value = unicodedata.normalize("NFKD", str(value).strip().lower())
+    value = "".join(char for char in value if not unicodedata.combining(char))
+    return "-".join(value.split())
+
+
+def _outcome(definition, next_state):
+    result = {
+        "next_state": next_state,
+        "message": definition.get("message", ""),
+        "is_final": definition.get("is_final", False),
+    }
+    if definition.get("eligibility_result") is not None:
+        result["eligibility_result"] = definition["eligibility_result"]
+    return result
+
+
+class CompiledState:
+    """État compilé : table des réponses, prédicats des transitions, suite par défaut."""
+
+    __slots__ = ("name", "slot", "transitions", "responses", "answer_slot", "default", "reprompt")
+
+    def __init__(self, name, definition):
+        self.name = name
+        self.slot = _PROCESS_SLOTS.get(definition.get("process"))
+        self.transitions = [
+            (
+                compile_condition(transition["condition"], normalize_city),
+                _outcome(transition, transition["next"]),
+            )
+            for transition in definition.get("transitions", [])
+        ]
+        self.responses = {
+            answer: _outcome(response, response.get("next", name))
+            for answer, response in definition.get("responses", {}).items()
+        }
+        self.answer_slot = next(
+            (slot for prefix, slot in _RESPONSE_SLOTS if name.startswith(prefix)), None
+        )
+        # Sans réponse ni transition : passage direct à l'état suivant (ou état final)
+        self.default = _outcome(definition, definition.get("next", name))
+        self.reprompt = {
+            "next_state": name,
+            "message": YES_NO_REPROMPT if self.responses else definition.get("message", ""),
+            "is_final": False,
+        }
+
+    def is_answered(self, user_data):
+        """La réponse à la question de l'état est déjà dans les données utilisateur"""
+        slot = self.slot or self.answer_slot
+        return slot is not None and user_data.get(slot) not in (None, "")
+
+
+class DialogueEngine:
+    """Table état -> CompiledState construite une fois depuis les règles."""
+
+    def __init__(self, rules):
+        """
+        Args:
+            rules (dict): Règles au format de eligibility_rules.json ({"states": {...}}).
+        """
+        self.states = {
+            name: CompiledState(name, definition)
+            for name, definition in rules.get("states", {}).items()
+        }
+
+    @classmethod
+    def from_file(cls, rules_file):
+        with open(rules_file, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def evaluate(self, current_state, nlp_data=None, user_data=None, prefill=False):
+        """
+        Args:
+            prefill (bool, optional): Passer les questions dont la réponse est déjà dans
+                user_data, comme EligibilityEvaluator.evaluate.
+
+        Returns:
+            dict: next_state, message, is_final (et eligibility_result pour un résultat,
+            prefilled_states si des questions ont été passées).
+        """
+        result = self._evaluate_state(current_state, nlp_data, user_data)
+        passed = []
+        while prefill and not result["is_final"]:
+            state = self.states.get(result["next_state"])
+            if (
+                state is None
+                or state.name in (current_state, *passed)
+                or not state.is_answered(user_data or {})
+            ):
+                break
+            step = self._evaluate_state(state.name, {}, user_data)
+            if step["next_state"] == state.name:
+                break
+            passed.append(state.name)
+            result = step
+        if passed:
+            result["prefilled_states"] = passed
+        return result
+
+    def _evaluate_state(self, current_state, nlp_data, user_data):
+        state = self.states.get(current_state)
+        if state is None:
+            return dict(UNKNOWN_STATE)
+        nlp_data = nlp_data or {}
+        user_data = user_data or {}
+        entities = nlp_data.get("entities") or {}
+
+        if state.slot is not None:
+            if state.slot == "age":
+                value = entities.get("age")
+                if value is None:
+                    match = _AGE_ANSWER.search(nlp_data.get("text") or "")
+                    value = int(match.group()) if match else user_data.get("age")
+            else:
+                value = user_data.get(state.slot)
+                if value is None:
+                    value = entities.get(state.slot)
+            if state.slot == "age" and not isinstance(value, (int, float)):
+                value = None
+            if value is None or value == "":
+                return dict(state.reprompt)
+            if state.slot == "city":
+                value = normalize_city(value)
+            data = {state.slot: value}
+            for predicate, outcome in state.transitions:
+                if predicate(data):
+                    return dict(outcome)
+            return dict(state.default)
+
+        if state.responses:
+            answer = self._answer(state, nlp_data, entities, user_data)
+            outcome = state.responses.get(answer)
+            return dict(outcome if outcome is not None else state.reprompt)
+
+        return dict(state.default)
+
+    @staticmethod
+    def _answer(state, nlp_data, entities, user_data):
+        """Réponse oui / non : entité de l'état, sinon intention ou mots du texte"""
+        slot = state.answer_slot
+        if slot is not None:
+            value = entities.get(slot)
+            if value is None:
+                value = user_data.get(slot)
+            if value is not None:
+                return "yes" if value else "no"
+
+        intent = (nlp_data.get("intent") or "").lower()
+        text = (nlp_data.get("text") or "").lower()
+        if intent == "yes" or YES_WORDS.search(text):
+            return "yes"
+        if intent == "no" or NO_WORDS.search(text):
+            return "no"
+        return None
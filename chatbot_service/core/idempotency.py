@@ -0,0 +1,166 @@
+"""
+Réponses déjà envoyées, retrouvées par clé d'idempotence (en-tête Idempotency-Key).
+
+Un client mobile qui renvoie un tour après une coupure réseau reçoit la réponse déjà
+calculée : la modération, l'arbre décisionnel et l'historique ne sont pas touchés une
+seconde fois. Les clés sont propres à une conversation et oubliées après ``ttl``
+secondes.
+
+- IdempotencyCache : en mémoire (stockages "memory" et "sqlite", un seul processus),
+  borné en nombre (LRU).
+- RedisIdempotencyCache : dans Redis (stockage "redis"), partagé entre workers, avec
+  l'expiration de Redis. La clé est réservée (SET NX) avant le tour : un autre worker
+  qui reçoit la même clé attend la réponse au lieu d'exécuter le tour une seconde fois.
+
+Exemple:
+    cache = IdempotencyCache(ttl=300)
+    response = cache.get(conversation_id, key)
+    if response is None and cache.reserve(conversation_id, key):
+        response = process(...)
+        cache.put(conversation_id, key, response)
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+
+# Longueur maximum d'une clé (UUID, ou identifiant choisi par le client)
+MAX_KEY_LENGTH = 255
+# Valeur d'une clé réservée dont le tour est en cours (stockage "redis")
+PENDING = b"__pending__"
+
+
+class IdempotencyCache:
+    backend = "memory"
+
+    def __init__(self, ttl=300, max_entries=10000):
+        """
+        Args:
+            ttl (float, optional): Durée en secondes pendant laquelle une réponse est rejouée.
+            max_entries (int, optional): Nombre maximum de réponses gardées.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        # (conversation, clé) -> (réponse, date d'expiration), du plus ancien au plus récent
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+
+    def get(self, conversation_id, key):
+        """Copie de la réponse enregistrée pour cette clé, ou None."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get((conversation_id, key))
+            if entry is None:
+                return None
+            response, expires_at = entry
+            if now > expires_at:
+                del self._entries[(conversation_id, key)]
+                return None
+            self._hits += 1
+        return dict(response)
+
+    def reserve(self, conversation_id, key):
+        """Toujours True : dans un seul processus, le verrou de la conversation sérialise
+        déjà les tours."""
+        return True
+
+    def release(self, conversation_id, key):
+        pass
+
+    def put(self, conversation_id, key, response):
+        with self._lock:
+            self._entries[(conversation_id, key)] = (dict(response), time.monotonic() + self.ttl)
+            self._entries.move_to_end((conversation_id, key))
+            if self.max_entries > 0:
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+    def metrics(self):
+        return {"backend": self.backend, "entries": len(self._entries), "replayed": self._hits}
+
+
+class RedisIdempotencyCache:
+    backend = "redis"
+
+    def __init__(
+        self,
+        redis_url="redis://localhost:6379/0",
+        ttl=300,
+        key_prefix="idempotency:",
+        pending_ttl=30,
+    ):
+        """
+        Args:
+            redis_url (str, optional): URL du serveur Redis.
+            ttl (float, optional): Durée en secondes pendant laquelle une réponse est rejouée.
+            key_prefix (str, optional): Préfixe des clés Redis.
+            pending_ttl (float, optional): Durée en secondes d'une réservation (tour en
+                cours) ; au-delà, un worker arrêté en plein tour ne bloque plus la clé.
+        """
+        import redis
+
+        self.ttl = ttl
+        self.pending_ttl = pending_ttl
+        self.key_prefix = key_prefix
+        self._client = redis.Redis.from_url(redis_url)
+        self._hits = 0
+
+    def _key(self, conversation_id, key):
+        return f"{self.key_prefix}{conversation_id}:{key}"
+
+    def get(self, conversation_id, key):
+        data = self._client.get(self._key(conversation_id, key))
+        if data is None or data == PENDING:
+            return None
+        self._hits += 1
+        return json.loads(data)
+
+    def put(self, conversation_id, key, response):
+        self._client.set(
+            self._key(conversation_id, key),
+            json.dumps(response, ensure_ascii=False),
+            ex=max(1, int(self.ttl)),
+        )
+
+    def reserve(self, conversation_id, key):
+        """True si ce worker doit exécuter le tour, False si un autre worker l'exécute ou
+        l'a déjà exécuté (réservation atomique, SET NX)."""
+        return bool(
+            self._client.set(
+                self._key(conversation_id, key),
+                PENDING,
+                nx=True,
+                ex=max(1, int(self.pending_ttl)),
+            )
+        )
+
+    def release(self, conversation_id, key):
+        """Libère la réservation d'un tour en échec : le client peut le renvoyer"""
+        redis_key = self._key(conversation_id, key)
+        # Seul le worker qui a réservé la clé y écrit : pas de course entre get et delete
+        if self._client.get(redis_key) == PENDING:
+            self._client.delete(redis_key)
+
+    def metrics(self):
+        return {"backend": self.backend, "replayed": self._hits}
+
+
+def create_idempotency_cache(
+    backend="memory", redis_url=None, ttl=300, max_entries=10000, pending_ttl=30
+):
+    """
+    Crée le cache de réponses correspondant au stockage des conversations.
+
+    Args:
+        backend (str, optional): Stockage des conversations ("memory", "sqlite" ou "redis").
+        redis_url (str, optional): URL du serveur pour le stockage "redis".
+        ttl (float, optional): Durée en secondes pendant laquelle une réponse est rejouée.
+        max_entries (int, optional): Nombre maximum de réponses gardées en mémoire.
+        pending_ttl (float, optional): Durée en secondes d'une réservation (stockage "redis").
+    """
+    if backend == "redis":
+        return RedisIdempotencyCache(redis_url, ttl=ttl, pending_ttl=pending_ttl)
+    return IdempotencyCache(ttl=ttl, max_entries=max_entries)
@@ -0,0 +1,215 @@
+"""
+File d'attente des rapports PDF : la génération est confiée à quelques threads au lieu
+de bloquer le worker qui reçoit la demande.
+
+Le client soumet une conversation (POST /pdf-jobs), reçoit un identifiant de tâche,
+interroge son état (GET /pdf-jobs/<id>) puis télécharge le fichier. Les clics répétés
+sur « Télécharger le rapport » rejoignent la tâche déjà soumise pour la même version de
+la conversation (ETag de ConversationSerializer) ; une conversation modifiée depuis, ou
+une tâche en échec, donne une nouvelle tâche.
+
+La file est bornée : au-delà de ``max_pending`` tâches en attente, submit lève
+PDFQueueFullError et le service PDF n'est jamais sollicité par plus de ``workers``
+rendus à la fois. Les tâches sont gardées en mémoire du processus (un worker gunicorn)
+et oubliées ``ttl`` secondes après la fin du rendu.
+
+Une conversation qui se termine avec un résultat d'éligibilité est rendue par avance
+(speculative=True) : le rapport est souvent prêt quand le client le demande. Ces rendus
+passent après les demandes des clients et ne sont pas soumis quand ``max_speculative``
+tâches attendent déjà ; une demande qui rejoint un rendu anticipé encore en attente le
+fait passer devant, sans occuper une place de plus dans la file. Seules les nouvelles
+tâches entrent dans la file.
+
+Exemple:
+    jobs = PDFJobQueue(render, workers=2, max_pending=50)
+    job, joined = jobs.submit(conversation_id, etag, body)
+    result = job.future.result(timeout=30)
+"""
+
+import heapq
+import itertools
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class PDFQueueFullError(Exception):
+    """Trop de rapports en attente : le client doit réessayer plus tard"""
+
+
+# Ordre de passage dans la file
+REQUESTED, SPECULATIVE = 0, 1
+
+
+class PDFJob:
+    def __init__(self, conversation_id, version, body, speculative=False):
+        self.job_id = uuid.uuid4().hex
+        self.conversation_id = conversation_id
+        self.version = version
+        # Rendu anticipé qu'aucun client n'a encore demandé
+        self.speculative = speculative
+        # Corps JSON envoyé au service PDF, libéré après le rendu
+        self.body = body
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created_at = time.monotonic()
+        self.finished_at = None
+        # Résolu à la fin du rendu : attendu par /generate-pdf ou le canal WebSocket
+        self.future = Future()
+
+    def to_dict(self):
+        data = {
+            "job_id": self.job_id,
+            "conversation_id": self.conversation_id,
+            "status": self.status,
+        }
+        if self.result is not None:
+            data.update(self.result)
+        if self.error is not None:
+            data["error"] = self.error
+        return data
+
+
+class PDFJobQueue:
+    def __init__(self, render, workers=2, max_pending=50, ttl=900, max_speculative=5):
+        """
+        Args:
+            render (callable): Rendu d'un corps JSON de conversation, renvoie
+                {"file_url", "filename"} ou lève une exception.
+            workers (int, optional): Nombre de rendus simultanés.
+            max_pending (int, optional): Nombre maximum de tâches en attente.
+            ttl (float, optional): Durée en secondes pendant laquelle une tâche terminée
+                reste consultable.
+            max_speculative (int, optional): Nombre de tâches en attente au-delà duquel
+                les rendus anticipés ne sont plus soumis.
+        """
+        self.render = render
+        self.workers = workers
+        self.ttl = ttl
+        self.max_speculative = max_speculative
+
+        # (ordre de passage, numéro de soumission, tâche)
+        self._queue = queue.PriorityQueue(max_pending)
+        self._sequence = itertools.count()
+        # job_id -> tâche, de la plus ancienne à la plus récente
+        self._jobs = OrderedDict()
+        # conversation -> dernière tâche soumise
+        self._latest = {}
+        self._lock = threading.Lock()
+        self._threads = []
+        self._counts = {
+            "submitted": 0,
+            "joined": 0,
+            "rejected": 0,
+            "done": 0,
+            "failed": 0,
+            "speculative": 0,
+            "speculative_skipped": 0,
+            "speculative_used": 0,
+        }
+
+    def submit(self, conversation_id, version, body, speculative=False):
+        """(tâche, True si une tâche de la même version était déjà soumise)
+
+        Un rendu anticipé (speculative=True) non soumis, faute de place, renvoie None.
+        """
+        with self._lock:
+            self._forget_expired()
+
+            job = self._latest.get(conversation_id)
+            if job is not None and job.version == version and job.status != "failed":
+                if not speculative:
+                    self._counts["joined"] += 1
+                    if job.speculative:
+                        self._claim(job)
+                return job, True
+
+            if speculative and self._queue.qsize() >= self.max_speculative:
+                self._counts["speculative_skipped"] += 1
+                return None
+
+            job = PDFJob(conversation_id, version, body, speculative)
+            try:
+                self._queue.put_nowait(
+                    (SPECULATIVE if speculative else REQUESTED, next(self._sequence), job)
+                )
+            except queue.Full:
+                self._counts["rejected"] += 1
+                raise PDFQueueFullError(f"{self._queue.maxsize} PDF reports already queued")
+            self._jobs[job.job_id] = job
+            self._latest[conversation_id] = job
+            self._counts["speculative" if speculative else "submitted"] += 1
+
+            if not self._threads:
+                self._start_workers()
+        return job, False
+
+    def _claim(self, job):
+        """Rendu anticipé demandé par un client : devant les autres s'il attend encore"""
+        job.speculative = False
+        self._counts["speculative_used"] += 1
+        if job.status == "queued":
+            # Priorité de son entrée changée sur place : aucune place de plus dans la file
+            with self._queue.mutex:
+                heap = self._queue.queue
+                for index, (_, _, queued) in enumerate(heap):
+                    if queued is job:
+                        # Rang d'une demande faite maintenant, comme une nouvelle tâche
+                        heap[index] = (REQUESTED, next(self._sequence), job)
+                        heapq.heapify(heap)
+                        break
+
+    def get(self, job_id):
+        """Tâche de cet identifiant, ou None (inconnue ou expirée)"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _start_workers(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"pdf-job-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            _, _, job = self._queue.get()
+            with self._lock:
+                job.status = "running"
+            try:
+                result = self.render(job.body)
+            except Exception as e:
+                print(f"Échec du rapport PDF de {job.conversation_id}: {str(e)}")
+                job.error, job.status = str(e), "failed"
+                job.future.set_exception(e)
+            else:
+                job.result, job.status = result, "done"
+                job.future.set_result(result)
+            job.body = None
+            job.finished_at = time.monotonic()
+            with self._lock:
+                self._counts[job.status] += 1
+
+    def _forget_expired(self):
+        """Oublie les tâches terminées depuis plus de ttl secondes (verrou tenu)"""
+        now = time.monotonic()
+        for job_id, job in list(self._jobs.items()):
+            # Une tâche créée il y a moins de ttl secondes ne peut pas avoir expiré
+            if job.created_at + self.ttl > now:
+                break
+            if job.finished_at is not None and job.finished_at + self.ttl <= now:
+                del self._jobs[job_id]
+                if self._latest.get(job.conversation_id) is job:
+                    del self._latest[job.conversation_id]
+
+    def metrics(self):
+        with self._lock:
+            return dict(
+                self._counts,
+                queued=self._queue.qsize(),
+                jobs=len(self._jobs),
+                workers=self.workers,
+            )
@@ -0,0 +1,232 @@
+"""
+Enregistrements compacts des conversations et de leurs messages.
+
+Une conversation garde ses champs dans des slots plutôt que dans un dict, chaque
+message est un objet à slots avec un rôle interné (Role), un horodatage entier
+(microsecondes depuis l'epoch) et, pour les réponses du bot, l'identifiant d'un
+modèle de texte partagé au lieu d'une copie du texte.
+
+to_dict() / from_dict() reproduisent exactement le format JSON historique
+(``{"role", "content", "timestamp"}`` avec un horodatage ISO 8601), utilisé par
+GET /conversation/<id>, le service PDF et les stockages persistants.
+"""
+
+import threading
+import time
+from datetime import datetime
+from enum import Enum
+
+
+class Role(str, Enum):
+    """Auteur d'un message."""
+
+    USER = "user"
+    BOT = "bot"
+
+
+def now_timestamp():
+    """Horodatage courant en microsecondes depuis l'epoch."""
+    return time.time_ns() // 1000
+
+
+def timestamp_to_iso(timestamp):
+    """Heure locale ISO 8601, identique à ``datetime.now().isoformat()`` à cet instant."""
+    seconds, microseconds = divmod(timestamp, 1000000)
+    return datetime.fromtimestamp(seconds).replace(microsecond=microseconds).isoformat()
+
+
+def iso_to_timestamp(value):
+    """Inverse de timestamp_to_iso."""
+    moment = datetime.fromisoformat(value)
+    return int(moment.replace(microsecond=0).timestamp()) * 1000000 + moment.microsecond
+
+
+class BotTemplates:
+    """
+    Table des textes du bot, partagée par toutes les conversations du processus.
+
+    Les réponses du bot sont presque toujours les mêmes textes (règles d'éligibilité,
+    avertissements) : chaque texte distinct est gardé une seule fois et les messages
+    ne conservent que son identifiant. Au-delà de max_templates textes distincts, les
+    nouveaux textes restent dans le message (pas d'identifiant) pour borner la table.
+    """
+
+    def __init__(self, max_templates=10000):
+        self.max_templates = max_templates
+        self._ids = {}
+        self._texts = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._texts)
+
+    def intern(self, text):
+        """
+        Returns:
+            int: Identifiant du texte, ou None si la table est pleine.
+        """
+        template_id = self._ids.get(text)
+        if template_id is not None:
+            return template_id
+        with self._lock:
+            template_id = self._ids.get(text)
+            if template_id is None and len(self._texts) < self.max_templates:
+                template_id = len(self._texts)
+                self._texts.append(text)
+                self._ids[text] = template_id
+        return template_id
+
+    def text(self, template_id):
+        return self._texts[template_id]
+
+
+bot_templates = BotTemplates()
+
+
+class Message:
+    """
+    Message d'une conversation.
+
+    ``content`` contient le texte, sauf pour les réponses du bot enregistrées dans
+    bot_templates, où il contient l'identifiant (int) du modèle.
+    """
+
+    __slots__ = ("role", "content", "timestamp")
+
+    def __init__(self, role, content, timestamp=None):
+        self.role = Role(role)
+        if self.role is Role.BOT and isinstance(content, str):
+            template_id = bot_templates.intern(content)
+            if template_id is not None:
+                content = template_id
+        self.content = content
+        self.timestamp = now_timestamp() if timestamp is None else timestamp
+
+    @property
+    def text(self):
+        if isinstance(self.content, int):
+            return bot_templates.text(self.content)
+        return self.content
+
+    def to_dict(self):
+        return {
+            "role": self.role.value,
+            "content": self.text,
+            "timestamp": timestamp_to_iso(self.timestamp),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        timestamp = data.get("timestamp")
+        return cls(
+            data["role"],
+            data.get("content"),
+            iso_to_timestamp(timestamp) if timestamp else None,
+        )
+
+
+class Conversation:
+    """
+    Conversation et état du parcours d'éligibilité.
+
+    Les champs restent accessibles comme les clés de l'ancien dict
+    (``conversation["current_state"]``, ``conversation.get("user_data", {})``).
+    """
+
+    __slots__ = (
+        "id",
+        "user_id",
+        "created_at",
+        "messages",
+        "current_state",
+        "eligibility_result",
+        "user_data",
+        "violation_count",
+        "version",
+    )
+
+    # Champs sérialisés, dans l'ordre du format JSON historique
+    FIELDS = __slots__[:-1]
+
+    def __init__(
+        self,
+        id,
+        user_id,
+        created_at=None,
+        messages=None,
+        current_state="initial",
+        eligibility_result=None,
+        user_data=None,
+        violation_count=0,
+        version=None,
+    ):
+        self.id = id
+        self.user_id = user_id
+        self.created_at = now_timestamp() if created_at is None else created_at
+        self.messages = [] if messages is None else messages
+        self.current_state = current_state
+        self.eligibility_result = eligibility_result
+        # Storage for user data across the conversation
+        self.user_data = {} if user_data is None else user_data
+        # Nombre de messages contenant des mots interdits
+        self.violation_count = violation_count
+        # Version lue dans un stockage partagé (voir redis_conversation_store), sinon None
+        self.version = version
+
+    def add_message(self, role, content):
+        """Ajoute un message horodaté à l'historique."""
+        self.messages.append(Message(role, content))
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.FIELDS
+
+    def get(self, key, default=None):
+        if key not in self.FIELDS:
+            return default
+        return getattr(self, key)
+
+    def __eq__(self, other):
+        if not isinstance(other, Conversation):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def to_dict(self, include_messages=True):
+        """Conversation au format JSON historique (sans l'historique si include_messages=False)."""
+        data = {
+            "id": self.id,
+            "user_id": self.user_id,
+            "created_at": timestamp_to_iso(self.created_at),
+        }
+        if include_messages:
+            data["messages"] = [message.to_dict() for message in self.messages]
+        data["current_state"] = self.current_state
+        data["eligibility_result"] = self.eligibility_result
+        data["user_data"] = self.user_data
+        data["violation_count"] = self.violation_count
+        return data
+
+    @classmethod
+    def from_dict(cls, data, version=None):
+        """Reconstruit une conversation depuis le format JSON historique."""
+        created_at = data.get("created_at")
+        return cls(
+            data["id"],
+            data.get("user_id"),
+            created_at=iso_to_timestamp(created_at) if created_at else None,
+            messages=[Message.from_dict(message) for message in data.get("messages", [])],
+            current_state=data.get("current_state", "initial"),
+            eligibility_result=data.get("eligibility_result"),
+            user_data=data.get("user_data") or {},
+            violation_count=data.get("violation_count", 0),
+            version=version,
+        )
@@ -0,0 +1,188 @@
+"""
+Stockage des conversations dans Redis (ou tout serveur compatible), partagé entre processus.
+
+Chaque conversation est un hash ``conversation:<id>`` avec deux champs : ``data``
+(la conversation en JSON) et ``version`` (incrémentée à chaque écriture). Rien n'est
+gardé en mémoire locale : n'importe quel worker ou nœud peut traiter n'importe quel tour.
+
+Les écritures sont optimistes : save() vérifie, sous WATCH/MULTI/EXEC, que la version
+en base est toujours celle lue par get(). Si un autre worker a écrit entre-temps,
+ConversationConflictError est levée et l'appelant rejoue le tour sur l'état à jour.
+
+L'expiration après inactivité utilise le TTL de Redis ; l'éviction LRU se configure
+côté serveur (``maxmemory-policy volatile-lru``).
+"""
+
+import json
+
+import redis
+
+from core.conversation_store import ConversationConflictError
+from core.records import Conversation
+
+
+class RedisConversationStore:
+    """
+    Stockage de conversations dans Redis, avec la même interface que ConversationStore.
+    """
+
+    backend = "redis"
+
+    def __init__(
+        self, redis_url="redis://localhost:6379/0", ttl=3600, key_prefix="conversation:"
+    ):
+        """
+        Args:
+            redis_url (str, optional): URL du serveur Redis.
+            ttl (float, optional): Durée d'inactivité en secondes avant expiration (0 = jamais).
+            key_prefix (str, optional): Préfixe des clés des conversations.
+        """
+        self.ttl = ttl
+        self.key_prefix = key_prefix
+        self._client = redis.Redis.from_url(redis_url)
+
+        self._loads = 0
+        self._saves = 0
+        self._conflicts = 0
+
+    def _key(self, conversation_id):
+        return f"{self.key_prefix}{conversation_id}"
+
+    def get(self, conversation_id, default=None):
+        """Lit la conversation et repousse son expiration, ou retourne default si absente."""
+        key = self._key(conversation_id)
+        pipe = self._client.pipeline(transaction=False)
+        pipe.hmget(key, "version", "data")
+        if self.ttl > 0:
+            pipe.expire(key, int(self.ttl))
+        (version, data), *_ = pipe.execute()
+        if data is None:
+            return default
+
+        self._loads += 1
+        return Conversation.from_dict(json.loads(data), version=int(version))
+
+    def __getitem__(self, conversation_id):
+        conversation = self.get(conversation_id)
+        if conversation is None:
+            raise KeyError(conversation_id)
+        return conversation
+
+    def __setitem__(self, conversation_id, conversation):
+        self.save(conversation_id, conversation)
+
+    def __contains__(self, conversation_id):
+        return bool(self._client.exists(self._key(conversation_id)))
+
+    def __len__(self):
+        return sum(1 for _ in self._client.scan_iter(match=f"{self.key_prefix}*"))
+
+    def pop(self, conversation_id, *default):
+        conversation = self.get(conversation_id)
+        self._client.delete(self._key(conversation_id))
+        if conversation is None:
+            if default:
+                return default[0]
+            raise KeyError(conversation_id)
+        return conversation
+
+    def save(self, conversation_id, conversation=None):
+        """
+        Écrit la conversation si personne ne l'a modifiée depuis sa lecture.
+
+        Une conversation qui n'a pas été lue par get() (version None) est une création :
+        l'écriture échoue si la clé existe déjà.
+
+        Args:
+            conversation_id (str): Identifiant de la conversation.
+            conversation (Conversation): Conversation à écrire. Sans conversation, rien n'est écrit :
+                                les conversations ne sont pas gardées en mémoire locale.
+
+        Raises:
+            ConversationConflictError: Si la conversation a été modifiée par un autre worker.
+        """
+        if conversation is None:
+            return
+
+        key = self._key(conversation_id)
+        expected = conversation.version
+        data = json.dumps(conversation.to_dict(), ensure_ascii=False)
+
+        with self._client.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                current = pipe.hget(key, "version")
+                current = int(current) if current is not None else None
+                if current != expected:
+                    raise ConversationConflictError(
+                        f"Conversation {conversation_id} modifiée par un autre worker "
+                        f"(version {current}, attendue {expected})"
+                    )
+
+                version = (current or 0) + 1
+                pipe.multi()
+                pipe.hset(key, mapping={"version": version, "data": data})
+                if self.ttl > 0:
+                    pipe.expire(key, int(self.ttl))
+                pipe.execute()
+            except redis.WatchError:
+                self._conflicts += 1
+                raise ConversationConflictError(
+                    f"Conversation {conversation_id} modifiée par un autre worker"
+                )
+            except ConversationConflictError:
+                self._conflicts += 1
+                raise
+
+        self._saves += 1
+        conversation.version = version
+
+    def flush(self):
+        """Rien à faire : chaque save() est écrit immédiatement."""
+
+    def values(self):
+        """Parcourt toutes les conversations enregistrées, sans repousser leur expiration."""
+        keys = []
+        for key in self._client.scan_iter(match=f"{self.key_prefix}*", count=500):
+            keys.append(key)
+            if len(keys) >= 500:
+                yield from self._load_many(keys)
+                keys = []
+        if keys:
+            yield from self._load_many(keys)
+
+    def _load_many(self, keys):
+        pipe = self._client.pipeline(transaction=False)
+        for key in keys:
+            pipe.hmget(key, "version", "data")
+        for version, data in pipe.execute():
+            if data is not None:
+                yield Conversation.from_dict(json.loads(data), version=int(version))
+
+    def sweep(self):
+        """Rien à faire : Redis supprime lui-même les conversations expirées."""
+        return 0
+
+    def start_sweeper(self, interval=60):
+        """Rien à faire : l'expiration est gérée par Redis."""
+
+    def stop_sweeper(self):
+        """Rien à faire : l'expiration est gérée par Redis."""
+
+    def close(self):
+        """Ferme les connexions au serveur."""
+        self._client.close()
+
+    def metrics(self):
+        """
+        Returns:
+            dict: Conversations enregistrées, lectures, écritures et conflits de ce processus.
+        """
+        return {
+            "backend": self.backend,
+            "live_sessions": len(self),
+            "loads": self._loads,
+            "saves": self._saves,
+            "conflicts": self._conflicts,
+            "ttl": self.ttl,
+        }
@@ -0,0 +1,411 @@
+"""
+Stockage persistant des conversations dans SQLite, avec écriture différée par lots.
+
+Les conversations actives restent en mémoire (ConversationStore, TTL + LRU) et sont
+servies depuis la mémoire. À la fin de chaque tour, save() copie l'état de la
+conversation et les nouveaux messages dans une file d'attente, sans toucher au disque ;
+un thread d'écriture vide cette file toutes les ``flush_interval`` secondes (ou dès que
+``batch_size`` messages attendent) en une seule transaction.
+
+En cas d'arrêt brutal, au plus ``flush_interval`` secondes de tours sont perdues ;
+à l'arrêt normal du processus, la file est vidée avant la fermeture de la base.
+"""
+
+import atexit
+import json
+import sqlite3
+import threading
+import time
+
+from core.conversation_store import ConversationStore
+from core.records import Conversation, timestamp_to_iso
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS conversations (
+        id TEXT PRIMARY KEY,
+        user_id TEXT,
+        created_at TEXT,
+        updated_at REAL,
+        data TEXT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS messages (
+        conversation_id TEXT NOT NULL,
+        position INTEGER NOT NULL,
+        role TEXT,
+        data TEXT NOT NULL,
+        PRIMARY KEY (conversation_id, position)
+    ) WITHOUT ROWID
+    """,
+)
+
+# Requêtes paramétrées, compilées une fois puis réutilisées par le cache de sqlite3
+_UPSERT_CONVERSATION = (
+    "INSERT OR REPLACE INTO conversations (id, user_id, created_at, updated_at, data) "
+    "VALUES (?, ?, ?, ?, ?)"
+)
+_INSERT_MESSAGE = (
+    "INSERT OR REPLACE INTO messages (conversation_id, position, role, data) "
+    "VALUES (?, ?, ?, ?)"
+)
+_SELECT_CONVERSATION = "SELECT data FROM conversations WHERE id = ?"
+_SELECT_MESSAGES = (
+    "SELECT data FROM messages WHERE conversation_id = ? ORDER BY position"
+)
+_SELECT_IDS = "SELECT id FROM conversations ORDER BY updated_at"
+_COUNT_CONVERSATIONS = "SELECT COUNT(*) FROM conversations"
+_DELETE_CONVERSATION = "DELETE FROM conversations WHERE id = ?"
+_DELETE_MESSAGES = "DELETE FROM messages WHERE conversation_id = ?"
+
+
+def sqlite_path(database_uri):
+    """
+    Retourne le chemin du fichier SQLite d'une URI ``sqlite:///chemin``.
+
+    ``sqlite:///chatbot.db`` donne un chemin relatif, ``sqlite:////data/chatbot.db``
+    un chemin absolu et ``sqlite:///:memory:`` une base en mémoire.
+
+    Raises:
+        ValueError: Si l'URI n'est pas une URI SQLite.
+    """
+    prefix = "sqlite:///"
+    if not database_uri or not database_uri.startswith(prefix):
+        raise ValueError(f"URI SQLite invalide: {database_uri}")
+    return database_uri[len(prefix) :]
+
+
+class SQLiteConversationStore:
+    """
+    Stockage de conversations persistant, avec la même interface que ConversationStore.
+
+    Les conversations sorties de la mémoire (TTL, LRU ou redémarrage) sont relues depuis
+    la base au prochain accès.
+    """
+
+    backend = "sqlite"
+
+    def __init__(
+        self,
+        database_uri="sqlite:///chatbot.db",
+        ttl=3600,
+        max_entries=10000,
+        flush_interval=1.0,
+        batch_size=200,
+    ):
+        """
+        Args:
+            database_uri (str, optional): URI de la base (voir sqlite_path).
+            ttl (float, optional): Durée d'inactivité avant qu'une conversation quitte la mémoire.
+            max_entries (int, optional): Nombre maximum de conversations gardées en mémoire.
+            flush_interval (float, optional): Délai maximum en secondes avant l'écriture d'un tour.
+            batch_size (int, optional): Nombre de messages en attente déclenchant une écriture.
+        """
+        self.path = sqlite_path(database_uri)
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._cache = ConversationStore(
+            ttl=ttl, max_entries=max_entries, on_evict=self._on_evict
+        )
+
+        # Une seule connexion, protégée par un verrou ; WAL permet de lire pendant une écriture
+        self._db_lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            self.path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._connection.execute(statement)
+
+        # File d'écriture : identifiant -> [conversation, état JSON, lignes de messages]
+        self._pending_lock = threading.Lock()
+        self._pending = {}
+        # Lot en cours d'écriture : encore visible de get() jusqu'au COMMIT
+        self._writing = {}
+        # Une écriture à la fois : un lot plus récent ne peut pas être écrit avant un plus ancien
+        self._flush_lock = threading.Lock()
+        self._pending_messages = 0
+        # Nombre de messages déjà mis en file par conversation en mémoire
+        self._queued_counts = {}
+        # Conversations sorties de la mémoire alors que leur écriture était en attente
+        self._evicted_pending = set()
+        self._load_lock = threading.Lock()
+
+        self._flushes = 0
+        self._written_messages = 0
+        self._flush_errors = 0
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._writer = threading.Thread(
+            target=self._write_loop, name="conversation-writer", daemon=True
+        )
+        self._writer.start()
+        atexit.register(self.close)
+
+    def get(self, conversation_id, default=None):
+        """Retourne la conversation depuis la mémoire, ou la relit depuis la base."""
+        conversation = self._cache.get(conversation_id)
+        if conversation is not None:
+            return conversation
+
+        with self._load_lock:
+            # Une autre requête a pu la recharger entre-temps
+            conversation = self._cache.get(conversation_id)
+            if conversation is not None:
+                return conversation
+
+            with self._pending_lock:
+                entry = self._pending.get(conversation_id) or self._writing.get(conversation_id)
+                self._evicted_pending.discard(conversation_id)
+            if entry is not None:
+                conversation = entry[0]
+            else:
+                conversation = self._load(conversation_id)
+                if conversation is None:
+                    return default
+                with self._pending_lock:
+                    self._queued_counts[conversation_id] = len(conversation.messages)
+
+            self._cache[conversation_id] = conversation
+        return conversation
+
+    def __getitem__(self, conversation_id):
+        conversation = self.get(conversation_id)
+        if conversation is None:
+            raise KeyError(conversation_id)
+        return conversation
+
+    def __setitem__(self, conversation_id, conversation):
+        self._cache[conversation_id] = conversation
+        self.save(conversation_id, conversation)
+
+    def __contains__(self, conversation_id):
+        return self.get(conversation_id) is not None
+
+    def __len__(self):
+        self.flush()
+        with self._db_lock:
+            return self._connection.execute(_COUNT_CONVERSATIONS).fetchone()[0]
+
+    def pop(self, conversation_id, *default):
+        conversation = self.get(conversation_id)
+        self._cache.pop(conversation_id, None)
+        # Après l'écriture en cours, qui pourrait sinon recréer la conversation
+        with self._flush_lock:
+            with self._pending_lock:
+                self._pending.pop(conversation_id, None)
+                self._queued_counts.pop(conversation_id, None)
+            with self._db_lock:
+                self._connection.execute("BEGIN")
+                self._connection.execute(_DELETE_MESSAGES, (conversation_id,))
+                self._connection.execute(_DELETE_CONVERSATION, (conversation_id,))
+                self._connection.execute("COMMIT")
+
+        if conversation is None:
+            if default:
+                return default[0]
+            raise KeyError(conversation_id)
+        return conversation
+
+    def save(self, conversation_id, conversation=None):
+        """
+        Met en file l'état de la conversation et ses nouveaux messages, sans écrire sur le disque.
+
+        Args:
+            conversation_id (str): Identifiant de la conversation.
+            conversation (Conversation, optional): Conversation ; par défaut celle en mémoire.
+        """
+        if conversation is None:
+            conversation = self._cache.get(conversation_id)
+            if conversation is None:
+                return
+
+        state = conversation.to_dict(include_messages=False)
+        state_json = json.dumps(state, ensure_ascii=False)
+        messages = conversation.messages
+
+        with self._pending_lock:
+            start = self._queued_counts.get(conversation_id, 0)
+            rows = [
+                (
+                    conversation_id,
+                    position,
+                    message.role.value,
+                    json.dumps(message.to_dict(), ensure_ascii=False),
+                )
+                for position, message in enumerate(messages[start:], start)
+            ]
+            self._queued_counts[conversation_id] = start + len(rows)
+
+            entry = self._pending.get(conversation_id)
+            if entry is None:
+                self._pending[conversation_id] = [conversation, state_json, rows]
+            else:
+                entry[1] = state_json
+                entry[2].extend(rows)
+            self._pending_messages += len(rows)
+            wake = self._pending_messages >= self.batch_size
+
+        if wake:
+            self._wake.set()
+
+    def flush(self):
+        """
+        Écrit immédiatement les tours en attente, en une transaction.
+
+        Returns:
+            int: Nombre de conversations écrites.
+        """
+        with self._flush_lock:
+            return self._flush()
+
+    def _flush(self):
+        with self._pending_lock:
+            batch, self._pending = self._pending, {}
+            self._writing = batch
+            self._pending_messages = 0
+        if not batch:
+            return 0
+
+        now = time.time()
+        conversation_rows = []
+        message_rows = []
+        for conversation_id, (conversation, state_json, rows) in batch.items():
+            conversation_rows.append(
+                (
+                    conversation_id,
+                    conversation.user_id,
+                    timestamp_to_iso(conversation.created_at),
+                    now,
+                    state_json,
+                )
+            )
+            message_rows.extend(rows)
+
+        try:
+            with self._db_lock:
+                self._connection.execute("BEGIN")
+                try:
+                    self._connection.executemany(_UPSERT_CONVERSATION, conversation_rows)
+                    self._connection.executemany(_INSERT_MESSAGE, message_rows)
+                    self._connection.execute("COMMIT")
+                except Exception:
+                    self._connection.execute("ROLLBACK")
+                    raise
+        except Exception as e:
+            print(f"Erreur lors de l'écriture des conversations: {str(e)}")
+            self._flush_errors += 1
+            self._requeue(batch)
+            return 0
+
+        with self._pending_lock:
+            self._writing = {}
+            self._flushes += 1
+            self._written_messages += len(message_rows)
+            # Oublier les conversations sorties de la mémoire maintenant qu'elles sont écrites
+            for conversation_id in batch:
+                if (
+                    conversation_id in self._evicted_pending
+                    and conversation_id not in self._pending
+                ):
+                    self._evicted_pending.discard(conversation_id)
+                    self._queued_counts.pop(conversation_id, None)
+        return len(batch)
+
+    def _requeue(self, batch):
+        """Remet en file un lot non écrit, devant les tours arrivés depuis."""
+        with self._pending_lock:
+            self._writing = {}
+            for conversation_id, entry in batch.items():
+                newer = self._pending.get(conversation_id)
+                if newer is not None:
+                    entry[1] = newer[1]
+                    entry[2].extend(newer[2])
+                self._pending[conversation_id] = entry
+                self._pending_messages += len(entry[2])
+
+    def _on_evict(self, conversation_id):
+        with self._pending_lock:
+            if conversation_id in self._pending or conversation_id in self._writing:
+                self._evicted_pending.add(conversation_id)
+            else:
+                self._queued_counts.pop(conversation_id, None)
+
+    def _write_loop(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def _load(self, conversation_id):
+        with self._db_lock:
+            row = self._connection.execute(
+                _SELECT_CONVERSATION, (conversation_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            messages = self._connection.execute(
+                _SELECT_MESSAGES, (conversation_id,)
+            ).fetchall()
+
+        data = json.loads(row[0])
+        data["messages"] = [json.loads(message) for (message,) in messages]
+        return Conversation.from_dict(data)
+
+    def values(self):
+        """Parcourt toutes les conversations enregistrées, en mémoire ou en base."""
+        self.flush()
+        with self._db_lock:
+            conversation_ids = [
+                row[0] for row in self._connection.execute(_SELECT_IDS).fetchall()
+            ]
+        for conversation_id in conversation_ids:
+            # peek : un parcours complet ne doit pas réordonner la LRU
+            conversation = self._cache.peek(conversation_id) or self._load(conversation_id)
+            if conversation is not None:
+                yield conversation
+
+    def sweep(self):
+        """Retire de la mémoire les conversations expirées (elles restent en base)."""
+        return self._cache.sweep()
+
+    def start_sweeper(self, interval=60):
+        self._cache.start_sweeper(interval)
+
+    def stop_sweeper(self):
+        self._cache.stop_sweeper()
+
+    def close(self):
+        """Arrête le thread d'écriture, écrit les tours en attente et ferme la base."""
+        if self._stop.is_set():
+            return
+        self._cache.stop_sweeper()
+        self._stop.set()
+        self._wake.set()
+        self._writer.join()
+        self.flush()
+        with self._db_lock:
+            self._connection.close()
+
+    def metrics(self):
+        """
+        Returns:
+            dict: Compteurs de la mémoire (voir ConversationStore.metrics) et de l'écriture.
+        """
+        metrics = self._cache.metrics()
+        with self._pending_lock:
+            metrics.update(
+                {
+                    "backend": self.backend,
+                    "pending_conversations": len(self._pending),
+                    "pending_messages": self._pending_messages,
+                    "flushes": self._flushes,
+                    "written_messages": self._written_messages,
+                    "flush_errors": self._flush_errors,
+                }
+            )
+        return metrics
@@ -0,0 +1,79 @@
+"""
+Vérifie en masse des conversations exportées avec le lexique de mots interdits.
+
+Les conversations sont lues au format de GET /conversation/<id>, soit une par ligne
+(JSON Lines), soit sous forme de liste JSON. Les messages contenant des mots interdits
+sont écrits sur la sortie standard, un objet JSON par ligne. Aucun état n'est modifié.
+
+Exemple:
+    python scan_history.py conversations.jsonl --words banned_words.txt --workers 4
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from utils.banned_words_filter import BannedWordsFilter
+
+
+def read_conversations(path):
+    """Lit les conversations d'un fichier JSON Lines ou d'une liste JSON."""
+    with open(path, "r", encoding="utf-8") as file:
+        first = file.read(1)
+        file.seek(0)
+        if first == "[":
+            yield from json.load(file)
+            return
+        for line in file:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Vérifie l'historique des conversations avec le lexique de mots interdits"
+    )
+    parser.add_argument("files", nargs="+", help="Fichiers de conversations exportées")
+    parser.add_argument(
+        "--words", help="Fichier de mots interdits (.txt ou .json), liste intégrée par défaut"
+    )
+    parser.add_argument(
+        "--fuzzy-distance",
+        type=int,
+        default=0,
+        help="Distance d'édition pour détecter les fautes de frappe (0 = désactivée)",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Nombre de processus")
+    parser.add_argument(
+        "--chunk-size", type=int, default=500, help="Messages envoyés à un processus à la fois"
+    )
+    args = parser.parse_args()
+
+    word_filter = BannedWordsFilter(
+        banned_words_file=args.words, fuzzy_distance=args.fuzzy_distance
+    )
+
+    def conversations():
+        for path in args.files:
+            yield from read_conversations(path)
+
+    start = time.perf_counter()
+    hit_count = 0
+    for hit in word_filter.scan_conversations(
+        conversations(), workers=args.workers, chunk_size=args.chunk_size
+    ):
+        hit["lexicon_version"] = word_filter.version
+        print(json.dumps(hit, ensure_ascii=False))
+        hit_count += 1
+
+    elapsed = time.perf_counter() - start
+    print(
+        f"{hit_count} message(s) avec des mots interdits, analyse en {elapsed:.2f} s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
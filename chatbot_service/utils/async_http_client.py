@@ -0,0 +1,148 @@
+"""
+Client HTTP asynchrone (httpx) pour la variante ASGI du service (asgi.py).
+
+Même comportement que HTTPClient (utils/http_client.py) : pool de connexions,
+échéance par appel couvrant les nouvelles tentatives, nouvelles tentatives avec
+jitter pour les appels idempotents, métriques par service appelé. Un appel en attente
+n'occupe ni thread ni worker : la boucle d'événements sert les autres requêtes.
+
+Exemple:
+    client = AsyncHTTPClient(timeout=10, retries=2)
+    response = await client.post(f"{url}/evaluate", json=payload, timeout=5, idempotent=True)
+"""
+
+import asyncio
+import random
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+from utils.http_client import IDEMPOTENT_METHODS, RETRY_STATUSES, _UpstreamStats
+
+
+class DeadlineExceeded(httpx.TimeoutException):
+    """L'échéance de l'appel est dépassée (nouvelles tentatives comprises)."""
+
+
+class AsyncHTTPClient:
+    """httpx.AsyncClient avec échéances, nouvelles tentatives et métriques."""
+
+    def __init__(
+        self,
+        timeout=10.0,
+        connect_timeout=2.0,
+        retries=2,
+        backoff=0.1,
+        max_backoff=2.0,
+        pool_size=100,
+        window=1000,
+    ):
+        """
+        Args:
+            timeout (float, optional): Échéance par défaut d'un appel, en secondes.
+            connect_timeout (float, optional): Délai maximum d'établissement d'une connexion.
+            retries (int, optional): Nouvelles tentatives au plus pour un appel idempotent.
+            backoff (float, optional): Attente de base avant la première nouvelle tentative.
+            max_backoff (float, optional): Attente maximum entre deux tentatives.
+            pool_size (int, optional): Connexions ouvertes au plus (tous hôtes confondus).
+            window (int, optional): Nombre de latences gardées par service pour les centiles.
+        """
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.window = window
+
+        # Créé au démarrage : la préparation du contexte TLS prend ~0,2 s, à ne pas faire
+        # payer à la première requête. Les connexions sont ouvertes dans la boucle du serveur.
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+            )
+        )
+        self._stats = {}
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    async def request(
+        self, method, url, timeout=None, idempotent=None, retries=None, upstream=None, **kwargs
+    ):
+        """
+        Envoie une requête et renvoie la réponse (quel que soit son code HTTP).
+
+        Mêmes arguments que HTTPClient.request ; **kwargs est passé à httpx
+        (json, data, files, headers...).
+
+        Raises:
+            DeadlineExceeded: Si l'échéance est dépassée.
+            httpx.HTTPError: Si la dernière tentative échoue.
+        """
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        if retries is None:
+            retries = self.retries if idempotent else 0
+        upstream = upstream or urlsplit(url).netloc
+        budget = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + budget
+
+        attempt = 0
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise DeadlineExceeded(f"{method} {url}: échéance de {budget}s dépassée")
+                try:
+                    response = await self.client.request(
+                        method,
+                        url,
+                        timeout=httpx.Timeout(remaining, connect=min(self.connect_timeout, remaining)),
+                        **kwargs,
+                    )
+                except httpx.TransportError as error:
+                    if attempt >= retries:
+                        if isinstance(error, httpx.TimeoutException):
+                            raise DeadlineExceeded(f"{method} {url}: {error}") from error
+                        raise
+                else:
+                    if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                        self._record(upstream, start, attempt, response.status_code >= 500)
+                        return response
+
+                # Attente aléatoire (full jitter) sans dépasser l'échéance
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+                if time.monotonic() + delay >= deadline:
+                    raise DeadlineExceeded(f"{method} {url}: échéance de {budget}s dépassée")
+                await asyncio.sleep(delay)
+                attempt += 1
+        except httpx.HTTPError:
+            self._record(upstream, start, attempt, True)
+            raise
+
+    def _record(self, upstream, start, retries, error):
+        # Une seule boucle d'événements : pas de verrou nécessaire
+        stats = self._stats.get(upstream)
+        if stats is None:
+            stats = self._stats[upstream] = _UpstreamStats(self.window)
+        stats.calls += 1
+        stats.retries += retries
+        stats.errors += error
+        stats.latencies.append(time.monotonic() - start)
+
+    def metrics(self):
+        """
+        Returns:
+            dict: Mêmes métriques que HTTPClient.metrics().
+        """
+        return {upstream: stats.to_dict() for upstream, stats in self._stats.items()}
+
+    async def close(self):
+        await self.client.aclose()
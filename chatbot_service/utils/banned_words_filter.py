@@ -4,9 +4,17 @@ Ce module surveille les messages des utilisateurs, détecte les mots vulgaires o
 et peut terminer une conversation si les règles sont violées plusieurs fois.
 """
 
-import re
 import json
 import logging
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from .fuzzy_index import FuzzyIndex
+from .text_normalizer import canonicalize
+from .word_matcher import WordMatcher
 
 # Configuration du logging
 logging.basicConfig(
@@ -15,13 +23,766 @@ logging.basicConfig(
 logger = logging.getLogger("banned_words_filter")
 
 
+class CompiledLexicon:
+    """
+    Lexique canonicalisé et compilé en automate, en lecture seule.
+
+    Chaque mot est ramené à sa forme canonique (voir text_normalizer) ; les messages
+    subissent la même transformation avant un unique passage de l'automate.
+    Si fuzzy_distance > 0, les mots du message sont aussi comparés aux formes de base
+    à une distance d'édition bornée (voir fuzzy_index).
+    """
+
+    __slots__ = ("words", "version", "matcher", "fuzzy", "_originals")
+
+    def __init__(self, words, version=0, fuzzy_distance=0, fuzzy_min_length=5):
+        """
+        Args:
+            words (iterable): Mots interdits tels qu'écrits dans le lexique.
+            version (int, optional): Numéro de version du lexique (incrémenté à chaque rechargement).
+            fuzzy_distance (int, optional): Distance d'édition maximale de la recherche approximative.
+                                          Par défaut: 0 (désactivée).
+            fuzzy_min_length (int, optional): Longueur minimale des mots recherchés approximativement.
+        """
+        self.words = tuple(words)
+        self.version = version
+
+        # Forme canonique -> premier mot du lexique qui la produit
+        originals = {}
+        for word in self.words:
+            canonical = canonicalize(word).strip()
+            if canonical:
+                originals.setdefault(canonical, word)
+
+        self._originals = originals
+        self.matcher = WordMatcher(originals)
+        self.fuzzy = (
+            FuzzyIndex(originals, fuzzy_distance, fuzzy_min_length)
+            if fuzzy_distance > 0
+            else None
+        )
+
+    def find_all(self, message):
+        """
+        Retourne les mots du lexique présents dans un message.
+
+        Args:
+            message (str): Message brut de l'utilisateur.
+
+        Returns:
+            list: Mots trouvés, tels qu'écrits dans le lexique.
+        """
+        originals = self._originals
+        text = canonicalize(message)
+        found = [originals[word] for word in self.matcher.find_all(text)]
+        if self.fuzzy is not None:
+            for word in self.fuzzy.find_all(text):
+                if originals[word] not in found:
+                    found.append(originals[word])
+        return found
+
+
+# Lexiques déjà compilés, pour ne compiler qu'une fois par processus
+_compiled_lexicons = {}
+
+
+def get_compiled_lexicon(words, fuzzy_distance=0, fuzzy_min_length=5):
+    """
+    Retourne le lexique compilé pour une liste de mots, en le construisant au premier appel.
+
+    Args:
+        words (list): Mots interdits.
+        fuzzy_distance (int, optional): Distance de la recherche approximative (0 = désactivée).
+        fuzzy_min_length (int, optional): Longueur minimale des mots recherchés approximativement.
+
+    Returns:
+        CompiledLexicon: Lexique partagé pour cette liste et ces paramètres.
+    """
+    key = (tuple(words), fuzzy_distance, fuzzy_min_length)
+    lexicon = _compiled_lexicons.get(key)
+    if lexicon is None:
+        lexicon = CompiledLexicon(
+            key[0], fuzzy_distance=fuzzy_distance, fuzzy_min_length=fuzzy_min_length
+        )
+        _compiled_lexicons[key] = lexicon
+    return lexicon
+
+
+# Lexique compilé dans chaque processus du pool de scan en masse
+_scan_worker_lexicon = None
+
+
+def _init_scan_worker(words, fuzzy_distance, fuzzy_min_length):
+    global _scan_worker_lexicon
+    _scan_worker_lexicon = get_compiled_lexicon(words, fuzzy_distance, fuzzy_min_length)
+
+
+def _scan_chunk(chunk):
+    return _find_in_chunk(_scan_worker_lexicon, chunk)
+
+
+def _find_in_chunk(lexicon, chunk):
+    """Retourne (position, mots trouvés) pour les messages du lot qui contiennent des mots interdits."""
+    hits = []
+    for position, message in chunk:
+        if message and isinstance(message, str):
+            found = lexicon.find_all(message)
+            if found:
+                hits.append((position, found))
+    return hits
+
+
+def _chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def read_banned_words(filepath):
+    """
+    Lit une liste de mots interdits depuis un fichier, sans modifier aucun filtre.
+
+    Args:
+        filepath (str): Chemin vers le fichier contenant les mots interdits.
+                      Peut être un fichier texte (un mot par ligne) ou JSON.
+
+    Returns:
+        tuple: Mots interdits en minuscules.
+
+    Raises:
+        FileNotFoundError: Si le fichier n'existe pas.
+        ValueError: Si le format du fichier n'est pas reconnu ou valide.
+    """
+    if filepath.endswith(".json"):
+        with open(filepath, "r", encoding="utf-8") as file:
+            data = json.load(file)
+            if isinstance(data, list):
+                return tuple(word.lower() for word in data)
+            elif isinstance(data, dict) and "words" in data:
+                return tuple(word.lower() for word in data["words"])
+            else:
+                raise ValueError(
+                    "Format JSON invalide. Attendu: liste ou dict avec clé 'words'"
+                )
+    elif filepath.endswith(".txt") or filepath.endswith(".docx"):
+        # Pour .docx, cela suppose que le contenu a été extrait au préalable
+        words = []
+        with open(filepath, "r", encoding="utf-8") as file:
+            for line in file:
+                word = line.strip()
+                if word and not word.startswith("#"):  # Ignorer les commentaires
+                    words.append(word.lower())
+        return tuple(words)
+    else:
+        raise ValueError(f"Format de fichier non pris en charge: {filepath}")
+
+
+# Liste par défaut des mots à bannir (partagée, en lecture seule).
+# Seules les formes de base sont nécessaires : accents, leetspeak, lettres répétées
+# et lettres espacées sont ramenés à la même forme canonique que les messages.
+DEFAULT_BANNED_WORDS = (
+    # Insultes
+    "connard",
+    "salopard",
+    "enculé",
+    "pute",
+    "tepu",
+    "merde",
+    "trou du cul",
+    "trou de balle",
+    "bâtard",
+    "batarde",
+    "chien",
+    "chienne",
+    "nègre",
+    "négro",
+    "goudou",
+    "lesboss",
+    "travelo",
+    "retardé",
+    # Violence
+    "tuer",
+    "hitler",
+    "haïr",
+    "haine",
+    "meurtre",
+    "détruire",
+    "agression",
+    # Sexuel
+    "sexe",
+    "pornographie",
+    "porno",
+    "viol",
+    "violer",
+    "pédophile",
+    # Drogues
+    "drogue",
+    "shit",
+    "cocaïne",
+    "héroïne",
+    "pétard",
+    "proto",
+    "cannabis",
+    "gandja",
+    "moulaga",
+    "moula",
+    "rata",
+    # Activités illégales
+    "escroquerie",
+    "arnaque",
+    "mensonge",
+    "mytho",
+    "myto",
+    # Argot
+    "wesh",
+    "nique",
+    "téma",
+    "bico",
+    "rebeu",
+    "renoi",
+    "feuj",
+    "gadji",
+    "boloss",
+    "bédave",
+    "zbeul",
+    "frelos",
+    "tocard",
+    "crari",
+    "yomb",
+    "poto",
+    "binks",
+    "kichta",
+    "pélo",
+    "gova",
+    "bicrave",
+    "charo",
+    "pointeur",
+    "faya",
+    "la mif",
+    "tiser",
+    "teubé",
+    "scred",
+    # Expressions grossières
+    "j'vais t'défoncer",
+    "ferme-la",
+    "ftg",
+    "j'vais t'enculer",
+    "espèce d'abruti",
+    "connasse",
+    "salope",
+    "lopsa",
+    "salaud",
+    "fdp",
+    "bordel",
+    "ta gueule",
+    "tg",
+    "gros con",
+    "grosse conne",
+    "va te faire foutre",
+    "enculeur",
+    "pédé",
+    "sale race",
+    "bouffon",
+    "débile",
+    "mongol",
+    "raté",
+    "idiot",
+    "crétin",
+    "abruti",
+    # Prostitution
+    "escort",
+    "tchoin",
+    "crasseuse",
+    "tapin",
+    "hustler",
+    "mac",
+    "bicraveuse",
+    "bicraveur",
+    # Argent illégal
+    "jnoun",
+    "liasse",
+    "biff",
+    "flouze",
+    "flouz",
+    "oseille",
+    "tuner",
+    "zeyo",
+    "placard",
+    "business sale",
+    "onlyfan",
+    "mym",
+    # Sexuel / Anatomie
+    "zeubi",
+    "zebi",
+    "zob",
+    "zboub",
+    "imbécile",
+    "ma gueule",
+    "putain",
+    "casses-toi",
+    "je t'emmerde",
+    "barre-toi",
+    "fait-chier",
+    "catin",
+    "bamboula",
+    "biatch",
+    "bitch",
+    "bite",
+    "teub",
+    "zgeg",
+    "zizi",
+    "bouffone",
+    "branleur",
+    "casse-couille",
+    # Armes
+    "arme",
+    "kalash",
+    "couteau",
+    # Autres insultes
+    "ta race",
+    "garce",
+    "baise",
+    "baiser",
+    "je m'en fou",
+    "je m'en fiche",
+    "mort",
+    "assassinat",
+    "homicide",
+    "féminicide",
+    "blaireau",
+    "coquin",
+    "coquine",
+    "boucaque",
+    "boukak",
+    "bougnoul",
+    "bounioul",
+    "casos",
+    "ksos",
+    "chintoc",
+    "chintok",
+    "cochon",
+    "cochonne",
+    "kouakoubé",
+    "quoicoubé",
+    "dégénéré",
+    "débilos",
+    "pauv' con",
+    "pov' type",
+    "bougnoule",
+    "grosse vache",
+    "boudin",
+    "clochard",
+    "clocharde",
+    "cul-terreux",
+    "foiré",
+    "pourriture",
+    "tocarde",
+    "va mourir",
+    "nul à chier",
+    "pleurnicheur",
+    "pleureuse",
+    "putréfié",
+    "raton",
+    "chinetoque",
+    "youpin",
+    "youpine",
+    "tarlouze",
+    "tafiolle",
+    "gouine",
+    "pd",
+    "bouffeur de porc",
+    "niaquoué",
+    "face de craie",
+    "michto",
+    "michtonneuse",
+    "j'vais t'exploser",
+    "j'vais t'buter",
+    "crève",
+    "écraser",
+    "défonce",
+    "marave",
+    "tabasser",
+    "étriper",
+    "buter",
+    "égorger",
+    "flinguer",
+    "pisser sur ta tombe",
+    "empoisonner",
+    "pendaison",
+    "pendre",
+    "génocide",
+    "exterminer",
+    # Sites pornographiques
+    "gang bang",
+    "brazzers",
+    "redtube",
+    "pornhub",
+    "choper",
+    "se faire sucer",
+    "pipe",
+    "branlette",
+    "fellation",
+    "débauche",
+    "dévergondée",
+    "milf",
+    "cougar",
+    "nympho",
+    "nymphomane",
+    "sodomie",
+    "xhamster",
+    "xvideos",
+    "pornstar",
+    "film x",
+    "actrice x",
+    # Drogues spécifiques
+    "lsd",
+    "ecsta",
+    "ecstasy",
+    "champis",
+    "meth",
+    "méthamphétamine",
+    "kétamine",
+    "crack",
+    "opium",
+    "speed",
+    "ghb",
+    "codeine",
+    "lean",
+    "purple drank",
+    "xanax",
+    # Crime organisé
+    "racket",
+    "trafiquant",
+    "magouille",
+    "dealer",
+    "passeur",
+    "yakuza",
+    "mafia",
+    "cartel",
+    "braquage",
+    "cagoulé",
+    "go fast",
+    "suceuse",
+    "suceur",
+    "femelle",
+    "tapette",
+    "hataille",
+    "rataille",
+    # Variantes orthographiques / fautes sur "connard"
+    "conar",
+    "konard",
+    "konar",
+    "connerd",
+    "connhard",
+    "connarde",
+    "konhard",
+    # "enculé" variations
+    "enculler",
+    "enqulé",
+    "enku",
+    "encu",
+    "enquler",
+    "encull",
+    "enkulé",
+    # "pute" variations
+    "poute",
+    "putin",
+    "pouta",
+    "poutre",
+    "poutay",
+    "putch",
+    "pu*e",
+    "pouteuh",
+    "poutasse",
+    "putinasse",
+    "puten",
+    "ptn",
+    # "merde" variations
+    "merd",
+    "mairde",
+    "marde",
+    "mherde",
+    "maerde",
+    "merdasse",
+    # "bâtard" variations
+    "batar",
+    "btard",
+    "btrd",
+    # "trou du cul"
+    "trouduk",
+    "troucul",
+    "trooduku",
+    "troudec",
+    "troudkul",
+    "troudk",
+    "trouducul",
+    # "chien/chienne"
+    "chienneuh",
+    "chyen",
+    "chian",
+    "tchien",
+    "shien",
+    # "salopard"
+    "salopar",
+    "saloparde",
+    "salaupar",
+    "salopehard",
+    "saloperd",
+    "saleopard",
+    "zalopard",
+    # "pédé"
+    "peday",
+    "pedey",
+    "pedeuh",
+    "pedu",
+    "pedy",
+    # "nique"
+    "nik",
+    "niq",
+    "niquer",
+    "niqu",
+    "n*que",
+    # "salope"
+    "salop",
+    "salopeuh",
+    "salaupe",
+    "saleoppe",
+    # "tg" / "ta gueule"
+    "ta guele",
+    "tgueule",
+    "tagueule",
+    "tgule",
+    "tgu",
+    "ta g",
+    "fermetag",
+    "t'as gueule",
+    # "bite" / "zgeg" / "zizi"
+    "bitt",
+    "byt",
+    "zize",
+    "zigzeg",
+    "bizzy",
+    # "teub"
+    "tbeu",
+    "tub",
+    "taub",
+    "tbeub",
+    # "branleur"
+    "branleure",
+    "branleu",
+    "branleureuh",
+    "branlheure",
+    "brenleur",
+    "brenloeur",
+    # "salope" combiné
+    "truie humaine",
+    # "fuck" / "foutre"
+    "fuk",
+    "f*ck",
+    "fout",
+    "vaffanculo",
+    "fooutre",
+    "faque",
+    "fawk",
+    "phoque",
+    "fuque",
+    "fuq",
+    # Générations avec lettres substituées
+    "p*te",
+    "vaf",
+    "trouduc",
+    "meuf",
+    "sex",
+    # "mongol", "débile"
+    "mongole",
+    "mongolien",
+    "debilous",
+    "débyle",
+    # "haine / tuer"
+    "haïss",
+    "tue-le",
+    "massacrer",
+    "detruir",
+    "tueurs",
+    "kille",
+    "tuee",
+    "destruction",
+    "assassins",
+    # "pédé" déguisé
+    "pedok",
+    "pedo",
+    "pédéstyle",
+    "petay",
+    "pédézouz",
+    "pdy",
+    "peydé",
+    "pedei",
+    # "porno"
+    "pornn",
+    "pourn",
+    "porny",
+    "p*rn",
+    "pron",
+    "pounrn",
+    "pornos",
+    "pornni",
+    # "violer / viol"
+    "viole",
+    "violay",
+    "vyolet",
+    "vyoler",
+    "violate",
+    "raper",
+    "rapay",
+    # Divers déguisés ou allongés
+    "puttttt",
+    "tgklm",
+    "tgms",
+    "tgconnard",
+    "tgpd",
+    "mgtg",
+    "niksa",
+    "niquezvous",
+    "niquez",
+    "niklm",
+    "enculax",
+    "niklamerde",
+    "enculord",
+    "saleconard",
+    "ptnms",
+    "ptnm",
+    "tgfdp",
+    "fermelagueule",
+    "connasseuh",
+    "saleenculé",
+    "nickyou",
+    "nicklamer",
+    # Variation de nombres / l33t
+    "con",
+    "oseil",
+    "bitc",
+    "tiz",
+    # Variations de "connard"
+    "konarh",
+    "conera",
+    "konarx",
+    "koniard",
+    # Variations de "salope"
+    "salopex",
+    "salopei",
+    # Variations de "merde"
+    "maerd",
+    "merda",
+    "merdo",
+    "merdx",
+    "maerda",
+    "merdax",
+    # Variations de "pute"
+    "paute",
+    "p ute",
+    "p_ute",
+    "piute",
+    # Variations de "enculé"
+    "enkul",
+    "enkuli",
+    "enculex",
+    "encula",
+    "enkulex",
+    "enkula",
+    "enkulix",
+    "enculei",
+    # Variations de "bite"
+    "bitx",
+    "bitex",
+    "biti",
+    "bitix",
+    "bita",
+    # Variations de "salaud"
+    "saloud",
+    "salaudx",
+    "salaudi",
+    "saloudx",
+    "salaude",
+    "saloude",
+    # Variations de "tg" (ta gueule)
+    "tagueul",
+    "tagueulix",
+    "tagueula",
+    "tgueulex",
+    "tgueula",
+    "tgueulix",
+    "tagueulei",
+    # Variations de "chier"
+    "chier",
+    "chieri",
+    "chierx",
+    "chiere",
+    "chierix",
+    "chiera",
+    "chierex",
+    "chierei",
+    "chierax",
+    # Variations de "fuck"
+    "fack",
+    "fück",
+    "f*k",
+    "f_ck",
+    "ph*ck",
+    "fvck",
+    "fak",
+    "fick",
+    "phack",
+    "phick",
+    "fvk",
+    "fücq",
+    "f*qu",
+    "fuke",
+    "phuq",
+    "phuk",
+    # Variations de "enfoiré"
+    "enfoiré",
+    "enfoirex",
+    "enfoira",
+    "enfoirei",
+    "enfoirax",
+    "enfoired",
+    "enfoirad",
+    # Termes originaux et variations de "fuck"
+    "foque",
+    "fouque",
+    "fouq",
+    # Termes originaux et variations de "enfoiré"
+    "enfoirés",
+    "enfoyer",
+    "enfoirard",
+    "enfoir",
+)
+
+
 class BannedWordsFilter:
     """
     Filtre les mots interdits dans les conversations utilisateur
     et fournit des mécanismes d'avertissement et de terminaison de conversation.
+
+    Le filtre ne contient que le lexique et l'automate compilé : une seule instance
+    est partagée par toutes les conversations du processus. Le nombre de violations
+    est conservé dans l'enregistrement de chaque conversation et passé à check_message.
+
+    Le lexique peut être rechargé à chaud (reload ou surveillance du fichier) : le nouvel
+    automate est construit en arrière-plan puis remplace l'ancien en une seule affectation,
+    sans bloquer les messages en cours ni toucher aux conversations.
     """
 
-    def __init__(self, banned_words_file=None, max_violations=2):
+    def __init__(
+        self,
+        banned_words_file=None,
+        max_violations=2,
+        fuzzy_distance=0,
+        fuzzy_min_length=5,
+    ):
         """
         Initialise le filtre de mots interdits.
 
@@ -30,972 +791,52 @@ class BannedWordsFilter:
                                              Par défaut: None, dans ce cas utilise la liste intégrée.
             max_violations (int, optional): Nombre maximum de violations avant terminaison.
                                           Par défaut: 2.
+            fuzzy_distance (int, optional): Distance d'édition maximale pour détecter les fautes
+                                          de frappe sur les formes de base. Par défaut: 0 (désactivée).
+            fuzzy_min_length (int, optional): Longueur minimale d'un mot pour la recherche approximative.
+                                            Par défaut: 5.
         """
         self.max_violations = max_violations
-        self.user_violations = (
-            {}
-        )  # Dictionnaire pour suivre les violations par conversation
-
-        # Liste par défaut des mots à bannir
-        self.banned_words = [
-            # Insultes
-            "connard",
-            "salopard",
-            "enculé",
-            "pute",
-            "tepu",
-            "merde",
-            "trou du cul",
-            "trou de balle",
-            "bâtard",
-            "batarde",
-            "chien",
-            "chienne",
-            "nègre",
-            "négro",
-            "goudou",
-            "lesboss",
-            "travelo",
-            "retardé",
-            # Violence
-            "tuer",
-            "hitler",
-            "haïr",
-            "haine",
-            "meurtre",
-            "détruire",
-            "agression",
-            # Sexuel
-            "sexe",
-            "pornographie",
-            "porno",
-            "viol",
-            "violer",
-            "pédophile",
-            # Drogues
-            "drogue",
-            "shit",
-            "cocaïne",
-            "héroïne",
-            "pétard",
-            "proto",
-            "cannabis",
-            "gandja",
-            "moulaga",
-            "moula",
-            "rata",
-            # Activités illégales
-            "escroquerie",
-            "arnaque",
-            "mensonge",
-            "mytho",
-            "myto",
-            # Argot
-            "wesh",
-            "nique",
-            "téma",
-            "bico",
-            "rebeu",
-            "renoi",
-            "feuj",
-            "gadji",
-            "boloss",
-            "bédave",
-            "zbeul",
-            "frelos",
-            "tocard",
-            "crari",
-            "yomb",
-            "poto",
-            "binks",
-            "kichta",
-            "pélo",
-            "gova",
-            "bicrave",
-            "charo",
-            "pointeur",
-            "faya",
-            "la mif",
-            "tiser",
-            "teubé",
-            "scred",
-            # Expressions grossières
-            "nique ta mère",
-            "nique ta race",
-            "j'vais t'défoncer",
-            "ferme-la",
-            "ftg",
-            "j'vais t'enculer",
-            "grosse merde",
-            "espèce d'abruti",
-            "dégage connard",
-            "sale fils de pute",
-            "connasse",
-            "salope",
-            "lopsa",
-            "salaud",
-            "fils de pute",
-            "fdp",
-            "fils de chien",
-            "bordel",
-            "ta gueule",
-            "tg",
-            "ferme ta gueule",
-            "gros con",
-            "grosse conne",
-            "va te faire foutre",
-            "enculeur",
-            "pédé",
-            "sale race",
-            "bouffon",
-            "débile",
-            "mongol",
-            "raté",
-            "idiot",
-            "crétin",
-            "abruti",
-            # Prostitution
-            "escort",
-            "tchoin",
-            "crasseuse",
-            "tapin",
-            "hustler",
-            "mac",
-            "bicraveuse",
-            "bicraveur",
-            # Argent illégal
-            "jnoun",
-            "liasse",
-            "biff",
-            "flouze",
-            "flouz",
-            "oseille",
-            "tuner",
-            "zeyo",
-            "placard",
-            "business sale",
-            "onlyfan",
-            "mym",
-            # Sexuel / Anatomie
-            "zeubi",
-            "zebi",
-            "zob",
-            "zboub",
-            "imbécile",
-            "ma gueule",
-            "putain",
-            "casses-toi",
-            "je t'emmerde",
-            "barre-toi",
-            "fait-chier",
-            "catin",
-            "tapin",
-            "bamboula",
-            "biatch",
-            "bitch",
-            "bite",
-            "teub",
-            "zgeg",
-            "zizi",
-            "bouffone",
-            "branleur",
-            "casse-couille",
-            # Armes
-            "arme",
-            "kalash",
-            "couteau",
-            # Autres insultes
-            "ta race",
-            "garce",
-            "baise",
-            "baiser",
-            "je m'en fou",
-            "je m'en fiche",
-            "nique ta grand-mère",
-            "nique ton père",
-            "nique ta sœur",
-            "nique ton frère",
-            "nique tes morts",
-            "mort",
-            "meurtre",
-            "tuer",
-            "assassinat",
-            "homicide",
-            "féminicide",
-            "blaireau",
-            "coquin",
-            "coquine",
-            "boucaque",
-            "boukak",
-            "bougnoul",
-            "bounioul",
-            "casos",
-            "ksos",
-            "chintoc",
-            "chintok",
-            "cochon",
-            "cochonne",
-            "kouakoubé",
-            "quoicoubé",
-            "dégénéré",
-            "sous-merde",
-            "débilos",
-            "pauv' con",
-            "pov' type",
-            "bougnoule",
-            "grosse vache",
-            "boudin",
-            "clochard",
-            "clocharde",
-            "cul-terreux",
-            "foiré",
-            "pourriture",
-            "raté",
-            "ratée",
-            "sombre merde",
-            "tocard",
-            "tocarde",
-            "va mourir",
-            "nul à chier",
-            "pédé comme un phoque",
-            "pleurnicheur",
-            "pleureuse",
-            "putréfié",
-            "putréfiée",
-            "sac à merde",
-            "raton",
-            "chinetoque",
-            "youpin",
-            "youpine",
-            "tarlouze",
-            "tafiolle",
-            "gouine",
-            "pédé",
-            "pd",
-            "bouffeur de porc",
-            "bouffeur de chien",
-            "niaquoué",
-            "fouteux de merde",
-            "face de craie",
-            "michto",
-            "michtonneuse",
-            "j'vais t'exploser",
-            "j'vais t'buter",
-            "crève",
-            "écraser",
-            "défonce",
-            "marave",
-            "tabasser",
-            "étriper",
-            "buter",
-            "égorger",
-            "flinguer",
-            "pisser sur ta tombe",
-            "empoisonner",
-            "pendaison",
-            "pendre",
-            "génocide",
-            "exterminer",
-            # Sites pornographiques
-            "gang bang",
-            "brazzers",
-            "redtube",
-            "pornhub",
-            "choper",
-            "se faire sucer",
-            "pipe",
-            "branlette",
-            "fellation",
-            "débauche",
-            "dévergondée",
-            "escort boy",
-            "milf",
-            "cougar",
-            "nympho",
-            "nymphomane",
-            "sodomie",
-            "xhamster",
-            "xvideos",
-            "pornstar",
-            "film x",
-            "actrice x",
-            # Drogues spécifiques
-            "lsd",
-            "ecsta",
-            "ecstasy",
-            "champis",
-            "meth",
-            "méthamphétamine",
-            "kétamine",
-            "crack",
-            "opium",
-            "speed",
-            "ghb",
-            "codeine",
-            "lean",
-            "purple drank",
-            "xanax",
-            # Crime organisé
-            "racket",
-            "trafiquant",
-            "magouille",
-            "dealer",
-            "passeur",
-            "yakuza",
-            "mafia",
-            "cartel",
-            "braquage",
-            "cagoulé",
-            "go fast",
-            "suceuse",
-            "suceur",
-            "femelle",
-            "gouïne",
-            "tapette",
-            "hataille",
-            "rataille",
-            # Variantes orthographiques / fautes sur "connard"
-            "conar",
-            "konard",
-            "konar",
-            "conard",
-            "konnaard",
-            "connar",
-            "connnard",
-            "connerd",
-            "konnard",
-            "konnar",
-            "conardd",
-            "connaaard",
-            "connhard",
-            "connarde",
-            "konhard",
-            # "enculé" variations
-            "encule",
-            "enculler",
-            "encullé",
-            "encullée",
-            "enqulé",
-            "enku",
-            "encu",
-            "enculer",
-            "enculle",
-            "enquler",
-            "enculéé",
-            "encuulé",
-            "encculé",
-            "encull",
-            "enkulé",
-            "enqqulé",
-            # "pute" variations
-            "putte",
-            "poute",
-            "putain",
-            "putin",
-            "puute",
-            "pouta",
-            "poutre",
-            "poutte",
-            "poutay",
-            "putch",
-            "put3",
-            "pu7e",
-            "pu*e",
-            "pouteuh",
-            "poutasse",
-            "putinasse",
-            "puten",
-            "ptn",
-            # "merde" variations
-            "merd",
-            "mairde",
-            "marde",
-            "m3rd",
-            "m3rde",
-            "mherde",
-            "merdde",
-            "m@erde",
-            "merdasse",
-            # "bâtard" variations
-            "batard",
-            "battard",
-            "baattard",
-            "bat@rd",
-            "batar",
-            "baatar",
-            "btard",
-            "btrd",
-            "bataar",
-            # "trou du cul"
-            "trouduk",
-            "trou2cul",
-            "trooduku",
-            "troudec",
-            "troudkul",
-            "troudk",
-            "trouducul",
-            "trouducul",
-            # "chien/chienne"
-            "chienneuh",
-            "ch1enne",
-            "chyen",
-            "chi1en",
-            "chiène",
-            "chienn",
-            "chian",
-            "tchien",
-            "shien",
-            # "salopard"
-            "salopar",
-            "saloparde",
-            "salaupar",
-            "salopehard",
-            "saloperd",
-            "saleopard",
-            "zalopard",
-            # "pédé"
-            "pd",
-            "pédéé",
-            "peday",
-            "pedey",
-            "peedé",
-            "p3dé",
-            "pedeuh",
-            "pedu",
-            "péddé",
-            "pedy",
-            # "nique"
-            "nik",
-            "niq",
-            "niquer",
-            "niqu",
-            "niqu3",
-            "n1que",
-            "n1k",
-            "n*que",
-            "niik",
-            "niqque",
-            # "salope"
-            "salop",
-            "saloope",
-            "saloppe",
-            "saloopp",
-            "salopeuh",
-            "saalope",
-            "salaupe",
-            "saleoppe",
-            # "tg" / "ta gueule"
-            "ta guele",
-            "tgueule",
-            "t@gueule",
-            "tgule",
-            "t@g",
-            "tgu",
-            "ta g",
-            "fermetag",
-            "t'as gueule",
-            # "bite" / "zgeg" / "zizi"
-            "bitt",
-            "byt",
-            "biite",
-            "zgeeg",
-            "zgegg",
-            "zize",
-            "ziizi",
-            "z1z1",
-            "zigzeg",
-            "b!te",
-            "bizzy",
-            # "teub"
-            "tbeu",
-            "tub",
-            "t3ub",
-            "teubb",
-            "t@ub",
-            "teuub",
-            "tbeub",
-            "teubé",
-            "t3uub",
-            "teuube",
-            # "branleur"
-            "branleurrr",
-            "branleure",
-            "branleu",
-            "branleureuh",
-            "branlheure",
-            "brenleur",
-            "brenloeur",
-            # "salope" combiné
-            "sale chienne",
-            "grosse salope",
-            "pute de merde",
-            "sale garce",
-            "vieille pute",
-            "grosse chienne",
-            "vieille salope",
-            "sale tepu",
-            "salope finie",
-            "truie humaine",
-            "garce finie",
-            "sale catin",
-            # "fuck" / "foutre"
-            "fuk",
-            "f*ck",
-            "fout",
-            "vaffanculo",
-            "fooutre",
-            "faque",
-            "fawk",
-            "phoque",
-            "fuque",
-            "fuq",
-            # Générations avec lettres substituées
-            "c0nn4rd",
-            "encul3",
-            "p*te",
-            "sh1t",
-            "fdp",
-            "s@lope",
-            "m3rd3",
-            "b@t@rd",
-            "s4l0p3",
-            "n1qu3",
-            "v@f",
-            "tr0uduc",
-            "s4l0p@rd",
-            "ch1enne",
-            "bat@rd",
-            "m3uf",
-            "b1atch",
-            "s3x",
-            "f0utre",
-            # "mongol", "débile"
-            "mongole",
-            "mongolien",
-            "débilos",
-            "debilous",
-            "debile",
-            "d3bile",
-            "d3bilos",
-            "débyle",
-            # "haine / tuer"
-            "haïss",
-            "tue-le",
-            "massacrer",
-            "detruir",
-            "tueurs",
-            "kille",
-            "tuee",
-            "destruction",
-            "assassins",
-            # "pédé" déguisé
-            "pedok",
-            "p3do",
-            "p3dé",
-            "pédéstyle",
-            "petay",
-            "pédézouz",
-            "pdy",
-            "peydé",
-            "pedei",
-            # "porno"
-            "p0rn",
-            "pornn",
-            "pourn",
-            "porny",
-            "p*rn",
-            "pr0n",
-            "pounrn",
-            "pornos",
-            "pornni",
-            "xxvideos",
-            # "violer / viol"
-            "viole",
-            "violay",
-            "violle",
-            "vyolet",
-            "vyoler",
-            "v1ol",
-            "violate",
-            "raper",
-            "rapay",
-            # Divers déguisés ou allongés
-            "connnnaard",
-            "coooonard",
-            "salauddd",
-            "enccuuulé",
-            "bittttte",
-            "puttttt",
-            "tgklm",
-            "fdppp",
-            "tgms",
-            "tgconnard",
-            "tgpd",
-            "mgtg",
-            "niksa",
-            "niquezvous",
-            "niquez",
-            "niklm",
-            "enculax",
-            "niklamerde",
-            "enculord",
-            "saleconard",
-            "ptnms",
-            "ptnm",
-            "tgfdp",
-            "fermelagueule",
-            "connasseuh",
-            "saleenculé",
-            "batar",
-            "nickyou",
-            "fayaaa",
-            "nicklamer",
-            # Variation de nombres / l33t
-            "c0n",
-            "sh1t",
-            "s3x",
-            "p0rn0",
-            "n1k",
-            "3ncule",
-            "c4nnard",
-            "t3ub",
-            "f0utre",
-            "0seill",
-            "b1tc",
-            "s4l3",
-            "t1z",
-            "k1chta",
-            # Variations de "connard"
-            "k0nar",
-            "c0nard",
-            "k0nn4rd",
-            "k0nard!",
-            "k0nnarh",
-            "c0nnera",
-            "k0nnar2",
-            "k0nn@rd",
-            "k0nnarx",
-            "k0nn@r",
-            "k0nn4rd",
-            "c0nn4rd!",
-            "k0nnardd",
-            "k0nn@r2",
-            "k0nnarh!",
-            "c0nnar!",
-            "k0nard2",
-            "c0nn@rd",
-            "k0nnarx2",
-            "k0nn!@rd",
-            # Variations de "salope"
-            "s@l0pe",
-            "s@l0p3",
-            "s@loppe",
-            "sàlope",
-            "sál0pe",
-            "s@l0p!",
-            "s@l0pex",
-            "sàl0pe",
-            "sàl0p3",
-            "s@l0p€",
-            "s@l0p3!",
-            "sál0p€",
-            "s@l0pex2",
-            "sàl0p!!",
-            "s@l0p3x",
-            "s@l0pe2",
-            "sál0pex",
-            "s@l0p€!",
-            "sàl0p3x",
-            "s@l0p3!2",
-            # Variations de "merde"
-            "m€rde",
-            "m3rd€",
-            "m@erd",
-            "merdd",
-            "m3rdd",
-            "m€rda",
-            "m@rd!",
-            "merd0",
-            "m3rd@",
-            "m€rdx",
-            "m3rd€!",
-            "m@erda",
-            "merdd2",
-            "m3rdd!",
-            "m€rd0",
-            "m@rd!2",
-            "merd02",
-            "m3rd@x",
-            "m€rdx!",
-            "m@erd2",
-            # Variations de "pute"
-            "p*te",
-            "p@ute",
-            "pu7e",
-            "p ute",
-            "pût€",
-            "p_ute",
-            "p!ute",
-            "pü+",
-            "p@ut3",
-            "pü7€",
-            "p*t3",
-            "p@ut!",
-            "pu7€",
-            "p ut3",
-            "pût!!",
-            "p_ut3",
-            "p!ut€",
-            "pü+2",
-            "p@ut3!",
-            "pü7!",
-            # Variations de "enculé"
-            "3nculé",
-            "3ncul3",
-            "3nkul!",
-            "3nkul€",
-            "3ncul@",
-            "3nkul2",
-            "3ncul3!",
-            "3nkul@!",
-            "3ncul€2",
-            "3nkul!2",
-            "3ncul3x",
-            "3nkul3",
-            "3ncul@2",
-            "3nkul€x",
-            "3ncul!!",
-            "3nkul@2",
-            "3ncul3!",
-            "3nkul!x",
-            "3ncul€!2",
-            "3nkul3x",
-            # Variations de "bite"
-            "b!te",
-            "b17e",
-            "b!7€",
-            "b17€",
-            "b!t3",
-            "b17!",
-            "b!t€",
-            "b17@",
-            "b!7",
-            "b17x",
-            "b!te2",
-            "b17€!",
-            "b!t3x",
-            "b17!2",
-            "b!t@",
-            "b17@!",
-            "b!7x",
-            "b17!x",
-            "b!te!",
-            "b17@2",
-            # Variations de "salaud"
-            "s@l@ud",
-            "s@l0ud",
-            "s@l@ûd",
-            "s@l@ud!",
-            "s@l0ud€",
-            "s@l@ud2",
-            "s@l0ud!",
-            "s@l@ûd€",
-            "s@l@udx",
-            "s@l0ud2",
-            "s@l@ud!2",
-            "s@l0ud€!",
-            "s@l@ûd!2",
-            "s@l@udx!",
-            "s@l0udx",
-            "s@l@ûdx",
-            "s@l@ud3",
-            "s@l0ud3",
-            "s@l@ûd3",
-            "s@l@udx2",
-            # Variations de "tg" (ta gueule)
-            "t@gu3ul3",
-            "tgu3ul!",
-            "t@gu€ul3",
-            "tgu3ul€",
-            "t@gu3ul!",
-            "tgu€ul@",
-            "t@gu3ul2",
-            "tgu3ul3!",
-            "t@gu€ul@!",
-            "tgu3ul€2",
-            "t@gu3ul!x",
-            "tgu€ul3",
-            "t@gu3ul@2",
-            "tgu€ul3x",
-            "t@gu3ul!!",
-            "tgu€ul@2",
-            "t@gu3ul3!",
-            "tgu€ul!x",
-            "t@gu€ul€!2",
-            "tgu3ul3x",
-            # Variations de "chier"
-            "ch!3r",
-            "ch!3r!",
-            "ch!3r€",
-            "ch!3r@",
-            "ch!3r2",
-            "ch!3r!2",
-            "ch!3r€!",
-            "ch!3r@!",
-            "ch!3rx",
-            "ch!3r3",
-            "ch!3r!x",
-            "ch!3r€2",
-            "ch!3r@2",
-            "ch!3r!!",
-            "ch!3r3x",
-            "ch!3r€!2",
-            "ch!3r@x",
-            "ch!3r3!",
-            "ch!3rx2",
-            "ch!3r€x",
-            # Variations de "fuck"
-            "f*ck",
-            "f@ck",
-            "fuk",
-            "fu¢k",
-            "f*k",
-            "fuq",
-            "fück",
-            "f_ck",
-            "ph*ck",
-            "fvck",
-            "f@k",
-            "fúck",
-            "fuçk",
-            "f!ck",
-            "fûck",
-            "fuk!",
-            "ph@ck",
-            "ph!ck",
-            "fvk",
-            "fücq",
-            "fúq",
-            "fu©k",
-            "f*qu",
-            "fuke",
-            "fuk3",
-            "fukk",
-            "phuq",
-            "phuk",
-            "f u c k",
-            "f v c k",
-            # Variations de "enfoiré"
-            "3nf0!r3",
-            "3nf0!r€",
-            "3nf0!r@",
-            "3nfoiré",
-            "3nf0!r3!",
-            "3nf0!r€x",
-            "3nf0!r@2",
-            "3nf0!r3x",
-            "3nf0!r!!",
-            "3nf0!r3!",
-            "3nf0!r€!2",
-            "3nf0!r@x",
-            "3nf0!r3x",
-            "3nfoirex",
-            "3nf0!r3d",
-            "3nf0!r€d",
-            "3nf0!r@d",
-            "3nfoiré!",
-            "3nf0!r3!2",
-            "3nf0!r€x!",
-            "3nf0!r@2!",
-            "3nf0!r3x!",
-            # Termes originaux et variations de "fuck"
-            "fuck",
-            "f*ck",
-            "f@ck",
-            "fuk",
-            "fu¢k",
-            "f*k",
-            "fuq",
-            "fück",
-            "f_ck",
-            "ph*ck",
-            "fvck",
-            "f@k",
-            "fúck",
-            "fuçk",
-            "f!ck",
-            "fûck",
-            "fuk!",
-            "ph@ck",
-            "ph!ck",
-            "fvk",
-            "fücq",
-            "fúq",
-            "fu©k",
-            "f*qu",
-            "fuke",
-            "fuk3",
-            "fukk",
-            "phuq",
-            "phuk",
-            "f u c k",
-            "f v c k",
-            "foque",
-            "fouque",
-            "fouq",
-            "phoque",
-            "fawk",
-            "fvk",
-            "fück",
-            # Termes originaux et variations de "enfoiré"
-            "enfoiré",
-            "enfoirés",
-            "enfoirée",
-            "3nfoiré",
-            "3nfoirés",
-            "enf0!ré",
-            "3nf0!r3",
-            "3nf0!r€",
-            "3nf0!r@",
-            "3nfoiré",
-            "3nf0!r3!",
-            "3nf0!r€x",
-            "3nf0!r@2",
-            "3nf0!r3x",
-            "3nf0!r!!",
-            "3nf0!r3!",
-            "3nf0!r€!2",
-            "3nf0!r@x",
-            "3nf0!r3x",
-            "3nfoirex",
-            "3nf0!r3d",
-            "3nf0!r€d",
-            "3nf0!r@d",
-            "3nfoiré!",
-            "3nf0!r3!2",
-            "3nf0!r€x!",
-            "3nf0!r@2!",
-            "3nf0!r3x!",
-            "enfoyer",
-            "enfoirard",
-            "enfoir3",
-            "3nf0!r",
-            "enf0ir3",
-        ]
+        self.fuzzy_distance = fuzzy_distance
+        self.fuzzy_min_length = fuzzy_min_length
+        self.banned_words_file = banned_words_file
+        self._file_mtime = None
+        self._reload_lock = threading.Lock()
+        self._stop_watching = None
+
+        # Liste par défaut des mots à bannir (tuple partagé, jamais copié)
+        words = DEFAULT_BANNED_WORDS
 
         # Charger les mots depuis un fichier si spécifié
         if banned_words_file:
             try:
-                self.load_banned_words(banned_words_file)
+                logger.info(
+                    f"Chargement des mots interdits depuis {banned_words_file}"
+                )
+                self._file_mtime = os.path.getmtime(banned_words_file)
+                words = read_banned_words(banned_words_file)
             except Exception as e:
                 logger.error(
                     f"Erreur lors du chargement du fichier de mots interdits: {e}"
                 )
                 logger.info("Utilisation de la liste de mots interdits par défaut")
 
+        # Compiler le lexique en automate (partagé entre les instances du processus)
+        self.lexicon = get_compiled_lexicon(words, fuzzy_distance, fuzzy_min_length)
+
+    @property
+    def banned_words(self):
+        """Mots interdits du lexique actuellement en service."""
+        return self.lexicon.words
+
+    @property
+    def version(self):
+        """Version du lexique actuellement en service (0 au démarrage)."""
+        return self.lexicon.version
+
     def load_banned_words(self, filepath):
         """
-        Charge la liste des mots interdits depuis un fichier.
+        Charge la liste des mots interdits depuis un fichier et la met en service immédiatement.
 
         Args:
             filepath (str): Chemin vers le fichier contenant les mots interdits.
@@ -1005,40 +846,119 @@ class BannedWordsFilter:
             FileNotFoundError: Si le fichier n'existe pas.
             ValueError: Si le format du fichier n'est pas reconnu ou valide.
         """
-        logger.info(f"Chargement des mots interdits depuis {filepath}")
-
-        if filepath.endswith(".json"):
-            with open(filepath, "r", encoding="utf-8") as file:
-                data = json.load(file)
-                if isinstance(data, list):
-                    self.banned_words = [word.lower() for word in data]
-                elif isinstance(data, dict) and "words" in data:
-                    self.banned_words = [word.lower() for word in data["words"]]
-                else:
-                    raise ValueError(
-                        "Format JSON invalide. Attendu: liste ou dict avec clé 'words'"
-                    )
-        elif filepath.endswith(".txt") or filepath.endswith(".docx"):
-            # Pour .docx, cela suppose que le contenu a été extrait au préalable
-            words = []
-            with open(filepath, "r", encoding="utf-8") as file:
-                for line in file:
-                    word = line.strip()
-                    if word and not word.startswith("#"):  # Ignorer les commentaires
-                        words.append(word.lower())
-            self.banned_words = words
-        else:
-            raise ValueError(f"Format de fichier non pris en charge: {filepath}")
-
-        logger.info(f"Chargé {len(self.banned_words)} mots interdits")
-
-    def check_message(self, conversation_id, message):
+        self.reload(filepath, background=False)
+
+    def reload(self, filepath=None, background=True):
         """
-        Vérifie si un message contient des mots interdits et met à jour le compteur de violations.
+        Recompile le lexique depuis un fichier et remplace l'automate en service.
+
+        La lecture et la compilation se font hors de tout verrou partagé avec check_message :
+        les messages continuent d'utiliser l'ancien lexique jusqu'à l'affectation finale.
+
+        Args:
+            filepath (str, optional): Fichier à charger. Par défaut: le fichier du filtre.
+            background (bool, optional): Si True, recompile dans un thread et retourne ce thread.
+                                       Sinon, recompile immédiatement et retourne la nouvelle version.
+
+        Raises:
+            ValueError: Si aucun fichier n'est configuré.
+        """
+        filepath = filepath or self.banned_words_file
+        if not filepath:
+            raise ValueError("Aucun fichier de mots interdits configuré")
+
+        if not background:
+            return self._reload(filepath)
+
+        thread = threading.Thread(
+            target=self._reload_safely,
+            args=(filepath,),
+            name="banned-words-reload",
+            daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def _reload(self, filepath):
+        """Lit, compile puis met en service le lexique ; les rechargements sont sérialisés."""
+        with self._reload_lock:
+            logger.info(f"Chargement des mots interdits depuis {filepath}")
+            mtime = os.path.getmtime(filepath)
+            words = read_banned_words(filepath)
+            lexicon = CompiledLexicon(
+                words,
+                version=self.lexicon.version + 1,
+                fuzzy_distance=self.fuzzy_distance,
+                fuzzy_min_length=self.fuzzy_min_length,
+            )
+
+            # Remplacement atomique : une seule affectation de référence
+            self.lexicon = lexicon
+            self.banned_words_file = filepath
+            self._file_mtime = mtime
+
+        logger.info(
+            f"Chargé {len(lexicon.words)} mots interdits (version {lexicon.version})"
+        )
+        return lexicon.version
+
+    def _reload_safely(self, filepath):
+        try:
+            self._reload(filepath)
+        except Exception as e:
+            logger.error(f"Échec du rechargement des mots interdits: {e}")
+            logger.info(
+                f"Le lexique version {self.lexicon.version} reste en service"
+            )
+
+    def start_watching(self, interval=30):
+        """
+        Surveille la date de modification du fichier et recharge le lexique quand il change.
+
+        Args:
+            interval (float, optional): Délai en secondes entre deux vérifications.
+        """
+        if not self.banned_words_file or self._stop_watching is not None:
+            return
+
+        self._stop_watching = threading.Event()
+        thread = threading.Thread(
+            target=self._watch,
+            args=(interval, self._stop_watching),
+            name="banned-words-watcher",
+            daemon=True,
+        )
+        thread.start()
+        logger.info(
+            f"Surveillance de {self.banned_words_file} toutes les {interval} secondes"
+        )
+
+    def stop_watching(self):
+        """Arrête la surveillance du fichier de mots interdits."""
+        if self._stop_watching is not None:
+            self._stop_watching.set()
+            self._stop_watching = None
+
+    def _watch(self, interval, stop_event):
+        while not stop_event.wait(interval):
+            try:
+                mtime = os.path.getmtime(self.banned_words_file)
+            except OSError as e:
+                logger.error(f"Fichier de mots interdits inaccessible: {e}")
+                continue
+            if mtime != self._file_mtime:
+                self._reload_safely(self.banned_words_file)
+
+    def check_message(self, message, violation_count=0):
+        """
+        Vérifie si un message contient des mots interdits et calcule le nouveau compteur de violations.
+
+        Le filtre ne garde aucun état : l'appelant conserve le compteur retourné
+        dans la conversation et le repasse au message suivant.
 
         Args:
-            conversation_id (str): Identifiant unique de la conversation.
             message (str): Message à vérifier.
+            violation_count (int, optional): Nombre de violations déjà commises dans la conversation.
 
         Returns:
             dict: Résultat contenant:
@@ -1046,37 +966,31 @@ class BannedWordsFilter:
                 - 'banned_words_found' (list): Liste des mots interdits trouvés
                 - 'should_warn' (bool): True si un avertissement devrait être émis
                 - 'should_terminate' (bool): True si la conversation devrait être terminée
-                - 'violation_count' (int): Nombre actuel de violations
+                - 'violation_count' (int): Nombre de violations après ce message
+                - 'lexicon_version' (int): Version du lexique utilisée pour la vérification
         """
+        # Un seul lexique pour tout le message, même si un rechargement a lieu en parallèle
+        lexicon = self.lexicon
+
         if not message or not isinstance(message, str):
             return {
                 "contains_banned_words": False,
                 "banned_words_found": [],
                 "should_warn": False,
                 "should_terminate": False,
-                "violation_count": self.user_violations.get(conversation_id, 0),
+                "violation_count": violation_count,
+                "lexicon_version": lexicon.version,
             }
 
-        # Convertir en minuscules pour une comparaison insensible à la casse
-        message_lower = message.lower()
-        banned_words_found = []
-
-        # Vérifier chaque mot interdit
-        for word in self.banned_words:
-            # Correspondance de mot entier avec des limites de mots
-            pattern = r"\b" + re.escape(word) + r"\b"
-            if re.search(pattern, message_lower):
-                banned_words_found.append(word)
+        # Canonicaliser le message puis trouver tous les mots interdits en un seul passage
+        banned_words_found = lexicon.find_all(message)
 
         contains_banned_words = len(banned_words_found) > 0
 
-        # Mettre à jour le compteur de violations si des mots interdits sont trouvés
+        # Incrémenter le compteur de violations si des mots interdits sont trouvés
         if contains_banned_words:
-            if conversation_id not in self.user_violations:
-                self.user_violations[conversation_id] = 0
-            self.user_violations[conversation_id] += 1
+            violation_count += 1
 
-        violation_count = self.user_violations.get(conversation_id, 0)
         should_warn = contains_banned_words and violation_count == 1
         should_terminate = violation_count >= self.max_violations
 
@@ -1086,8 +1000,116 @@ class BannedWordsFilter:
             "should_warn": should_warn,
             "should_terminate": should_terminate,
             "violation_count": violation_count,
+            "lexicon_version": lexicon.version,
         }
 
+    def scan(self, message):
+        """
+        Retourne les mots interdits d'un message, sans compter de violation.
+
+        Args:
+            message (str): Message à vérifier.
+
+        Returns:
+            list: Mots interdits trouvés (liste vide si aucun).
+        """
+        if not message or not isinstance(message, str):
+            return []
+        return self.lexicon.find_all(message)
+
+    def scan_messages(self, messages, workers=1, chunk_size=500):
+        """
+        Parcourt un grand nombre de messages et produit ceux qui contiennent des mots interdits.
+
+        Aucun compteur n'est modifié. Tous les messages sont vérifiés avec la version du
+        lexique en service au début du parcours. Les messages sont lus au fur et à mesure :
+        au plus deux lots par processus sont en attente à un instant donné.
+
+        Args:
+            messages (iterable): Messages (str) à vérifier.
+            workers (int, optional): Nombre de processus de vérification. 1 = dans le processus courant.
+            chunk_size (int, optional): Nombre de messages envoyés à un processus à la fois.
+
+        Yields:
+            tuple: (position du message dans l'itérable, liste des mots interdits trouvés),
+                   dans l'ordre des messages.
+        """
+        chunks = ((chunk, None) for chunk in _chunked(enumerate(messages), chunk_size))
+        for _, hits in self._scan_chunks(chunks, workers):
+            yield from hits
+
+    def scan_conversations(self, conversations, workers=1, chunk_size=500):
+        """
+        Vérifie les messages utilisateur de conversations enregistrées, sans les modifier.
+
+        Chaque lot garde les références (conversation, position) de ses messages
+        jusqu'à ce que ses résultats soient produits : la mémoire ne dépend pas de la
+        taille de l'historique.
+
+        Args:
+            conversations (iterable): Conversations au format de ConversationManager.
+            workers (int, optional): Nombre de processus de vérification.
+            chunk_size (int, optional): Nombre de messages envoyés à un processus à la fois.
+
+        Yields:
+            dict: Pour chaque message contenant des mots interdits:
+                - 'conversation_id' (str): Identifiant de la conversation
+                - 'message_index' (int): Position du message dans l'historique
+                - 'content' (str): Texte du message
+                - 'banned_words_found' (list): Mots interdits trouvés
+        """
+
+        def user_messages():
+            for conversation in conversations:
+                for index, message in enumerate(conversation.get("messages", [])):
+                    if message.get("role") == "user":
+                        yield conversation.get("id"), index, message.get("content")
+
+        def chunks():
+            for references in _chunked(user_messages(), chunk_size):
+                # Positions propres au lot : elles désignent directement ses références
+                yield [(position, ref[2]) for position, ref in enumerate(references)], references
+
+        for references, hits in self._scan_chunks(chunks(), workers):
+            for position, found in hits:
+                conversation_id, index, content = references[position]
+                yield {
+                    "conversation_id": conversation_id,
+                    "message_index": index,
+                    "content": content,
+                    "banned_words_found": found,
+                }
+
+    def _scan_chunks(self, chunks, workers):
+        """
+        Vérifie des lots (liste de (position, message), contexte) et produit, dans
+        l'ordre des lots, (contexte, liste de (position, mots trouvés)).
+
+        Seuls les messages sont envoyés aux processus ; le contexte d'un lot est libéré
+        dès que ses résultats sont produits.
+        """
+        lexicon = self.lexicon
+
+        if workers <= 1:
+            for chunk, context in chunks:
+                yield context, _find_in_chunk(lexicon, chunk)
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_scan_worker,
+            initargs=(lexicon.words, self.fuzzy_distance, self.fuzzy_min_length),
+        ) as executor:
+            pending = deque()
+            for chunk, context in chunks:
+                pending.append((context, executor.submit(_scan_chunk, chunk)))
+                if len(pending) >= workers * 2:
+                    context, future = pending.popleft()
+                    yield context, future.result()
+            while pending:
+                context, future = pending.popleft()
+                yield context, future.result()
+
     def get_warning_message(self):
         """
         Retourne un message d'avertissement pour l'utilisateur.
@@ -1114,19 +1136,6 @@ class BannedWordsFilter:
             "Vous pouvez réessayer ultérieurement en respectant nos conditions d'utilisation."
         )
 
-    def reset_violations(self, conversation_id):
-        """
-        Réinitialise le compteur de violations pour une conversation donnée.
-
-        Args:
-            conversation_id (str): Identifiant de la conversation.
-        """
-        if conversation_id in self.user_violations:
-            del self.user_violations[conversation_id]
-            logger.info(
-                f"Réinitialisation des violations pour la conversation {conversation_id}"
-            )
-
 
 # Exemple d'utilisation
 if __name__ == "__main__":
@@ -1140,11 +1149,12 @@ if __name__ == "__main__":
         "Allez-vous faire foutre avec votre service",
     ]
 
-    test_conversation_id = "test-123"
+    violation_count = 0
 
     for msg in test_messages:
         print(f"\nMessage: {msg}")
-        result = word_filter.check_message(test_conversation_id, msg)
+        result = word_filter.check_message(msg, violation_count)
+        violation_count = result["violation_count"]
         print(f"Contient des mots interdits: {result['contains_banned_words']}")
         if result["contains_banned_words"]:
             print(f"Mots trouvés: {result['banned_words_found']}")
@@ -0,0 +1,317 @@
+"""
+Extraction des entités et de l'intention d'une réponse en français, en une passe.
+
+Le texte est normalisé une seule fois (minuscules, sans accents, apostrophes et
+tirets séparant les mots), découpé en mots par une expression compilée, puis parcouru
+une fois. Les mots sont comparés entiers (des ensembles et un dict, pas de recherche
+de sous-chaîne) : "no" ne correspond plus à "nom", ni "pas" à "passer".
+
+La négation porte sur la proposition (jusqu'à la prochaine ponctuation ou "mais"),
+et une question ne renseigne ni le RSA ni la scolarité :
+"je ne touche pas le RSA" -> rsa=False, "j'ai fini mes études" -> schooling=False,
+"oui, je n'ai pas le RSA" -> intent "yes" et rsa=False.
+
+Un nombre n'est un âge que suivi de "an(s)" ou juste après "âge", et entre
+MIN_AGE et MAX_AGE : "je suis en 3ème" ou "2 ans au RSA" ne renseignent pas l'âge.
+
+Entités : age, rsa, schooling, postal_code, city.
+Intention : ask_question, yes, no ou provide_info.
+
+Exemple:
+    extract("J'ai dix-neuf ans et j'habite au 93200")
+    # {"intent": "provide_info", "entities": {"age": 19, "postal_code": "93200",
+    #  "city": "saint-denis"}, ...}
+"""
+
+import re
+import unicodedata
+
+_TOKEN = re.compile(r"\d+|[a-z]+|[?!.,;:]")
+# Code postal d'Île-de-France écrit "93200", "93 200" ou "93.200"
+_POSTAL_CODE = re.compile(r"\b(75|77|78|91|92|93|94|95)[ .]?(\d{3})\b")
+_APOSTROPHES = str.maketrans({"’": "'", "`": "'"})
+
+CLAUSE_BREAKS = frozenset((".", ",", ";", ":", "!", "?", "mais"))
+NEGATIONS = frozenset(("ne", "n", "pas", "jamais", "aucun", "aucune", "rien", "nullement"))
+# "plus" est une négation sauf dans "plus de", "plus que", "plus 25"...
+_PLUS_COMPARISON = frozenset(("de", "d", "que", "qu"))
+
+# Réponses directes : jamais inversées par une négation de la proposition
+YES_ANSWERS = frozenset(("oui", "ouais", "ouai", "yes", "yep", "ouep", "affirmatif"))
+NO_ANSWERS = frozenset(("non", "no", "nan", "nope", "negatif"))
+# Accords inversés par une négation ("je n'accepte pas", "pas d'accord")
+YES_WORDS = frozenset(
+    ("ok", "okay", "accepte", "accord", "certainement", "absolument", "volontiers", "exact", "exactement", "bien")
+)
+NO_WORDS = frozenset(("refuse", "refus"))
+
+RSA_WORDS = frozenset(("rsa",))
+_SCHOOLING = re.compile(r"(?:scolaris|etudi|etude|lycee|lyceen|colleg|universit|ecole|fac|alternan|apprenti)\w*")
+# Mots indiquant que la scolarité est terminée
+SCHOOLING_ENDED = frozenset(("arrete", "fini", "finis", "termine", "quitte", "abandonne", "descolarise", "descolarisee"))
+
+# Villes : suite de mots normalisés -> nom renvoyé (format historique)
+CITIES = {
+    ("saint", "denis"): "saint-denis",
+    ("st", "denis"): "saint-denis",
+    ("stains",): "stains",
+    ("pierrefitte",): "pierrefitte",
+    ("pierrefitte", "sur", "seine"): "pierrefitte",
+    ("saint", "ouen"): "saint-ouen",
+    ("st", "ouen"): "saint-ouen",
+    ("epinay",): "épinay",
+    ("epinay", "sur", "seine"): "épinay-sur-seine",
+    ("villetaneuse",): "villetaneuse",
+    ("ile", "saint", "denis"): "île-saint-denis",
+    ("ile", "st", "denis"): "île-saint-denis",
+    ("aubervilliers",): "aubervilliers",
+    ("la", "courneuve"): "la courneuve",
+    ("courneuve",): "la courneuve",
+    ("montfermeil",): "montfermeil",
+}
+_CITY_MAX_WORDS = max(len(words) for words in CITIES)
+_CITY_FIRST_WORDS = frozenset(words[0] for words in CITIES)
+
+POSTAL_CODES = {
+    "93200": "saint-denis",
+    "93210": "saint-denis",
+    "93240": "stains",
+    "93380": "pierrefitte",
+    "93400": "saint-ouen",
+    "93800": "épinay-sur-seine",
+    "93430": "villetaneuse",
+    "93450": "île-saint-denis",
+    "93300": "aubervilliers",
+    "93120": "la courneuve",
+    "93370": "montfermeil",
+}
+
+_UNITS = {
+    "zero": 0, "un": 1, "une": 1, "deux": 2, "trois": 3, "quatre": 4, "cinq": 5,
+    "six": 6, "sept": 7, "huit": 8, "neuf": 9, "dix": 10, "onze": 11, "douze": 12,
+    "treize": 13, "quatorze": 14, "quinze": 15, "seize": 16,
+}
+_TENS = {
+    "vingt": 20, "vingts": 20, "trente": 30, "quarante": 40,
+    "cinquante": 50, "soixante": 60, "septante": 70, "huitante": 80, "nonante": 90,
+}
+AGE_WORDS = frozenset(("an", "ans"))
+# "âge : 19", "mon âge est de 19" : nombre à au plus AGE_WORD_DISTANCE mots de "âge"
+AGE_WORD_DISTANCE = 3
+MIN_AGE = 10
+MAX_AGE = 99
+
+
+def normalize(text):
+    """Minuscules, sans accents ni autres caractères non ASCII, apostrophes uniformisées."""
+    text = unicodedata.normalize("NFKD", text.lower().translate(_APOSTROPHES))
+    # Seuls les lettres a-z, les chiffres et la ponctuation sont gardés par _TOKEN
+    return text.encode("ascii", "ignore").decode("ascii")
+
+
+def _read_number(tokens, start):
+    """Nombre écrit en chiffres ou en lettres à partir de tokens[start] ; renvoie (valeur, fin)"""
+    token = tokens[start]
+    if token.isdigit():
+        return int(token), start + 1
+    value = None
+    position = start
+    while position < len(tokens):
+        word = tokens[position]
+        if word in _UNITS:
+            value = (value or 0) + _UNITS[word]
+        elif word in _TENS:
+            # "quatre-vingt" : 4 x 20
+            if word.startswith("vingt") and value == 4:
+                value = 80
+            else:
+                value = (value or 0) + _TENS[word]
+        elif word != "et" or value is None:
+            break
+        position += 1
+    return value, position
+
+
+# Catégorie de chaque mot connu : une seule recherche par mot pendant le parcours
+(
+    _BREAK,
+    _NUMBER,
+    _CITY,
+    _YES_ANSWER,
+    _NO_ANSWER,
+    _NEGATION,
+    _PLUS,
+    _YES_WORD,
+    _NO_WORD,
+    _RSA,
+    _REVENU,
+    _ENDED,
+    _SCHOOL,
+    _AGE,
+    _OTHER,
+) = range(15)
+
+_CATEGORIES = {}
+for _words, _category in (
+    (CLAUSE_BREAKS, _BREAK),
+    (_UNITS, _NUMBER),
+    (_TENS, _NUMBER),
+    (_CITY_FIRST_WORDS, _CITY),
+    (YES_ANSWERS, _YES_ANSWER),
+    (NO_ANSWERS, _NO_ANSWER),
+    (NEGATIONS, _NEGATION),
+    (("plus",), _PLUS),
+    (YES_WORDS, _YES_WORD),
+    (NO_WORDS, _NO_WORD),
+    (RSA_WORDS, _RSA),
+    (("revenu",), _REVENU),
+    (SCHOOLING_ENDED, _ENDED),
+    (("age",), _AGE),
+):
+    for _word in _words:
+        _CATEGORIES.setdefault(_word, _category)
+
+# Mots rencontrés et non listés ci-dessus (nombres, mots de la scolarité, autres)
+_CACHE_SIZE = 50000
+_learned = {}
+
+
+def _category(token):
+    category = _CATEGORIES.get(token)
+    if category is None:
+        category = _learned.get(token)
+        if category is None:
+            if token.isdigit():
+                category = _NUMBER
+            elif _SCHOOLING.fullmatch(token):
+                category = _SCHOOL
+            else:
+                category = _OTHER
+            if len(_learned) < _CACHE_SIZE:
+                _learned[token] = category
+    return category
+
+
+def extract(text):
+    """
+    Analyse une réponse de l'utilisateur.
+
+    Returns:
+        dict: {"intent", "entities", "text", "sentiment", "confidence"} comme le
+        service NLP.
+    """
+    normalized = normalize(text)
+    postal_codes = [a + b for a, b in _POSTAL_CODE.findall(normalized)]
+    if postal_codes:
+        normalized = _POSTAL_CODE.sub(" ", normalized)
+    tokens = _TOKEN.findall(normalized)
+    # Fin de texte : dernière proposition
+    tokens.append(".")
+
+    entities = {}
+    answer = None
+    age = None
+    # Position du dernier "âge"
+    age_word = None
+
+    # Proposition courante
+    negated = yes_word = no_word = rsa = schooling = schooling_ended = False
+
+    index = 0
+    count = len(tokens)
+    while index < count:
+        token = tokens[index]
+        category = _category(token)
+
+        if category == _OTHER:
+            pass
+        elif category == _BREAK:
+            # "C'est quoi le RSA ?" ne dit rien de la situation de l'utilisateur
+            if token != "?":
+                if rsa and "rsa" not in entities:
+                    entities["rsa"] = not negated
+                if schooling and "schooling" not in entities:
+                    entities["schooling"] = not (negated or schooling_ended)
+            if answer is None:
+                if no_word or (yes_word and negated):
+                    answer = "no"
+                elif yes_word:
+                    answer = "yes"
+            negated = yes_word = no_word = rsa = schooling = schooling_ended = False
+        elif category == _NUMBER:
+            value, end = _read_number(tokens, index)
+            if value is not None:
+                if (
+                    age is None
+                    and MIN_AGE <= value <= MAX_AGE
+                    and (
+                        tokens[end] in AGE_WORDS
+                        or (age_word is not None and index - age_word <= AGE_WORD_DISTANCE)
+                    )
+                ):
+                    age = value
+                index = end
+                continue
+        elif category == _CITY:
+            # Nom le plus long commençant ici ("ile saint denis" avant "saint denis")
+            if "city" not in entities:
+                for length in range(min(_CITY_MAX_WORDS, count - index), 0, -1):
+                    city = CITIES.get(tuple(tokens[index : index + length]))
+                    if city:
+                        entities["city"] = city
+                        index += length
+                        break
+                else:
+                    index += 1
+                continue
+        elif category == _YES_ANSWER:
+            answer = answer or "yes"
+        elif category == _NO_ANSWER:
+            answer = answer or "no"
+        elif category == _NEGATION:
+            negated = True
+        elif category == _PLUS:
+            following = tokens[index + 1]
+            if following not in _PLUS_COMPARISON and not following.isdigit():
+                negated = True
+        elif category == _YES_WORD:
+            # "bien" seulement dans "bien sûr"
+            if token != "bien" or tokens[index + 1] == "sur":
+                yes_word = True
+        elif category == _NO_WORD:
+            no_word = True
+        elif category == _RSA:
+            rsa = True
+        elif category == _REVENU:
+            rsa = rsa or "solidarite" in tokens[index + 1 : index + 4]
+        elif category == _ENDED:
+            schooling_ended = True
+            if token.startswith("descolaris"):
+                schooling = True
+        elif category == _SCHOOL:
+            schooling = True
+        elif category == _AGE:
+            age_word = index
+        index += 1
+
+    if age is not None:
+        entities["age"] = age
+    if postal_codes:
+        entities["postal_code"] = postal_codes[0]
+        if "city" not in entities and postal_codes[0] in POSTAL_CODES:
+            entities["city"] = POSTAL_CODES[postal_codes[0]]
+
+    if "?" in text:
+        intent = "ask_question"
+    elif answer is not None:
+        intent = answer
+    else:
+        intent = "provide_info"
+
+    return {
+        "intent": intent,
+        "entities": entities,
+        "text": text,
+        "sentiment": "neutral",
+        "confidence": 0.8,
+    }
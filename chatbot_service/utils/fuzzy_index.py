@@ -0,0 +1,155 @@
+"""
+Index approximatif (dictionnaire de suppressions façon SymSpell) pour le filtre de mots interdits.
+
+Pour chaque forme de base du lexique, toutes les chaînes obtenues en supprimant jusqu'à
+``max_distance`` lettres sont enregistrées. Un mot du message est recherché de la même
+façon : les candidats sont les formes de base qui partagent une suppression avec lui,
+puis la distance d'édition réelle est vérifiée. Le coût par mot ne dépend que de sa
+longueur et de ``max_distance``, pas de la taille du lexique.
+
+Les mots courts ne sont pas recherchés (trop de mots courants à une lettre près),
+ni les entrées de plusieurs mots, qui restent détectées par l'automate exact.
+"""
+
+import re
+from itertools import combinations
+
+_WORD = re.compile(r"\w+")
+
+
+def _deletes(word, max_distance):
+    """Toutes les chaînes obtenues en supprimant de 0 à max_distance caractères."""
+    results = {word}
+    length = len(word)
+    for distance in range(1, min(max_distance, length - 1) + 1):
+        for positions in combinations(range(length), distance):
+            results.add("".join(c for i, c in enumerate(word) if i not in positions))
+    return results
+
+
+def edit_distance(a, b, max_distance):
+    """
+    Distance de Damerau-Levenshtein restreinte (transposition de lettres voisines comptée 1).
+
+    Le calcul s'arrête dès que la distance dépasse max_distance.
+
+    Returns:
+        int: Distance, ou max_distance + 1 si elle est supérieure.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (
+                previous_previous is not None
+                and j > 1
+                and a[i - 1] == b[j - 2]
+                and a[i - 2] == b[j - 1]
+            ):
+                value = min(value, previous_previous[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return min(previous[-1], max_distance + 1)
+
+
+class FuzzyIndex:
+    """
+    Index immuable des formes de base à une distance d'édition bornée.
+
+    Comme WordMatcher, l'index n'est plus modifié après construction et peut être
+    partagé entre threads sans verrou ; seul le cache des mots déjà vus est complété.
+    """
+
+    __slots__ = ("max_distance", "min_length", "_deletes", "_ranks", "_cache")
+
+    def __init__(self, words, max_distance=1, min_length=5):
+        """
+        Construit le dictionnaire de suppressions.
+
+        Args:
+            words (iterable): Formes canoniques du lexique, dans l'ordre du lexique.
+            max_distance (int, optional): Nombre maximum de lettres différentes. Par défaut: 1.
+            min_length (int, optional): Longueur minimale d'un mot pour la recherche approximative.
+                                      Par défaut: 5.
+        """
+        self.max_distance = max_distance
+        self.min_length = min_length
+        # Rang de chaque forme de base, pour départager les candidats à égale distance
+        self._ranks = {}
+        for word in words:
+            if len(word) >= min_length and _WORD.fullmatch(word):
+                self._ranks.setdefault(word, len(self._ranks))
+
+        deletes = {}
+        for word in self._ranks:
+            for variant in _deletes(word, max_distance):
+                deletes.setdefault(variant, []).append(word)
+        self._deletes = {variant: tuple(found) for variant, found in deletes.items()}
+
+        # Résultats par mot du message ; borné pour ne pas grossir indéfiniment
+        self._cache = {}
+
+    def __len__(self):
+        return len(self._ranks)
+
+    def lookup(self, token):
+        """
+        Retourne les formes de base à au plus max_distance modifications d'un mot.
+
+        Args:
+            token (str): Mot canonique du message.
+
+        Returns:
+            tuple: Formes de base proches, de la plus proche à la plus éloignée
+                   (vide si aucune ou si le mot est trop court).
+        """
+        cached = self._cache.get(token)
+        if cached is not None:
+            return cached
+
+        found = ()
+        if len(token) >= self.min_length:
+            candidates = set()
+            for variant in _deletes(token, self.max_distance):
+                candidates.update(self._deletes.get(variant, ()))
+            scored = []
+            for word in candidates:
+                distance = edit_distance(token, word, self.max_distance)
+                if distance <= self.max_distance:
+                    scored.append((distance, self._ranks[word], word))
+            found = tuple(word for _, _, word in sorted(scored))
+
+        if len(self._cache) < 100000:
+            self._cache[token] = found
+        return found
+
+    def find_all(self, text):
+        """
+        Retourne la forme de base la plus proche de chaque mot mal orthographié d'un texte.
+
+        Les mots qui sont déjà des formes de base sont ignorés : l'automate exact les trouve.
+
+        Args:
+            text (str): Texte déjà canonicalisé.
+
+        Returns:
+            list: Formes de base trouvées, sans doublon, dans l'ordre d'apparition.
+        """
+        found = []
+        for token in _WORD.findall(text):
+            if token in self._ranks:
+                continue
+            closest = self.lookup(token)
+            if closest and closest[0] not in found:
+                found.append(closest[0])
+        return found
@@ -0,0 +1,40 @@
+"""
+Verrous par clé, répartis sur un nombre fixe de verrous (lock striping).
+
+Chaque clé (identifiant de conversation) correspond toujours au même verrou parmi
+`stripes` : deux opérations sur la même clé sont sérialisées, deux opérations sur des
+clés différentes ne s'attendent que si elles tombent sur le même verrou (probabilité
+1/stripes). La mémoire reste constante quel que soit le nombre de clés.
+
+Les verrous sont réentrants : un appelant qui tient déjà le verrou d'une clé peut
+appeler une fonction qui le reprend.
+
+Exemple:
+    locks = StripedLock(256)
+    with locks.locked(conversation_id):
+        ...
+"""
+
+import threading
+import zlib
+
+
+class StripedLock:
+    __slots__ = ("_locks",)
+
+    def __init__(self, stripes=256, factory=threading.RLock):
+        """
+        Args:
+            stripes (int, optional): Nombre de verrous.
+            factory (callable, optional): Type de verrou (asyncio.Lock pour des coroutines,
+                non réentrant).
+        """
+        self._locks = tuple(factory() for _ in range(max(1, stripes)))
+
+    def __len__(self):
+        return len(self._locks)
+
+    def locked(self, key):
+        """Verrou de la clé, à utiliser avec `with` (`async with` pour asyncio.Lock)."""
+        # crc32 plutôt que hash() : même répartition dans tous les processus
+        return self._locks[zlib.crc32(str(key).encode("utf-8")) % len(self._locks)]
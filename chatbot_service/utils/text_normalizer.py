@@ -0,0 +1,90 @@
+"""
+Canonicalisation du texte avant la modération.
+
+La même transformation est appliquée au lexique lors du chargement et à chaque message,
+ce qui permet de ne garder que les formes de base des mots interdits :
+- suppression des accents et ligatures ("fück" -> "fuck", "sœur" -> "soeur")
+- remplacement du leetspeak à l'intérieur des mots ("3nf0!r€" -> "enfoire", "k0nnar2" -> "konnar")
+- regroupement des lettres isolées séparées par des espaces ("f u c k" -> "fuck")
+- réduction des lettres répétées ("connnnaard" -> "conard")
+"""
+
+import re
+import unicodedata
+
+# Caractères remplacés lorsqu'ils apparaissent dans un mot contenant des lettres
+_LEET_TABLE = str.maketrans(
+    {
+        "0": "o",
+        "1": "i",
+        "3": "e",
+        "4": "a",
+        "5": "s",
+        "7": "t",
+        "@": "a",
+        "€": "e",
+        "$": "s",
+        "¢": "c",
+        "©": "c",
+        "+": "t",
+        "!": "i",
+        "|": "i",
+    }
+)
+
+_LIGATURES = str.maketrans({"œ": "oe", "æ": "ae", "ß": "ss"})
+
+_COMBINING_MARKS = re.compile(r"[\u0300-\u036f]")
+_TOKEN = re.compile(r"\S+")
+_TRAILING_PUNCTUATION = re.compile(r"[!?.,;:]+$")
+_HAS_LETTER = re.compile(r"[a-z]")
+_HAS_LEET = re.compile(r"[0-9@€$¢©+!|]")
+_DIGITS = re.compile(r"[0-9]")
+_SPACED_LETTERS = re.compile(r"\b[a-z](?: [a-z]){2,}\b")
+_REPEATED_LETTERS = re.compile(r"([a-z])\1+")
+
+
+def _fold_accents(text):
+    """Supprime les accents et décompose les ligatures."""
+    text = unicodedata.normalize("NFKD", text.translate(_LIGATURES))
+    return _COMBINING_MARKS.sub("", text)
+
+
+def _replace_leet(match):
+    """Remplace le leetspeak d'un mot, sans toucher aux nombres ni à la ponctuation finale.
+
+    Les chiffres sans équivalent (2, 6, 8, 9) ajoutés à un mot sont supprimés.
+    """
+    token = match.group()
+    if not _HAS_LEET.search(token) or not _HAS_LETTER.search(token):
+        return token
+
+    suffix_match = _TRAILING_PUNCTUATION.search(token)
+    if suffix_match:
+        body, suffix = token[: suffix_match.start()], suffix_match.group()
+    else:
+        body, suffix = token, ""
+    return _DIGITS.sub("", body.translate(_LEET_TABLE)) + suffix
+
+
+def _join_spaced_letters(match):
+    return match.group().replace(" ", "")
+
+
+def canonicalize(text):
+    """
+    Retourne la forme canonique d'un texte pour la détection des mots interdits.
+
+    Args:
+        text (str): Texte brut (message ou entrée du lexique).
+
+    Returns:
+        str: Texte en minuscules, sans accents ni leetspeak, lettres répétées réduites.
+    """
+    if not text:
+        return ""
+
+    text = _fold_accents(text.lower())
+    text = _TOKEN.sub(_replace_leet, text)
+    text = _SPACED_LETTERS.sub(_join_spaced_letters, text)
+    return _REPEATED_LETTERS.sub(r"\1", text)
@@ -0,0 +1,133 @@
+"""
+Automate de recherche multi-motifs (Aho-Corasick) utilisé par le filtre de mots interdits.
+
+Le lexique est compilé une seule fois en automate ; un seul passage sur le message
+suffit ensuite pour trouver toutes les occurrences, quelle que soit la taille du lexique.
+Les correspondances respectent les mêmes limites de mots que le motif regex ``\\b...\\b``.
+"""
+
+from collections import deque
+
+
+def _is_word_char(char):
+    """Reproduit la classe ``\\w`` du module ``re`` pour les chaînes Unicode."""
+    return char.isalnum() or char == "_"
+
+
+class WordMatcher:
+    """
+    Automate Aho-Corasick immuable construit à partir d'une liste de mots.
+
+    Une fois construit, l'objet n'est jamais modifié : il peut donc être partagé
+    sans verrou entre conversations et threads.
+    """
+
+    __slots__ = ("_goto", "_fail", "_output", "_words", "_word_count")
+
+    def __init__(self, words):
+        """
+        Compile l'automate.
+
+        Args:
+            words (iterable): Mots (déjà en minuscules) à rechercher. Les doublons
+                              sont conservés dans l'ordre pour l'affichage des résultats.
+        """
+        self._words = tuple(words)
+        self._word_count = len(self._words)
+
+        # Positions de chaque mot distinct dans la liste d'origine
+        positions = {}
+        for index, word in enumerate(self._words):
+            if word:
+                positions.setdefault(word, []).append(index)
+
+        # Construction du trie
+        goto = [{}]
+        output = [()]
+        for word, indexes in positions.items():
+            node = 0
+            for char in word:
+                next_node = goto[node].get(char)
+                if next_node is None:
+                    next_node = len(goto)
+                    goto[node][char] = next_node
+                    goto.append({})
+                    output.append(())
+                node = next_node
+            output[node] = ((len(word), tuple(indexes)),)
+
+        # Liens d'échec calculés en largeur
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                fallback = goto[state].get(char, 0)
+                fail[child] = fallback if fallback != child else 0
+                output[child] = output[child] + output[fail[child]]
+
+        self._goto = goto
+        self._fail = fail
+        self._output = output
+
+    def __len__(self):
+        return self._word_count
+
+    @property
+    def words(self):
+        """Liste d'origine des mots compilés."""
+        return self._words
+
+    def find_all(self, text):
+        """
+        Retourne les mots présents dans le texte, en respectant les limites de mots.
+
+        Le résultat est identique à une boucle ``re.search(r"\\b" + re.escape(mot) + r"\\b")``
+        sur chaque mot du lexique : même ordre, doublons du lexique compris.
+
+        Args:
+            text (str): Texte déjà converti en minuscules.
+
+        Returns:
+            list: Mots trouvés, dans l'ordre du lexique.
+        """
+        if not text:
+            return []
+
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        length = len(text)
+        hits = set()
+
+        node = 0
+        for position, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if not output[node]:
+                continue
+
+            end = position + 1
+            end_is_boundary = None
+            for word_length, indexes in output[node]:
+                if indexes[0] in hits:
+                    continue
+                start = end - word_length
+                if end_is_boundary is None:
+                    end_is_boundary = _is_boundary(text, end, length)
+                if end_is_boundary and _is_boundary(text, start, length):
+                    hits.update(indexes)
+
+        return [self._words[index] for index in sorted(hits)]
+
+
+def _is_boundary(text, index, length):
+    """Vrai si ``\\b`` correspond à la position donnée du texte."""
+    before = index > 0 and _is_word_char(text[index - 1])
+    after = index < length and _is_word_char(text[index])
+    return before != after
@@ -37,6 +37,8 @@ def evaluate_decision():
         current_state = data.get("current_state")
         nlp_data = data.get("nlp_data", {})
         user_data = data.get("user_data", {})
+        # Passer les questions déjà répondues (réponses données d'avance par l'utilisateur)
+        prefill = bool(data.get("prefill", False))
 
         if not conversation_id or not current_state:
             return (
@@ -52,6 +54,7 @@ def evaluate_decision():
             current_state=current_state,
             nlp_data=nlp_data,
             user_data=user_data,
+            prefill=prefill,
         )
 
         return jsonify(result), 200
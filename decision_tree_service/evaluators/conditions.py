@@ -0,0 +1,124 @@
+"""
+Conditions des transitions de l'arbre décisionnel ("age >= 16 and age <= 25.5",
+"city in ['saint-denis', 'stains']"), compilées une fois en prédicats Python.
+
+La condition est analysée par le module ast et traduite en fonctions imbriquées :
+aucun eval, et seule une liste blanche de constructions est acceptée. Évaluer une
+transition revient ensuite à un appel de fonction.
+
+Version de référence : utilisée par le moteur de secours (core/dialogue_engine.py) et
+copiée dans decision_tree_service/evaluators/ par update_conditions.sh.
+
+Exemple:
+    predicate = compile_condition("age >= 16 and age <= 25.5")
+    predicate({"age": 19})  # True
+"""
+
+import ast
+import operator
+
+_COMPARISONS = {
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.In: lambda value, collection: value in collection,
+    ast.NotIn: lambda value, collection: value not in collection,
+}
+
+
+def compile_condition(source, normalize=None, membership=None):
+    """
+    Compile une condition des règles ("age >= 16 and age <= 25.5", "city in [...]")
+    en une fonction predicate(data) -> bool.
+
+    Seuls sont acceptés : and / or / not, les comparaisons (<, <=, >, >=, ==, !=, in,
+    not in), les noms de variables, les constantes et les listes de constantes
+    (converties en frozenset). Une variable absente des données rend la condition fausse.
+
+    Args:
+        source (str): Condition.
+        normalize (callable, optional): Appliqué aux chaînes des listes de constantes.
+        membership (callable, optional): membership(nom, valeurs) renvoie le prédicat
+            de "nom in [valeurs]" (villes et leurs variantes, par exemple), ou None pour
+            le test d'appartenance simple.
+
+    Raises:
+        ValueError: Si la condition contient une construction non autorisée.
+    """
+
+    def constants(node):
+        values = []
+        for element in node.elts:
+            if not isinstance(element, ast.Constant):
+                raise ValueError(f"Liste non constante dans '{source}'")
+            value = element.value
+            if normalize and isinstance(value, str):
+                value = normalize(value)
+            values.append(value)
+        return frozenset(values)
+
+    def build(node):
+        if isinstance(node, ast.BoolOp):
+            operands = [build(value) for value in node.values]
+            if isinstance(node.op, ast.And):
+                return lambda data: all(operand(data) for operand in operands)
+            return lambda data: any(operand(data) for operand in operands)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            operand = build(node.operand)
+            return lambda data: not operand(data)
+        if isinstance(node, ast.Compare):
+            if (
+                membership is not None
+                and len(node.ops) == 1
+                and isinstance(node.ops[0], ast.In)
+                and isinstance(node.left, ast.Name)
+                and isinstance(node.comparators[0], (ast.List, ast.Tuple, ast.Set))
+            ):
+                predicate = membership(node.left.id, constants(node.comparators[0]))
+                if predicate is not None:
+                    return predicate
+
+            left = build(node.left)
+            steps = []
+            for op, comparator in zip(node.ops, node.comparators):
+                if type(op) not in _COMPARISONS:
+                    raise ValueError(f"Opérateur non autorisé dans '{source}'")
+                steps.append((_COMPARISONS[type(op)], build(comparator)))
+
+            def compare(data):
+                value = left(data)
+                for function, right in steps:
+                    other = right(data)
+                    if not function(value, other):
+                        return False
+                    value = other
+                return True
+
+            return compare
+        if isinstance(node, ast.Name):
+            name = node.id
+            return lambda data: data[name]
+        if isinstance(node, ast.Constant):
+            value = node.value
+            return lambda data: value
+        if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+            values = constants(node)
+            return lambda data: values
+        raise ValueError(f"Construction non autorisée dans '{source}': {type(node).__name__}")
+
+    try:
+        tree = ast.parse(source, mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Condition invalide '{source}': {e.msg}")
+    expression = build(tree.body)
+
+    def predicate(data):
+        try:
+            return bool(expression(data))
+        except (KeyError, TypeError):
+            return False
+
+    return predicate
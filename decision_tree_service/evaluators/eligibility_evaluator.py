@@ -2,6 +2,7 @@ import json
 import os
 import re
 from datetime import datetime
+from functools import lru_cache
 
 # Importer le module city_variants
 try:
@@ -22,6 +23,17 @@ except ImportError:
         normalize_city_name,
     )
 
+from evaluators.conditions import compile_condition
+
+# Normalisation des villes saisies, mise en cache : le même nom revient souvent
+_normalize_city = lru_cache(maxsize=4096)(normalize_city_name)
+
+
+# Information répondant à la question d'un état, pour passer les questions déjà
+# répondues : d'après son traitement ("process") ou son nom (états oui / non)
+PREFILL_PROCESS_SLOTS = {"extract_age": "age", "extract_city": "city"}
+PREFILL_RESPONSE_SLOTS = (("rsa_verification", "rsa"), ("schooling_verification", "schooling"))
+
 
 class EligibilityEvaluator:
     """Évalue l'éligibilité des utilisateurs basée sur les règles de l'arbre décisionnel"""
@@ -41,6 +53,12 @@ class EligibilityEvaluator:
         self.user_data = {}  # Stocker temporairement les données utilisateur
 
     def _load_rules(self):
+        """Charger les règles et compiler leurs conditions de transition"""
+        rules = self._read_rules()
+        self.conditions = self._compile_conditions(rules)
+        return rules
+
+    def _read_rules(self):
         """Charger les règles depuis le fichier JSON"""
         try:
             # Vérifier si le fichier existe
@@ -338,7 +356,9 @@ class EligibilityEvaluator:
             }
         }
 
-    def evaluate(self, conversation_id, current_state, nlp_data=None, user_data=None):
+    def evaluate(
+        self, conversation_id, current_state, nlp_data=None, user_data=None, prefill=False
+    ):
         """
         Évaluer l'état actuel et déterminer la prochaine étape
 
@@ -347,10 +367,69 @@ class EligibilityEvaluator:
             current_state (str): État actuel dans l'arbre décisionnel
             nlp_data (dict): Résultats du traitement NLP
             user_data (dict): Données utilisateur collectées jusqu'à présent
+            prefill (bool): Passer les questions dont la réponse est déjà connue
+                ("j'ai 23 ans, pas au RSA, j'habite Stains") et renvoyer la première
+                question encore sans réponse
 
         Returns:
-            dict: Informations sur la prochaine étape
+            dict: Informations sur la prochaine étape (avec prefilled_states, les
+            états passés, si prefill en a passé)
         """
+        result = self._evaluate_state(conversation_id, current_state, nlp_data, user_data)
+        if prefill:
+            result = self._prefill(conversation_id, current_state, result)
+        return result
+
+    def _prefill(self, conversation_id, current_state, result):
+        """Avancer dans l'arbre tant que la question suivante a déjà sa réponse"""
+        prefilled = []
+        # Chaque état est passé au plus une fois
+        while not result.get("is_final"):
+            next_state = result.get("next_state")
+            if next_state == current_state or next_state in prefilled:
+                break
+            known_data = dict(self.user_data.get(conversation_id, {}))
+            answer = self._known_answer(next_state, known_data)
+            if answer is None:
+                break
+
+            print(f"*** Réponse déjà connue pour {next_state}: {json.dumps(answer)} ***")
+            step = self._evaluate_state(conversation_id, next_state, answer, known_data)
+            if step.get("next_state") == next_state:
+                # Réponse connue mais inutilisable : poser la question
+                break
+            prefilled.append(next_state)
+            current_state = next_state
+            result = step
+
+        if prefilled:
+            result["prefilled_states"] = prefilled
+        return result
+
+    def _known_answer(self, state, data):
+        """Réponse (au format nlp_data) à la question de l'état, si les données la contiennent"""
+        state_def = self.rules["states"].get(state, {})
+        slot = PREFILL_PROCESS_SLOTS.get(state_def.get("process"))
+        if slot is None and "responses" in state_def:
+            slot = next(
+                (slot for prefix, slot in PREFILL_RESPONSE_SLOTS if prefix in state), None
+            )
+        value = data.get(slot) if slot else None
+        if value is None or value == "":
+            return None
+
+        if slot in ("rsa", "schooling"):
+            return {
+                "text": "oui" if value else "non",
+                "intent": "yes" if value else "no",
+                "entities": {slot: bool(value)},
+            }
+        if slot == "age" and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            return None
+        return {"text": str(value), "intent": "provide_info", "entities": {slot: value}}
+
+    def _evaluate_state(self, conversation_id, current_state, nlp_data=None, user_data=None):
+        """Évaluer un seul état (une question, une réponse)"""
         print(
             f"\nEvaluating - conversation_id: {conversation_id}, current_state: {current_state}"
         )
@@ -828,11 +907,9 @@ class EligibilityEvaluator:
             result.update(existing_data)
 
         if process_type == "extract_age":
-            # D'abord vérifier si l'âge est déjà dans les données existantes
-            if existing_data and "age" in existing_data:
-                print(f"Âge déjà présent dans les données: {existing_data['age']}")
-                result["age"] = existing_data["age"]
-                return result
+            # L'âge donné dans ce tour passe avant celui des données existantes, qui a
+            # pu venir d'une remarque antérieure ("ma mère a 70 ans")
+            known_age = result.pop("age", None)
 
             # Extraire la ville des données NLP
             text = nlp_data.get("text", "").lower()
@@ -851,6 +928,8 @@ class EligibilityEvaluator:
                     print(
                         f"Code postal trouvé dans un contexte de ville: {postcode_match.group()}"
                     )
+                    if known_age is not None:
+                        result["age"] = known_age
                     return result
 
             # Sinon, extraire l'âge des données NLP ou du message utilisateur
@@ -1055,6 +1134,10 @@ class EligibilityEvaluator:
                 except Exception as e:
                     print(f"Erreur lors de l'extraction d'âge: {str(e)}")
 
+            if "age" not in result and known_age is not None:
+                print(f"Âge déjà présent dans les données: {known_age}")
+                result["age"] = known_age
+
         elif process_type == "extract_city":
             # D'abord vérifier si la ville est déjà dans les données existantes
             if existing_data and "city" in existing_data:
@@ -1192,120 +1275,53 @@ class EligibilityEvaluator:
 
         return result
 
-    def _evaluate_condition(self, condition, data):
-        """Évaluer une condition par rapport aux données"""
-        print(
-            f"Évaluation de la condition: '{condition}' avec les données: {json.dumps(data)}"
-        )
-
+    def _compile_conditions(self, rules):
+        """Condition -> prédicat compilé, pour chaque transition des règles"""
+        conditions = {}
+        for state_name, state_def in rules.get("states", {}).items():
+            for transition in state_def.get("transitions", []):
+                condition = transition["condition"]
+                if condition not in conditions:
+                    conditions[condition] = self._compile_condition(condition)
+        return conditions
+
+    def _compile_condition(self, condition):
         try:
-            # Cas spécial pour la condition "True"
-            if condition == "True":
-                return True
-
-            # Cas spécial pour vérifier si une valeur est dans une liste
-            if " in [" in condition and "]" in condition:
-                # Extraire la variable et la liste
-                var_name, list_str = condition.split(" in ", 1)
-                var_name = var_name.strip()
-
-                if var_name in data:
-                    # Normaliser la valeur entrée
-                    city_value = (
-                        data[var_name].lower() if var_name == "city" else data[var_name]
-                    )
+            return compile_condition(condition, membership=self._city_membership)
+        except ValueError as e:
+            print(f"Condition non compilée, toujours fausse: {str(e)}")
+            return lambda data: False
+
+    @staticmethod
+    def _city_membership(name, values):
+        """Prédicat de "city in [...]" : ville listée, variante d'une ville listée,
+        ou ville dont une variante est listée"""
+        if name != "city":
+            return None
+
+        listed = {value.lower() for value in values}
+        # Variantes des villes listées, et villes dont une variante est listée
+        variants = set()
+        accepted = set(listed)
+        for standard_city, city_variants in CITY_VARIANTS.items():
+            if standard_city in listed:
+                variants.update(city_variants)
+            if any(listed_city in city_variants for listed_city in listed):
+                accepted.add(standard_city)
+
+        def predicate(data):
+            city_value = data["city"]
+            if not isinstance(city_value, str):
+                return False
+            city_value = city_value.lower()
+            normalized_city = _normalize_city(city_value) or city_value
+            return normalized_city in accepted or city_value in variants
+
+        return predicate
 
-                    # Évaluer la liste (en supposant qu'elle est correctement formatée)
-                    list_value = eval(list_str, {"__builtins__": {}})
-
-                    # Pour les villes, utiliser notre module city_variants
-                    if var_name == "city":
-                        # Utiliser la fonction normalize_city_name pour standardiser la ville
-                        normalized_city = normalize_city_name(city_value)
-                        if not normalized_city:
-                            normalized_city = city_value  # Fallback si non reconnu
-
-                        print(
-                            f"Ville normalisée: '{city_value}' -> '{normalized_city}'"
-                        )
-
-                        # Vérifier si la ville normalisée est dans la liste
-                        for listed_city in list_value:
-                            listed_city_lower = listed_city.lower()
-
-                            # Vérification directe avec les noms normalisés
-                            if normalized_city == listed_city_lower:
-                                return True
-
-                            # Vérifier si la ville est une variante d'une ville listée
-                            for standard_city, variants in CITY_VARIANTS.items():
-                                if (
-                                    standard_city == listed_city_lower
-                                    and city_value in variants
-                                ):
-                                    print(
-                                        f"Ville '{city_value}' reconnue comme variante de '{standard_city}' qui est dans la liste"
-                                    )
-                                    return True
-
-                                # Vérifier le cas inverse aussi (ville donnée normalisée est dans la liste)
-                                if (
-                                    standard_city == normalized_city
-                                    and listed_city_lower in variants
-                                ):
-                                    print(
-                                        f"Ville '{listed_city_lower}' reconnue comme variante de '{normalized_city}' qui est la ville entrée"
-                                    )
-                                    return True
-
-                        print(
-                            f"Ville '{city_value}' non trouvée dans les variantes reconnues"
-                        )
-                        return False
-                    else:
-                        # Pour les autres variables, vérification standard
-                        result = data[var_name] in list_value
-                        print(
-                            f"Évaluation standard 'in': {data[var_name]} in {list_value} => {result}"
-                        )
-                        return result
-                else:
-                    print(
-                        f"Variable '{var_name}' requise pour 'in' mais absente des données!"
-                    )
-                    return False
-
-            # Créer un contexte d'évaluation sécurisé pour les autres conditions
-            eval_context = {}
-
-            # Ajouter les données au contexte
-            for key, value in data.items():
-                eval_context[key] = value
-                print(f"Variable ajoutée au contexte: {key} = {value}")
-
-            # Vérifier si toutes les variables requises sont présentes
-            for var_name in re.findall(r"\b([a-zA-Z_][a-zA-Z0-9_]*)\b", condition):
-                if (
-                    var_name not in eval_context
-                    and var_name != "True"
-                    and var_name != "False"
-                    and var_name != "and"
-                    and var_name != "or"
-                    and var_name != "in"
-                    and var_name != "not"
-                ):
-                    print(
-                        f"ATTENTION: Variable '{var_name}' requise dans la condition mais absente des données!"
-                    )
-                    return False
-
-            # Évaluer la condition dans un environnement sécurisé
-            result = eval(condition, {"__builtins__": {}}, eval_context)
-            print(f"Résultat de l'évaluation: {result}")
-            return result
-        except Exception as e:
-            print(f"Erreur lors de l'évaluation de la condition: {str(e)}")
-            if condition == "True":  # Fallback pour la condition "True"
-                print(f"Condition 'True' évaluée par défaut à True")
-                return True
-            return False
+    def _evaluate_condition(self, condition, data):
+        """Évaluer une condition par rapport aux données (prédicat compilé au chargement)"""
+        predicate = self.conditions.get(condition)
+        if predicate is None:
+            predicate = self.conditions[condition] = self._compile_condition(condition)
+        return predicate(data)
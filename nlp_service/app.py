@@ -3,6 +3,7 @@ from flask_cors import CORS
 import os
 from dotenv import load_dotenv
 from processors.openai_processor import OpenAIProcessor
+from utils.http_client import HTTPClient
 
 # Charger les variables d'environnement
 load_dotenv()
@@ -26,10 +27,23 @@ class Config:
     PORT = int(os.getenv("PORT", 5003))
     DEBUG = os.getenv("DEBUG", "True") == "True"
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "default-key")
+    # Appels à l'API OpenAI : échéance d'un appel et de la connexion (secondes),
+    # nouvelles tentatives, connexions gardées ouvertes
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 30))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+    HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", 1))
+    HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 10))
 
 
+http_client = HTTPClient(
+    timeout=Config.HTTP_TIMEOUT,
+    connect_timeout=Config.HTTP_CONNECT_TIMEOUT,
+    retries=Config.HTTP_RETRIES,
+    pool_size=Config.HTTP_POOL_SIZE,
+)
+
 # Initialiser le processeur NLP
-nlp_processor = OpenAIProcessor(api_key=Config.OPENAI_API_KEY)
+nlp_processor = OpenAIProcessor(api_key=Config.OPENAI_API_KEY, http_client=http_client)
 
 
 @app.route("/process", methods=["POST"])
@@ -57,6 +71,12 @@ def health_check():
     return jsonify({"status": "healthy", "service": "nlp-service"}), 200
 
 
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Latency and error metrics of the calls to the OpenAI API"""
+    return jsonify({"upstreams": http_client.metrics()}), 200
+
+
 if __name__ == "__main__":
     # Assurez-vous que les répertoires nécessaires existent
     os.makedirs("processors", exist_ok=True)
@@ -1,13 +1,15 @@
 import json
-import requests
+from utils.http_client import HTTPClient
 
 
 class OpenAIProcessor:
     """Processes text using OpenAI's API for NLP tasks"""
 
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, http_client=None):
         self.api_key = api_key
         self.api_url = "https://api.openai.com/v1/chat/completions"
+        # Keep-alive connection to the API, bounded by a deadline on every call
+        self.http_client = http_client or HTTPClient(timeout=30)
 
     def analyze(self, text, language="fr"):
         """
@@ -68,7 +70,13 @@ class OpenAIProcessor:
             }
 
             # Make the request
-            response = requests.post(self.api_url, headers=headers, json=data)
+            response = self.http_client.post(
+                self.api_url,
+                headers=headers,
+                json=data,
+                idempotent=True,
+                upstream="openai",
+            )
 
             # Process the response
             if response.status_code == 200:
@@ -0,0 +1 @@
+# Utilitaires du service nlp_service
@@ -1,16 +1,17 @@
-import requests
 import base64
 import json
 import os
 import tempfile
+from utils.http_client import HTTPClient
 
 
 class WhisperAdapter:
     """Adapter for OpenAI's Whisper API"""
 
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, http_client=None):
         self.api_key = api_key
         self.api_url = "https://api.openai.com/v1/audio/transcriptions"
+        self.http_client = http_client or HTTPClient(timeout=60)
 
     def transcribe(self, audio_data, language="fr"):
         """
@@ -35,14 +36,21 @@ class WhisperAdapter:
             # Prepare the request
             headers = {"Authorization": f"Bearer {self.api_key}"}
 
+            # Contenu en mémoire : il peut être renvoyé si l'appel est retenté
             with open(temp_filename, "rb") as audio_file:
                 files = {
-                    "file": audio_file,
+                    "file": (os.path.basename(temp_filename), audio_file.read()),
                     "model": (None, "whisper-1"),
                     "language": (None, language),
                 }
 
-                response = requests.post(self.api_url, headers=headers, files=files)
+            response = self.http_client.post(
+                self.api_url,
+                headers=headers,
+                files=files,
+                idempotent=True,
+                upstream="openai",
+            )
 
             # Clean up the temporary file
             os.unlink(temp_filename)
@@ -3,9 +3,11 @@ from flask_cors import CORS
 import os
 from dotenv import load_dotenv
 from config.config import Config
-import requests
+from utils.http_client import HTTPClient, StreamBody
 import base64
 import json
+import re
+import shutil
 import tempfile
 
 app = Flask(__name__)
@@ -26,38 +28,77 @@ load_dotenv()
 # Récupérer la clé API depuis les variables d'environnement
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", Config.OPENAI_API_KEY)
 
+# Connexion gardée ouverte vers l'API Whisper, avec échéance sur chaque appel
+http_client = HTTPClient(
+    timeout=Config.HTTP_TIMEOUT,
+    connect_timeout=Config.HTTP_CONNECT_TIMEOUT,
+    retries=Config.HTTP_RETRIES,
+    pool_size=Config.HTTP_POOL_SIZE,
+)
 
-# Modifiez la fonction transcribe_audio pour gérer correctement les fichiers temporaires
-@app.route("/transcribe", methods=["POST"])
-def transcribe_audio():
-    """Transcribe audio to text"""
-    temp_filename = None
-    try:
-        print("Received transcription request")
-        data = request.json
 
-        if "audio" not in data:
-            return jsonify({"error": "No audio data provided"}), 400
+# Taille des blocs lus dans le corps reçu et écrits dans le fichier temporaire
+AUDIO_CHUNK_SIZE = 64 * 1024
 
-        audio_data = data["audio"]
-        language = data.get("language", "fr")
+# Code langue accepté ("fr", "fr-FR") : il est recopié dans le corps multipart envoyé
+# à Whisper, aucun retour à la ligne ni délimiteur ne doit pouvoir y être injecté
+LANGUAGE_PATTERN = re.compile(r"[a-z]{2}(-[A-Z]{2})?")
 
-        print(f"Audio data length: {len(audio_data) if audio_data else 'None'}")
-        print(f"Language: {language}")
 
-        # Decode base64 audio
+def _receive_audio(temp_file):
+    """Write the uploaded audio to temp_file, chunk by chunk for binary bodies.
+
+    Accepted bodies: raw audio (audio/*, application/octet-stream, ?language=fr),
+    multipart/form-data (file field "audio" or "file", optional "language" field) or
+    the historic JSON {"audio": base64, "language": "fr"}.
+
+    The language must match LANGUAGE_PATTERN, otherwise the request is rejected (400).
+
+    Returns (language, error response or None).
+    """
+    if request.is_json:
+        data = request.get_json(silent=True) or {}
+        if not data.get("audio"):
+            return None, (jsonify({"error": "No audio data provided"}), 400)
+        print(f"Audio data length: {len(data['audio'])}")
         try:
-            audio_bytes = base64.b64decode(audio_data)
-            print(f"Decoded audio bytes length: {len(audio_bytes)}")
+            temp_file.write(base64.b64decode(data["audio"]))
         except Exception as decode_err:
             print(f"Error decoding audio: {str(decode_err)}")
-            return jsonify({"error": f"Error decoding audio: {str(decode_err)}"}), 400
+            return None, (
+                jsonify({"error": f"Error decoding audio: {str(decode_err)}"}),
+                400,
+            )
+        language = data.get("language", "fr")
+    elif request.mimetype == "multipart/form-data":
+        upload = request.files.get("audio") or request.files.get("file")
+        if upload is None:
+            return None, (jsonify({"error": "No audio data provided"}), 400)
+        shutil.copyfileobj(upload.stream, temp_file, AUDIO_CHUNK_SIZE)
+        language = request.form.get("language") or request.args.get("language", "fr")
+    else:
+        shutil.copyfileobj(request.stream, temp_file, AUDIO_CHUNK_SIZE)
+        language = request.args.get("language", "fr")
+
+    if not temp_file.tell():
+        return None, (jsonify({"error": "No audio data provided"}), 400)
+    if not isinstance(language, str) or not LANGUAGE_PATTERN.fullmatch(language):
+        return None, (jsonify({"error": "Invalid language"}), 400)
+    return language, None
+
+
+@app.route("/transcribe", methods=["POST"])
+def transcribe_audio():
+    """Transcribe audio to text (raw, multipart or base64 JSON body)"""
+    temp_filename = None
+    try:
+        print(f"Received transcription request ({request.mimetype})")
 
         # Create a temporary file
         try:
             with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
                 temp_filename = temp_file.name
-                temp_file.write(audio_bytes)
+                language, error_response = _receive_audio(temp_file)
                 print(f"Temporary file created: {temp_filename}")
         except Exception as file_err:
             print(f"Error creating temporary file: {str(file_err)}")
@@ -65,26 +106,38 @@ def transcribe_audio():
                 jsonify({"error": f"Error creating temporary file: {str(file_err)}"}),
                 500,
             )
+        if error_response is not None:
+            return error_response
+
+        audio_size = os.path.getsize(temp_filename)
+        print(f"Audio bytes length: {audio_size}")
+        print(f"Language: {language}")
 
         # Prepare the request to OpenAI Whisper API
-        api_url = "https://api.openai.com/v1/audio/transcriptions"
+        api_url = Config.WHISPER_API_URL
         headers = {"Authorization": f"Bearer {OPENAI_API_KEY}"}
 
-        # For debugging, check if the file exists and its size
-        print(f"File exists: {os.path.exists(temp_filename)}")
-        print(f"File size: {os.path.getsize(temp_filename)}")
-
         try:
             transcribed_text = ""
             with open(temp_filename, "rb") as audio_file:
-                files = {
-                    "file": audio_file,
-                    "model": (None, "whisper-1"),
-                    "language": (None, language),
-                }
+                # Fichier envoyé par blocs depuis le disque, rembobiné si l'appel est retenté
+                body, content_type = StreamBody.multipart(
+                    {"model": "whisper-1", "language": language},
+                    "file",
+                    os.path.basename(temp_filename),
+                    audio_file,
+                    audio_size,
+                )
+                headers["Content-Type"] = content_type
 
                 print("Sending request to OpenAI Whisper API...")
-                response = requests.post(api_url, headers=headers, files=files)
+                response = http_client.post(
+                    api_url,
+                    headers=headers,
+                    data=body,
+                    idempotent=True,
+                    upstream="openai",
+                )
 
                 print(f"OpenAI response status: {response.status_code}")
 
@@ -119,13 +172,9 @@ def transcribe_audio():
         print(traceback.format_exc())
         return jsonify({"error": str(e)}), 500
     finally:
-        # Essayez de supprimer le fichier temporaire dans le bloc finally
+        # Le fichier temporaire est déjà fermé : il peut être supprimé tout de suite
         if temp_filename and os.path.exists(temp_filename):
             try:
-                # Attendez un court instant pour que le fichier soit libéré
-                import time
-
-                time.sleep(0.5)
                 os.unlink(temp_filename)
                 print(f"Temporary file deleted: {temp_filename}")
             except Exception as del_err:
@@ -139,6 +188,12 @@ def health_check():
     return jsonify({"status": "healthy", "service": "stt-service"}), 200
 
 
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Latency and error metrics of the calls to the Whisper API"""
+    return jsonify({"upstreams": http_client.metrics()}), 200
+
+
 @app.route("/", methods=["GET"])
 def index():
     """Root endpoint for testing"""
@@ -148,7 +203,7 @@ def index():
                 "service": "Speech-to-Text Service",
                 "status": "running",
                 "endpoints": [
-                    "/transcribe - POST - Transcribe audio to text",
+                    "/transcribe - POST - Transcribe audio to text (raw, multipart or JSON)",
                     "/health - GET - Health check",
                 ],
             }
@@ -9,3 +9,13 @@ class Config:
 
     # OpenAI API configuration
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+    WHISPER_API_URL = os.getenv(
+        "WHISPER_API_URL", "https://api.openai.com/v1/audio/transcriptions"
+    )
+
+    # Appels à l'API Whisper (utils/http_client.py) : échéance d'un appel et de la
+    # connexion (secondes), nouvelles tentatives, connexions gardées ouvertes
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 60))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+    HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", 1))
+    HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 10))
@@ -0,0 +1 @@
+# Utilitaires du service stt_service
@@ -0,0 +1,146 @@
+"""
+Message vocal de 1 Mo, du client au service STT, selon le format du corps :
+JSON avec l'audio en base64 (format historique), binaire brut ou multipart.
+
+Le service chatbot (app.py) et le service STT (app.py) sont lancés chacun dans leur
+processus ; l'API Whisper est simulée ici. Pour chaque format, les deux services sont
+relancés et on mesure la latence moyenne d'un message vocal et l'augmentation du pic
+de mémoire résidente (VmHWM) de chaque service depuis son démarrage.
+"""
+
+import base64
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+CLIP = os.urandom(1024 * 1024)
+ROUNDS = 5
+
+
+class _WhisperHandler(BaseHTTPRequestHandler):
+    """API Whisper simulée : lit le formulaire par blocs et renvoie un texte"""
+
+    def do_POST(self):
+        remaining = int(self.headers["Content-Length"])
+        while remaining:
+            remaining -= len(self.rfile.read(min(remaining, 65536)))
+        body = json.dumps({"text": "Bonjour"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start(service, **env):
+    """Lance service/app.py sur un port libre ; renvoie (processus, URL)"""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "app.py"],
+        cwd=os.path.join(ROOT, service),
+        env=dict(os.environ, HOST="127.0.0.1", PORT=str(port), **env),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(200):
+        try:
+            requests.get(f"{url}/health", timeout=1)
+            return process, url
+        except requests.ConnectionError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError(f"{service} n'a pas démarré")
+
+
+def peak_rss(process):
+    """Pic de mémoire résidente du processus, en Mo"""
+    with open(f"/proc/{process.pid}/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+
+
+def send(url, conversation_id, body_format):
+    if body_format == "json":
+        audio = base64.b64encode(CLIP).decode("ascii")
+        return requests.post(
+            f"{url}/process-audio", json={"conversation_id": conversation_id, "audio": audio}
+        )
+    if body_format == "binaire":
+        return requests.post(
+            f"{url}/process-audio",
+            params={"conversation_id": conversation_id},
+            data=CLIP,
+            headers={"Content-Type": "audio/webm"},
+        )
+    return requests.post(
+        f"{url}/process-audio",
+        data={"conversation_id": conversation_id},
+        files={"audio": ("clip.webm", CLIP, "audio/webm")},
+    )
+
+
+def bench(body_format, whisper_url):
+    stt, stt_url = start("stt_service", WHISPER_API_URL=whisper_url, OPENAI_API_KEY="bench")
+    chatbot, chatbot_url = start(
+        "chatbot_service",
+        STT_SERVICE_URL=stt_url,
+        DECISION_TREE_MODE="local",
+        CONVERSATION_BACKEND="memory",
+        CONVERSATION_SWEEP_INTERVAL="0",
+    )
+    try:
+        conversation_id = requests.post(f"{chatbot_url}/conversation", json={}).json()[
+            "conversation_id"
+        ]
+        before = peak_rss(chatbot), peak_rss(stt)
+
+        latencies = []
+        for _ in range(ROUNDS + 1):
+            start_time = time.perf_counter()
+            response = send(chatbot_url, conversation_id, body_format)
+            latencies.append(time.perf_counter() - start_time)
+            assert response.json()["transcription"] == "Bonjour", response.text
+        # Premier message hors latence (connexions à ouvrir)
+        latency = sum(latencies[1:]) / ROUNDS
+
+        after = peak_rss(chatbot), peak_rss(stt)
+        print(
+            f"{body_format:>9}: {latency * 1000:6.1f} ms par message de 1 Mo, pic RSS "
+            f"+{after[0] - before[0]:.1f} Mo (chatbot, {after[0]:.0f} Mo), "
+            f"+{after[1] - before[1]:.1f} Mo (stt, {after[1]:.0f} Mo)"
+        )
+    finally:
+        for process in (chatbot, stt):
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    whisper = ThreadingHTTPServer(("127.0.0.1", 0), _WhisperHandler)
+    whisper.daemon_threads = True
+    threading.Thread(target=whisper.serve_forever, daemon=True).start()
+    whisper_url = "http://127.0.0.1:%d/v1/audio/transcriptions" % whisper.server_address[1]
+    try:
+        for body_format in ("json", "binaire", "multipart"):
+            bench(body_format, whisper_url)
+    finally:
+        whisper.shutdown()
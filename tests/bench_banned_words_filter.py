@@ -0,0 +1,101 @@
+import os
+import re
+import sys
+import time
+
+# Rendre les modules du service chatbot importables
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "chatbot_service")
+)
+
+from utils.banned_words_filter import BannedWordsFilter
+from utils.word_matcher import WordMatcher
+
+MESSAGES = [
+    "Bonjour, comment puis-je vous aider ?",
+    "J'ai 22 ans et j'habite à Saint-Denis, je ne suis pas au RSA",
+    "Je ne comprends pas pourquoi ce con ne me répond pas",
+    "Allez-vous faire foutre avec votre service, espèce de connard",
+    "Oui j'accepte, je suis scolarisé au lycée de Stains depuis septembre",
+    "nique ta mère sale fils de pute",
+    "Je cherche un accompagnement pour trouver un emploi dans la logistique "
+    "ou le bâtiment, j'ai déjà travaillé comme cariste pendant deux ans " * 5,
+]
+
+
+def reference_find_all(words, message_lower):
+    """Ancienne implémentation : une regex \\b...\\b par mot du lexique"""
+    found = []
+    for word in words:
+        pattern = r"\b" + re.escape(word) + r"\b"
+        if re.search(pattern, message_lower):
+            found.append(word)
+    return found
+
+
+def test_equivalence():
+    """Vérifie que l'automate donne exactement les mêmes mots que les regex"""
+    word_filter = BannedWordsFilter()
+    words = word_filter.banned_words
+    matcher = WordMatcher(words)
+
+    corpus = [m.lower() for m in MESSAGES]
+    # Chaque mot du lexique, seul et entouré de texte, doit être détecté de la même façon
+    for word in words:
+        corpus.append(word)
+        corpus.append(f"avant {word} après")
+        corpus.append(f"x{word}x")
+
+    mismatches = 0
+    for message in corpus:
+        expected = reference_find_all(words, message)
+        got = matcher.find_all(message)
+        if expected != got:
+            mismatches += 1
+            print(f"DIFFÉRENCE pour {message!r}: attendu {expected}, obtenu {got}")
+
+    print(f"{len(corpus)} messages comparés, {mismatches} différence(s)")
+    assert mismatches == 0
+
+
+def bench(label, func, repeat=200):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for message in MESSAGES:
+            func(message)
+    elapsed = time.perf_counter() - start
+    per_message = elapsed / (repeat * len(MESSAGES)) * 1e6
+    print(f"{label:<40} {per_message:10.1f} µs/message")
+
+
+def main():
+    test_equivalence()
+
+    words = BannedWordsFilter().banned_words
+    lowered = [m.lower() for m in MESSAGES]
+    MESSAGES[:] = lowered
+
+    print("\n=== Coût par message selon la taille du lexique ===")
+    for size in (100, 450, len(words), len(words) * 4):
+        lexicon = (words * 4)[:size]
+        if size > len(words):
+            # Lexique synthétique plus grand : variantes uniques des mots existants
+            lexicon = [f"{w}{i // len(words)}" for i, w in enumerate(lexicon)]
+        matcher = WordMatcher(lexicon)
+        bench(f"regex par mot ({size} mots)", lambda m: reference_find_all(lexicon, m), 1)
+        bench(f"automate ({size} mots)", matcher.find_all)
+
+    print("\n=== Débit du filtre complet (canonicalisation + automate) ===")
+    word_filter = BannedWordsFilter()
+    bench(f"check_message ({len(word_filter.banned_words)} mots)", word_filter.check_message)
+    start = time.perf_counter()
+    count = 0
+    while time.perf_counter() - start < 1.0:
+        for message in MESSAGES:
+            word_filter.check_message(message)
+        count += len(MESSAGES)
+    print(f"{'débit':<40} {count / (time.perf_counter() - start):10.0f} messages/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import json
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+
+# Rendre les modules du service chatbot importables
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "chatbot_service")
+)
+
+from core.conversation_manager import ConversationManager
+from core.records import Conversation, Role
+from utils.banned_words_filter import DEFAULT_BANNED_WORDS
+
+CONVERSATIONS = 10000
+
+# Un parcours d'éligibilité typique : réponses de l'utilisateur et textes du bot
+TURNS = [
+    ("Bonjour", "Merci pour ton message, je suis là pour t'aider ! 😊\nDonne moi plus de détails sur ton besoin?"),
+    ("Je cherche un emploi", "Avant de commencer, je dois recueillir quelques informations personnelles pour déterminer votre éligibilité. Acceptez-vous que vos données soient traitées dans le cadre de cette évaluation ?"),
+    ("Oui j'accepte", "Pour mieux t'orienter, peux tu me communiquer ton âge ? Cela m'aidera à te fournir des informations adaptées à ton profil. 😊"),
+    ("J'ai 22 ans", "Es-tu actuellement bénéficiaire du RSA (Revenu de Solidarité Active) ? 💰"),
+    ("Non", "Es-tu actuellement scolarisé(e) ? 🎓"),
+    ("Non plus depuis l'an dernier", "Dans quelle ville habites-tu ? 🏙️"),
+    ("Saint-Denis", "🎉 Bonne nouvelle ! 🎉 Tu es éligible à un accompagnement personnalisé <b>Avenir Jeunes</b>. Un conseiller te contactera très prochainement pour t'aider dans ton projet professionnel. 📞"),
+]
+
+
+class LegacyPerConversationFilter:
+    """Reproduit l'ancien filtre : liste du lexique et dict de violations par conversation"""
+
+    def __init__(self, max_violations=2):
+        self.max_violations = max_violations
+        self.user_violations = {}
+        self.banned_words = list(DEFAULT_BANNED_WORDS)
+
+
+def measure(label, create):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    keep = [create(i) for i in range(CONVERSATIONS)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    per_conversation = (after - before) / CONVERSATIONS
+    print(f"{label:<45} {per_conversation:10.0f} octets/conversation")
+    return keep
+
+
+def main():
+    print(f"=== Mémoire pour {CONVERSATIONS} conversations ===")
+
+    manager = ConversationManager()
+
+    def create_legacy(i):
+        return {
+            "id": f"conv-{i}",
+            "user_id": f"user_{i}",
+            "created_at": datetime.now().isoformat(),
+            "messages": [],
+            "current_state": "initial",
+            "eligibility_result": None,
+            "user_data": {},
+            "word_filter": LegacyPerConversationFilter(max_violations=2),
+        }
+
+    measure("avant (filtre par conversation)", create_legacy)
+    measure("après (lexique partagé + compteur)", manager.create_conversation)
+
+    print(f"\n=== Mémoire pour {CONVERSATIONS} conversations de {len(TURNS)} tours ===")
+
+    def play_dicts(i):
+        conversation = create_legacy(i)
+        del conversation["word_filter"]
+        conversation["violation_count"] = 0
+        for user_text, bot_text in TURNS:
+            conversation["messages"].append(
+                {"role": "user", "content": user_text, "timestamp": datetime.now().isoformat()}
+            )
+            # Le texte du bot arrive dans la réponse JSON de l'arbre de décision : une copie par tour
+            conversation["messages"].append(
+                {
+                    "role": "bot",
+                    "content": json.loads(json.dumps(bot_text)),
+                    "timestamp": datetime.now().isoformat(),
+                }
+            )
+        return conversation
+
+    def play_records(i):
+        conversation = Conversation(f"conv-{i}", f"user_{i}")
+        for user_text, bot_text in TURNS:
+            conversation.add_message(Role.USER, user_text)
+            conversation.add_message(Role.BOT, json.loads(json.dumps(bot_text)))
+        return conversation
+
+    dicts = measure("dicts (format JSON en mémoire)", play_dicts)
+    records = measure("enregistrements à slots", play_records)
+    assert [set(c) for c in dicts[:1]] == [set(records[0].to_dict())]
+
+
+if __name__ == "__main__":
+    main()
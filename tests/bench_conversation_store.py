@@ -0,0 +1,62 @@
+import os
+import sys
+import tempfile
+import time
+
+# Rendre les modules du service chatbot importables
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "chatbot_service")
+)
+
+from core.conversation_store import ConversationStore
+from core.records import Conversation, Role
+from core.sqlite_conversation_store import SQLiteConversationStore
+
+CONVERSATIONS = 2000
+TURNS_PER_CONVERSATION = 8
+
+
+def run(label, store, after_turn=None):
+    """Un tour = lecture, ajout du message utilisateur et de la réponse, changement d'état, save()"""
+    ids = [f"conv-{i}" for i in range(CONVERSATIONS)]
+    for conversation_id in ids:
+        store[conversation_id] = Conversation(conversation_id, "user")
+
+    start = time.perf_counter()
+    for turn in range(TURNS_PER_CONVERSATION):
+        for conversation_id in ids:
+            conversation = store.get(conversation_id)
+            conversation.add_message(Role.USER, f"Réponse {turn}")
+            conversation.add_message(Role.BOT, "Question suivante ?")
+            conversation["current_state"] = f"state_{turn}"
+            store.save(conversation_id)
+            if after_turn:
+                after_turn()
+    elapsed = time.perf_counter() - start
+
+    # Le débit compte les tours jusqu'à leur écriture complète sur le disque
+    store.flush()
+    total = time.perf_counter() - start
+    turns = CONVERSATIONS * TURNS_PER_CONVERSATION
+    print(
+        f"{label:<38} {turns / elapsed:9.0f} tours/s "
+        f"({turns / total:9.0f} tours/s écriture comprise)"
+    )
+    store.close()
+
+
+def main():
+    print(f"=== {CONVERSATIONS} conversations x {TURNS_PER_CONVERSATION} tours ===")
+    run("mémoire", ConversationStore(ttl=0, max_entries=0))
+
+    with tempfile.TemporaryDirectory() as directory:
+        uri = f"sqlite:///{os.path.join(directory, 'lots.db')}"
+        run("sqlite, écriture différée par lots", SQLiteConversationStore(uri))
+
+        uri = f"sqlite:///{os.path.join(directory, 'sync.db')}"
+        store = SQLiteConversationStore(uri, flush_interval=3600)
+        run("sqlite, écriture à chaque tour", store, after_turn=store.flush)
+
+
+if __name__ == "__main__":
+    main()
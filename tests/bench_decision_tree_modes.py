@@ -0,0 +1,118 @@
+import contextlib
+import io
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import requests
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DECISION_TREE_DIR = os.path.join(ROOT, "decision_tree_service")
+
+# Rendre les modules du service chatbot importables
+sys.path.append(os.path.join(ROOT, "chatbot_service"))
+
+from config.config import Config
+from core.conversation_manager import ConversationManager
+
+# Réponses successives de l'utilisateur pour quelques parcours complets
+SCENARIOS = [
+    ["Bonjour", "Oui", "Oui", "J'ai 17 ans", "Non", "Non", "Saint-Denis"],
+    ["Bonjour", "Oui", "Oui", "J'ai 22 ans", "Oui", "Non", "Stains"],
+    ["Bonjour", "Oui", "Oui", "J'ai 30 ans", "Oui", "Non", "Pierrefitte"],
+    ["Bonjour", "Oui", "Oui", "J'ai 19 ans", "Non", "Non", "Marseille"],
+    ["Bonjour", "Oui", "Oui", "J'ai 12 ans"],
+    ["Bonjour", "Oui", "Non"],
+]
+ROUNDS = 20
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_service():
+    """Lance decision_tree_service (serveur Flask) sur un port libre"""
+    port = free_port()
+    env = dict(os.environ, HOST="127.0.0.1", PORT=str(port))
+    process = subprocess.Popen(
+        [sys.executable, "app.py"],
+        cwd=DECISION_TREE_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            requests.get(f"{url}/health", timeout=1)
+            return process, url
+        except requests.RequestException:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("decision_tree_service n'a pas démarré")
+
+
+def make_manager(mode, url=None):
+    Config.DECISION_TREE_MODE = mode
+    Config.DECISION_TREE_SERVICE_URL = url or Config.DECISION_TREE_SERVICE_URL
+    Config.CONVERSATION_SWEEP_INTERVAL = 0
+    return ConversationManager()
+
+
+def run(manager, label):
+    """Joue tous les parcours ; renvoie les réponses et le temps moyen par appel à l'arbre"""
+    calls = []
+    evaluate = manager.decision_tree.evaluate
+
+    def timed(*args):
+        start = time.perf_counter()
+        try:
+            return evaluate(*args)
+        finally:
+            calls.append(time.perf_counter() - start)
+
+    manager.decision_tree.evaluate = timed
+    transcripts = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for round_number in range(ROUNDS):
+            for texts in SCENARIOS:
+                conversation_id = manager.create_conversation(f"user-{round_number}")
+                transcript = []
+                for text in texts:
+                    response = manager.process_message(conversation_id, text)
+                    conversation = manager.get_conversation(conversation_id)
+                    transcript.append((response["message"], conversation["current_state"]))
+                transcripts.append(transcript)
+
+    calls.sort()
+    mean = sum(calls) / len(calls)
+    p95 = calls[int(len(calls) * 0.95)]
+    print(
+        f"{label:<10} {len(calls):5d} appels  moyenne {mean * 1e6:9.1f} µs  p95 {p95 * 1e6:9.1f} µs"
+    )
+    return transcripts
+
+
+def main():
+    process, url = start_service()
+    try:
+        remote = run(make_manager("remote", url), "remote")
+    finally:
+        process.terminate()
+        process.wait()
+
+    local = run(make_manager("local"), "local")
+
+    assert remote == local, "les modes local et remote donnent des parcours différents"
+    final_states = sorted({transcript[-1][1] for transcript in local})
+    print(f"Parcours identiques dans les deux modes (états finaux: {', '.join(final_states)})")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Débit de EligibilityEvaluator.evaluate() pour chaque état des règles, et coût d'une
+vérification de condition de transition.
+
+L'évaluateur est celui de decision_tree_service, exécuté dans le processus (ses
+journaux sont envoyés vers /dev/null pendant la mesure).
+"""
+
+import contextlib
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DECISION_TREE_DIR = os.path.join(ROOT, "decision_tree_service")
+RULES_FILE = os.path.join(DECISION_TREE_DIR, "rules", "eligibility_rules.json")
+
+sys.path.append(DECISION_TREE_DIR)
+
+from evaluators.eligibility_evaluator import EligibilityEvaluator
+
+DURATION = 0.3
+CONDITION_CALLS = 20000
+
+# Données utilisateur connues quand l'état est atteint
+PROFILES = {
+    "young_rsa": {"age": 19, "rsa": True},
+    "young_no_rsa": {"age": 19, "rsa": False},
+    "adult_rsa": {"age": 35, "rsa": True},
+    "adult_no_rsa": {"age": 35, "rsa": False},
+}
+
+
+def case(state):
+    """(nlp_data, user_data) d'une réponse typique à la question de l'état"""
+    user_data = next(
+        (dict(data) for suffix, data in PROFILES.items() if state.endswith(suffix)), {}
+    )
+    if state == "age_verification":
+        return {"text": "J'ai 19 ans", "intent": "inform", "entities": {"age": 19}}, user_data
+    if state.startswith("city_verification"):
+        return {"text": "Saint-Denis", "intent": "inform", "entities": {}}, user_data
+    if state.startswith(("consent", "rsa_verification", "schooling_verification")):
+        return {"text": "non", "intent": "no", "entities": {}}, user_data
+    return {"text": "ok", "intent": "unknown", "entities": {}}, user_data
+
+
+def throughput(evaluator, state):
+    nlp_data, user_data = case(state)
+    calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        for _ in range(50):
+            evaluator.evaluate("bench", state, nlp_data, dict(user_data))
+        calls += 50
+    return calls / (time.perf_counter() - start)
+
+
+def condition_cost(evaluator, condition, data):
+    start = time.perf_counter()
+    for _ in range(CONDITION_CALLS):
+        evaluator._evaluate_condition(condition, data)
+    return (time.perf_counter() - start) / CONDITION_CALLS
+
+
+if __name__ == "__main__":
+    with open(RULES_FILE, encoding="utf-8-sig") as f:
+        states = json.load(f)["states"]
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        evaluator = EligibilityEvaluator(RULES_FILE)
+        rates = {state: throughput(evaluator, state) for state in states}
+
+        conditions = {}
+        for definition in states.values():
+            for transition in definition.get("transitions", []):
+                condition = transition["condition"]
+                data = {"age": 19, "city": "saint-denis"}
+                conditions[condition] = condition_cost(evaluator, condition, data)
+
+    print("evaluate() par état (appels/s):")
+    for state, rate in rates.items():
+        print(f"  {state:<38} {rate:10.0f}")
+    print("Vérification d'une condition (µs):")
+    for condition, cost in conditions.items():
+        print(f"  {condition[:60]:<62} {cost * 1e6:8.2f}")
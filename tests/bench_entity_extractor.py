@@ -0,0 +1,128 @@
+import json
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+REPLIES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "french_replies.json")
+
+# Rendre les modules du service chatbot importables
+sys.path.append(os.path.join(ROOT, "chatbot_service"))
+
+from utils.entity_extractor import extract
+
+FIELDS = ("intent", "age", "rsa", "schooling", "city", "postal_code")
+ROUNDS = 200
+
+
+def legacy_extract(text):
+    """Ancienne version de ConversationManager._process_with_nlp (sous-chaînes)"""
+    entities = {}
+
+    age_match = re.search(r"\d+", text)
+    if age_match:
+        entities["age"] = int(age_match.group())
+
+    rsa_keywords = ["rsa", "revenu de solidarité active"]
+    if any(keyword in text.lower() for keyword in rsa_keywords):
+        if "non" in text.lower() or "pas" in text.lower():
+            entities["rsa"] = False
+        else:
+            entities["rsa"] = True
+
+    schooling_keywords = ["scolarisé", "école", "étudiant", "études"]
+    if any(keyword in text.lower() for keyword in schooling_keywords):
+        if "non" in text.lower() or "pas" in text.lower():
+            entities["schooling"] = False
+        else:
+            entities["schooling"] = True
+
+    cities = [
+        "saint-denis",
+        "stains",
+        "pierrefitte",
+        "saint-ouen",
+        "épinay",
+        "villetaneuse",
+        "île-saint-denis",
+        "aubervilliers",
+        "épinay-sur-seine",
+        "la courneuve",
+        "montfermeil",
+    ]
+    for city in cities:
+        if city in text.lower() or city.replace("-", " ") in text.lower():
+            entities["city"] = city
+            break
+
+    intent = "provide_info"
+    if "?" in text:
+        intent = "ask_question"
+    elif "oui" in text.lower() or "yes" in text.lower() or "accepte" in text.lower():
+        intent = "yes"
+    elif "non" in text.lower() or "no" in text.lower():
+        intent = "no"
+
+    return {"intent": intent, "entities": entities, "text": text}
+
+
+def score(function, replies):
+    """Nombre de réponses correctes par champ (valeur absente attendue = None)"""
+    correct = dict.fromkeys(FIELDS, 0)
+    errors = []
+    for reply in replies:
+        result = function(reply["text"])
+        found = dict(result["entities"], intent=result["intent"])
+        for field in FIELDS:
+            if found.get(field) == reply.get(field):
+                correct[field] += 1
+            else:
+                errors.append((reply["text"], field, reply.get(field), found.get(field)))
+    return correct, errors
+
+
+def timing(function, replies, repeat=5):
+    """Meilleur temps moyen par réponse sur repeat séries"""
+    texts = [reply["text"] for reply in replies]
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(ROUNDS):
+            for text in texts:
+                function(text)
+        elapsed = (time.perf_counter() - start) / (ROUNDS * len(texts))
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    with open(REPLIES_FILE, encoding="utf-8") as f:
+        replies = json.load(f)
+
+    results = {
+        "ancien": score(legacy_extract, replies),
+        "compilé": score(extract, replies),
+    }
+
+    print(f"=== Exactitude sur {len(replies)} réponses étiquetées ===")
+    print(f"{'champ':<12}" + "".join(f"{label:>10}" for label in results))
+    for field in FIELDS:
+        print(
+            f"{field:<12}"
+            + "".join(f"{correct[field] / len(replies):>10.1%}" for correct, _ in results.values())
+        )
+    totals = [sum(correct.values()) / (len(replies) * len(FIELDS)) for correct, _ in results.values()]
+    print(f"{'total':<12}" + "".join(f"{total:>10.1%}" for total in totals))
+
+    print("\n=== Temps par réponse ===")
+    for label, function in (("ancien", legacy_extract), ("compilé", extract)):
+        print(f"{label:<12}{timing(function, replies) * 1e6:8.2f} µs")
+
+    print("\n=== Erreurs restantes (compilé) ===")
+    for text, field, expected, found in results["compilé"][1]:
+        print(f"{text!r}: {field} attendu {expected!r}, obtenu {found!r}")
+
+
+if __name__ == "__main__":
+    main()
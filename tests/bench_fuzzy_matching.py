@@ -0,0 +1,144 @@
+import json
+import os
+import random
+import sys
+import time
+
+# Rendre les modules du service chatbot importables
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.join(TESTS_DIR, "..")
+sys.path.append(os.path.join(ROOT_DIR, "chatbot_service"))
+sys.path.append(os.path.join(ROOT_DIR, "decision_tree_service"))
+
+from data.city_variants import CITY_VARIANTS
+from utils.banned_words_filter import DEFAULT_BANNED_WORDS, BannedWordsFilter
+
+# Réponses habituelles des utilisateurs du parcours d'éligibilité
+USER_REPLIES = [
+    "Bonjour, je cherche un accompagnement pour trouver un emploi",
+    "Oui j'accepte",
+    "Non merci",
+    "J'ai 22 ans",
+    "J'ai vingt-trois ans et je ne suis pas au RSA",
+    "Je suis bénéficiaire du RSA depuis deux ans",
+    "Je ne suis plus scolarisé, j'ai arrêté en première",
+    "Je suis en terminale au lycée professionnel",
+    "Je suis en salle de classe le mardi",
+    "Merci beaucoup pour votre aide !",
+    "C'est passé, je peux passer au rendez-vous lundi ?",
+    "Je voudrais une formation de cariste ou de caissière",
+    "Est-ce que je peux venir avec mon dossier CAF ?",
+    "Je travaille en intérim dans la logistique",
+    "J'ai un CAP cuisine et un BEP vente",
+    "Je suis demandeur d'emploi inscrit à France Travail",
+    "Je cherche un chantier d'insertion ou un contrat aidé",
+    "Ma conseillère de la mission locale m'a envoyé ici",
+    "J'ai perdu mon travail de chauffeur livreur le mois dernier",
+    "Je voudrais reprendre des études de comptabilité",
+    "Je suis réfugié et je cherche un logement et un travail",
+    "Mon fils est handicapé, je m'occupe de lui à la maison",
+    "Je suis auto-entrepreneur mais je n'ai plus de clients",
+    "Je cherche un stage de secrétariat ou d'accueil",
+    "Je veux devenir agent de sécurité ou agent d'entretien",
+]
+
+CORPUS_SIZE = 2000
+TYPOS_PER_WORD = 5
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def clean_corpus():
+    """Messages sans mot interdit : réponses habituelles, textes du bot et noms de villes"""
+    messages = list(USER_REPLIES)
+
+    def collect(value):
+        if isinstance(value, str):
+            if len(value.split()) >= 3:
+                messages.append(value)
+        elif isinstance(value, dict):
+            for item in value.values():
+                collect(item)
+        elif isinstance(value, list):
+            for item in value:
+                collect(item)
+
+    rules_file = os.path.join(
+        ROOT_DIR, "decision_tree_service", "rules", "eligibility_rules.json"
+    )
+    with open(rules_file, "r", encoding="utf-8") as file:
+        collect(json.load(file))
+
+    for city, variants in CITY_VARIANTS.items():
+        for variant in variants:
+            messages.append(f"J'habite à {variant}")
+
+    random.seed(7)
+    corpus = []
+    while len(corpus) < CORPUS_SIZE:
+        corpus.append(" ".join(random.sample(messages, 2)))
+    return corpus
+
+
+def typo(word):
+    """Une faute de frappe : lettre remplacée, ajoutée, supprimée ou deux lettres inversées"""
+    position = random.randrange(1, len(word) - 1)
+    kind = random.choice(("substitute", "insert", "delete", "transpose"))
+    if kind == "substitute":
+        return word[:position] + random.choice(LETTERS) + word[position + 1 :]
+    if kind == "insert":
+        return word[:position] + random.choice(LETTERS) + word[position:]
+    if kind == "delete":
+        return word[:position] + word[position + 1 :]
+    return word[: position - 1] + word[position] + word[position - 1] + word[position + 1 :]
+
+
+def typo_corpus():
+    """Formes de base du lexique avec une faute de frappe, dans une phrase"""
+    random.seed(11)
+    corpus = []
+    for word in DEFAULT_BANNED_WORDS:
+        if " " in word or len(word) < 5:
+            continue
+        for _ in range(TYPOS_PER_WORD):
+            corpus.append(f"franchement t'es qu'un {typo(word)} toi")
+    return corpus
+
+
+def evaluate(label, word_filter, clean, typos):
+    flagged_clean = [m for m in clean if word_filter.scan(m)]
+    detected = sum(1 for m in typos if word_filter.scan(m))
+
+    # Latence mesurée sur un second passage (cache des mots déjà vus rempli)
+    messages = clean + typos
+    start = time.perf_counter()
+    for message in messages:
+        word_filter.scan(message)
+    per_message = (time.perf_counter() - start) / len(messages) * 1e6
+
+    print(
+        f"{label:<28} {per_message:8.1f} µs/msg  "
+        f"rappel fautes {detected / len(typos):6.1%}  "
+        f"faux positifs {len(flagged_clean) / len(clean):6.2%}"
+    )
+    return flagged_clean
+
+
+def main():
+    clean = clean_corpus()
+    typos = typo_corpus()
+    print(
+        f"=== {len(clean)} messages sans mot interdit, "
+        f"{len(typos)} messages avec une faute de frappe ==="
+    )
+
+    evaluate("exact", BannedWordsFilter(), clean, typos)
+    for distance, min_length in ((1, 5), (1, 6), (2, 6), (2, 8)):
+        word_filter = BannedWordsFilter(fuzzy_distance=distance, fuzzy_min_length=min_length)
+        label = f"distance {distance}, longueur >= {min_length}"
+        flagged = evaluate(label, word_filter, clean, typos)
+        for message in sorted(set(flagged))[:3]:
+            print(f"    faux positif: {word_filter.scan(message)} dans {message[:70]!r}")
+
+
+if __name__ == "__main__":
+    main()
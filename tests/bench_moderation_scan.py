@@ -0,0 +1,56 @@
+import os
+import random
+import sys
+import time
+
+# Rendre les modules du service chatbot importables
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "chatbot_service")
+)
+
+from utils.banned_words_filter import BannedWordsFilter
+
+USER_REPLIES = [
+    "Oui j'accepte",
+    "J'ai 22 ans",
+    "Non je ne suis pas au RSA",
+    "Je ne suis plus scolarisé depuis l'an dernier",
+    "J'habite à Saint-Denis, 93200",
+    "Bonjour, je cherche un accompagnement pour trouver un emploi dans la logistique",
+    "Espèce de connard tu comprends rien",
+    "c'est de la m3rde votre truc",
+]
+
+CONVERSATIONS = 10000
+
+
+def build_conversations():
+    random.seed(42)
+    conversations = []
+    for i in range(CONVERSATIONS):
+        messages = []
+        for _ in range(5):
+            messages.append({"role": "user", "content": random.choice(USER_REPLIES)})
+            messages.append({"role": "bot", "content": "D'accord, tu es scolarisé?"})
+        conversations.append({"id": f"conv-{i}", "messages": messages})
+    return conversations
+
+
+def main():
+    conversations = build_conversations()
+    word_filter = BannedWordsFilter()
+    user_messages = CONVERSATIONS * 5
+
+    print(f"=== Vérification de {user_messages} messages utilisateur ===")
+    for workers in (1, 2, 4):
+        start = time.perf_counter()
+        hits = sum(1 for _ in word_filter.scan_conversations(conversations, workers=workers))
+        elapsed = time.perf_counter() - start
+        print(
+            f"{workers} processus: {elapsed:6.2f} s "
+            f"({user_messages / elapsed:8.0f} messages/s, {hits} messages signalés)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""
+Serveur minimal compatible avec le protocole Redis, pour les tests sans Redis.
+
+Seules les commandes utilisées par RedisConversationStore et RedisIdempotencyCache sont
+prises en charge : HELLO, CLIENT, PING, EXISTS, DEL, EXPIRE, GET, SET (NX), HGET, HMGET,
+HSET, SCAN, WATCH, UNWATCH, MULTI, EXEC, DISCARD.
+Les clés n'expirent pas ; WATCH détecte toute écriture sur une clé surveillée.
+
+Exemple:
+    server = RedisStandIn()
+    server.start()
+    store = RedisConversationStore(server.url)
+"""
+
+import fnmatch
+import socketserver
+import threading
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        self.watched = {}
+        self.queued = None
+        self.protocol = 2
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()
+        arguments = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            arguments.append(self.rfile.read(length + 2)[:-2])
+        return arguments
+
+    def handle(self):
+        while True:
+            command = self.read_command()
+            if command is None:
+                return
+            self.wfile.write(self.server.stand_in.execute(self, command))
+
+
+class _Map(list):
+    """Réponse de type map (RESP3), sous forme de liste clé, valeur, clé, valeur..."""
+
+
+# Réponse nulle selon la version du protocole choisie par HELLO
+_NULL = {2: b"$-1\r\n", 3: b"_\r\n"}
+
+
+def _encode(value, protocol=2):
+    if value is None:
+        return _NULL[protocol]
+    if isinstance(value, Exception):
+        return b"-ERR " + str(value).encode() + b"\r\n"
+    if value is True:
+        return b"+OK\r\n"
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    if isinstance(value, _Map):
+        return b"%%%d\r\n" % (len(value) // 2) + b"".join(
+            _encode(item, protocol) for item in value
+        )
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(
+            _encode(item, protocol) for item in value
+        )
+    raise TypeError(value)
+
+
+class RedisStandIn:
+    """Serveur en mémoire, dans un thread, sur un port libre de 127.0.0.1."""
+
+    def __init__(self):
+        self.data = {}
+        self.versions = {}
+        self.lock = threading.Lock()
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _Handler)
+        self.server.daemon_threads = True
+        self.server.stand_in = self
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"redis://{host}:{port}/0"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _touch(self, key):
+        self.versions[key] = self.versions.get(key, 0) + 1
+
+    def execute(self, client, command):
+        name = command[0].upper()
+        arguments = command[1:]
+        with self.lock:
+            if name == b"MULTI":
+                client.queued = []
+                return _encode(True)
+            if name == b"DISCARD":
+                client.queued = None
+                client.watched = {}
+                return _encode(True)
+            if name == b"EXEC":
+                queued, client.queued = client.queued or [], None
+                watched, client.watched = client.watched, {}
+                if any(self.versions.get(key, 0) != v for key, v in watched.items()):
+                    return b"*-1\r\n" if client.protocol == 2 else _NULL[3]
+                return _encode([self._run(n, a) for n, a in queued], client.protocol)
+            if client.queued is not None:
+                client.queued.append((name, arguments))
+                return b"+QUEUED\r\n"
+            if name == b"WATCH":
+                for key in arguments:
+                    client.watched[key] = self.versions.get(key, 0)
+                return _encode(True)
+            if name == b"HELLO":
+                client.protocol = int(arguments[0]) if arguments else 2
+            if name == b"UNWATCH":
+                client.watched = {}
+                return _encode(True)
+            return _encode(self._run(name, arguments), client.protocol)
+
+    def _run(self, name, arguments):
+        if name == b"PING":
+            return b"PONG"
+        if name == b"HELLO":
+            # Les réponses RESP2 sont aussi comprises par les clients en RESP3
+            proto = int(arguments[0]) if arguments else 2
+            return _Map([b"server", b"redis", b"version", b"7.0.0", b"proto", proto])
+        if name == b"CLIENT":
+            return True
+        if name == b"EXISTS":
+            return sum(1 for key in arguments if key in self.data)
+        if name == b"DEL":
+            removed = 0
+            for key in arguments:
+                if self.data.pop(key, None) is not None:
+                    self._touch(key)
+                    removed += 1
+            return removed
+        if name == b"EXPIRE":
+            return 1 if arguments[0] in self.data else 0
+        if name == b"GET":
+            return self.data.get(arguments[0])
+        if name == b"SET":
+            key, value = arguments[0], arguments[1]
+            if b"NX" in [argument.upper() for argument in arguments[2:]] and key in self.data:
+                return None
+            self.data[key] = value
+            self._touch(key)
+            return True
+        if name == b"HGET":
+            return self.data.get(arguments[0], {}).get(arguments[1])
+        if name == b"HMGET":
+            values = self.data.get(arguments[0], {})
+            return [values.get(field) for field in arguments[1:]]
+        if name == b"HSET":
+            key, pairs = arguments[0], arguments[1:]
+            values = self.data.setdefault(key, {})
+            added = 0
+            for field, value in zip(pairs[::2], pairs[1::2]):
+                added += field not in values
+                values[field] = value
+            self._touch(key)
+            return added
+        if name == b"SCAN":
+            pattern = "*"
+            if b"MATCH" in [argument.upper() for argument in arguments]:
+                index = [argument.upper() for argument in arguments].index(b"MATCH")
+                pattern = arguments[index + 1].decode()
+            keys = [key for key in self.data if fnmatch.fnmatchcase(key.decode(), pattern)]
+            return [b"0", keys]
+        return Exception(f"unknown command '{name.decode()}'")
@@ -0,0 +1,236 @@
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Rendre les modules du service chatbot importables
+sys.path.append(os.path.join(ROOT, "chatbot_service"))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+
+from config.config import Config
+
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Durée d'une transcription simulée (Whisper prend plusieurs secondes)
+STT_DELAY = 0.5
+AUDIO_REQUESTS = 10
+TEXT_TURNS = 40
+
+# Aller-retour Redis lent simulé
+REDIS_DELAY = 0.2
+
+FLOW = ["Bonjour", "ok", "oui", "17 ans", "non", "non", "Saint Denis"]
+
+
+class _SlowSTTHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        time.sleep(STT_DELAY)
+        body = json.dumps({"text": "Bonjour"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _STTServer(ThreadingHTTPServer):
+    # Toutes les transcriptions arrivent en même temps
+    request_queue_size = 64
+
+
+def start_stt_server():
+    server = _STTServer(("127.0.0.1", 0), _SlowSTTHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return server, f"http://{host}:{port}"
+
+
+def configure(stt_url="http://127.0.0.1:9"):
+    Config.DECISION_TREE_MODE = "local"
+    Config.CONVERSATION_BACKEND = "memory"
+    Config.CONVERSATION_SWEEP_INTERVAL = 0
+    Config.STT_SERVICE_URL = stt_url
+
+
+def asgi_client():
+    import asgi
+
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=asgi.app), base_url="http://chatbot")
+
+
+async def _asgi_flow():
+    async with asgi_client() as client:
+        response = await client.post("/conversation", json={"user_id": "test"})
+        conversation_id = response.json()["conversation_id"]
+        replies = []
+        for text in FLOW:
+            response = await client.post(
+                "/process", json={"conversation_id": conversation_id, "text": text}
+            )
+            replies.append(response.json())
+        conversation = (await client.get(f"/conversation/{conversation_id}")).json()
+        missing = await client.post("/process", json={"text": "Bonjour"})
+        return replies, conversation, missing.status_code
+
+
+def test_same_contract_as_flask():
+    """Même parcours, mêmes réponses que app.py"""
+    configure()
+    import app
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        flask_client = app.app.test_client()
+        conversation_id = flask_client.post("/conversation", json={"user_id": "test"}).get_json()[
+            "conversation_id"
+        ]
+        flask_replies = [
+            flask_client.post(
+                "/process", json={"conversation_id": conversation_id, "text": text}
+            ).get_json()
+            for text in FLOW
+        ]
+        flask_conversation = flask_client.get(f"/conversation/{conversation_id}").get_json()
+
+        asgi_replies, asgi_conversation, missing_status = asyncio.run(_asgi_flow())
+
+    for flask_reply, asgi_reply in zip(flask_replies, asgi_replies):
+        flask_reply.pop("conversation_id")
+        asgi_reply.pop("conversation_id")
+        assert flask_reply == asgi_reply, (flask_reply, asgi_reply)
+    assert asgi_replies[-1]["is_final"]
+    for field in ("current_state", "eligibility_result", "user_data"):
+        assert flask_conversation[field] == asgi_conversation[field], field
+    assert len(asgi_conversation["messages"]) == len(flask_conversation["messages"])
+    assert missing_status == 400
+
+
+async def _mixed_load():
+    """Transcriptions lentes et messages texte envoyés en même temps"""
+    async with asgi_client() as client:
+        conversation_ids = []
+        for i in range(AUDIO_REQUESTS + TEXT_TURNS):
+            response = await client.post("/conversation", json={"user_id": f"user-{i}"})
+            conversation_ids.append(response.json()["conversation_id"])
+
+        start = time.perf_counter()
+        text_done = []
+
+        async def audio(conversation_id):
+            response = await client.post(
+                "/process-audio", json={"conversation_id": conversation_id, "audio": "UklGRg=="}
+            )
+            assert response.json()["transcription"] == "Bonjour"
+
+        async def text(conversation_id):
+            response = await client.post(
+                "/process", json={"conversation_id": conversation_id, "text": "Bonjour"}
+            )
+            assert response.status_code == 200
+            text_done.append(time.perf_counter() - start)
+
+        await asyncio.gather(
+            *(audio(c) for c in conversation_ids[:AUDIO_REQUESTS]),
+            *(text(c) for c in conversation_ids[AUDIO_REQUESTS:]),
+        )
+        return time.perf_counter() - start, max(text_done)
+
+
+def test_slow_transcriptions_do_not_starve_text_turns():
+    server, url = start_stt_server()
+    configure(url)
+    import asgi
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        total, slowest_text = asyncio.run(_mixed_load())
+    server.shutdown()
+
+    # Les transcriptions sont attendues en parallèle, les messages texte n'attendent pas
+    assert total < STT_DELAY * 3, total
+    assert slowest_text < STT_DELAY, slowest_text
+    assert asgi.http_client.metrics()["stt"]["calls"] >= AUDIO_REQUESTS
+    print(
+        f"ASGI: {AUDIO_REQUESTS} transcriptions de {STT_DELAY}s et {TEXT_TURNS} messages texte "
+        f"en {total:.2f} s, dernier message texte servi en {slowest_text * 1000:.0f} ms "
+        f"(un worker synchrone: {AUDIO_REQUESTS * STT_DELAY:.1f} s d'attente avant les textes "
+        "dans le pire cas)"
+    )
+
+
+def test_slow_redis_does_not_block_the_loop():
+    """Un aller-retour Redis lent n'arrête pas les autres coroutines"""
+    from redis_stand_in import RedisStandIn
+
+    server = RedisStandIn().start()
+    backend, redis_url = Config.CONVERSATION_BACKEND, Config.REDIS_URL
+    configure()
+    Config.CONVERSATION_BACKEND = "redis"
+    Config.REDIS_URL = server.url
+    from core.async_conversation_manager import AsyncConversationManager
+
+    async def run():
+        manager = AsyncConversationManager()
+        conversation_id = await manager.create_conversation_async("user")
+        store_get = manager.conversations.get
+
+        def slow_get(key):
+            time.sleep(REDIS_DELAY)
+            return store_get(key)
+
+        manager.conversations.get = slow_get
+        gaps = []
+
+        async def heartbeat(done):
+            last = time.perf_counter()
+            while not done.is_set():
+                await asyncio.sleep(0.005)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        done = asyncio.Event()
+        beating = asyncio.create_task(heartbeat(done))
+        await asyncio.sleep(0.02)
+        response = await manager.process_message(conversation_id, "Bonjour", "key")
+        done.set()
+        await beating
+        await manager.close()
+        return response, max(gaps)
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            response, longest_gap = asyncio.run(run())
+    finally:
+        Config.CONVERSATION_BACKEND, Config.REDIS_URL = backend, redis_url
+        server.stop()
+
+    assert response["message"]
+    assert longest_gap < REDIS_DELAY / 2, longest_gap
+
+
+if __name__ == "__main__":
+    test_same_contract_as_flask()
+    test_slow_transcriptions_do_not_starve_text_turns()
+    test_slow_redis_does_not_block_the_loop()
+    print("OK")
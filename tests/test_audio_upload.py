@@ -0,0 +1,203 @@
+import asyncio
+import base64
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Rendre les modules du service chatbot importables
+sys.path.append(os.path.join(ROOT, "chatbot_service"))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.http_client import HTTPClient, StreamBody
+
+AUDIO = bytes(range(256)) * 1024
+
+
+class _RecordingHandler(BaseHTTPRequestHandler):
+    """Service STT simulé : garde chaque corps reçu, répond 503 tant que FAILURES > 0"""
+
+    received = []
+    failures = 0
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        type(self).received.append((self.path, self.headers["Content-Type"], body))
+        if type(self).failures:
+            type(self).failures -= 1
+            status, reply = 503, b"{}"
+        else:
+            status, reply = 200, json.dumps({"text": "Bonjour"}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server():
+    _RecordingHandler.received = []
+    _RecordingHandler.failures = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _RecordingHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return server, f"http://{host}:{port}"
+
+
+def test_stream_body():
+    body, content_type = StreamBody.multipart(
+        {"model": "whisper-1"}, "file", "a.wav", io.BytesIO(AUDIO), len(AUDIO)
+    )
+    data = body.read(1000) + body.read()
+    assert len(data) == len(body) and AUDIO in data
+    assert content_type.split("boundary=")[1].encode() in data
+    body.seek(0)
+    assert body.read() == data
+
+    # Flux non relisible : pas de retour au début
+    stream = StreamBody((_Unseekable(AUDIO), len(AUDIO)))
+    assert not stream.seekable()
+    try:
+        stream.seek(0)
+        assert False, "UnsupportedOperation attendu"
+    except io.UnsupportedOperation:
+        pass
+
+
+class _Unseekable(io.RawIOBase):
+    def __init__(self, data):
+        self._data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self._data.readinto(buffer)
+
+
+def test_stream_body_retries():
+    server, url = start_server()
+    client = HTTPClient(retries=2, backoff=0)
+    try:
+        # Relisible : renvoyé en entier après la 503
+        _RecordingHandler.failures = 1
+        response = client.post(url, data=StreamBody((io.BytesIO(AUDIO), len(AUDIO))), idempotent=True)
+        assert response.status_code == 200
+        assert [body for _, _, body in _RecordingHandler.received] == [AUDIO, AUDIO]
+
+        # Flux consommé par le premier envoi : pas de nouvelle tentative
+        _RecordingHandler.received = []
+        _RecordingHandler.failures = 1
+        body = StreamBody((_Unseekable(AUDIO), len(AUDIO)))
+        assert client.post(url, data=body, idempotent=True).status_code == 503
+        assert len(_RecordingHandler.received) == 1
+    finally:
+        server.shutdown()
+
+
+def make_client(stt_url):
+    import test_asgi_chatbot
+
+    test_asgi_chatbot.configure(stt_url)
+    import app
+
+    client = app.app.test_client()
+    with contextlib.redirect_stdout(io.StringIO()):
+        conversation_id = client.post("/conversation", json={}).get_json()["conversation_id"]
+    return client, conversation_id
+
+
+def test_process_audio_bodies():
+    server, url = start_server()
+    try:
+        client, conversation_id = make_client(url)
+        with contextlib.redirect_stdout(io.StringIO()):
+            legacy = client.post(
+                "/process-audio",
+                json={"conversation_id": conversation_id, "audio": base64.b64encode(AUDIO).decode()},
+            )
+            raw = client.post(
+                f"/process-audio?conversation_id={conversation_id}",
+                data=AUDIO,
+                content_type="audio/webm",
+            )
+            multipart = client.post(
+                "/process-audio",
+                data={"conversation_id": conversation_id, "audio": (io.BytesIO(AUDIO), "a.wav", "audio/wav")},
+            )
+            empty = client.post(
+                f"/process-audio?conversation_id={conversation_id}", data=b"", content_type="audio/wav"
+            )
+    finally:
+        server.shutdown()
+
+    for response in (legacy, raw, multipart):
+        assert response.status_code == 200, response.get_json()
+        assert response.get_json()["transcription"] == "Bonjour"
+    assert empty.status_code == 400
+
+    (_, json_type, json_body), (raw_path, raw_type, raw_body), (_, part_type, part_body) = (
+        _RecordingHandler.received
+    )
+    # Forme historique inchangée pour le service STT
+    assert json_type == "application/json"
+    assert base64.b64decode(json.loads(json_body)["audio"]) == AUDIO
+    # Binaire : octets transmis tels quels, sans base64
+    assert raw_type == "audio/webm" and raw_body == AUDIO
+    assert raw_path == "/transcribe?language=fr"
+    assert part_type == "audio/wav" and part_body == AUDIO
+
+
+async def _asgi_bodies(conversation_id, client):
+    raw = await client.post(
+        f"/process-audio?conversation_id={conversation_id}",
+        content=AUDIO,
+        headers={"Content-Type": "audio/webm"},
+    )
+    multipart = await client.post(
+        "/process-audio",
+        data={"conversation_id": conversation_id},
+        files={"audio": ("a.wav", AUDIO, "audio/wav")},
+    )
+    return raw, multipart
+
+
+def test_asgi_process_audio_bodies():
+    import test_asgi_chatbot
+
+    server, url = start_server()
+    test_asgi_chatbot.configure(url)
+
+    async def run():
+        async with test_asgi_chatbot.asgi_client() as client:
+            created = await client.post("/conversation", json={})
+            return await _asgi_bodies(created.json()["conversation_id"], client)
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            raw, multipart = asyncio.run(run())
+    finally:
+        server.shutdown()
+
+    assert raw.json()["transcription"] == multipart.json()["transcription"] == "Bonjour"
+    assert [(t, b == AUDIO) for _, t, b in _RecordingHandler.received] == [
+        ("audio/webm", True),
+        ("audio/wav", True),
+    ]
+
+
+if __name__ == "__main__":
+    test_stream_body()
+    test_stream_body_retries()
+    test_process_audio_bodies()
+    test_asgi_process_audio_bodies()
+    print("OK")
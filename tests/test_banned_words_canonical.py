@@ -0,0 +1,106 @@
+import os
+import re
+import sys
+
+# Rendre les modules du service chatbot importables
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(TESTS_DIR, "..", "chatbot_service"))
+
+from utils.banned_words_filter import BannedWordsFilter
+
+# Ancienne liste intégrée (avec toutes ses variantes écrites à la main)
+LEGACY_WORDS_FILE = os.path.join(TESTS_DIR, "data", "banned_words_legacy.txt")
+
+# Variantes volontairement abandonnées : leur forme canonique est un mot courant
+# ("s4l3" -> "sale"/"salle", "t@g" -> "tag", "c4nnard" -> "canard", "m@rd!2" -> "mardi")
+DROPPED_VARIANTS = {"s4l3", "t@g", "c4nnard", "m@rd!2"}
+
+CLEAN_MESSAGES = [
+    "Bonjour, je cherche un accompagnement pour trouver un emploi",
+    "Oui j'accepte",
+    "Non merci",
+    "J'ai 22 ans",
+    "J'ai vingt-trois ans et je ne suis pas au RSA",
+    "Je suis bénéficiaire du RSA depuis deux ans",
+    "Je ne suis plus scolarisé, j'ai arrêté en première",
+    "J'habite à Saint-Denis, code postal 93200",
+    "J'habite à Épinay-sur-Seine",
+    "Je vis à l'Île-Saint-Denis avec ma sœur",
+    "Je suis à Aubervilliers, 93300",
+    "La Courneuve",
+    "Pierrefitte-sur-Seine 93380",
+    "Je suis en salle de classe le mardi",
+    "Merci beaucoup pour votre aide !",
+    "C'est passé, je peux passer au rendez-vous lundi ?",
+    "Je voudrais une formation de cariste ou de caissière",
+    "Est-ce que je peux venir avec mon dossier CAF ?",
+    "Je travaille en intérim dans la logistique",
+    "J'ai un CAP cuisine et un BEP vente",
+]
+
+
+def load_legacy_words():
+    with open(LEGACY_WORDS_FILE, "r", encoding="utf-8") as file:
+        return [
+            line.rstrip("\n")
+            for line in file
+            if line.strip() and not line.startswith("#")
+        ]
+
+
+def legacy_pattern(words):
+    """Ancien comportement (une regex \\b...\\b par mot) réuni en une seule regex"""
+    return re.compile(r"\b(?:" + "|".join(re.escape(word) for word in words) + r")\b")
+
+
+def test_legacy_corpus_still_flagged():
+    """Tout message détecté par l'ancienne liste doit l'être par le lexique canonique"""
+    legacy_words = load_legacy_words()
+    legacy = legacy_pattern(legacy_words)
+    word_filter = BannedWordsFilter()
+
+    corpus = []
+    for word in legacy_words:
+        if word in DROPPED_VARIANTS:
+            continue
+        corpus.append(word)
+        corpus.append(f"Bonjour {word} merci")
+        corpus.append(f"{word.upper()} !")
+
+    missed = []
+    for message in corpus:
+        if legacy.search(message.lower()):
+            if not word_filter.check_message(message)["contains_banned_words"]:
+                missed.append(message)
+
+    print(
+        f"Lexique: {len(legacy_words)} -> {len(word_filter.banned_words)} entrées, "
+        f"{len(corpus)} messages, {len(missed)} non détecté(s)"
+    )
+    for message in missed:
+        print(f"  NON DÉTECTÉ: {message!r}")
+    assert not missed
+
+
+def test_new_variants_flagged():
+    """Des variantes absentes de l'ancienne liste sont détectées grâce à la canonicalisation"""
+    word_filter = BannedWordsFilter()
+    for message in ["c0nnaaaard", "S A L O P E", "enfoirééé", "m€€rde", "b1t3"]:
+        result = word_filter.check_message(message)
+        print(f"{message!r}: {result['banned_words_found']}")
+        assert result["contains_banned_words"]
+
+
+def test_clean_messages_not_flagged():
+    """Les réponses habituelles du parcours d'éligibilité ne sont pas bloquées"""
+    word_filter = BannedWordsFilter()
+    for message in CLEAN_MESSAGES:
+        result = word_filter.check_message(message)
+        assert not result["contains_banned_words"], (message, result)
+
+
+if __name__ == "__main__":
+    test_legacy_corpus_still_flagged()
+    test_new_variants_flagged()
+    test_clean_messages_not_flagged()
+    print("OK")
@@ -0,0 +1,63 @@
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Rendre les modules du service chatbot importables
+sys.path.append(os.path.join(ROOT, "chatbot_service"))
+
+from config.config import Config
+
+
+def test_reload_only_loads_configured_lists():
+    directory = tempfile.mkdtemp()
+    with open(os.path.join(directory, "extra.txt"), "w", encoding="utf-8") as f:
+        f.write("patate\n")
+    with open(os.path.join(directory, ".hidden.txt"), "w", encoding="utf-8") as f:
+        f.write("patate\n")
+
+    Config.DECISION_TREE_MODE = "local"
+    Config.CONVERSATION_BACKEND = "memory"
+    Config.CONVERSATION_SWEEP_INTERVAL = 0
+    Config.BANNED_WORDS_DIR = directory
+    import app
+
+    client = app.app.test_client()
+    word_filter = app.conversation_manager.word_filter
+    lexicon, banned_words_file = word_filter.lexicon, word_filter.banned_words_file
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            rejected = [
+                client.post("/admin/banned-words/reload", json={"file": name})
+                for name in (
+                    "/etc/passwd",
+                    "../extra.txt",
+                    os.path.join(directory, "extra.txt"),
+                    ".hidden.txt",
+                    "missing.txt",
+                    ["extra.txt"],
+                )
+            ]
+            version = word_filter.version
+            accepted = client.post("/admin/banned-words/reload", json={"file": "extra.txt"})
+            deadline = time.monotonic() + 5
+            while word_filter.version == version and time.monotonic() < deadline:
+                time.sleep(0.01)
+        reloaded = list(word_filter.banned_words)
+    finally:
+        Config.BANNED_WORDS_DIR = None
+        # Lexique d'origine pour les autres tests du processus
+        word_filter.lexicon, word_filter.banned_words_file = lexicon, banned_words_file
+
+    assert all(response.status_code == 400 for response in rejected)
+    assert accepted.status_code == 202
+    assert reloaded == ["patate"]
+
+
+if __name__ == "__main__":
+    test_reload_only_loads_configured_lists()
+    print("OK")
@@ -0,0 +1,142 @@
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Rendre les modules du service chatbot importables
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "chatbot_service")
+)
+
+from config.config import Config
+from core.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+def fail():
+    raise ConnectionError("service injoignable")
+
+
+def test_opens_after_consecutive_failures():
+    """Le circuit s'ouvre au bout de failure_threshold échecs, puis refuse sans appeler"""
+    breaker = CircuitBreaker("test", failure_threshold=3, reset_timeout=60)
+    calls = []
+
+    for _ in range(3):
+        try:
+            breaker.call(lambda: calls.append(1) or fail())
+        except ConnectionError:
+            pass
+    assert breaker.status()["state"] == "open"
+
+    try:
+        breaker.call(lambda: calls.append(1))
+        assert False, "CircuitOpenError attendu"
+    except CircuitOpenError:
+        pass
+    assert len(calls) == 3
+    assert breaker.status()["rejected_calls"] == 1
+    breaker.close()
+
+
+def test_success_resets_failures():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+    for _ in range(5):
+        try:
+            breaker.call(fail)
+        except ConnectionError:
+            pass
+        breaker.call(lambda: None)
+    assert breaker.status()["state"] == "closed"
+
+
+def test_latency_breach():
+    """Des réponses trop lentes ouvrent le circuit comme des échecs"""
+    breaker = CircuitBreaker("test", failure_threshold=2, latency_threshold=0.01, reset_timeout=60)
+    assert breaker.call(lambda: time.sleep(0.02) or "lent") == "lent"
+    breaker.call(lambda: time.sleep(0.02))
+    assert breaker.status()["state"] == "open"
+    breaker.close()
+
+
+def test_background_probe():
+    """La vérification en arrière-plan referme le circuit quand le service répond"""
+    healthy = threading.Event()
+
+    def probe():
+        if not healthy.is_set():
+            raise ConnectionError("toujours injoignable")
+
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0.05, probe=probe)
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            breaker.call(fail)
+        except ConnectionError:
+            pass
+        time.sleep(0.2)
+        assert breaker.status()["state"] in ("open", "half_open")
+
+        healthy.set()
+        time.sleep(0.2)
+    assert breaker.status()["state"] == "closed"
+
+
+class _StalledHandler(BaseHTTPRequestHandler):
+    """Service d'arbre décisionnel bloqué : ne répond jamais à temps"""
+
+    def do_POST(self):
+        time.sleep(1)
+
+    do_GET = do_POST
+
+    def log_message(self, *args):
+        pass
+
+
+def test_manager_fallback_is_immediate():
+    """Quand le service est bloqué, les tours suivants passent directement au secours"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StalledHandler)
+    server.daemon_threads = True
+    server.handle_error = lambda request, client_address: None
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+
+    Config.DECISION_TREE_MODE = "remote"
+    Config.DECISION_TREE_SERVICE_URL = f"http://{host}:{port}"
+    Config.DECISION_TREE_TIMEOUT = 0.2
+    Config.DECISION_TREE_BREAKER_FAILURES = 2
+    Config.DECISION_TREE_BREAKER_RESET = 60
+    Config.CONVERSATION_SWEEP_INTERVAL = 0
+    from core.conversation_manager import ConversationManager
+
+    manager = ConversationManager()
+    conversation_id = manager.create_conversation("user")
+    durations = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(6):
+            start = time.perf_counter()
+            response = manager.process_message(conversation_id, "Bonjour")
+            durations.append(time.perf_counter() - start)
+            assert response["message"]
+
+    assert manager.decision_tree_breaker.status()["state"] == "open"
+    # Deux tours attendent l'échéance, les suivants n'attendent plus le service
+    assert min(durations[:2]) >= 0.2
+    assert max(durations[2:]) < 0.05
+    print(
+        f"tour avec service bloqué: {sum(durations[:2]) / 2 * 1000:.0f} ms, "
+        f"circuit ouvert: {sum(durations[2:]) / 4 * 1000:.2f} ms"
+    )
+    manager.decision_tree_breaker.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    test_opens_after_consecutive_failures()
+    test_success_resets_failures()
+    test_latency_breach()
+    test_background_probe()
+    test_manager_fallback_is_immediate()
+    print("OK")
@@ -0,0 +1,131 @@
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Rendre les modules du service chatbot importables
+sys.path.append(os.path.join(ROOT, "chatbot_service"))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from starlette.testclient import TestClient
+
+import test_asgi_chatbot
+
+
+class _Services(BaseHTTPRequestHandler):
+    """Services STT et PDF simulés ; garde les corps reçus par le STT"""
+
+    audio = []
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path.startswith("/transcribe"):
+            type(self).audio.append(body)
+            reply = {"text": "oui"}
+        else:
+            reply = {"file_url": "/pdf/rapport.pdf", "filename": "rapport.pdf"}
+        data = json.dumps(reply).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@contextlib.contextmanager
+def channel_client():
+    _Services.audio = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Services)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "http://%s:%d" % server.server_address
+    test_asgi_chatbot.configure(url)
+    from config.config import Config
+
+    Config.PDF_SERVICE_URL = url
+    import asgi
+
+    # Sans lifespan : le client HTTP du module reste ouvert pour les autres tests
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield TestClient(asgi.app), asgi
+    finally:
+        server.shutdown()
+
+
+def test_turns_and_progress_events():
+    with channel_client() as (client, asgi):
+        with client.websocket_connect("/ws") as ws:
+            opened = ws.receive_json()
+            assert opened["event"] == "conversation" and opened["message"]
+            conversation_id = opened["conversation_id"]
+            assert asgi.channel_metrics["open"] == 1
+
+            ws.send_json({"type": "text", "text": "Bonjour", "id": "t1"})
+            reply = ws.receive_json()
+            assert reply["event"] == "reply" and reply["id"] == "t1"
+            assert reply["conversation_id"] == conversation_id and "message" in reply
+
+            # Tour vocal : la transcription arrive avant la réponse
+            ws.send_json({"type": "audio", "id": "a1"})
+            ws.send_bytes(b"RIFF" + bytes(1000))
+            transcription, reply = ws.receive_json(), ws.receive_json()
+            assert transcription == {"event": "transcription", "id": "a1", "text": "oui"}
+            assert reply["event"] == "reply" and reply["transcription"] == "oui"
+            assert _Services.audio == [b"RIFF" + bytes(1000)]
+
+            # Même id après une reconnexion : réponse gardée, pas de nouvelle transcription
+            ws.send_json({"type": "audio", "id": "a1"})
+            ws.send_bytes(b"RIFF")
+            assert ws.receive_json() == reply and len(_Services.audio) == 1
+
+            ws.send_json({"type": "pdf", "id": "p1"})
+            assert ws.receive_json() == {
+                "event": "pdf",
+                "id": "p1",
+                "status": "success",
+                "file_url": "/pdf/rapport.pdf",
+                "filename": "rapport.pdf",
+            }
+
+            ws.send_text("pas du JSON")
+            assert ws.receive_json()["event"] == "error"
+            ws.send_json({"type": "text", "id": "t2"})
+            assert ws.receive_json() == {"event": "error", "id": "t2", "error": "Missing text"}
+
+        # Le même historique que par les routes HTTP
+        messages = client.get(f"/conversation/{conversation_id}").json()["messages"]
+        assert [m["content"] for m in messages if m["role"] == "user"] == ["Bonjour", "oui"]
+        metrics = client.get("/metrics").json()["channels"]
+        assert metrics["open"] == 0 and metrics["messages"] == 8
+
+
+def test_existing_conversation():
+    with channel_client() as (client, asgi):
+        started = client.post("/conversation", json={}).json()
+        conversation_id = started["conversation_id"]
+        # Le canal est annoncé aux clients
+        assert started["channel"] == "/ws"
+        with client.websocket_connect(f"/ws?conversation_id={conversation_id}") as ws:
+            assert ws.receive_json() == {
+                "event": "conversation",
+                "id": None,
+                "conversation_id": conversation_id,
+            }
+        with client.websocket_connect("/ws?conversation_id=inconnue") as ws:
+            assert ws.receive_json()["error"] == "Conversation not found"
+            assert ws.receive()["code"] == 4404
+
+
+if __name__ == "__main__":
+    test_turns_and_progress_events()
+    test_existing_conversation()
+    print("OK")
@@ -0,0 +1,141 @@
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Rendre les modules du service chatbot importables
+sys.path.append(os.path.join(ROOT, "chatbot_service"))
+
+from config.config import Config
+from utils.striped_lock import StripedLock
+
+CONVERSATIONS = 4
+THREADS_PER_CONVERSATION = 8
+TURNS_PER_THREAD = 25
+# Pause simulant l'appel NLP : libère le GIL entre le message utilisateur et la réponse
+NLP_DELAY = 0.0005
+
+
+class _NoLock:
+    """Remplace les verrous pour montrer ce qui se passe sans eux"""
+
+    def locked(self, key):
+        return contextlib.nullcontext()
+
+
+def make_manager():
+    Config.DECISION_TREE_MODE = "local"
+    Config.CONVERSATION_BACKEND = "memory"
+    Config.CONVERSATION_SWEEP_INTERVAL = 0
+    from core.conversation_manager import ConversationManager
+
+    manager = ConversationManager()
+    process_with_nlp = manager._process_with_nlp
+
+    def slow_nlp(text):
+        time.sleep(NLP_DELAY)
+        return process_with_nlp(text)
+
+    manager._process_with_nlp = slow_nlp
+    return manager
+
+
+def hammer(manager):
+    """Plusieurs threads par conversation envoient des tours en même temps"""
+    conversation_ids = [manager.create_conversation(f"user-{i}") for i in range(CONVERSATIONS)]
+    errors = []
+
+    def worker(conversation_id):
+        try:
+            for _ in range(TURNS_PER_THREAD):
+                manager.process_message(conversation_id, "Bonjour")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [
+        threading.Thread(target=worker, args=(conversation_id,))
+        for conversation_id in conversation_ids
+        for _ in range(THREADS_PER_CONVERSATION)
+    ]
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    elapsed = time.perf_counter() - start
+    assert not errors, errors
+    return [manager.get_conversation(conversation_id) for conversation_id in conversation_ids], elapsed
+
+
+def interleavings(conversation):
+    """Nombre de messages qui ne suivent pas l'alternance utilisateur / bot"""
+    roles = [message.role.value for message in conversation.messages]
+    expected = ("user", "bot") * (len(roles) // 2 + 1)
+    return sum(role != expected[i] for i, role in enumerate(roles))
+
+
+def test_striped_lock():
+    locks = StripedLock(16)
+    assert len(locks) == 16
+    assert locks.locked("abc") is locks.locked("abc")
+    # Réentrant : process_message peut être appelé sous le verrou de la route
+    with locks.locked("abc"):
+        with locks.locked("abc"):
+            pass
+
+
+def test_turns_are_serialised_per_conversation():
+    manager = make_manager()
+    conversations, elapsed = hammer(manager)
+    turns = THREADS_PER_CONVERSATION * TURNS_PER_THREAD
+    for conversation in conversations:
+        assert len(conversation.messages) == 2 * turns, len(conversation.messages)
+        assert interleavings(conversation) == 0
+    print(f"avec verrous: {CONVERSATIONS * turns} tours en {elapsed:.2f} s, historiques intacts")
+
+
+def test_conversations_run_in_parallel():
+    """Le verrou d'une conversation ne bloque pas les autres"""
+    manager = make_manager()
+    first, second = (manager.create_conversation(f"user-{i}") for i in range(2))
+    # Garantit deux verrous distincts malgré le hachage
+    while manager.conversation_lock(second) is manager.conversation_lock(first):
+        second = manager.create_conversation("user-1")
+
+    entered = threading.Event()
+
+    def other_conversation():
+        with manager.conversation_lock(second):
+            entered.set()
+
+    with manager.conversation_lock(first):
+        threading.Thread(target=other_conversation, daemon=True).start()
+        assert entered.wait(1)
+
+
+def show_without_locks():
+    """Sans verrous, les tours concurrents se mélangent dans l'historique (non vérifié)"""
+    manager = make_manager()
+    manager.conversation_locks = _NoLock()
+    manager.decision_tree._locks = _NoLock()
+    conversations, _ = hammer(manager)
+    turns = THREADS_PER_CONVERSATION * TURNS_PER_THREAD
+    mixed = sum(interleavings(conversation) for conversation in conversations)
+    lengths = sorted({len(conversation.messages) for conversation in conversations})
+    print(
+        f"sans verrous: {mixed} messages hors alternance, "
+        f"historiques de {lengths} messages pour {2 * turns} attendus"
+    )
+
+
+if __name__ == "__main__":
+    test_striped_lock()
+    test_turns_are_serialised_per_conversation()
+    test_conversations_run_in_parallel()
+    show_without_locks()
+    print("OK")
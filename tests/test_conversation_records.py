@@ -0,0 +1,70 @@
+import os
+import sys
+from datetime import datetime
+
+# Rendre les modules du service chatbot importables
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "chatbot_service")
+)
+
+from core.records import Conversation, Message, Role, bot_templates, iso_to_timestamp
+
+WELCOME = "Pour mieux t'orienter, peux tu me communiquer ton âge ? 😊"
+
+
+def test_json_shape():
+    """to_dict() reproduit le format historique des conversations"""
+    conversation = Conversation("conv-1", "user_1")
+    conversation.add_message(Role.USER, "Bonjour")
+    conversation.add_message(Role.BOT, WELCOME)
+    conversation["user_data"]["age"] = 22
+
+    data = conversation.to_dict()
+    assert list(data) == [
+        "id",
+        "user_id",
+        "created_at",
+        "messages",
+        "current_state",
+        "eligibility_result",
+        "user_data",
+        "violation_count",
+    ]
+    assert [set(message) for message in data["messages"]] == [
+        {"role", "content", "timestamp"}
+    ] * 2
+    assert data["messages"][1] == {
+        "role": "bot",
+        "content": WELCOME,
+        "timestamp": data["messages"][1]["timestamp"],
+    }
+    # Même format que datetime.now().isoformat()
+    datetime.fromisoformat(data["created_at"])
+    assert Conversation.from_dict(data).to_dict() == data
+
+
+def test_timestamps_round_trip():
+    """Les horodatages ISO (avec ou sans microsecondes) sont conservés à l'identique"""
+    for value in ("2024-03-01T10:15:30.123456", "2024-03-01T10:15:30"):
+        message = Message.from_dict({"role": "user", "content": "x", "timestamp": value})
+        assert message.timestamp == iso_to_timestamp(value)
+        assert message.to_dict()["timestamp"] == value
+
+
+def test_bot_texts_shared():
+    """Une réponse du bot identique n'est gardée qu'une fois, quel que soit le nombre de conversations"""
+    before = len(bot_templates)
+    for i in range(100):
+        conversation = Conversation(f"conv-{i}", "user")
+        conversation.add_message(Role.BOT, "".join(WELCOME))
+        conversation.add_message(Role.USER, WELCOME)
+        assert isinstance(conversation.messages[0].content, int)
+        assert conversation.messages[1].content == WELCOME
+    assert len(bot_templates) - before <= 1
+
+
+if __name__ == "__main__":
+    test_json_shape()
+    test_timestamps_round_trip()
+    test_bot_texts_shared()
+    print("OK")
@@ -0,0 +1,129 @@
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Rendre les modules du service chatbot importables
+sys.path.append(os.path.join(ROOT, "chatbot_service"))
+
+from config.config import Config
+from core.conversation_serializer import ConversationSerializer
+from core.records import Conversation, Role
+
+
+def make_conversation(turns=20):
+    conversation = Conversation("c1", "user")
+    for i in range(turns):
+        conversation.add_message(Role.USER, f"réponse {i} — « ok »")
+        conversation.add_message(Role.BOT, "Quel âge as-tu ? 😊")
+    conversation["user_data"] = {"age": 19, "city": "saint-denis"}
+    return conversation
+
+
+def test_body_is_the_historic_format():
+    conversation = make_conversation()
+    etag, body = ConversationSerializer().render(conversation)
+    assert json.loads(body) == conversation.to_dict()
+    assert "—" in body.decode("utf-8")
+
+
+def test_etag_follows_the_conversation():
+    serializer = ConversationSerializer()
+    conversation = make_conversation()
+    etag, body = serializer.render(conversation)
+    assert serializer.render(conversation) == (etag, body)
+    assert serializer.metrics()["reused"] == 1
+
+    # Un nouveau tour : seuls les deux nouveaux messages sont encodés
+    conversation.add_message(Role.USER, "Stains")
+    conversation.add_message(Role.BOT, "Merci")
+    new_etag, new_body = serializer.render(conversation)
+    assert new_etag != etag
+    assert json.loads(new_body) == conversation.to_dict()
+
+    # Un champ modifié sans nouveau message change aussi l'ETag
+    conversation["user_data"]["rsa"] = False
+    assert serializer.render(conversation)[0] != new_etag
+
+    # Historique reconstruit (autre worker, autre objet) : même corps
+    copy = Conversation.from_dict(conversation.to_dict())
+    assert serializer.render(copy) == serializer.render(conversation)
+
+
+def test_since():
+    serializer = ConversationSerializer()
+    conversation = make_conversation(turns=3)
+    etag, body = serializer.render(conversation, since=4)
+    data = json.loads(body)
+    assert data["since"] == 4 and data["message_count"] == 6
+    assert data["messages"] == conversation.to_dict()["messages"][4:]
+    assert data["current_state"] == "initial"
+    assert json.loads(serializer.render(conversation, since=99)[1])["messages"] == []
+    assert etag != serializer.render(conversation, since=5)[0]
+
+
+def test_route_etag_and_delta():
+    Config.DECISION_TREE_MODE = "local"
+    Config.CONVERSATION_BACKEND = "memory"
+    Config.CONVERSATION_SWEEP_INTERVAL = 0
+    import app
+
+    client = app.app.test_client()
+    with contextlib.redirect_stdout(io.StringIO()):
+        conversation_id = client.post("/conversation", json={}).get_json()["conversation_id"]
+        for text in ("Bonjour", "ok", "oui", "19 ans"):
+            client.post("/process", json={"conversation_id": conversation_id, "text": text})
+
+    url = f"/conversation/{conversation_id}"
+    full = client.get(url)
+    assert full.status_code == 200 and len(full.get_json()["messages"]) == 8
+    assert full.headers["Cache-Control"] == "no-cache"
+
+    etag = full.headers["ETag"]
+    not_modified = client.get(url, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304 and not not_modified.data
+
+    delta = client.get(f"{url}?since=6")
+    assert [m["content"] for m in delta.get_json()["messages"]][0] == "19 ans"
+    assert client.get(f"{url}?since=-1").status_code == 400
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        client.post("/process", json={"conversation_id": conversation_id, "text": "non"})
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+
+    delta_bytes = len(client.get(f"{url}?since=8").data)
+    print(
+        f"conversation de {len(full.get_json()['messages']) + 2} messages: "
+        f"{len(full.data)} octets complets, {delta_bytes} octets pour le dernier tour"
+    )
+
+
+def bench_render(turns=40, rounds=2000):
+    """Interrogation sans nouveauté : jsonify de tout l'historique contre corps gardé"""
+    conversation = make_conversation(turns)
+    serializer = ConversationSerializer()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        json.dumps(conversation.to_dict()).encode("utf-8")
+    before = (time.perf_counter() - start) / rounds
+    start = time.perf_counter()
+    for _ in range(rounds):
+        serializer.render(conversation)
+    after = (time.perf_counter() - start) / rounds
+    print(
+        f"{2 * turns} messages: to_dict + json.dumps {before * 1e6:.1f} µs, "
+        f"corps gardé {after * 1e6:.1f} µs"
+    )
+
+
+if __name__ == "__main__":
+    test_body_is_the_historic_format()
+    test_etag_follows_the_conversation()
+    test_since()
+    test_route_etag_and_delta()
+    bench_render()
+    print("OK")
@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+
+# Rendre les modules du service chatbot importables
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "chatbot_service")
+)
+
+from core.conversation_manager import ConversationManager
+from core.conversation_store import ConversationStore
+
+
+def test_lru_eviction():
+    """Au-delà de max_entries, la conversation la moins récemment utilisée est supprimée"""
+    store = ConversationStore(ttl=0, max_entries=3)
+    for conversation_id in ("a", "b", "c"):
+        store[conversation_id] = {"id": conversation_id}
+
+    store.get("a")  # "b" devient la moins récemment utilisée
+    store["d"] = {"id": "d"}
+
+    assert "b" not in store
+    assert all(conversation_id in store for conversation_id in ("a", "c", "d"))
+    assert store.metrics()["evicted"] == 1
+    assert store.metrics()["live_sessions"] == 3
+
+
+def test_idle_ttl():
+    """Une conversation inactive expire, une conversation utilisée reste en mémoire"""
+    store = ConversationStore(ttl=0.2, max_entries=0)
+    store["idle"] = {"id": "idle"}
+    store["active"] = {"id": "active"}
+
+    for _ in range(3):
+        time.sleep(0.1)
+        assert store.get("active") is not None
+
+    assert store.get("idle") is None
+    assert store.metrics()["expired"] == 1
+
+
+def test_sweeper():
+    """Le thread de nettoyage supprime les conversations expirées sans accès"""
+    store = ConversationStore(ttl=0.05, max_entries=0)
+    for i in range(100):
+        store[f"conv-{i}"] = {"id": f"conv-{i}"}
+
+    store.start_sweeper(interval=0.05)
+    time.sleep(0.3)
+    store.stop_sweeper()
+
+    metrics = store.metrics()
+    assert metrics["live_sessions"] == 0
+    assert metrics["expired"] == 100
+
+
+def test_manager_uses_bounded_store():
+    """create_conversation / get_conversation passent par le stockage borné"""
+    manager = ConversationManager()
+    manager.conversations.max_entries = 5
+    ids = [manager.create_conversation(f"user_{i}") for i in range(8)]
+
+    assert manager.get_conversation(ids[0]) is None
+    assert manager.get_conversation(ids[-1])["user_id"] == "user_7"
+    metrics = manager.get_metrics()
+    assert metrics["live_sessions"] == 5
+    assert metrics["evicted"] == 3
+
+
+if __name__ == "__main__":
+    test_lru_eviction()
+    test_idle_ttl()
+    test_sweeper()
+    test_manager_uses_bounded_store()
+    print("OK")
@@ -0,0 +1,110 @@
+import os
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+RULES_FILE = os.path.join(ROOT, "decision_tree_service", "rules", "eligibility_rules.json")
+
+# Rendre les modules du service chatbot importables
+sys.path.append(os.path.join(ROOT, "chatbot_service"))
+
+from core.dialogue_engine import DialogueEngine, compile_condition, normalize_city
+
+
+def test_compile_condition():
+    assert compile_condition("age >= 16 and age <= 25.5")({"age": 20})
+    assert not compile_condition("age >= 16 and age <= 25.5")({"age": 30})
+    assert compile_condition("16 <= age <= 25.5")({"age": 16})
+    assert compile_condition("True")({})
+    # Variable absente : condition fausse
+    assert not compile_condition("age < 16")({})
+
+    in_list = compile_condition("city in ['Saint-Denis', 'île-saint-denis']", normalize_city)
+    assert in_list({"city": normalize_city("Ile Saint Denis")})
+    assert not in_list({"city": "paris"})
+
+
+def test_compile_condition_rejects_code():
+    for source in ("__import__('os').system('true')", "age.__class__", "[x for x in age]"):
+        try:
+            compile_condition(source)
+            assert False, f"ValueError attendu pour {source}"
+        except ValueError:
+            pass
+
+
+def test_rules_compile_without_drift():
+    """Tous les états des règles compilent et chaque transition mène à un état connu"""
+    engine = DialogueEngine.from_file(RULES_FILE)
+    for state in engine.states.values():
+        outcomes = [outcome for _, outcome in state.transitions] + list(state.responses.values())
+        for outcome in outcomes:
+            assert outcome["next_state"] in engine.states, outcome["next_state"]
+
+
+def play(engine, answers):
+    """answers: liste de (nlp_data, user_data) ; renvoie la dernière réponse"""
+    state = "initial"
+    for nlp_data, user_data in answers:
+        result = engine.evaluate(state, nlp_data, user_data)
+        state = result["next_state"]
+    return result
+
+
+def test_flows():
+    engine = DialogueEngine.from_file(RULES_FILE)
+    start = [({"text": "Bonjour"}, {}), ({"text": "ok"}, {}), ({"text": "oui"}, {})]
+
+    result = play(
+        engine,
+        start
+        + [
+            ({"text": "17 ans", "entities": {"age": 17}}, {"age": 17}),
+            ({"text": "non", "entities": {"rsa": False}}, {"age": 17, "rsa": False}),
+            ({"text": "non"}, {"age": 17, "rsa": False}),
+            ({"text": "Saint Denis", "entities": {"city": "Saint Denis"}}, {"city": "Saint Denis"}),
+        ],
+    )
+    assert result["next_state"] == "eligible_ml"
+    assert result["eligibility_result"] == "ML"
+    assert result["is_final"]
+
+    result = play(engine, start + [({"text": "12 ans", "entities": {"age": 12}}, {"age": 12})])
+    assert result["next_state"] == "not_eligible_age"
+
+    # Réponse ambiguë : l'état ne change pas
+    result = engine.evaluate("consent", {"text": "peut-être"}, {})
+    assert result["next_state"] == "consent"
+    # Mots entiers seulement : "normal" n'est pas un "non"
+    state = "rsa_verification_young"
+    for text in ("normal", "bonjour", "mon nom"):
+        assert engine.evaluate(state, {"text": text}, {})["next_state"] == state, text
+    assert engine.evaluate(state, {"text": "Non, pas au RSA"}, {})["next_state"].endswith("_no_rsa")
+    assert engine.evaluate(state, {"text": "oui."}, {})["next_state"].endswith("young_rsa")
+    # Âge non donné : on redemande
+    assert engine.evaluate("age_verification", {"text": "bof"}, {})["next_state"] == "age_verification"
+    # Nombre seul en réponse à la question de l'âge, même avec un âge déjà connu
+    assert engine.evaluate("age_verification", {"text": "19"}, {})["next_state"] == "rsa_verification_young"
+    assert engine.evaluate("age_verification", {"text": "19"}, {"age": 70})["next_state"] == "rsa_verification_young"
+    assert engine.evaluate("age_verification", {"text": "ok"}, {"age": 40})["next_state"] == "rsa_verification_adult"
+    assert engine.evaluate("inconnu", {}, {})["next_state"] == "error"
+
+
+def bench_turn(turns=100000):
+    engine = DialogueEngine.from_file(RULES_FILE)
+    nlp_data = {"text": "Stains", "entities": {"city": "Stains"}}
+    user_data = {"age": 30, "rsa": True, "city": "Stains"}
+    start = time.perf_counter()
+    for _ in range(turns):
+        engine.evaluate("city_verification_adult_no_rsa", nlp_data, user_data)
+    elapsed = time.perf_counter() - start
+    print(f"moteur compilé: {elapsed / turns * 1e6:.2f} µs/tour")
+
+
+if __name__ == "__main__":
+    test_compile_condition()
+    test_compile_condition_rejects_code()
+    test_rules_compile_without_drift()
+    test_flows()
+    bench_turn()
+    print("OK")
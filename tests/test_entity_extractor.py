@@ -0,0 +1,53 @@
+import os
+import sys
+
+# Rendre les modules du service chatbot importables
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "chatbot_service")
+)
+
+from utils.entity_extractor import extract
+
+
+def test_whole_words():
+    """Les mots courts ne sont plus trouvés à l'intérieur d'autres mots"""
+    assert extract("Mon nom est Karim")["intent"] == "provide_info"
+    assert extract("Je voudrais passer un entretien")["entities"] == {}
+
+
+def test_negation_scope():
+    assert extract("Non je ne touche pas le RSA")["entities"] == {"rsa": False}
+    result = extract("oui, mais pas le RSA")
+    assert result["intent"] == "yes"
+    assert result["entities"] == {"rsa": False}
+    assert extract("J'ai fini mes études")["entities"] == {"schooling": False}
+    assert extract("Je ne suis pas d'accord")["intent"] == "no"
+    # Une question ne renseigne pas la situation de l'utilisateur
+    assert extract("C'est quoi le RSA ?")["entities"] == {}
+
+
+def test_numbers_and_places():
+    result = extract("vingt ans, pas scolarisée, Villetaneuse")
+    assert result["entities"] == {"age": 20, "schooling": False, "city": "villetaneuse"}
+    result = extract("mon code postal est le 93 240")
+    assert result["entities"] == {"postal_code": "93240", "city": "stains"}
+    assert extract("L'Île-Saint-Denis")["entities"] == {"city": "île-saint-denis"}
+
+
+def test_age_needs_context():
+    """Un nombre n'est un âge qu'avec "ans" ou "âge", dans des bornes plausibles"""
+    assert "age" not in extract("je suis en 3ème")["entities"]
+    assert extract("2 ans au rsa")["entities"] == {"rsa": True}
+    assert "age" not in extract("J'ai 150 ans")["entities"]
+    assert "age" not in extract("19")["entities"]
+    assert extract("J'ai 19 ans")["entities"] == {"age": 19}
+    assert extract("âge : 19")["entities"] == {"age": 19}
+    assert extract("mon âge est de 22")["entities"] == {"age": 22}
+
+
+if __name__ == "__main__":
+    test_whole_words()
+    test_negation_scope()
+    test_numbers_and_places()
+    test_age_needs_context()
+    print("OK")
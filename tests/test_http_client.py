@@ -0,0 +1,164 @@
+import os
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+# Rendre les modules du service chatbot importables
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "chatbot_service")
+)
+
+from utils.http_client import DeadlineExceeded, HTTPClient
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """
+    /ok répond 200, /slow ne répond qu'après 2 s, /flaky répond 503 puis 200,
+    /drip envoie son corps par blocs de 16 Ko toutes les 0,2 s
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Comme gunicorn : pas d'attente de l'algorithme de Nagle entre en-têtes et corps
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.server.connections += 1
+
+    def _reply(self, status):
+        body = b'{"ok": true}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        self.server.hits[self.path] = self.server.hits.get(self.path, 0) + 1
+        if self.path == "/slow":
+            time.sleep(2)
+        if self.path == "/drip":
+            return self._drip()
+        if self.path == "/flaky" and self.server.hits[self.path] < 3:
+            self._reply(503)
+        else:
+            self._reply(200)
+
+    def _drip(self):
+        block = b"x" * 16 * 1024
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(block) * 5))
+        self.end_headers()
+        for _ in range(5):
+            self.wfile.write(block)
+            self.wfile.flush()
+            time.sleep(0.2)
+
+    do_GET = _handle
+    do_POST = _handle
+
+    def log_message(self, *args):
+        pass
+
+
+def start_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.daemon_threads = True
+    # Les réponses lentes arrivent après l'abandon de l'appel : connexion déjà fermée
+    server.handle_error = lambda request, client_address: None
+    server.connections = 0
+    server.hits = {}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return server, f"http://{host}:{port}"
+
+
+def test_keep_alive():
+    """Les appels successifs réutilisent la même connexion"""
+    server, url = start_server()
+    client = HTTPClient()
+    for _ in range(20):
+        assert client.post(f"{url}/ok", json={"text": "bonjour"}).status_code == 200
+    assert server.connections == 1
+    server.shutdown()
+
+
+def test_deadline():
+    """Un service qui ne répond pas libère l'appelant à l'échéance"""
+    server, url = start_server()
+    client = HTTPClient(retries=2, backoff=0.01)
+    start = time.monotonic()
+    try:
+        client.get(f"{url}/slow", timeout=0.3)
+        assert False, "DeadlineExceeded attendu"
+    except DeadlineExceeded:
+        pass
+    # L'échéance couvre aussi les nouvelles tentatives
+    assert time.monotonic() - start < 0.6
+    assert client.metrics()[url.split("//")[1]]["errors"] == 1
+    server.shutdown()
+
+
+def test_deadline_covers_the_body():
+    """Chaque bloc arrive avant le délai de lecture, mais le corps entier arrive trop tard"""
+    server, url = start_server()
+    client = HTTPClient(retries=0)
+    start = time.monotonic()
+    try:
+        client.get(f"{url}/drip", timeout=0.5)
+        assert False, "DeadlineExceeded attendu"
+    except DeadlineExceeded:
+        pass
+    assert time.monotonic() - start < 0.7
+    # Un corps reçu à temps est lu en entier
+    assert len(client.get(f"{url}/drip", timeout=3).content) == 5 * 16 * 1024
+    server.shutdown()
+
+
+def test_retries():
+    """Les appels idempotents sont retentés après un 503, les autres non"""
+    server, url = start_server()
+    client = HTTPClient(retries=2, backoff=0.01)
+
+    assert client.post(f"{url}/flaky", upstream="flaky").status_code == 503
+    assert server.hits["/flaky"] == 1
+
+    server.hits.clear()
+    response = client.post(f"{url}/flaky", idempotent=True, upstream="flaky")
+    assert response.status_code == 200
+    assert server.hits["/flaky"] == 3
+
+    metrics = client.metrics()["flaky"]
+    assert metrics["calls"] == 2
+    assert metrics["retries"] == 2
+    assert metrics["errors"] == 1
+    assert set(metrics["latency_ms"]) == {"mean", "p50", "p95", "max"}
+    server.shutdown()
+
+
+def bench_keep_alive(calls=300):
+    """Temps par appel : requests.post (nouvelle connexion) vs client partagé"""
+    server, url = start_server()
+    client = HTTPClient()
+    for label, post in (("requests.post", requests.post), ("HTTPClient", client.post)):
+        start = time.perf_counter()
+        for _ in range(calls):
+            post(f"{url}/ok", json={"text": "bonjour"})
+        elapsed = time.perf_counter() - start
+        print(f"{label:<14} {elapsed / calls * 1e6:8.0f} µs/appel")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    test_keep_alive()
+    test_deadline()
+    test_deadline_covers_the_body()
+    test_retries()
+    bench_keep_alive()
+    print("OK")
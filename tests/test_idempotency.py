@@ -0,0 +1,210 @@
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Rendre les modules du service chatbot importables
+sys.path.append(os.path.join(ROOT, "chatbot_service"))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config.config import Config
+from core.idempotency import IdempotencyCache
+
+
+def test_cache_expires_and_is_bounded():
+    cache = IdempotencyCache(ttl=0.05, max_entries=2)
+    cache.put("c1", "k1", {"message": "a"})
+    assert cache.get("c1", "k1") == {"message": "a"}
+    # Clés propres à une conversation
+    assert cache.get("c2", "k1") is None
+    # La réponse rejouée est une copie
+    cache.get("c1", "k1")["message"] = "modifié"
+    assert cache.get("c1", "k1") == {"message": "a"}
+
+    cache.put("c1", "k2", {})
+    cache.put("c1", "k3", {})
+    assert cache.get("c1", "k1") is None
+    time.sleep(0.06)
+    assert cache.get("c1", "k3") is None
+
+
+def make_client(stt_url="http://127.0.0.1:9"):
+    Config.DECISION_TREE_MODE = "local"
+    Config.CONVERSATION_BACKEND = "memory"
+    Config.CONVERSATION_SWEEP_INTERVAL = 0
+    Config.STT_SERVICE_URL = stt_url
+    import app
+
+    client = app.app.test_client()
+    with contextlib.redirect_stdout(io.StringIO()):
+        conversation_id = client.post("/conversation", json={}).get_json()["conversation_id"]
+    return app.conversation_manager, client, conversation_id
+
+
+def post(client, path, body, key=None):
+    headers = {"Idempotency-Key": key} if key else {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        return client.post(path, json=body, headers=headers)
+
+
+def test_retried_turn_is_not_run_again():
+    manager, client, conversation_id = make_client()
+    body = {"conversation_id": conversation_id, "text": "Bonjour"}
+
+    first = post(client, "/process", body, key="turn-1")
+    retry = post(client, "/process", body, key="turn-1")
+    assert retry.get_json() == first.get_json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert len(manager.get_conversation(conversation_id).messages) == 2
+
+    # Sans clé, ou avec une nouvelle clé, le tour est traité
+    post(client, "/process", body)
+    post(client, "/process", body, key="turn-2")
+    assert len(manager.get_conversation(conversation_id).messages) == 6
+
+    assert post(client, "/process", body, key="x" * 300).status_code == 400
+
+
+def test_retried_violation_is_counted_once():
+    manager, client, conversation_id = make_client()
+    body = {"conversation_id": conversation_id, "text": "espèce de connard"}
+    for _ in range(3):
+        response = post(client, "/process", body, key="insult")
+    assert response.get_json()["contains_banned_words"]
+    assert not response.get_json()["is_final"]
+    assert manager.get_conversation(conversation_id)["violation_count"] == 1
+
+
+def test_concurrent_retries():
+    """Une nouvelle tentative envoyée pendant le premier essai reçoit sa réponse"""
+    manager, client, conversation_id = make_client()
+    body = {"conversation_id": conversation_id, "text": "Bonjour"}
+    responses = []
+    threads = [
+        threading.Thread(
+            target=lambda: responses.append(post(client, "/process", body, key="same").get_json())
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(responses) == 8 and all(r == responses[0] for r in responses)
+    assert len(manager.get_conversation(conversation_id).messages) == 2
+
+
+def test_retried_audio_is_not_transcribed_again():
+    import test_asgi_chatbot
+
+    delay, test_asgi_chatbot.STT_DELAY = test_asgi_chatbot.STT_DELAY, 0
+    server, url = test_asgi_chatbot.start_stt_server()
+    manager, client, conversation_id = make_client(url)
+    body = {"conversation_id": conversation_id, "audio": "UklGRg=="}
+    stt_calls = manager.http_client.metrics().get("stt", {}).get("calls", 0)
+    try:
+        first = post(client, "/process-audio", body, key="audio-1")
+        retry = post(client, "/process-audio", body, key="audio-1")
+    finally:
+        server.shutdown()
+        test_asgi_chatbot.STT_DELAY = delay
+
+    assert retry.get_json() == first.get_json()
+    assert first.get_json()["transcription"] == "Bonjour"
+    assert manager.http_client.metrics()["stt"]["calls"] == stt_calls + 1
+    assert len(manager.get_conversation(conversation_id).messages) == 2
+
+
+def test_workers_share_the_key():
+    """Stockage Redis : deux workers reçoivent la même clé, un seul exécute le tour"""
+    from redis_stand_in import RedisStandIn
+
+    server = RedisStandIn().start()
+    backend, redis_url = Config.CONVERSATION_BACKEND, Config.REDIS_URL
+    Config.DECISION_TREE_MODE = "local"
+    Config.CONVERSATION_BACKEND = "redis"
+    Config.REDIS_URL = server.url
+    Config.CONVERSATION_SWEEP_INTERVAL = 0
+    from core.conversation_manager import ConversationManager
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            first, second = ConversationManager(), ConversationManager()
+            conversation_id = first.create_conversation("user")
+
+            # Le premier worker est encore au milieu du tour quand le second le reçoit
+            started = threading.Event()
+            process_with_nlp = first._process_with_nlp
+
+            def slow_nlp(text):
+                started.set()
+                time.sleep(0.2)
+                return process_with_nlp(text)
+
+            first._process_with_nlp = slow_nlp
+            responses = []
+            thread = threading.Thread(
+                target=lambda: responses.append(
+                    first.process_message(conversation_id, "Bonjour", "same")
+                )
+            )
+            thread.start()
+            started.wait(5)
+            responses.append(second.process_message(conversation_id, "Bonjour", "same"))
+            thread.join()
+
+            # Un tour en échec libère la clé : la nouvelle tentative est exécutée
+            first._process_with_nlp = None
+            try:
+                first.process_message(conversation_id, "Oui", "failed")
+                assert False, "TypeError attendu"
+            except TypeError:
+                pass
+            first._process_with_nlp = process_with_nlp
+            second.process_message(conversation_id, "Oui", "failed")
+            conversation = second.get_conversation(conversation_id)
+    finally:
+        Config.CONVERSATION_BACKEND, Config.REDIS_URL = backend, redis_url
+        server.stop()
+
+    assert len(responses) == 2 and responses[0] == responses[1]
+    assert [m.content for m in conversation.messages if m.role == "user"] == ["Bonjour", "Oui"]
+
+
+def test_reply_route():
+    manager, client, conversation_id = make_client()
+    body = {"conversation_id": conversation_id, "text": "Bonjour"}
+    first = post(client, "/process", body, key="turn/1")
+
+    reply = client.get(f"/conversation/{conversation_id}/replies/turn%2F1")
+    assert reply.status_code == 200 and reply.get_json() == first.get_json()
+    assert reply.headers["Idempotent-Replayed"] == "true"
+    assert client.get(f"/conversation/{conversation_id}/replies/other").status_code == 404
+
+
+def bench_replay(rounds=2000):
+    manager, client, conversation_id = make_client()
+    body = {"conversation_id": conversation_id, "text": "Bonjour"}
+    post(client, "/process", body, key="bench")
+    start = time.perf_counter()
+    for _ in range(rounds):
+        manager.get_idempotent_response(conversation_id, "bench")
+    elapsed = time.perf_counter() - start
+    print(f"réponse rejouée: {elapsed / rounds * 1e6:.2f} µs (hors HTTP)")
+
+
+if __name__ == "__main__":
+    test_cache_expires_and_is_bounded()
+    test_retried_turn_is_not_run_again()
+    test_retried_violation_is_counted_once()
+    test_concurrent_retries()
+    test_retried_audio_is_not_transcribed_again()
+    test_workers_share_the_key()
+    test_reply_route()
+    bench_replay()
+    print("OK")
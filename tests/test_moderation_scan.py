@@ -0,0 +1,98 @@
+import contextlib
+import io
+import json
+import os
+import sys
+import tracemalloc
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Rendre les modules du service chatbot importables
+sys.path.append(os.path.join(ROOT, "chatbot_service"))
+
+from config.config import Config
+from utils.banned_words_filter import BannedWordsFilter
+
+
+def conversations(count, insult_every=0):
+    """Conversations produites au fur et à mesure, comme un parcours du stockage"""
+    for i in range(count):
+        text = "Espèce de connard" if insult_every and i % insult_every == 0 else "J'ai 22 ans"
+        yield {
+            "id": f"conv-{i}",
+            "messages": [
+                {"role": "bot", "content": "Quel âge as-tu ?"},
+                {"role": "user", "content": text},
+            ],
+        }
+
+
+def test_hits_are_the_same_with_processes():
+    word_filter = BannedWordsFilter()
+    expected = [
+        {
+            "conversation_id": f"conv-{i}",
+            "message_index": 1,
+            "content": "Espèce de connard",
+            "banned_words_found": ["connard"],
+        }
+        for i in range(0, 1200, 7)
+    ]
+    for workers in (1, 2):
+        hits = word_filter.scan_conversations(
+            conversations(1200, insult_every=7), workers=workers, chunk_size=100
+        )
+        assert list(hits) == expected, workers
+
+
+def test_memory_does_not_grow_with_history():
+    """Les références d'un lot sont libérées une fois ses résultats produits"""
+    word_filter = BannedWordsFilter()
+    peaks = []
+    for count in (5000, 40000):
+        tracemalloc.start()
+        assert not any(True for _ in word_filter.scan_conversations(conversations(count)))
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    assert peaks[1] < peaks[0] * 2, peaks
+
+
+def test_route_bounds_workers():
+    Config.DECISION_TREE_MODE = "local"
+    Config.CONVERSATION_BACKEND = "memory"
+    Config.CONVERSATION_SWEEP_INTERVAL = 0
+    import app
+
+    client = app.app.test_client()
+    scan_messages = app.conversation_manager.word_filter.scan_messages
+    requested = []
+
+    def recording_scan(messages, workers=1, chunk_size=500):
+        requested.append(workers)
+        return scan_messages(messages, workers=1, chunk_size=chunk_size)
+
+    app.conversation_manager.word_filter.scan_messages = recording_scan
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for workers in (1000, 0):
+                response = client.post(
+                    "/admin/moderation/scan", json={"messages": ["connard"], "workers": workers}
+                )
+                hits = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+                assert hits[0]["banned_words_found"] == ["connard"]
+            invalid = [
+                client.post("/admin/moderation/scan", json={"messages": [], "workers": workers})
+                for workers in ("8", 2.5, True, None)
+            ]
+    finally:
+        del app.conversation_manager.word_filter.scan_messages
+
+    assert requested == [Config.MODERATION_SCAN_WORKERS, 1]
+    assert all(response.status_code == 400 for response in invalid)
+
+
+if __name__ == "__main__":
+    test_hits_are_the_same_with_processes()
+    test_memory_does_not_grow_with_history()
+    test_route_bounds_workers()
+    print("OK")
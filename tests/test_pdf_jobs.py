@@ -0,0 +1,276 @@
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Rendre les modules du service chatbot importables
+sys.path.append(os.path.join(ROOT, "chatbot_service"))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.pdf_jobs import PDFJobQueue, PDFQueueFullError
+
+# Durée d'un rendu ReportLab simulé
+RENDER_DELAY = 0.3
+CLICKS = 10
+
+
+def wait(job, timeout=5):
+    job.future.exception(timeout=timeout)
+    return job
+
+
+def test_jobs_are_joined_bounded_and_retried():
+    started, release = threading.Event(), threading.Event()
+    rendered = []
+
+    def render(body):
+        started.set()
+        release.wait(5)
+        rendered.append(body)
+        if body == "en erreur":
+            raise ValueError("service PDF indisponible")
+        return {"file_url": f"/reports/{body}.pdf", "filename": f"{body}.pdf"}
+
+    jobs = PDFJobQueue(render, workers=1, max_pending=2, ttl=60)
+    first, joined = jobs.submit("c1", "v1", "c1-v1")
+    assert not joined
+    # Même version : même tâche ; conversation modifiée : nouvelle tâche
+    assert jobs.submit("c1", "v1", "c1-v1") == (first, True)
+    started.wait(5)  # le worker a pris la première tâche
+    second, joined = jobs.submit("c1", "v2", "c1-v2")
+    assert second is not first and not joined
+    third, _ = jobs.submit("c2", "v1", "en erreur")
+
+    # Un rendu en cours et deux tâches en attente : la file est pleine
+    try:
+        jobs.submit("c3", "v1", "c3-v1")
+        assert False, "PDFQueueFullError attendu"
+    except PDFQueueFullError:
+        pass
+
+    release.set()
+    assert wait(second).to_dict() == {
+        "job_id": second.job_id,
+        "conversation_id": "c1",
+        "status": "done",
+        "file_url": "/reports/c1-v2.pdf",
+        "filename": "c1-v2.pdf",
+    }
+    assert wait(third).status == "failed" and third.error == "service PDF indisponible"
+    assert third.body is None and jobs.get(third.job_id) is third
+
+    # Une tâche en échec n'est pas rejointe
+    retried, joined = jobs.submit("c2", "v1", "c2-v1")
+    assert retried is not third and not joined
+    wait(retried)
+    assert rendered == ["c1-v1", "c1-v2", "en erreur", "c2-v1"]
+    metrics = jobs.metrics()
+    assert (metrics["submitted"], metrics["joined"], metrics["rejected"]) == (4, 1, 1)
+    assert (metrics["done"], metrics["failed"], metrics["queued"]) == (3, 1, 0)
+
+
+def test_finished_jobs_expire():
+    jobs = PDFJobQueue(lambda body: {"file_url": body, "filename": body}, ttl=0)
+    job, _ = jobs.submit("c1", "v1", "a")
+    wait(job)
+    again, joined = jobs.submit("c1", "v1", "a")
+    assert not joined and jobs.get(job.job_id) is None
+
+
+def test_speculative_renders_wait_their_turn():
+    started, release = threading.Event(), threading.Event()
+    rendered = []
+
+    def render(body):
+        started.set()
+        release.wait(5)
+        rendered.append(body)
+        return {"file_url": body, "filename": body}
+
+    jobs = PDFJobQueue(render, workers=1, max_pending=10, max_speculative=2)
+    first, _ = jobs.submit("a", "v1", "a")
+    started.wait(5)
+    jobs.submit("s1", "v1", "s1", speculative=True)
+    second, _ = jobs.submit("s2", "v1", "s2", speculative=True)
+    # Deux tâches attendent déjà : pas de nouveau rendu anticipé
+    assert jobs.submit("s3", "v1", "s3", speculative=True) is None
+    last, _ = jobs.submit("b", "v1", "b")
+    # Le client demande le rapport anticipé de s2 : il passe devant s1
+    assert jobs.submit("s2", "v1", "s2") == (second, True)
+
+    release.set()
+    for job in (first, second, last):
+        wait(job)
+    wait(jobs.submit("s1", "v1", "s1")[0])
+    assert rendered == ["a", "b", "s2", "s1"]
+    metrics = jobs.metrics()
+    assert (metrics["speculative"], metrics["speculative_skipped"]) == (2, 1)
+    assert (metrics["speculative_used"], metrics["done"]) == (2, 4)
+
+
+def test_joined_requests_take_no_queue_slot():
+    """Les demandes répétées d'une tâche en attente n'occupent pas la file"""
+    started, release = threading.Event(), threading.Event()
+
+    def render(body):
+        started.set()
+        release.wait(5)
+        return {"file_url": body, "filename": body}
+
+    jobs = PDFJobQueue(render, workers=1, max_pending=2, max_speculative=2)
+    first, _ = jobs.submit("a", "v1", "a")
+    started.wait(5)
+    speculative, _ = jobs.submit("s", "v1", "s", speculative=True)
+    for _ in range(CLICKS):
+        assert jobs.submit("s", "v1", "s") == (speculative, True)
+        assert jobs.submit("a", "v1", "a") == (first, True)
+    # Une seule place occupée : une autre conversation est encore acceptée
+    other, joined = jobs.submit("b", "v1", "b")
+    assert not joined and jobs.metrics()["queued"] == 2
+
+    release.set()
+    for job in (first, speculative, other):
+        assert wait(job).status == "done"
+
+
+class _SlowPDFService(BaseHTTPRequestHandler):
+    """Service PDF simulé : rendu de RENDER_DELAY secondes, compte les rendus"""
+
+    renders = 0
+
+    def do_POST(self):
+        json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        type(self).renders += 1
+        time.sleep(RENDER_DELAY)
+        data = json.dumps(
+            {"file_url": "http://pdf/reports/r.pdf", "filename": "r.pdf"}
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_routes():
+    _SlowPDFService.renders = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowPDFService)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    import test_asgi_chatbot
+    from config.config import Config
+
+    test_asgi_chatbot.configure()
+    Config.PDF_SERVICE_URL = "http://%s:%d" % server.server_address
+    import app
+
+    client = app.app.test_client()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            conversation_id = client.post("/conversation", json={}).get_json()["conversation_id"]
+            client.post("/process", json={"conversation_id": conversation_id, "text": "Bonjour"})
+
+            submitted = client.post("/pdf-jobs", json={"conversation_id": conversation_id})
+            job = submitted.get_json()
+            assert submitted.status_code == 202 and job["status"] in ("queued", "running")
+            assert client.get(f"/pdf-jobs/{job['job_id']}/download").status_code == 409
+
+            # Clics répétés pendant le rendu : la même tâche
+            start = time.perf_counter()
+            with ThreadPoolExecutor(CLICKS) as pool:
+                clicks = list(
+                    pool.map(
+                        lambda _: app.app.test_client().post(
+                            "/generate-pdf", json={"conversation_id": conversation_id}
+                        ),
+                        range(CLICKS),
+                    )
+                )
+            elapsed = time.perf_counter() - start
+
+            status = client.get(f"/pdf-jobs/{job['job_id']}").get_json()
+            download = client.get(f"/pdf-jobs/{job['job_id']}/download")
+            missing = client.post("/pdf-jobs", json={"conversation_id": "inconnue"})
+            unknown = client.get("/pdf-jobs/inconnue")
+    finally:
+        server.shutdown()
+
+    assert all(c.get_json()["file_url"] == "http://pdf/reports/r.pdf" for c in clicks)
+    assert status["status"] == "done" and status["filename"] == "r.pdf"
+    assert download.status_code == 302
+    assert download.headers["Location"] == "http://pdf/reports/r.pdf"
+    assert missing.status_code == 404 and unknown.status_code == 404
+    assert _SlowPDFService.renders == 1
+    metrics = client.get("/metrics").get_json()["pdf_jobs"]
+    assert metrics["joined"] >= CLICKS
+    print(
+        f"{CLICKS + 1} demandes du même rapport pendant un rendu de {RENDER_DELAY}s: "
+        f"{_SlowPDFService.renders} rendu, servies en {elapsed:.2f} s"
+    )
+
+
+def test_report_is_rendered_when_the_conversation_ends():
+    _SlowPDFService.renders = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowPDFService)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    import test_asgi_chatbot
+    from config.config import Config
+
+    test_asgi_chatbot.configure()
+    Config.PDF_SERVICE_URL = "http://%s:%d" % server.server_address
+    import app
+
+    client = app.app.test_client()
+    jobs = app.conversation_manager.pdf_jobs
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            conversation_id = client.post("/conversation", json={}).get_json()["conversation_id"]
+            for text in test_asgi_chatbot.FLOW:
+                reply = client.post(
+                    "/process", json={"conversation_id": conversation_id, "text": text}
+                ).get_json()
+                # Pas de rendu tant que la conversation n'est pas terminée
+                assert reply["is_final"] or _SlowPDFService.renders == 0
+            assert reply["is_final"]
+            assert app.conversation_manager.get_conversation(conversation_id)["eligibility_result"]
+
+            # L'utilisateur lit le résultat pendant le rendu anticipé
+            time.sleep(RENDER_DELAY + 0.1)
+            used = jobs.metrics()["speculative_used"]
+            start = time.perf_counter()
+            response = client.post("/generate-pdf", json={"conversation_id": conversation_id})
+            elapsed = time.perf_counter() - start
+    finally:
+        server.shutdown()
+
+    assert response.status_code == 200 and response.get_json()["filename"] == "r.pdf"
+    assert _SlowPDFService.renders == 1
+    assert jobs.metrics()["speculative_used"] == used + 1
+    assert elapsed < RENDER_DELAY / 2
+    print(
+        f"/generate-pdf après un rendu anticipé: {elapsed * 1000:.1f} ms "
+        f"(rendu à froid: {RENDER_DELAY * 1000:.0f} ms)"
+    )
+
+
+if __name__ == "__main__":
+    test_jobs_are_joined_bounded_and_retried()
+    test_finished_jobs_expire()
+    test_speculative_renders_wait_their_turn()
+    test_joined_requests_take_no_queue_slot()
+    test_routes()
+    test_report_is_rendered_when_the_conversation_ends()
+    print("OK")
@@ -0,0 +1,109 @@
+import os
+import sys
+import threading
+
+# Rendre les modules du service chatbot importables
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "chatbot_service")
+)
+
+from core.conversation_store import ConversationConflictError
+from core.records import Conversation, Role
+from core.redis_conversation_store import RedisConversationStore
+from redis_stand_in import RedisStandIn
+
+# Un vrai serveur peut être utilisé : REDIS_URL=redis://localhost:6379/15
+REDIS_URL = os.getenv("REDIS_URL")
+
+
+def open_store(server):
+    return RedisConversationStore(REDIS_URL or server.url, key_prefix="test-conversation:")
+
+
+def new_conversation(conversation_id):
+    return Conversation(conversation_id, "user")
+
+
+def test_workers_share_conversations():
+    """Une conversation créée par un worker est lue et complétée par un autre"""
+    server = RedisStandIn().start()
+    worker_a, worker_b = open_store(server), open_store(server)
+
+    worker_a["a"] = new_conversation("a")
+    conversation = worker_b.get("a")
+    conversation.add_message(Role.USER, "Oui")
+    conversation["current_state"] = "age_verification"
+    worker_b.save("a", conversation)
+
+    assert worker_a.get("a")["current_state"] == "age_verification"
+    assert worker_a.get("a") == conversation
+    assert "a" in worker_a and worker_a.get("missing") is None
+    server.stop()
+
+
+def test_stale_write_rejected():
+    """Une écriture basée sur une version périmée est refusée"""
+    server = RedisStandIn().start()
+    store = open_store(server)
+    store["a"] = new_conversation("a")
+
+    first, second = store.get("a"), store.get("a")
+    first["current_state"] = "consent"
+    store.save("a", first)
+
+    second["current_state"] = "end"
+    try:
+        store.save("a", second)
+    except ConversationConflictError:
+        pass
+    else:
+        raise AssertionError("écriture périmée acceptée")
+
+    # Créer une conversation qui existe déjà est aussi un conflit
+    try:
+        store["a"] = new_conversation("a")
+    except ConversationConflictError:
+        pass
+    else:
+        raise AssertionError("conversation écrasée")
+
+    assert store.get("a")["current_state"] == "consent"
+    assert store.metrics()["conflicts"] == 2
+    server.stop()
+
+
+def test_concurrent_turns_not_lost():
+    """Des tours concurrents sur la même conversation sont tous conservés (rejoués en cas de conflit)"""
+    server = RedisStandIn().start()
+    store = open_store(server)
+    store["a"] = new_conversation("a")
+
+    def play_turns(worker, turns):
+        worker_store = open_store(server)
+        for turn in range(turns):
+            while True:
+                conversation = worker_store.get("a")
+                conversation.add_message(Role.USER, f"{worker}-{turn}")
+                try:
+                    worker_store.save("a", conversation)
+                    break
+                except ConversationConflictError:
+                    continue
+
+    threads = [threading.Thread(target=play_turns, args=(w, 25)) for w in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    conversation = store.get("a")
+    assert len(conversation["messages"]) == 100
+    assert conversation.version == 101
+    server.stop()
+
+
+if __name__ == "__main__":
+    test_workers_share_conversations()
+    test_stale_write_rejected()
+    test_concurrent_turns_not_lost()
+    print("OK")
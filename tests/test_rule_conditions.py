@@ -0,0 +1,77 @@
+import contextlib
+import io
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DECISION_TREE_DIR = os.path.join(ROOT, "decision_tree_service")
+RULES_FILE = os.path.join(DECISION_TREE_DIR, "rules", "eligibility_rules.json")
+
+# Rendre les modules du service chatbot et de decision_tree_service importables
+sys.path.append(os.path.join(ROOT, "chatbot_service"))
+sys.path.append(DECISION_TREE_DIR)
+
+from evaluators.eligibility_evaluator import EligibilityEvaluator
+from utils.conditions import compile_condition
+
+
+def make_evaluator():
+    with contextlib.redirect_stdout(io.StringIO()):
+        return EligibilityEvaluator(RULES_FILE)
+
+
+def test_copy_matches_reference():
+    """decision_tree_service/evaluators/conditions.py est à jour (update_conditions.sh)"""
+    paths = (
+        os.path.join(ROOT, "chatbot_service", "utils", "conditions.py"),
+        os.path.join(DECISION_TREE_DIR, "evaluators", "conditions.py"),
+    )
+    reference, copy = (open(path, encoding="utf-8").read() for path in paths)
+    assert copy == reference
+
+
+def test_membership_hook():
+    seen = []
+
+    def membership(name, values):
+        seen.append((name, values))
+        return (lambda data: data[name].upper() in values) if name == "city" else None
+
+    predicate = compile_condition("city in ['PARIS'] and code in [75]", membership=membership)
+    assert predicate({"city": "paris", "code": 75})
+    assert not predicate({"city": "paris", "code": 93})
+    assert not predicate({"code": 75})
+    assert seen == [("city", frozenset({"PARIS"})), ("code", frozenset({75}))]
+
+
+def test_conditions_are_compiled_at_load():
+    evaluator = make_evaluator()
+    assert len(evaluator.conditions) == 8 and "True" in evaluator.conditions
+    # Les règles renvoyées par /rules restent du JSON
+    assert all(isinstance(key, str) for key in evaluator.get_rules()["states"])
+
+    age = evaluator._evaluate_condition
+    assert age("age >= 16 and age <= 25.5", {"age": 25.5})
+    assert not age("age >= 16 and age <= 25.5", {"age": "20"})
+    assert not age("age < 16", {})
+
+    city = "city in ['saint-denis', 'stains', 'pierrefitte']"
+    for value in ("Saint-Denis", "st denis", "93200", "STAINS"):
+        assert evaluator._evaluate_condition(city, {"city": value}), value
+    for value in ("Paris", None, ""):
+        assert not evaluator._evaluate_condition(city, {"city": value}), value
+
+
+def test_unsafe_condition_is_never_true():
+    evaluator = make_evaluator()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for condition in ("__import__('os').system('true')", "age >", "age.real > 1"):
+            assert not evaluator._evaluate_condition(condition, {"age": 20}), condition
+
+
+if __name__ == "__main__":
+    test_copy_matches_reference()
+    test_membership_hook()
+    test_conditions_are_compiled_at_load()
+    test_unsafe_condition_is_never_true()
+    print("OK")
@@ -0,0 +1,171 @@
+import contextlib
+import io
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+RULES_FILE = os.path.join(ROOT, "decision_tree_service", "rules", "eligibility_rules.json")
+
+# Rendre les modules du service chatbot importables
+sys.path.append(os.path.join(ROOT, "chatbot_service"))
+
+from config.config import Config
+from core.dialogue_engine import DialogueEngine
+
+# Premier message libre, puis réponses de l'utilisateur aux questions posées
+SCENARIOS = [
+    {
+        "first": "Bonjour, j'ai 23 ans, pas au RSA, j'habite Stains",
+        "age": 23, "rsa": False, "schooling": False, "city": "Stains",
+        "expected": "Non éligible (ville)",
+    },
+    {
+        "first": "Salut, j'ai 19 ans, j'ai arrêté l'école et j'habite à Saint-Denis",
+        "age": 19, "rsa": False, "schooling": False, "city": "Saint-Denis",
+        "expected": "ML",
+    },
+    {
+        "first": "J'ai 40 ans et je touche le RSA",
+        "age": 40, "rsa": True, "schooling": False, "city": "Saint-Denis",
+        "expected": "ALI",
+    },
+    {
+        "first": "Bonjour, je cherche un accompagnement à Aubervilliers",
+        "age": 35, "rsa": False, "schooling": False, "city": "Aubervilliers",
+        "expected": "PLIE",
+    },
+    {
+        "first": "Bonjour",
+        "age": 22, "rsa": True, "schooling": True, "city": "Pierrefitte",
+        "expected": "ALI",
+    },
+    {
+        "first": "j'ai 15 ans",
+        "age": 15, "rsa": False, "schooling": True, "city": "Stains",
+        "expected": "Non éligible (âge)",
+    },
+]
+
+
+def answer(profile, state):
+    """Réponse de l'utilisateur à la question de l'état"""
+    if state == "consent":
+        return "oui"
+    if state == "age_verification":
+        return f"{profile['age']} ans"
+    if state.startswith("rsa_verification"):
+        return "oui" if profile["rsa"] else "non"
+    if state.startswith("schooling_verification"):
+        return "oui" if profile["schooling"] else "non"
+    if state.startswith("city_verification"):
+        return profile["city"]
+    return "ok"
+
+
+def play(client, manager, profile, max_turns=15, answer=answer):
+    """Conversation jusqu'au résultat ; renvoie (nombre de tours, résultat)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        conversation_id = client.post("/conversation", json={}).get_json()["conversation_id"]
+        text = profile["first"]
+        for turn in range(1, max_turns + 1):
+            response = client.post(
+                "/process", json={"conversation_id": conversation_id, "text": text}
+            ).get_json()
+            conversation = manager.get_conversation(conversation_id)
+            if response["is_final"]:
+                return turn, conversation.get("eligibility_result")
+            text = answer(profile, conversation["current_state"])
+    raise AssertionError(f"Pas de résultat après {max_turns} tours: {profile['first']}")
+
+
+def make_client():
+    Config.DECISION_TREE_MODE = "local"
+    Config.CONVERSATION_BACKEND = "memory"
+    Config.CONVERSATION_SWEEP_INTERVAL = 0
+    import app
+
+    return app.app.test_client(), app.conversation_manager
+
+
+def average_turns(prefill):
+    client, manager = make_client()
+    default, Config.SLOT_PREFILL = Config.SLOT_PREFILL, prefill
+    try:
+        results = [play(client, manager, profile) for profile in SCENARIOS]
+    finally:
+        Config.SLOT_PREFILL = default
+    for (turns, result), profile in zip(results, SCENARIOS):
+        assert result == profile["expected"], (profile["first"], result)
+    return [turns for turns, _ in results]
+
+
+def test_answered_questions_are_skipped():
+    before = average_turns(prefill=False)
+    after = average_turns(prefill=True)
+    # Mêmes résultats, jamais plus de tours ; sans information d'avance, rien ne change
+    assert all(a <= b for a, b in zip(after, before))
+    assert after[0] < before[0] and after[4] == before[4]
+    print(
+        f"tours par éligibilité: {sum(before) / len(before):.2f} sans pré-remplissage "
+        f"{before}, {sum(after) / len(after):.2f} avec {after}"
+    )
+
+
+def test_evaluator_returns_first_missing_question():
+    client, manager = make_client()
+    evaluator = manager.decision_tree.evaluator
+    user_data = {"age": 23, "rsa": False, "city": "stains"}
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = evaluator.evaluate(
+            "prefill-1", "consent", {"text": "oui", "intent": "yes"}, user_data, prefill=True
+        )
+        unchanged = evaluator.evaluate(
+            "prefill-2", "consent", {"text": "oui", "intent": "yes"}, user_data
+        )
+    assert result["next_state"] == "schooling_verification_young_no_rsa"
+    assert result["prefilled_states"] == ["age_verification", "rsa_verification_young"]
+    assert unchanged["next_state"] == "age_verification"
+    assert "prefilled_states" not in unchanged
+
+
+def test_age_answer_replaces_aside():
+    """ "19" en réponse à la question de l'âge remplace un âge dit en passant"""
+    client, manager = make_client()
+    profile = {"first": "Bonjour, ma mère a 70 ans", "rsa": False, "schooling": True, "city": "Stains"}
+
+    def reply(profile, state):
+        return "19" if state == "age_verification" else answer(profile, state)
+
+    def fallback(conversation_id, *args):
+        return manager._fallback_decision(*args)
+
+    results = []
+    for decision_tree in ("local", "fallback"):
+        if decision_tree == "fallback":
+            manager._process_with_decision_tree = fallback
+        try:
+            results.append(play(client, manager, profile, answer=reply)[1])
+        finally:
+            manager.__dict__.pop("_process_with_decision_tree", None)
+    # 19 ans, pas au RSA, scolarisé, à Stains : jeune scolarisé, pas l'âge de 70 ans
+    assert results[0] == results[1] != "Non éligible (âge)", results
+    assert results[0] == play(client, manager, dict(profile, first="Bonjour", age=19))[1]
+
+
+def test_fallback_engine_prefill():
+    engine = DialogueEngine.from_file(RULES_FILE)
+    user_data = {"age": 30, "rsa": True, "schooling": False, "city": "stains"}
+    result = engine.evaluate("consent", {"text": "oui"}, user_data, prefill=True)
+    assert result["next_state"] == "eligible_ali" and result["is_final"]
+    assert len(result["prefilled_states"]) == 4
+    # Âge inutilisable : la question est posée normalement
+    result = engine.evaluate("consent", {"text": "oui"}, {"age": "vingt"}, prefill=True)
+    assert result["next_state"] == "age_verification"
+
+
+if __name__ == "__main__":
+    test_answered_questions_are_skipped()
+    test_evaluator_returns_first_missing_question()
+    test_age_answer_replaces_aside()
+    test_fallback_engine_prefill()
+    print("OK")
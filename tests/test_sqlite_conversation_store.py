@@ -0,0 +1,146 @@
+import os
+import sys
+import tempfile
+import threading
+
+# Rendre les modules du service chatbot importables
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "chatbot_service")
+)
+
+from core.records import Conversation, Role
+from core.sqlite_conversation_store import SQLiteConversationStore
+
+
+def new_conversation(conversation_id):
+    return Conversation(conversation_id, "user")
+
+
+def play_turn(store, conversation_id, text, next_state):
+    conversation = store.get(conversation_id)
+    conversation.add_message(Role.USER, text)
+    conversation.add_message(Role.BOT, "ok")
+    conversation["current_state"] = next_state
+    store.save(conversation_id)
+
+
+def test_conversations_survive_restart():
+    """Les conversations sont relues à l'identique après réouverture de la base"""
+    with tempfile.TemporaryDirectory() as directory:
+        uri = f"sqlite:///{os.path.join(directory, 'chatbot.db')}"
+
+        store = SQLiteConversationStore(uri, flush_interval=60)
+        store["a"] = new_conversation("a")
+        play_turn(store, "a", "Oui j'accepte", "age_verification")
+        play_turn(store, "a", "J'ai 22 ans", "rsa_verification")
+        store.get("a")["user_data"]["age"] = 22
+        store.save("a")
+        expected = store.get("a")
+
+        # Rien n'est écrit avant le lot (flush_interval de 60 s)
+        assert store.metrics()["pending_messages"] == 4
+        store.close()
+
+        reopened = SQLiteConversationStore(uri)
+        assert reopened.get("a") == expected
+        assert reopened.get("missing") is None
+        reopened.close()
+
+
+def test_evicted_while_pending():
+    """Une conversation sortie de la mémoire avant son écriture n'est pas perdue"""
+    with tempfile.TemporaryDirectory() as directory:
+        uri = f"sqlite:///{os.path.join(directory, 'chatbot.db')}"
+        store = SQLiteConversationStore(uri, max_entries=2, flush_interval=60)
+
+        for conversation_id in ("a", "b", "c"):
+            store[conversation_id] = new_conversation(conversation_id)
+            play_turn(store, conversation_id, "Bonjour", "consent")
+
+        assert store.metrics()["evicted"] == 1
+        # "a" est relue depuis la file d'écriture, puis complétée
+        play_turn(store, "a", "Oui", "age_verification")
+        store.flush()
+
+        # Forcer une relecture depuis la base
+        store._cache.pop("a")
+        conversation = store.get("a")
+        assert [m.text for m in conversation["messages"]] == [
+            "Bonjour",
+            "ok",
+            "Oui",
+            "ok",
+        ]
+        assert conversation["current_state"] == "age_verification"
+        assert len(store) == 3
+        store.close()
+
+
+class _GatedLock:
+    """Verrou de la base dont la première prise attend un signal (écriture en cours)"""
+
+    def __init__(self, lock):
+        self.lock = lock
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def __enter__(self):
+        if not self.entered.is_set():
+            self.entered.set()
+            self.release.wait(5)
+        return self.lock.__enter__()
+
+    def __exit__(self, *exc):
+        return self.lock.__exit__(*exc)
+
+
+def test_read_during_flush():
+    """Un lot en cours d'écriture reste visible : relecture et tour suivant à jour"""
+    with tempfile.TemporaryDirectory() as directory:
+        uri = f"sqlite:///{os.path.join(directory, 'chatbot.db')}"
+        store = SQLiteConversationStore(uri, max_entries=1, flush_interval=60)
+        store["a"] = new_conversation("a")
+        play_turn(store, "a", "Bonjour", "consent")
+
+        gate = store._db_lock = _GatedLock(store._db_lock)
+        writer = threading.Thread(target=store.flush)
+        writer.start()
+        gate.entered.wait(5)
+
+        # "a" sort de la mémoire puis est relue pendant l'écriture de son lot
+        store["b"] = new_conversation("b")
+        assert [m.text for m in store.get("a")["messages"]] == ["Bonjour", "ok"]
+        play_turn(store, "a", "Oui", "age_verification")
+
+        gate.release.set()
+        writer.join()
+        store.close()
+
+        reopened = SQLiteConversationStore(uri)
+        conversation = reopened.get("a")
+        assert [m.text for m in conversation["messages"]] == ["Bonjour", "ok", "Oui", "ok"]
+        assert conversation["current_state"] == "age_verification"
+        reopened.close()
+
+
+def test_scan_keeps_lru_order():
+    with tempfile.TemporaryDirectory() as directory:
+        uri = f"sqlite:///{os.path.join(directory, 'chatbot.db')}"
+        store = SQLiteConversationStore(uri, max_entries=2, flush_interval=60)
+        for conversation_id in ("a", "b"):
+            store[conversation_id] = new_conversation(conversation_id)
+        store.get("a")
+
+        assert len(list(store.values())) == 2
+        # "b" reste la moins récemment utilisée : c'est elle qui sort
+        store["c"] = new_conversation("c")
+        assert store._cache.peek("b") is None and store._cache.peek("a") is not None
+        store.close()
+
+
+if __name__ == "__main__":
+    test_conversations_survive_restart()
+    test_evicted_while_pending()
+    test_read_during_flush()
+    test_scan_keeps_lru_order()
+    print("OK")
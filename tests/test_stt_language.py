@@ -0,0 +1,109 @@
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+STT_DIR = os.path.join(ROOT, "stt_service")
+# Modules dont le nom existe aussi dans le service chatbot des autres tests
+SHARED_MODULES = ("app", "config", "utils")
+
+AUDIO = bytes(range(256)) * 16
+
+
+class _WhisperHandler(BaseHTTPRequestHandler):
+    """API Whisper simulée : garde chaque corps reçu"""
+
+    received = []
+
+    def do_POST(self):
+        type(self).received.append(self.rfile.read(int(self.headers["Content-Length"])))
+        reply = json.dumps({"text": "Bonjour"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, *args):
+        pass
+
+
+@contextlib.contextmanager
+def stt_modules():
+    """
+    Modules app, config et utils du service STT le temps du bloc : ceux du service
+    chatbot déjà importés (même processus pytest) sont mis de côté puis remis.
+    """
+
+    def shared(name):
+        return name.split(".")[0] in SHARED_MODULES
+
+    saved = {name: sys.modules.pop(name) for name in list(sys.modules) if shared(name)}
+    sys.path.insert(0, STT_DIR)
+    try:
+        yield
+    finally:
+        sys.path.remove(STT_DIR)
+        for name in [name for name in sys.modules if shared(name)]:
+            del sys.modules[name]
+        sys.modules.update(saved)
+
+
+def test_language_is_validated():
+    with stt_modules():
+        _check_language_validation()
+
+
+def _check_language_validation():
+    from config.config import Config
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _WhisperHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    Config.WHISPER_API_URL = f"http://127.0.0.1:{server.server_address[1]}/transcriptions"
+    import app
+
+    client = app.app.test_client()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            rejected = [
+                client.post(
+                    "/transcribe",
+                    query_string={"language": language},
+                    data=AUDIO,
+                    content_type="application/octet-stream",
+                )
+                for language in ("fr\r\nX-Injected: 1", "fr\n", "french", "FR", "fr-fr")
+            ]
+            rejected.append(
+                client.post(
+                    "/transcribe",
+                    data={"audio": (io.BytesIO(AUDIO), "audio.wav"), "language": "fr\r\n--x"},
+                    content_type="multipart/form-data",
+                )
+            )
+            rejected.append(client.post("/transcribe", json={"audio": "AAAA", "language": 12}))
+            accepted = [
+                client.post(
+                    "/transcribe",
+                    query_string={"language": language},
+                    data=AUDIO,
+                    content_type="application/octet-stream",
+                )
+                for language in ("fr", "fr-FR")
+            ]
+    finally:
+        server.shutdown()
+
+    assert all(response.status_code == 400 for response in rejected)
+    # Aucun corps invalide n'est parvenu à Whisper
+    assert len(_WhisperHandler.received) == 2
+    assert [response.get_json()["language"] for response in accepted] == ["fr", "fr-FR"]
+
+
+if __name__ == "__main__":
+    test_language_is_validated()
+    print("OK")
@@ -0,0 +1,13 @@
+#!/bin/bash
+
+# Copie le compilateur de conditions des règles (version de référence dans
+# chatbot_service/utils, utilisée par le moteur de secours) dans decision_tree_service,
+# dont EligibilityEvaluator compile les mêmes conditions au chargement des règles.
+# Le module est placé dans evaluators/ : en mode DECISION_TREE_MODE=local, le chatbot
+# importe ce dossier et son propre paquet utils masquerait celui du service.
+
+SOURCE="chatbot_service/utils/conditions.py"
+TARGET="decision_tree_service/evaluators/conditions.py"
+
+cp "$SOURCE" "$TARGET"
+echo "Updated $TARGET"
@@ -0,0 +1,23 @@
+#!/bin/bash
+
+# Copie le client HTTP partagé (version de référence dans chatbot_service/utils)
+# dans les services qui appellent d'autres services ou des API externes.
+# Chaque service est construit séparément par Docker : le module doit être présent
+# dans son propre répertoire.
+
+SOURCE="chatbot_service/utils/http_client.py"
+
+SERVICES=(
+    "api_gateway"
+    "nlp_service"
+    "stt_service"
+)
+
+for service in "${SERVICES[@]}"; do
+    mkdir -p "$service/utils"
+    if [ ! -f "$service/utils/__init__.py" ]; then
+        echo "# Utilitaires du service $service" > "$service/utils/__init__.py"
+    fi
+    cp "$SOURCE" "$service/utils/http_client.py"
+    echo "Updated $service/utils/http_client.py"
+done
@@ -25,6 +25,14 @@ document.addEventListener('DOMContentLoaded', function () {
 
     // API URL
     const API_BASE_URL = window.location.origin + '/api';
+
+    // Canal WebSocket de la conversation (null : envoi par requêtes HTTP)
+    let channel = null;
+    let pendingAudioUrl = null;
+    let turnCounter = 0;
+    // Tours envoyés sur le canal et encore sans réponse, par id : renvoyés par fetch
+    // (même clé d'idempotence) si le canal se ferme avant la réponse
+    const channelTurns = new Map();
     messageDiv.innerHTML = text;
     // Conversation Initialization
     function initConversation() {
@@ -40,6 +48,7 @@ document.addEventListener('DOMContentLoaded', function () {
             .then(response => response.json())
             .then(data => {
                 conversationId = data.conversation_id;
+                openChannel(data.channel);
                 // Modifiez cette ligne pour stocker l'indicateur de parole
                 const speakingIndicator = addBotMessage(data.message);
 
@@ -52,6 +61,57 @@ document.addEventListener('DOMContentLoaded', function () {
             });
     }
 
+    // Ouvrir le canal annoncé par le service (variante ASGI) : tours envoyés sans
+    // nouvelle requête HTTP, transcription affichée dès qu'elle est prête. Sans canal
+    // annoncé, ou une fois le canal fermé, les messages partent par fetch.
+    function openChannel(channelUrl) {
+        if (!channelUrl || !('WebSocket' in window)) return;
+
+        // Chemin relatif à l'URL de l'API, ou URL complète (ws://, wss://)
+        const base = /^wss?:\/\//.test(channelUrl)
+            ? channelUrl
+            : API_BASE_URL.replace(/^http/, 'ws') + channelUrl;
+        const socket = new WebSocket(`${base}?conversation_id=${encodeURIComponent(conversationId)}`);
+        socket.onopen = () => {
+            channel = socket;
+        };
+        socket.onmessage = event => {
+            const data = JSON.parse(event.data);
+            if (data.event === 'transcription') {
+                showTranscription(data.text, pendingAudioUrl);
+            } else if (data.event === 'reply') {
+                channelTurns.delete(data.id);
+                showReply(data);
+            } else if (data.event === 'error') {
+                console.error('Erreur du canal:', data.error);
+                if (channelTurns.delete(data.id)) {
+                    addBotMessage('Erreur lors de l\'envoi du message. Veuillez réessayer.');
+                }
+            }
+        };
+        socket.onerror = error => {
+            // Suivi de onclose : les tours sans réponse y sont renvoyés
+            console.error('Erreur du canal WebSocket:', error);
+        };
+        socket.onclose = () => {
+            channel = null;
+            const turns = Array.from(channelTurns.entries());
+            channelTurns.clear();
+            turns.forEach(([turnId, turn]) => {
+                if (turn.audioBlob) {
+                    postAudio(turn.audioBlob, turn.audioUrl, turnId);
+                } else {
+                    postText(turn.text, turnId);
+                }
+            });
+        };
+    }
+
+    function nextTurnId() {
+        turnCounter += 1;
+        return `${conversationId}-${turnCounter}`;
+    }
+
     // Start Recording
     function startRecording() {
         navigator.mediaDevices.getUserMedia({ audio: true })
@@ -115,57 +175,49 @@ document.addEventListener('DOMContentLoaded', function () {
             return;
         }
 
-        const reader = new FileReader();
-        reader.readAsDataURL(audioBlob);
-        reader.onloadend = () => {
-            // Format base64: data:audio/wav;base64,XXXXXX
-            const base64Audio = reader.result.split(',')[1];
-
-            // Créer URL pour l'audio
-            const audioUrl = URL.createObjectURL(audioBlob);
-
-            // Ajouter un message temporaire en attendant la transcription
-            addUserMessage('<div class="line_emoji">🎤 Message vocal envoyé</div>', null, audioUrl);
-
-            fetch(`${API_BASE_URL}/process-audio`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                    'Accept': 'application/json'
-                },
-                mode: 'cors',
-                body: JSON.stringify({
-                    conversation_id: conversationId,
-                    audio: base64Audio
-                })
-            })
-                .then(response => response.json())
-                .then(data => {
-                    if (data.transcription) {
-                        // Supprimer le message temporaire
-                        chatMessages.removeChild(chatMessages.lastElementChild);
-
-                        // Ajouter un nouveau message avec la transcription et l'audio
-                        addUserMessage(data.transcription, null, audioUrl);
-                    }
+        // Créer URL pour l'audio
+        const audioUrl = URL.createObjectURL(audioBlob);
 
-                    // Slight delay before adding bot message
-                    setTimeout(() => {
-                        const speakingIndicator = addBotMessage(data.message);
-                        speakText(data.message, speakingIndicator);
-                    }, 500);
+        // Ajouter un message temporaire en attendant la transcription
+        addUserMessage('<div class="line_emoji">🎤 Message vocal envoyé</div>', null, audioUrl);
 
-                    // Activate PDF generation if conversation is finished
-                    if (data.is_final) {
-                        conversationFinished = true;
-                        generatePdfButton.disabled = false;
-                    }
-                })
-                .catch(error => {
-                    console.error('Error sending audio message:', error);
-                    addBotMessage('Erreur lors de l\'envoi du message audio. Veuillez réessayer.');
-                });
-        };
+        // Enregistrement envoyé tel quel (corps binaire, sans conversion en base64)
+        const url = `${API_BASE_URL}/process-audio?conversation_id=${encodeURIComponent(conversationId)}`;
+        fetch(url, {
+            method: 'POST',
+            headers: {
+                'Content-Type': audioBlob.type || 'application/octet-stream',
+                'Accept': 'application/json'
+            },
+            mode: 'cors',
+            body: audioBlob
+        })
+            .then(response => response.json())
+            .then(data => {
+                if (data.transcription) {
+                    // Supprimer le message temporaire
+                    chatMessages.removeChild(chatMessages.lastElementChild);
+
+                    // Ajouter un nouveau message avec la transcription et l'audio
+                    addUserMessage(data.transcription, null, audioUrl);
+                }
+
+                // Slight delay before adding bot message
+                setTimeout(() => {
+                    const speakingIndicator = addBotMessage(data.message);
+                    speakText(data.message, speakingIndicator);
+                }, 500);
+
+                // Activate PDF generation if conversation is finished
+                if (data.is_final) {
+                    conversationFinished = true;
+                    generatePdfButton.disabled = false;
+                }
+            })
+            .catch(error => {
+                console.error('Error sending audio message:', error);
+                addBotMessage('Erreur lors de l\'envoi du message audio. Veuillez réessayer.');
+            });
     }
 
     // Mettre à jour cette fonction pour afficher correctement les messages audio
@@ -412,96 +464,113 @@ document.addEventListener('DOMContentLoaded', function () {
             return;
         }
 
-        const reader = new FileReader();
-        reader.readAsDataURL(audioBlob);
-        reader.onloadend = () => {
-            // Format base64: data:audio/wav;base64,XXXXXX
-            const base64Audio = reader.result.split(',')[1];
-
-            // Créer URL pour l'audio
-            const audioUrl = URL.createObjectURL(audioBlob);
-
-            // Ajouter un message temporaire en attendant la transcription
-            addUserMessage('🎤 Message vocal envoyé', null, audioUrl);
-
-            fetch(`${API_BASE_URL}/process-audio`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                    'Accept': 'application/json'
-                },
-                mode: 'cors',
-                body: JSON.stringify({
-                    conversation_id: conversationId,
-                    audio: base64Audio
-                })
+        // Créer URL pour l'audio
+        const audioUrl = URL.createObjectURL(audioBlob);
+
+        // Ajouter un message temporaire en attendant la transcription
+        addUserMessage('🎤 Message vocal envoyé', null, audioUrl);
+
+        const turnId = nextTurnId();
+
+        // Canal ouvert : la transcription puis la réponse arrivent par onmessage
+        if (channel) {
+            pendingAudioUrl = audioUrl;
+            channelTurns.set(turnId, { audioBlob: audioBlob, audioUrl: audioUrl });
+            channel.send(JSON.stringify({ type: 'audio', id: turnId }));
+            channel.send(audioBlob);
+            return;
+        }
+
+        postAudio(audioBlob, audioUrl, turnId);
+    }
+
+    // Message vocal envoyé par requête HTTP
+    function postAudio(audioBlob, audioUrl, turnId) {
+        // Enregistrement envoyé tel quel (corps binaire, sans conversion en base64)
+        const url = `${API_BASE_URL}/process-audio?conversation_id=${encodeURIComponent(conversationId)}`;
+        fetch(url, {
+            method: 'POST',
+            headers: {
+                'Content-Type': audioBlob.type || 'application/octet-stream',
+                'Accept': 'application/json',
+                'Idempotency-Key': turnId
+            },
+            mode: 'cors',
+            body: audioBlob
+        })
+            .then(response => response.json())
+            .then(data => {
+                console.log("Réponse complète du service audio:", data); // Debug
+
+                showTranscription(data.transcription, audioUrl);
+
+                // Slight delay before adding bot message
+                setTimeout(() => showReply(data), 500);
             })
-                .then(response => response.json())
-                .then(data => {
-                    console.log("Réponse complète du service audio:", data); // Debug
-
-                    // Vérifier explicitement si la transcription existe
-                    if (data.transcription && data.transcription.trim() !== '') {
-                        console.log("Transcription reçue:", data.transcription);
-
-                        // Supprimer le message temporaire
-                        while (chatMessages.lastChild) {
-                            chatMessages.removeChild(chatMessages.lastChild);
-                            break; // Ne supprime que le dernier enfant
-                        }
-
-                        // Ajouter le message utilisateur avec la transcription
-                        const messageContainer = document.createElement('div');
-                        messageContainer.classList.add('message-container', 'user-container');
-
-                        // Message principal
-                        const messageDiv = document.createElement('div');
-                        messageDiv.classList.add('message', 'user-message');
-                        messageDiv.textContent = data.transcription;
-                        messageContainer.appendChild(messageDiv);
-
-                        // Ajouter le conteneur de message au chat
-                        chatMessages.appendChild(messageContainer);
-
-                        // Ajouter le lecteur audio dans un conteneur séparé si nécessaire
-                        if (audioUrl) {
-                            const audioContainer = document.createElement('div');
-                            audioContainer.classList.add('audio-message-container');
-                            // Ajout du lecteur audio ici (code du lecteur audio)
-                            // ...
-
-                            // Appliquer le style au conteneur audio
-                            audioContainer.style.marginLeft = 'auto';
-                            audioContainer.style.marginTop = '5px';
-
-                            chatMessages.appendChild(audioContainer);
-                        }
-
-                        // Faire défiler vers le bas
-                        chatMessages.scrollTop = chatMessages.scrollHeight;
-                    } else {
-                        console.log("Aucune transcription reçue ou transcription vide");
-                    }
+            .catch(error => {
+                console.error('Error sending audio message:', error);
+                addBotMessage('Erreur lors de l\'envoi du message audio. Veuillez réessayer.');
+            });
+    }
 
-                    // Slight delay before adding bot message
-                    setTimeout(() => {
-                        const speakingIndicator = addBotMessage(data.message);
-                        speakText(data.message, speakingIndicator);
-                    }, 500);
-
-                    // Activate PDF generation if conversation is finished
-                    if (data.is_final) {
-                        conversationFinished = true;
-                        if (generatePdfButton) {
-                            generatePdfButton.disabled = false;
-                        }
-                    }
-                })
-                .catch(error => {
-                    console.error('Error sending audio message:', error);
-                    addBotMessage('Erreur lors de l\'envoi du message audio. Veuillez réessayer.');
-                });
-        };
+    // Remplacer le message temporaire par la transcription du message vocal
+    function showTranscription(transcription, audioUrl) {
+        // Vérifier explicitement si la transcription existe
+        if (transcription && transcription.trim() !== '') {
+            console.log("Transcription reçue:", transcription);
+
+            // Supprimer le message temporaire
+            while (chatMessages.lastChild) {
+                chatMessages.removeChild(chatMessages.lastChild);
+                break; // Ne supprime que le dernier enfant
+            }
+
+            // Ajouter le message utilisateur avec la transcription
+            const messageContainer = document.createElement('div');
+            messageContainer.classList.add('message-container', 'user-container');
+
+            // Message principal
+            const messageDiv = document.createElement('div');
+            messageDiv.classList.add('message', 'user-message');
+            messageDiv.textContent = transcription;
+            messageContainer.appendChild(messageDiv);
+
+            // Ajouter le conteneur de message au chat
+            chatMessages.appendChild(messageContainer);
+
+            // Ajouter le lecteur audio dans un conteneur séparé si nécessaire
+            if (audioUrl) {
+                const audioContainer = document.createElement('div');
+                audioContainer.classList.add('audio-message-container');
+                // Ajout du lecteur audio ici (code du lecteur audio)
+                // ...
+
+                // Appliquer le style au conteneur audio
+                audioContainer.style.marginLeft = 'auto';
+                audioContainer.style.marginTop = '5px';
+
+                chatMessages.appendChild(audioContainer);
+            }
+
+            // Faire défiler vers le bas
+            chatMessages.scrollTop = chatMessages.scrollHeight;
+        } else {
+            console.log("Aucune transcription reçue ou transcription vide");
+        }
+    }
+
+    // Afficher et lire la réponse du bot
+    function showReply(data) {
+        const speakingIndicator = addBotMessage(data.message);
+        speakText(data.message, speakingIndicator);
+
+        // Activate PDF generation if conversation is finished
+        if (data.is_final) {
+            conversationFinished = true;
+            if (generatePdfButton) {
+                generatePdfButton.disabled = false;
+            }
+        }
     }
 
     // Add Bot Message
@@ -636,11 +705,26 @@ document.addEventListener('DOMContentLoaded', function () {
             return;
         }
 
+        const turnId = nextTurnId();
+
+        // Canal ouvert : la réponse arrive par onmessage
+        if (channel) {
+            channelTurns.set(turnId, { text: text });
+            channel.send(JSON.stringify({ type: 'text', text: text, id: turnId }));
+            return;
+        }
+
+        postText(text, turnId);
+    }
+
+    // Message texte envoyé par requête HTTP
+    function postText(text, turnId) {
         fetch(`${API_BASE_URL}/process`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
-                'Accept': 'application/json'
+                'Accept': 'application/json',
+                'Idempotency-Key': turnId
             },
             mode: 'cors',
             body: JSON.stringify({